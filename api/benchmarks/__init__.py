@@ -0,0 +1 @@
+"""Offline, CPU-only benchmarks for clipizy's analysis and rendering code"""
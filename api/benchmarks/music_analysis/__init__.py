@@ -0,0 +1,22 @@
+"""Music analysis benchmark: synthetic ground-truth audio, per-stage timing, peak RSS and accuracy"""
+from .engines import compare_engines
+from .harness import compare_reports, run_case, run_suite, write_report
+from .metrics import beat_scores, boundary_scores, tempo_scores
+from .synthetic import GroundTruth, SyntheticSpec, default_specs, generate_blocks, ground_truth, write_track
+
+__all__ = [
+    "SyntheticSpec",
+    "GroundTruth",
+    "default_specs",
+    "generate_blocks",
+    "ground_truth",
+    "write_track",
+    "tempo_scores",
+    "beat_scores",
+    "boundary_scores",
+    "run_case",
+    "run_suite",
+    "write_report",
+    "compare_reports",
+    "compare_engines",
+]
@@ -0,0 +1,57 @@
+"""
+Run the music analysis benchmark
+
+    python -m api.benchmarks.music_analysis --out report.json
+    python -m api.benchmarks.music_analysis --durations 30,600,3600 --baseline old.json
+    python -m api.benchmarks.music_analysis --compare-engines
+
+Runs offline on CPU; synthetic audio is regenerated deterministically (or
+reused from --audio-dir).
+"""
+import argparse
+import json
+import sys
+import tempfile
+
+from .engines import compare_engines, engine_summary_lines
+from .harness import _rounded, compare_reports, run_suite, write_report
+from .synthetic import default_specs
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the music analyzer on synthetic ground-truth audio")
+    parser.add_argument("--durations", default="30,120,300,600",
+                        help="comma-separated track durations in seconds (default: 30,120,300,600)")
+    parser.add_argument("--repeats", type=int, default=1, help="fresh-process runs per case; the fastest is kept")
+    parser.add_argument("--audio-dir", default=None, help="keep generated audio here and reuse it across runs")
+    parser.add_argument("--no-end-to-end", action="store_true", help="skip the analyze_audio_bytes end-to-end run")
+    parser.add_argument("--compare-engines", action="store_true",
+                        help="also compare import time, latency and accuracy of the lite and librosa analyzers")
+    parser.add_argument("--out", default="music_analysis_benchmark.json", help="JSON report path")
+    parser.add_argument("--baseline", default=None, help="earlier report to compare against")
+    args = parser.parse_args(argv)
+
+    specs = default_specs([float(d) for d in args.durations.split(",") if d.strip()])
+    print(f"🧪 ===== MUSIC ANALYSIS BENCHMARK ({len(specs)} cases) =====")
+    report = run_suite(specs, audio_dir=args.audio_dir, repeats=args.repeats, end_to_end=not args.no_end_to_end)
+    if args.compare_engines:
+        print("⚖️ Comparing lite and librosa analyzers")
+        with tempfile.TemporaryDirectory() as tmp:
+            comparison = [compare_engines(spec, args.audio_dir or tmp) for spec in specs]
+        report["engine_comparison"] = _rounded(comparison)
+        for line in engine_summary_lines(comparison):
+            print(line)
+    write_report(report, args.out)
+    print(f"✅ Report written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"📊 Compared with {args.baseline}")
+        for line in compare_reports(baseline, report):
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Lite vs librosa analyzer comparison
+
+For each engine, a fresh spawned process measures:
+- the import time of the analyzer module;
+- the latency of the first (cold) analyze_audio_bytes call, which includes
+  numba compilation on the librosa path;
+- the latency of a second (warm) call;
+- peak RSS.
+Accuracy is scored on the warm result against the synthetic ground truth.
+"""
+import os
+import sys
+import time
+from dataclasses import asdict
+from typing import Any, Dict, List
+
+from .harness import _in_fresh_process, peak_rss_mb
+from .metrics import beat_scores, boundary_scores, tempo_scores
+from .synthetic import SyntheticSpec, ground_truth, write_track
+
+ENGINES = {"full": "music_analyzer", "lite": "lite_analyzer"}
+ANALYZER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'workflows', 'analyzer')
+
+
+def _engine_run(module_name: str, path: str) -> Dict[str, Any]:
+    """Worker: import one analyzer module and analyze the same bytes cold, then warm"""
+    sys.path.insert(0, ANALYZER_DIR)
+    started = time.perf_counter()
+    analyzer = __import__(module_name)
+    import_seconds = time.perf_counter() - started
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    timings = []
+    for _ in range(2):
+        started = time.perf_counter()
+        result = analyzer.analyze_audio_bytes(data, create_plot=False, min_gap_seconds=11.0)
+        timings.append(time.perf_counter() - started)
+    return {
+        "import_seconds": import_seconds,
+        "cold_seconds": timings[0],
+        "warm_seconds": timings[1],
+        "peak_rss_mb": peak_rss_mb(),
+        "tempo": float(result["tempo"]),
+        "beat_times": [float(t) for t in result["beat_times_sec"]],
+        "segments_sec": [float(t) for t in result["segments_sec"]],
+    }
+
+
+def compare_engines(spec: SyntheticSpec, audio_dir: str) -> Dict[str, Any]:
+    path = write_track(spec, audio_dir)
+    truth = ground_truth(spec)
+    engines = {}
+    for engine, module_name in ENGINES.items():
+        run = _in_fresh_process(_engine_run, module_name, path)
+        engines[engine] = {
+            "import_seconds": run["import_seconds"],
+            "cold_seconds": run["cold_seconds"],
+            "warm_seconds": run["warm_seconds"],
+            "cold_start_seconds": run["import_seconds"] + run["cold_seconds"],
+            "peak_rss_mb": run["peak_rss_mb"],
+            "accuracy": {
+                "tempo": tempo_scores(run["tempo"], truth.bpm),
+                "beats": beat_scores(truth.beat_times, run["beat_times"]),
+                "boundaries": boundary_scores(truth.boundaries, run["segments_sec"], spec.duration),
+            },
+            "estimated_boundaries": run["segments_sec"],
+        }
+    return {"name": spec.name, "spec": asdict(spec), "engines": engines}
+
+
+def engine_summary_lines(comparison: List[Dict[str, Any]]) -> List[str]:
+    lines = []
+    for case in comparison:
+        lines.append(case["name"])
+        for engine, r in case["engines"].items():
+            accuracy = r["accuracy"]
+            lines.append(
+                f"  {engine:<5} import {r['import_seconds']:6.2f}s  cold {r['cold_seconds']:6.2f}s  "
+                f"warm {r['warm_seconds']:6.2f}s  peak {r['peak_rss_mb']:5.0f}MB  "
+                f"tempo err {accuracy['tempo']['relative_error']:.3f}  beat F {accuracy['beats']['f_measure']:.3f}  "
+                f"boundary F@3s {accuracy['boundaries']['window_3s']['f_measure']:.2f}"
+            )
+    return lines
@@ -0,0 +1,259 @@
+"""
+Stage-by-stage timing, peak RSS and accuracy for the music analyzer
+
+Every measurement runs in a fresh spawned process so peak RSS belongs to one
+case only. Each process is warmed up on a short signal first, like an
+analysis worker, so JIT compilation is not timed. The staged run mirrors
+MusicAnalyzerService._analyze_music_comprehensive (decode, resample, beat
+tracking, change points, features, descriptors); the end-to-end run times
+analyze_audio_bytes from encoded bytes.
+"""
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional
+
+# Benchmarks measure analysis, not the result cache; the services import needs some database URL
+os.environ.setdefault("ANALYSIS_CACHE_ENABLED", "false")
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "clipizy_benchmark.db"))
+
+from .metrics import beat_scores, boundary_scores, tempo_scores
+from .synthetic import SyntheticSpec, ground_truth, write_track
+
+REPORT_SCHEMA = 1
+STAGES = ("decode", "resample", "beat_tracking", "change_points", "features", "descriptors")
+SEGMENTATION_PARAMS = dict(use_beat_energy=True, short_ma_beats=4, long_ma_beats=16, min_gap_seconds=11.0)
+
+
+def peak_rss_mb() -> float:
+    """High-water resident set size of this process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def _warm_up(analyzer) -> None:
+    """Touch resampling, beat tracking and the feature path once, as a warm analysis worker would have"""
+    import numpy as np
+    y = 0.1 * np.random.default_rng(0).standard_normal(44100 * 2).astype(np.float32)
+    ctx = analyzer.AudioContext(y, 44100)
+    ctx.y, ctx.beat_times
+    ctx.summary_features()
+
+
+class _StageTimer:
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.rss_mb: Dict[str, float] = {}
+
+    def run(self, stage: str, fn: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        value = fn()
+        self.seconds[stage] = time.perf_counter() - started
+        self.rss_mb[stage] = peak_rss_mb()
+        return value
+
+
+def _staged_analysis(path: str) -> Dict[str, Any]:
+    """Worker: the comprehensive analysis pipeline with a timer around each stage"""
+    baseline_rss = peak_rss_mb()
+    from api.services.media.music_analyzer_service import (
+        MusicAnalyzerService, _load_music_analyzer, load_audio_context,
+    )
+    analyzer = _load_music_analyzer()
+    service = MusicAnalyzerService()
+    theory = service.theory_categorizer
+    _warm_up(analyzer)
+    imported_rss = peak_rss_mb()
+
+    timer = _StageTimer()
+
+    def decode():
+        with open(path, 'rb') as f:
+            return load_audio_context(path, f.read())
+
+    ctx = timer.run("decode", decode)
+    timer.run("resample", lambda: ctx.y)
+    timer.run("beat_tracking", lambda: ctx.beat_times)
+    result = timer.run("change_points", lambda: analyzer.analyze_audio_bytes(
+        data=ctx, create_plot=False, audio_file=os.path.basename(path), **SEGMENTATION_PARAMS))
+
+    segments_sec = result.get('segments_sec', [])
+    bounds = [(a, b) for a, b in zip(segments_sec[:-1], segments_sec[1:]) if b > a]
+
+    def features():
+        metadata = theory.extract_metadata(path, ctx)
+        track = theory.analyze_audio_features(ctx)
+        peaks = service.peak_detector.detect_music_peaks(ctx)
+        segments = [theory.analyze_segment_features(ctx, a, b) for a, b in bounds]
+        return metadata, track, peaks, segments
+
+    metadata, track_features, _, segment_features = timer.run("features", features)
+
+    def descriptors():
+        genre_scores = theory.calculate_genre_scores(track_features, metadata)
+        return genre_scores, [service.simple_analyzer.generate_music_descriptors(f) for f in segment_features if f]
+
+    timer.run("descriptors", descriptors)
+
+    return {
+        "stages": timer.seconds,
+        "stage_peak_rss_mb": timer.rss_mb,
+        "baseline_rss_mb": baseline_rss,
+        "imported_rss_mb": imported_rss,
+        "peak_rss_mb": peak_rss_mb(),
+        "tempo": float(result.get('tempo', 0.0)),
+        "beat_times": [float(t) for t in result.get('beat_times_sec', [])],
+        "segments_sec": [float(t) for t in segments_sec],
+    }
+
+
+def _end_to_end_analysis(path: str) -> Dict[str, Any]:
+    """Worker: analyze_audio_bytes from encoded bytes, as the segmentation API calls it"""
+    from api.services.media.music_analyzer_service import _load_music_analyzer
+    analyzer = _load_music_analyzer()
+    _warm_up(analyzer)
+    imported_rss = peak_rss_mb()
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    started = time.perf_counter()
+    analyzer.analyze_audio_bytes(data=data, create_plot=False, **SEGMENTATION_PARAMS)
+    return {
+        "seconds": time.perf_counter() - started,
+        "imported_rss_mb": imported_rss,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _in_fresh_process(fn: Callable[..., Dict[str, Any]], *args) -> Dict[str, Any]:
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def _best_of(fn: Callable[..., Dict[str, Any]], path: str, repeats: int, key: Callable[[Dict], float]):
+    runs = [_in_fresh_process(fn, path) for _ in range(max(1, repeats))]
+    return min(runs, key=key)
+
+
+def run_case(spec: SyntheticSpec, audio_dir: str, repeats: int = 1, end_to_end: bool = True) -> Dict[str, Any]:
+    """Benchmark one synthetic track: timings, memory and accuracy"""
+    path = write_track(spec, audio_dir)
+    truth = ground_truth(spec)
+
+    staged = _best_of(_staged_analysis, path, repeats, key=lambda r: sum(r["stages"].values()))
+    total = sum(staged["stages"].values())
+    case = {
+        "name": spec.name,
+        "spec": asdict(spec),
+        "ground_truth": {"bpm": truth.bpm, "n_beats": len(truth.beat_times), "boundaries": truth.boundaries},
+        "stages": staged["stages"],
+        "stage_peak_rss_mb": staged["stage_peak_rss_mb"],
+        "total_seconds": total,
+        "realtime_factor": spec.duration / total if total > 0 else None,
+        "baseline_rss_mb": staged["baseline_rss_mb"],
+        "imported_rss_mb": staged["imported_rss_mb"],
+        "peak_rss_mb": staged["peak_rss_mb"],
+        "accuracy": {
+            "tempo": tempo_scores(staged["tempo"], truth.bpm),
+            "beats": beat_scores(truth.beat_times, staged["beat_times"]),
+            "boundaries": boundary_scores(truth.boundaries, staged["segments_sec"], spec.duration),
+        },
+        "estimated_boundaries": staged["segments_sec"],
+    }
+    if end_to_end:
+        case["end_to_end"] = {
+            "analyze_audio_bytes": _best_of(_end_to_end_analysis, path, repeats, key=lambda r: r["seconds"]),
+        }
+    return case
+
+
+def environment() -> Dict[str, Any]:
+    versions = {}
+    for module in ("numpy", "scipy", "librosa", "soundfile", "soxr", "ruptures", "numba"):
+        try:
+            versions[module] = __import__(module).__version__
+        except Exception:
+            versions[module] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "versions": versions,
+    }
+
+
+def _rounded(value: Any, digits: int = 4) -> Any:
+    """Round floats so reports diff cleanly between runs"""
+    if isinstance(value, float):
+        return round(value, digits)
+    if isinstance(value, dict):
+        return {k: _rounded(v, digits) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_rounded(v, digits) for v in value]
+    return value
+
+
+def run_suite(specs: List[SyntheticSpec], audio_dir: Optional[str] = None, repeats: int = 1,
+              end_to_end: bool = True, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """Run every case and return the JSON-serializable report"""
+    cases = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for spec in specs:
+            log(f"🎵 {spec.name}")
+            case = run_case(spec, audio_dir or tmp, repeats=repeats, end_to_end=end_to_end)
+            accuracy = case["accuracy"]
+            log(f"   {case['total_seconds']:.2f}s total ({case['realtime_factor']:.0f}x realtime), "
+                f"peak {case['peak_rss_mb']:.0f}MB, tempo {accuracy['tempo']['estimated_bpm']:.1f}/{spec.bpm:g} BPM, "
+                f"boundary F@3s {accuracy['boundaries']['window_3s']['f_measure']:.2f}")
+            cases.append(case)
+    return _rounded({
+        "schema": REPORT_SCHEMA,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": environment(),
+        "cases": cases,
+    })
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Per-case stage time, memory and accuracy deltas between two reports"""
+    def change(old, new, unit):
+        if old is None or new is None:
+            return f"{new}{unit}"
+        pct = f" ({(new - old) / old * 100:+.0f}%)" if old else ""
+        return f"{old:.3f}{unit} -> {new:.3f}{unit}{pct}"
+
+    old_cases = {c["name"]: c for c in baseline.get("cases", [])}
+    lines = []
+    for case in current.get("cases", []):
+        old = old_cases.get(case["name"])
+        if old is None:
+            lines.append(f"{case['name']}: not in baseline")
+            continue
+        lines.append(case["name"])
+        for stage in STAGES:
+            lines.append(f"  {stage:<14} {change(old['stages'].get(stage), case['stages'].get(stage), 's')}")
+        lines.append(f"  {'total':<14} {change(old['total_seconds'], case['total_seconds'], 's')}")
+        lines.append(f"  {'peak_rss':<14} {change(old['peak_rss_mb'], case['peak_rss_mb'], 'MB')}")
+        for label, path in (("tempo_error", ("tempo", "relative_error")),
+                            ("beat_f", ("beats", "f_measure")),
+                            ("boundary_f3s", ("boundaries", "window_3s", "f_measure"))):
+            a, b = old["accuracy"], case["accuracy"]
+            for key in path:
+                a, b = a[key], b[key]
+            lines.append(f"  {label:<14} {a:.3f} -> {b:.3f}")
+    return lines
@@ -0,0 +1,70 @@
+"""
+Accuracy scores against synthetic ground truth
+
+Conventions follow mir_eval (without depending on it): boundaries within
+0.5 s of the track edges are ignored, hits are one-to-one matches within a
+tolerance window, and tempo is scored both strictly and up to octave errors.
+"""
+from typing import Dict, Iterable
+
+import numpy as np
+
+TEMPO_TOLERANCE = 0.04
+OCTAVE_FACTORS = (1.0 / 3.0, 0.5, 1.0, 2.0, 3.0)
+EDGE_TRIM = 0.5
+
+
+def tempo_scores(estimated: float, reference: float) -> Dict[str, float]:
+    """Relative tempo error plus strict (acc1) and octave-tolerant (acc2) accuracy"""
+    estimated, reference = float(estimated), float(reference)
+    relative = abs(estimated - reference) / reference
+    octave = min(abs(estimated - reference * f) / (reference * f) for f in OCTAVE_FACTORS)
+    return {
+        "estimated_bpm": estimated,
+        "reference_bpm": reference,
+        "relative_error": relative,
+        "acc1": float(relative <= TEMPO_TOLERANCE),
+        "acc2": float(octave <= TEMPO_TOLERANCE),
+    }
+
+
+def _match(reference: np.ndarray, estimated: np.ndarray, window: float) -> int:
+    """Size of a maximum one-to-one matching within ``window`` (both inputs sorted)"""
+    i = j = hits = 0
+    while i < len(reference) and j < len(estimated):
+        if abs(reference[i] - estimated[j]) <= window:
+            hits += 1
+            i += 1
+            j += 1
+        elif reference[i] < estimated[j]:
+            i += 1
+        else:
+            j += 1
+    return hits
+
+
+def f_measure(reference: Iterable[float], estimated: Iterable[float], window: float) -> Dict[str, float]:
+    reference = np.asarray(sorted(reference), dtype=float)
+    estimated = np.asarray(sorted(estimated), dtype=float)
+    hits = _match(reference, estimated, window)
+    precision = hits / len(estimated) if len(estimated) else float(not len(reference))
+    recall = hits / len(reference) if len(reference) else float(not len(estimated))
+    f = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f_measure": f}
+
+
+def boundary_scores(reference, estimated, duration: float) -> Dict[str, Dict[str, float]]:
+    """Boundary hit-rate F-measure at 0.5 s and 3 s; track start/end are not boundaries"""
+    trim = lambda times: [t for t in times if EDGE_TRIM < t < duration - EDGE_TRIM]
+    reference, estimated = trim(reference), trim(estimated)
+    return {
+        "window_0.5s": f_measure(reference, estimated, 0.5),
+        "window_3s": f_measure(reference, estimated, 3.0),
+        "n_reference": len(reference),
+        "n_estimated": len(estimated),
+    }
+
+
+def beat_scores(reference, estimated) -> Dict[str, float]:
+    """Beat F-measure with the usual ±70 ms window"""
+    return f_measure(reference, estimated, 0.07)
@@ -0,0 +1,179 @@
+"""
+Deterministic synthetic music with known ground truth
+
+Each track is a click track at a fixed BPM (accented downbeats) over a tonal
+pad and a noise bed. The pad chord, click timbre and bed level change at
+section boundaries that fall on bar lines, so tempo, beats and boundaries are
+known exactly. Audio is generated and written block by block, so hour-long
+tracks never sit in memory.
+"""
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import lfilter
+
+BLOCK_SECONDS = 10.0
+BEATS_PER_BAR = 4
+SECTION_BARS = (8, 12, 16)
+
+# Pad chords (Hz) cycled across sections; adjacent sections always differ
+CHORDS = (
+    (220.0, 277.18, 329.63),   # A major
+    (196.0, 246.94, 293.66),   # G major
+    (174.61, 220.0, 261.63),   # F major
+    (164.81, 207.65, 246.94),  # E major
+)
+
+
+@dataclass
+class SyntheticSpec:
+    """Parameters of a synthetic track; equal specs produce identical audio"""
+    duration: float = 120.0
+    bpm: float = 120.0
+    sr: int = 44100
+    noise_db: float = -30.0
+    seed: int = 0
+
+    @property
+    def name(self) -> str:
+        return f"click_{self.bpm:g}bpm_{self.duration:g}s_noise{self.noise_db:g}dB_seed{self.seed}"
+
+    def digest(self) -> str:
+        payload = json.dumps(asdict(self), sort_keys=True).encode()
+        return hashlib.sha256(payload).hexdigest()[:16]
+
+
+@dataclass
+class GroundTruth:
+    """What the analyzer should find in a synthetic track"""
+    bpm: float
+    duration: float
+    beat_times: List[float] = field(default_factory=list)
+    boundaries: List[float] = field(default_factory=list)
+
+
+@dataclass
+class _Section:
+    start: float
+    end: float
+    chord: tuple
+    pad_gain: float
+    click_gain: float
+    click_decay: float
+    bed_gain: float
+
+
+def _plan_sections(spec: SyntheticSpec, rng: np.random.Generator) -> List[_Section]:
+    """Split the track into bar-aligned sections with distinct levels and timbres"""
+    bar = BEATS_PER_BAR * 60.0 / spec.bpm
+    bed = 10.0 ** (spec.noise_db / 20.0)
+    sections, start, chord_index = [], 0.0, 0
+    while start < spec.duration:
+        end = min(spec.duration, start + int(rng.choice(SECTION_BARS)) * bar)
+        # Swallow a runt final section into its predecessor
+        if spec.duration - end < 4 * bar:
+            end = spec.duration
+        loud = bool(len(sections) % 2)
+        sections.append(_Section(
+            start=start,
+            end=end,
+            chord=CHORDS[chord_index % len(CHORDS)],
+            pad_gain=float(rng.uniform(0.25, 0.35) if loud else rng.uniform(0.06, 0.1)),
+            click_gain=float(rng.uniform(0.6, 0.8) if loud else rng.uniform(0.25, 0.35)),
+            click_decay=float(rng.uniform(0.004, 0.008) if loud else rng.uniform(0.015, 0.025)),
+            bed_gain=float(bed * (2.0 if loud else 1.0)),
+        ))
+        chord_index += 1 + int(rng.integers(0, len(CHORDS) - 1))
+        start = end
+    return sections
+
+
+def ground_truth(spec: SyntheticSpec) -> GroundTruth:
+    rng = np.random.default_rng(spec.seed)
+    sections = _plan_sections(spec, rng)
+    period = 60.0 / spec.bpm
+    return GroundTruth(
+        bpm=spec.bpm,
+        duration=spec.duration,
+        beat_times=[float(t) for t in np.arange(0.0, spec.duration, period)],
+        boundaries=[s.start for s in sections[1:]],
+    )
+
+
+def generate_blocks(spec: SyntheticSpec, block_seconds: float = BLOCK_SECONDS):
+    """Yield the track as float32 mono blocks of ``block_seconds``"""
+    rng = np.random.default_rng(spec.seed)
+    sections = _plan_sections(spec, rng)
+    noise_rng = np.random.default_rng(spec.seed + 1)
+
+    sr = spec.sr
+    total = int(round(spec.duration * sr))
+    block = int(block_seconds * sr)
+    period = 60.0 / spec.bpm
+    click_len = int(0.08 * sr)
+    click_noise = np.random.default_rng(spec.seed + 2).standard_normal(click_len).astype(np.float32)
+    click_t = np.arange(click_len) / sr
+    section_starts = np.array([s.start for s in sections])
+
+    # One-pole lowpass state keeps the noise bed continuous across blocks
+    bed_state = np.zeros(1)
+    for offset in range(0, total, block):
+        n = min(block, total - offset)
+        t = (offset + np.arange(n)) / sr
+        which = np.searchsorted(section_starts, t, side='right') - 1
+        x = np.zeros(n, dtype=np.float64)
+
+        for index in np.unique(which):
+            s = sections[index]
+            mask = which == index
+            ts = t[mask]
+            pad = sum(np.sin(2 * np.pi * f * ts) for f in s.chord) / len(s.chord)
+            x[mask] += s.pad_gain * pad
+
+            white = noise_rng.standard_normal(int(mask.sum()))
+            bed, bed_state = lfilter([0.1], [1.0, -0.9], white, zi=bed_state)
+            x[mask] += s.bed_gain * bed
+
+        # Clicks: every beat, accented on the downbeat, shaped by the section's decay
+        first_beat = int(np.ceil((offset / sr - 0.08) / period))
+        last_beat = int(np.floor((offset + n - 1) / sr / period))
+        for k in range(max(0, first_beat), last_beat + 1):
+            onset = k * period
+            s = sections[min(len(sections) - 1, int(np.searchsorted(section_starts, onset, side='right') - 1))]
+            env = np.exp(-click_t / s.click_decay)
+            burst = s.click_gain * (1.5 if k % BEATS_PER_BAR == 0 else 1.0) * env * click_noise
+            i0 = int(round(onset * sr)) - offset
+            a, b = max(0, i0), min(n, i0 + click_len)
+            if a < b:
+                x[a:b] += burst[a - i0:b - i0]
+
+        yield np.clip(0.5 * x, -1.0, 1.0).astype(np.float32)
+
+
+def write_track(spec: SyntheticSpec, directory: str, subtype: str = 'PCM_16') -> str:
+    """Write the track as WAV (reused if an identical spec was written before)"""
+    path = os.path.join(directory, f"{spec.name}_{spec.digest()}.wav")
+    if os.path.exists(path):
+        return path
+    os.makedirs(directory, exist_ok=True)
+    partial = path + ".partial"
+    with sf.SoundFile(partial, 'w', samplerate=spec.sr, channels=1, subtype=subtype, format='WAV') as f:
+        for block in generate_blocks(spec):
+            f.write(block)
+    os.replace(partial, path)
+    return path
+
+
+def default_specs(durations: Optional[List[float]] = None) -> List[SyntheticSpec]:
+    """The standard suite: several tempi per duration, from 30 s up to an hour"""
+    durations = durations or [30.0, 120.0, 300.0, 600.0]
+    tempi = (90.0, 120.0, 128.0, 174.0)
+    return [
+        SyntheticSpec(duration=d, bpm=tempi[i % len(tempi)], seed=i)
+        for i, d in enumerate(durations)
+    ]
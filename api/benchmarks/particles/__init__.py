@@ -0,0 +1,24 @@
+"""Particle engine benchmark: numpy struct-of-arrays kernels against the list-of-dicts engine"""
+from .harness import (
+    random_discs,
+    run_case,
+    run_interaction_cases,
+    run_raster_cases,
+    run_suite,
+    speedups,
+    synthetic_bass,
+    write_report,
+)
+from .legacy import DictParticleSystem
+
+__all__ = [
+    "DictParticleSystem",
+    "synthetic_bass",
+    "run_case",
+    "random_discs",
+    "run_raster_cases",
+    "run_interaction_cases",
+    "run_suite",
+    "speedups",
+    "write_report",
+]
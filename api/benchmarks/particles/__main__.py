@@ -0,0 +1,63 @@
+"""
+Run the particle engine benchmark
+
+    python -m api.benchmarks.particles --out report.json
+    python -m api.benchmarks.particles --types snow,enhanced --counts 1000,10000 --engines numpy
+    python -m api.benchmarks.particles --types "" --raster-counts 10000,100000 --blends over,max
+    python -m api.benchmarks.particles --types "" --raster-counts "" --interaction-counts 1000,10000,50000
+
+Runs offline on CPU; the bass series is synthetic and every case is seeded.
+"""
+import argparse
+import sys
+
+from .harness import (
+    BLEND_MODES,
+    DEFAULT_COUNTS,
+    DEFAULT_INTERACTION_COUNTS,
+    DEFAULT_RASTER_COUNTS,
+    DEFAULT_TYPES,
+    ENGINES,
+    INTERACTIONS,
+    run_suite,
+    write_report,
+)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the particle engines at increasing particle counts")
+    parser.add_argument("--types", default=",".join(DEFAULT_TYPES), help="comma-separated particle types")
+    parser.add_argument("--counts", default=",".join(map(str, DEFAULT_COUNTS)),
+                        help="comma-separated particle counts (default: 100,1000,10000)")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="comma-separated engines: dict, numpy")
+    parser.add_argument("--raster-counts", default=",".join(map(str, DEFAULT_RASTER_COUNTS)),
+                        help="comma-separated disc counts of the draw-only cases (empty to skip)")
+    parser.add_argument("--blends", default=",".join(BLEND_MODES), help="comma-separated rasterizer blend modes")
+    parser.add_argument("--interaction-counts", default=",".join(map(str, DEFAULT_INTERACTION_COUNTS)),
+                        help="comma-separated particle counts of the pairwise interaction cases")
+    parser.add_argument("--interactions", default=",".join(INTERACTIONS),
+                        help="comma-separated interactions: repel, collide, flock (empty to skip)")
+    parser.add_argument("--frames", type=int, default=120, help="timed frames per case")
+    parser.add_argument("--fps", type=int, default=60, help="target frame rate for the realtime factor")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--out", default="particle_benchmark.json", help="JSON report path")
+    args = parser.parse_args(argv)
+
+    split = lambda value: [item.strip() for item in value.split(",") if item.strip()]
+    print("🧪 ===== PARTICLE ENGINE BENCHMARK =====")
+    report = run_suite(split(args.types), [int(c) for c in split(args.counts)], split(args.engines),
+                       frames=args.frames, fps=args.fps, width=args.width, height=args.height,
+                       raster_counts=[int(c) for c in split(args.raster_counts)], blends=split(args.blends),
+                       interaction_counts=[int(c) for c in split(args.interaction_counts)],
+                       interactions=split(args.interactions))
+    for row in report["speedups"]:
+        print(f"⚡ {row['particle_type']:<20} {row['particle_count']:>6}: simulate {row['simulate']:6.1f}x, "
+              f"simulate + draw {row['frame']:6.1f}x")
+    write_report(report, args.out)
+    print(f"✅ Report written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
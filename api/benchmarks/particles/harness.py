@@ -0,0 +1,256 @@
+"""
+Per-frame simulation and draw timing of the particle engines
+
+Each case steps one particle type at one particle count through a synthetic
+bass series and times the update kernels and the particle drawing
+separately, on a full-size frame. Raster cases time drawing alone: random
+discs drawn with one cv2.circle call each against the batched
+DiscRasterizer in every blend mode, with the mean pixel difference from the
+cv2 frame. Interaction cases time the spatial-hash pairwise stage alone at a
+fixed particle density (the field grows with the count), so its time per
+particle should stay flat as the count grows. The realtime factor compares one frame's
+simulate + draw time with the frame budget at the target fps. Encoding is
+not included: it is the same for both engines and render metrics report it.
+The continuous-spawning type starts filled to its particle count, so every
+type runs at the requested population.
+"""
+import json
+import os
+import platform
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+from api.workflows.generator.particle_engine import ParticleArrays
+from api.workflows.generator.particle_grid import INTERACTIONS, interact
+from api.workflows.generator.particle_raster import BLEND_MODES, DiscRasterizer
+from api.workflows.generator.particles.unified_particle_system import (
+    ParticleConfig,
+    ParticleType,
+    UnifiedParticleSystem,
+)
+
+from .legacy import DictParticleSystem
+
+REPORT_SCHEMA = 1
+ENGINES = {"dict": DictParticleSystem, "numpy": UnifiedParticleSystem}
+DEFAULT_TYPES = ("snow", "enhanced", "bouncing", "zen", "continuous_spawning")
+DEFAULT_COUNTS = (100, 1000, 10000)
+DEFAULT_RASTER_COUNTS = (10000, 50000, 100000)
+DEFAULT_INTERACTION_COUNTS = (1000, 5000, 10000, 50000)
+INTERACTION_AREA = 400.0  # square pixels per particle: 1080p holds ~5000 particles at this density
+
+
+def synthetic_bass(frames: int, fps: float, seed: int = 0) -> np.ndarray:
+    """Kick-like bass envelope: decaying pulses at 2 Hz plus noise, in [0, 1]"""
+    t = np.arange(frames) / fps
+    pulses = np.exp(-8.0 * np.mod(t, 0.5))
+    noise = 0.1 * np.random.default_rng(seed).random(frames)
+    return np.clip(0.85 * pulses + noise, 0.0, 1.0).astype(np.float32)
+
+
+def build_system(engine: str, particle_type: str, count: int, frames: int, fps: int = 60,
+                 width: int = 1920, height: int = 1080, seed: int = 0) -> UnifiedParticleSystem:
+    """A system of the given engine with `count` particles and the synthetic bass loaded"""
+    config = ParticleConfig(width=width, height=height, fps=fps, particle_count=count, max_particles=count,
+                            duration=frames / fps, seed=seed)
+    np.random.seed(seed)  # the dict engine draws from the global generator
+    system = ENGINES[engine](ParticleType(particle_type), config)
+    if system.particle_type == ParticleType.CONTINUOUS_SPAWNING:
+        if engine == "dict":
+            system.particles = [system._spawn_continuous_particle() for _ in range(count)]
+        else:
+            system.particles.extend(**system._spawn_continuous_particles(count))
+    system.bass_frequencies = synthetic_bass(frames, fps, seed)
+    return system
+
+
+def run_case(particle_type: str, count: int, engine: str, frames: int = 120, fps: int = 60,
+             width: int = 1920, height: int = 1080, seed: int = 0) -> Dict[str, Any]:
+    system = build_system(engine, particle_type, count, frames, fps, width, height, seed)
+    black = np.zeros((height, width, 3), dtype=np.uint8)
+    system._update_particles(0.0, 0)  # warm-up frame, not timed
+    system._draw_particles(black.copy())
+
+    simulate = draw = 0.0
+    for i in range(1, frames + 1):
+        started = time.perf_counter()
+        system._update_particles(i / fps, i % frames)
+        drawn = time.perf_counter()
+        system._draw_particles(black.copy())
+        simulate += drawn - started
+        draw += time.perf_counter() - drawn
+
+    frame_ms = 1000.0 * (simulate + draw) / frames
+    return {
+        "particle_type": particle_type,
+        "particle_count": count,
+        "engine": engine,
+        "frames": frames,
+        "final_particles": len(system.particles),
+        "simulate_ms": 1000.0 * simulate / frames,
+        "draw_ms": 1000.0 * draw / frames,
+        "frame_ms": frame_ms,
+        "simulate_realtime_factor": (1000.0 / fps) / (1000.0 * simulate / frames) if simulate > 0 else None,
+        "realtime_factor": (1000.0 / fps) / frame_ms if frame_ms > 0 else None,
+    }
+
+
+def random_discs(count: int, width: int, height: int, seed: int = 0):
+    """Centers, radii (0-4 px, like the particle sizes) and colors of `count` random discs"""
+    rng = np.random.default_rng(seed)
+    return (rng.integers(0, width, count), rng.integers(0, height, count), rng.integers(0, 5, count),
+            rng.integers(0, 256, (count, 3)))
+
+
+def run_raster_cases(count: int, blends: Sequence[str] = BLEND_MODES, frames: int = 10,
+                     width: int = 1920, height: int = 1080, seed: int = 0) -> List[Dict[str, Any]]:
+    """Draw time of `count` discs per frame: the cv2.circle loop, then the rasterizer in each blend mode"""
+    import cv2
+    x, y, radius, colors = random_discs(count, width, height, seed)
+    black = np.zeros((height, width, 3), dtype=np.uint8)
+
+    def cv2_loop(frame):
+        for xi, yi, ri, ci in zip(x.tolist(), y.tolist(), radius.tolist(), colors.tolist()):
+            cv2.circle(frame, (xi, yi), ri, tuple(ci), -1)
+        return frame
+
+    methods = [("cv2", cv2_loop)]
+    for blend in blends:
+        raster = DiscRasterizer(width, height, blend)
+        methods.append((blend, lambda frame, raster=raster: raster.draw(frame, x, y, radius, colors)))
+
+    reference = cv2_loop(black.copy())
+    cases = []
+    for method, draw in methods:
+        frame = draw(black.copy())  # warm-up (sprites, scratch buffers), not timed
+        started = time.perf_counter()
+        for _ in range(frames):
+            draw(black.copy())
+        draw_ms = 1000.0 * (time.perf_counter() - started) / frames
+        cases.append({
+            "particle_count": count,
+            "method": method,
+            "draw_ms": draw_ms,
+            "mean_abs_diff": float(np.abs(frame.astype(np.int16) - reference).mean()),
+        })
+    baseline = cases[0]["draw_ms"]
+    for case in cases:
+        case["speedup"] = baseline / case["draw_ms"] if case["draw_ms"] > 0 else None
+    return cases
+
+
+def run_interaction_cases(counts: Sequence[int], modes: Sequence[str] = INTERACTIONS, frames: int = 10,
+                          radius: float = 12.0, seed: int = 0) -> List[Dict[str, Any]]:
+    """Time of the pairwise stage per frame at each count, moving particles on a square field of fixed density"""
+    cases = []
+    for mode in modes:
+        for count in counts:
+            rng = np.random.default_rng(seed)
+            side = float(np.sqrt(count * INTERACTION_AREA))
+            p = ParticleArrays(count)
+            p.extend(x=rng.uniform(0, side, count), y=rng.uniform(0, side, count), vx=rng.normal(0, 1, count),
+                     vy=rng.normal(0, 1, count), size=rng.uniform(1, 3, count))
+            interact(p, mode, radius, 0.5)  # warm-up, not timed
+            elapsed, pairs = 0.0, 0
+            for _ in range(frames):
+                p['x'] = (p['x'] + p['vx']) % side
+                p['y'] = (p['y'] + p['vy']) % side
+                started = time.perf_counter()
+                pairs += interact(p, mode, radius, 0.5)
+                elapsed += time.perf_counter() - started
+            cases.append({
+                "interaction": mode,
+                "particle_count": count,
+                "pairs": pairs // frames,
+                "interact_ms": 1000.0 * elapsed / frames,
+                "us_per_particle": 1e6 * elapsed / frames / count,
+            })
+        # Time per particle relative to the smallest count: 1.0 is perfectly linear scaling
+        first = cases[-len(counts)]["us_per_particle"] if counts else None
+        for case in cases[-len(counts):]:
+            case["scaling"] = case["us_per_particle"] / first if first else None
+    return cases
+
+
+def environment() -> Dict[str, Any]:
+    import cv2
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "versions": {"numpy": np.__version__, "opencv": cv2.__version__},
+    }
+
+
+def _rounded(value: Any, digits: int = 4) -> Any:
+    """Round floats so reports diff cleanly between runs"""
+    if isinstance(value, float):
+        return round(value, digits)
+    if isinstance(value, dict):
+        return {k: _rounded(v, digits) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_rounded(v, digits) for v in value]
+    return value
+
+
+def speedups(cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """numpy over dict speedup of simulation and of simulate + draw, per type and count"""
+    by_key = {(c["particle_type"], c["particle_count"], c["engine"]): c for c in cases}
+    rows = []
+    for (particle_type, count, engine), case in by_key.items():
+        baseline = by_key.get((particle_type, count, "dict"))
+        if engine != "numpy" or baseline is None:
+            continue
+        rows.append({
+            "particle_type": particle_type,
+            "particle_count": count,
+            "simulate": baseline["simulate_ms"] / case["simulate_ms"],
+            "frame": baseline["frame_ms"] / case["frame_ms"],
+        })
+    return rows
+
+
+def run_suite(types: Sequence[str] = DEFAULT_TYPES, counts: Sequence[int] = DEFAULT_COUNTS,
+              engines: Sequence[str] = ("dict", "numpy"), frames: int = 120, fps: int = 60,
+              width: int = 1920, height: int = 1080, raster_counts: Sequence[int] = DEFAULT_RASTER_COUNTS,
+              blends: Sequence[str] = BLEND_MODES, interaction_counts: Sequence[int] = DEFAULT_INTERACTION_COUNTS,
+              interactions: Sequence[str] = INTERACTIONS, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """Run every (type, count, engine) case, raster case and interaction case; return the JSON-serializable report"""
+    cases = []
+    for particle_type in types:
+        for count in counts:
+            for engine in engines:
+                case = run_case(particle_type, count, engine, frames=frames, fps=fps, width=width, height=height)
+                log(f"✨ {particle_type:<20} {count:>6} {engine:<5} simulate {case['simulate_ms']:8.3f} ms/frame, "
+                    f"draw {case['draw_ms']:8.3f} ms/frame, {case['realtime_factor']:6.2f}x realtime @ {fps} fps")
+                cases.append(case)
+    raster = []
+    for count in raster_counts:
+        for case in run_raster_cases(count, blends, width=width, height=height):
+            log(f"🎨 {count:>6} discs {case['method']:<4} draw {case['draw_ms']:8.3f} ms/frame, "
+                f"{case['speedup']:5.2f}x cv2.circle, mean diff {case['mean_abs_diff']:.3f}")
+            raster.append(case)
+    interaction = run_interaction_cases(interaction_counts, interactions) if interactions else []
+    for case in interaction:
+        log(f"🧲 {case['particle_count']:>6} particles {case['interaction']:<7} {case['interact_ms']:8.3f} ms/frame, "
+            f"{case['us_per_particle']:6.3f} us/particle ({case['scaling']:.2f}x the smallest count), "
+            f"{case['pairs']} pairs")
+    return _rounded({
+        "schema": REPORT_SCHEMA,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": environment(),
+        "settings": {"frames": frames, "fps": fps, "width": width, "height": height},
+        "cases": cases,
+        "speedups": speedups(cases),
+        "raster": raster,
+        "interactions": interaction,
+    })
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
@@ -44,6 +44,28 @@ class Settings(BaseSettings):
     log_file_max_size: int = int(os.getenv("LOG_FILE_MAX_SIZE", "10485760"))  # 10MB
     log_file_backup_count: int = int(os.getenv("LOG_FILE_BACKUP_COUNT", "5"))
 
+    # Analysis cache settings
+    analysis_cache_enabled: bool = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+    analysis_cache_dir: str = os.getenv("ANALYSIS_CACHE_DIR", "storage/cache/analysis")
+    analysis_cache_max_bytes: int = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", "536870912"))  # 512MB on disk
+    analysis_cache_memory_entries: int = int(os.getenv("ANALYSIS_CACHE_MEMORY_ENTRIES", "128"))
+    analysis_cache_memory_bytes: int = int(os.getenv("ANALYSIS_CACHE_MEMORY_BYTES", "67108864"))  # 64MB in process
+
+    # Render result cache settings (backend "s3" stores videos in the application bucket, "local" under the cache dir)
+    render_cache_enabled: bool = os.getenv("RENDER_CACHE_ENABLED", "true").lower() == "true"
+    render_cache_backend: str = os.getenv("RENDER_CACHE_BACKEND", "local")
+    render_cache_dir: str = os.getenv("RENDER_CACHE_DIR", "storage/cache/renders")
+    render_cache_s3_prefix: str = os.getenv("RENDER_CACHE_S3_PREFIX", "cache/renders")
+    render_cache_max_bytes: int = int(os.getenv("RENDER_CACHE_MAX_BYTES", "5368709120"))  # 5GB of videos
+
+    # Analysis engine settings (0 workers = run on the default thread executor)
+    analysis_workers: int = int(os.getenv("ANALYSIS_WORKERS", "2"))
+    analysis_task_timeout: float = float(os.getenv("ANALYSIS_TASK_TIMEOUT", "600"))
+    # engine=auto serves the numpy-only lite analyzer while librosa takes longer than this to import
+    analysis_librosa_import_budget: float = float(os.getenv("ANALYSIS_LIBROSA_IMPORT_BUDGET", "2.0"))
+    # Recordings at least this long are decoded and analyzed block by block, in bounded memory
+    analysis_streaming_min_seconds: float = float(os.getenv("ANALYSIS_STREAMING_MIN_SECONDS", "1200"))  # 20 minutes
+
     # External services
     gemini_api_key: Optional[str] = os.getenv("GEMINI_API_KEY")
     runpod_api_key: Optional[str] = os.getenv("RUNPOD_API_KEY")
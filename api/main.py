@@ -123,6 +123,14 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️ Queue Manager initialization failed: {e}")
 
+    # Warm the music analysis worker pool
+    try:
+        from api.services.media.analysis_engine import analysis_engine
+        await analysis_engine.start()
+        print("✅ Analysis engine started")
+    except Exception as e:
+        print(f"⚠️ Analysis engine initialization failed: {e}")
+
     yield
 
     # Shutdown
@@ -144,6 +152,14 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️ Queue Manager cleanup failed: {e}")
 
+    # Stop analysis worker processes
+    try:
+        from api.services.media.analysis_engine import analysis_engine
+        analysis_engine.shutdown(wait=False)
+        print("✅ Analysis engine stopped")
+    except Exception as e:
+        print(f"⚠️ Analysis engine shutdown failed: {e}")
+
 # Create FastAPI app
 app = FastAPI(
     title="clipizy API",
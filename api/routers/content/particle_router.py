@@ -2,10 +2,16 @@ from fastapi import APIRouter, HTTPException, BackgroundTasks
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
+import asyncio
 import os
+import threading
 import uuid
 from datetime import datetime
 
+from api.services.media.render_cache import RenderCache, render_cache
+from api.workflows.generator.feature_cache import feature_cache
+from api.workflows.generator.preview import PREVIEW_DURATION, PreviewSettings
+from api.workflows.generator.render_metrics import RenderMetrics
 from api.workflows.generator.particles.unified_particle_system import (
     UnifiedParticleSystem,
     ParticleType,
@@ -19,6 +25,8 @@ router = APIRouter(prefix="/particles", tags=["particles"])
 # In-memory storage for active particle systems (in production, use Redis or database)
 active_systems: Dict[str, UnifiedParticleSystem] = {}
 render_jobs: Dict[str, Dict[str, Any]] = {}
+# One render at a time per system: a render steps the system's own particle state
+system_locks: Dict[str, threading.Lock] = {}
 
 
 class ParticleSystemRequest(BaseModel):
@@ -34,6 +42,9 @@ class RenderRequest(BaseModel):
     system_id: str
     output_path: Optional[str] = None
     audio_path: Optional[str] = None
+    render_mode: str = "final"  # "preview": low resolution and fps, one time window
+    preview_start: float = 0.0
+    preview_duration: float = PREVIEW_DURATION
 
 
 class ParticleSystemResponse(BaseModel):
@@ -43,6 +54,53 @@ class ParticleSystemResponse(BaseModel):
     created_at: datetime
 
 
+def _preview_settings(request: RenderRequest) -> Optional[PreviewSettings]:
+    """PreviewSettings for a preview render, None for a final render"""
+    if request.render_mode not in ("final", "preview"):
+        raise HTTPException(status_code=400, detail=f"Invalid render_mode: {request.render_mode}")
+    if request.render_mode == "final":
+        return None
+    if request.preview_start < 0 or request.preview_duration <= 0:
+        raise HTTPException(status_code=400, detail="preview_start must be >= 0 and preview_duration > 0")
+    return PreviewSettings(start=request.preview_start, duration=request.preview_duration)
+
+
+def _render_key(system: UnifiedParticleSystem, audio_path: Optional[str], preview: Optional[PreviewSettings]) -> str:
+    """Render cache key: the audio driving the particles, type, config, whether audio is muxed, preview window"""
+    features_audio = audio_path or system.audio_path
+    audio = feature_cache.digest(features_audio) if features_audio and os.path.exists(features_audio) else None
+    return RenderCache.make_key("particles", audio, {
+        "particle_type": system.particle_type,
+        "config": system.config,
+        "mux_audio": bool(audio_path),
+        "preview": preview,
+    })
+
+
+def _job_metrics(job_id: str, preview: Optional[PreviewSettings]) -> RenderMetrics:
+    """Metrics for a job's render; frame progress moves the job from 10% to 95%"""
+    def on_progress(done: int, total: int):
+        if total > 0 and job_id in render_jobs:
+            render_jobs[job_id]["progress"] = 10 + 85 * min(done, total) // total
+    return RenderMetrics(job_id, "particles_preview" if preview else "particles", on_progress=on_progress)
+
+
+def _render_system(system_id: str, render_key: str, output_path: str, audio_path: Optional[str],
+                   preview: Optional[PreviewSettings], metrics: Optional[RenderMetrics] = None,
+                   counted: bool = False) -> bool:
+    """Render through the render cache (blocking); True when the output came from the cache
+
+    ``counted``: the request already looked render_key up with render_cache.fetch (see get_or_render)
+    """
+    system = active_systems[system_id]
+
+    def render(dest: str) -> None:
+        with system_locks.setdefault(system_id, threading.Lock()):
+            system.render_particles(dest, audio_path, preview=preview, metrics=metrics)
+
+    return render_cache.get_or_render(render_key, output_path, render, counted=counted)[1]
+
+
 @router.post("/create", response_model=ParticleSystemResponse)
 async def create_particle_system_endpoint(request: ParticleSystemRequest):
     """Create a new particle system"""
@@ -153,13 +211,14 @@ async def render_particles(system_id: str, background_tasks: BackgroundTasks, re
         raise HTTPException(status_code=404, detail="Particle system not found")
 
     system = active_systems[system_id]
+    preview = _preview_settings(request)
 
     # Generate output path if not provided
     if not request.output_path:
-        output_dir = "api/storage/renders"
+        output_dir = "api/storage/previews" if preview else "api/storage/renders"
         os.makedirs(output_dir, exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        request.output_path = f"{output_dir}/particles_{system_id}_{timestamp}.mp4"
+        request.output_path = f"{output_dir}/{'preview' if preview else 'particles'}_{system_id}_{timestamp}.mp4"
 
     # Validate audio path if provided
     if request.audio_path and not os.path.exists(request.audio_path):
@@ -167,10 +226,34 @@ async def render_particles(system_id: str, background_tasks: BackgroundTasks, re
 
     # Create job entry
     job_id = str(uuid.uuid4())
+    render_key = await asyncio.to_thread(_render_key, system, request.audio_path, preview)
+    if await asyncio.to_thread(render_cache.fetch, render_key, request.output_path):
+        metrics = _job_metrics(job_id, preview)
+        metrics.info["cached"] = True
+        render_jobs[job_id] = {
+            "system_id": system_id,
+            "output_path": request.output_path,
+            "audio_path": request.audio_path,
+            "render_mode": request.render_mode,
+            "status": "completed",
+            "created_at": datetime.now(),
+            "completed_at": datetime.now(),
+            "progress": 100,
+            "cached": True,
+            "metrics": metrics.finish().record()
+        }
+        return {
+            "job_id": job_id,
+            "message": "Served from cache",
+            "status": "completed",
+            "output_path": request.output_path
+        }
+
     render_jobs[job_id] = {
         "system_id": system_id,
         "output_path": request.output_path,
         "audio_path": request.audio_path,
+        "render_mode": request.render_mode,
         "status": "queued",
         "created_at": datetime.now(),
         "progress": 0
@@ -182,7 +265,9 @@ async def render_particles(system_id: str, background_tasks: BackgroundTasks, re
         job_id,
         system_id,
         request.output_path,
-        request.audio_path
+        request.audio_path,
+        preview,
+        render_key
     )
 
     return {
@@ -192,20 +277,25 @@ async def render_particles(system_id: str, background_tasks: BackgroundTasks, re
     }
 
 
-async def render_particles_background(job_id: str, system_id: str, output_path: str, audio_path: Optional[str]):
-    """Background task for rendering particles"""
+async def render_particles_background(job_id: str, system_id: str, output_path: str, audio_path: Optional[str],
+                                     preview: Optional[PreviewSettings], render_key: str):
+    """Background task for rendering particles (identical concurrent jobs share one render)"""
+    metrics = _job_metrics(job_id, preview)
     try:
         render_jobs[job_id]["status"] = "rendering"
         render_jobs[job_id]["progress"] = 10
 
-        system = active_systems[system_id]
-        system.render_particles(output_path, audio_path)
+        render_jobs[job_id]["cached"] = metrics.info["cached"] = await asyncio.to_thread(
+            _render_system, system_id, render_key, output_path, audio_path, preview, metrics, counted=True
+        )
 
+        render_jobs[job_id]["metrics"] = metrics.finish().record()
         render_jobs[job_id]["status"] = "completed"
         render_jobs[job_id]["progress"] = 100
         render_jobs[job_id]["completed_at"] = datetime.now()
 
     except Exception as e:
+        render_jobs[job_id]["metrics"] = metrics.finish().record()
         render_jobs[job_id]["status"] = "failed"
         render_jobs[job_id]["error"] = str(e)
         render_jobs[job_id]["failed_at"] = datetime.now()
@@ -235,6 +325,18 @@ async def get_render_job_status(job_id: str):
     return response
 
 
+@router.get("/jobs/{job_id}/metrics")
+async def get_render_job_metrics(job_id: str):
+    """Per-stage timings, frame throughput and peak memory of a job's render"""
+    if job_id not in render_jobs:
+        raise HTTPException(status_code=404, detail="Render job not found")
+
+    metrics = render_jobs[job_id].get("metrics")
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="Render metrics not available yet")
+    return metrics
+
+
 @router.get("/jobs")
 async def list_render_jobs():
     """List all render jobs"""
@@ -279,6 +381,7 @@ async def delete_particle_system(system_id: str):
         raise HTTPException(status_code=404, detail="Particle system not found")
 
     del active_systems[system_id]
+    system_locks.pop(system_id, None)
     return {"message": "Particle system deleted successfully"}
 
 
@@ -302,33 +405,23 @@ async def delete_render_job(job_id: str):
 
 
 @router.get("/systems/{system_id}/preview")
-async def get_system_preview(system_id: str, duration: float = 2.0):
-    """Generate a quick preview of the particle system"""
+async def get_system_preview(system_id: str, duration: float = 2.0, start: float = 0.0):
+    """Generate a quick low-resolution preview of a window of the particle system's render"""
     if system_id not in active_systems:
         raise HTTPException(status_code=404, detail="Particle system not found")
+    if start < 0 or duration <= 0:
+        raise HTTPException(status_code=400, detail="start must be >= 0 and duration > 0")
 
     system = active_systems[system_id]
+    preview = PreviewSettings(start=start, duration=duration)
 
-    # Create a temporary system for preview
-    preview_config = ParticleConfig(
-        width=640,
-        height=360,
-        fps=15,
-        duration=duration,
-        particle_count=min(50, system.particle_count)
-    )
-
-    preview_system = UnifiedParticleSystem(
-        particle_type=system.particle_type,
-        config=preview_config
-    )
-
-    # Generate preview
+    # Generate preview from the system's own configuration, so it matches the final render
     preview_path = f"api/storage/previews/preview_{system_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
     os.makedirs(os.path.dirname(preview_path), exist_ok=True)
 
     try:
-        preview_system.render_particles(preview_path)
+        render_key = await asyncio.to_thread(_render_key, system, None, preview)
+        await asyncio.to_thread(_render_system, system_id, render_key, preview_path, None, preview)
         return FileResponse(
             path=preview_path,
             filename=f"preview_{system_id}.mp4",
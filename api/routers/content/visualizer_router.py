@@ -2,12 +2,19 @@ from fastapi import APIRouter, HTTPException, BackgroundTasks, UploadFile, File
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
+import asyncio
+import copy
 import os
 import uuid
 import tempfile
 from pathlib import Path
 
+from api.services.media.analysis_cache import audio_digest
+from api.services.media.render_cache import RenderCache, render_cache
+from api.workflows.generator.preview import PREVIEW_DURATION, PreviewSettings
+from api.workflows.generator.render_metrics import RenderMetrics
 from api.workflows.generator.unified_visualizers import (
+    AudioVisualizerBase,
     UnifiedVisualizerService, 
     VisualizerConfig, 
     VisualizerType
@@ -46,6 +53,9 @@ class VisualizerRequest(BaseModel):
     border_alpha: float = 1.0
     smooth_arcs: bool = False
     enhanced_mode: Optional[Dict[str, Any]] = None
+    render_mode: str = "final"
+    preview_start: float = 0.0
+    preview_duration: float = PREVIEW_DURATION
 
 class VisualizerResponse(BaseModel):
     job_id: str
@@ -65,6 +75,86 @@ job_status = {}
 
 visualizer_service = UnifiedVisualizerService()
 
+RENDER_MODES = ("final", "preview")
+
+def _preview_settings(render_mode: str, preview_start: float, preview_duration: float) -> Optional[PreviewSettings]:
+    """PreviewSettings for a preview render (low resolution and fps, one time window), None for a final render"""
+    if render_mode not in RENDER_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid render_mode: {render_mode}. Use one of {list(RENDER_MODES)}")
+    if render_mode == "final":
+        return None
+    if preview_start < 0 or preview_duration <= 0:
+        raise HTTPException(status_code=400, detail="preview_start must be >= 0 and preview_duration > 0")
+    return PreviewSettings(start=preview_start, duration=preview_duration)
+
+def _render_key(audio_data: bytes, config: VisualizerConfig, preview: Optional[PreviewSettings]) -> str:
+    """Render cache key: audio content, the config with its default sizes resolved, and the preview window"""
+    normalized = AudioVisualizerBase.resolve_config(copy.copy(config))
+    return RenderCache.make_key("visualizer", audio_digest(audio_data), {"config": normalized, "preview": preview})
+
+def _job_metrics(job_id: str, preview: Optional[PreviewSettings]) -> RenderMetrics:
+    """Metrics for a job's render; frame progress moves the job from 30% to 90%"""
+    def on_progress(done: int, total: int):
+        if total > 0 and job_id in job_status:
+            job_status[job_id]["progress"] = 30 + 60 * min(done, total) // total
+    return RenderMetrics(job_id, "visualizer_preview" if preview else "visualizer", on_progress=on_progress)
+
+def _output_path(job_id: str, preview: Optional[PreviewSettings]) -> str:
+    permanent_dir = os.path.join("storage", "visualizers")
+    os.makedirs(permanent_dir, exist_ok=True)
+    return os.path.join(permanent_dir, f"{'preview' if preview else 'visualizer'}_{job_id}.mp4")
+
+async def _start_visualizer_job(background_tasks: BackgroundTasks, audio_file: UploadFile, config: VisualizerConfig,
+                                preview: Optional[PreviewSettings]) -> VisualizerResponse:
+    """Serve the render from the cache, or queue it as a background job"""
+    job_id = str(uuid.uuid4())
+    audio_data = await audio_file.read()
+    render_key = _render_key(audio_data, config, preview)
+    
+    output_path = _output_path(job_id, preview)
+    if await asyncio.to_thread(render_cache.fetch, render_key, output_path):
+        metrics = _job_metrics(job_id, preview)
+        metrics.info["cached"] = True
+        job_status[job_id] = {
+            "status": "completed",
+            "progress": 100,
+            "output_path": output_path,
+            "error": None,
+            "metrics": metrics.finish().record()
+        }
+        return VisualizerResponse(
+            job_id=job_id,
+            status="completed",
+            message="Visualizer served from cache",
+            output_path=output_path
+        )
+    
+    # Initialize job status
+    job_status[job_id] = {
+        "status": "processing",
+        "progress": 0,
+        "output_path": None,
+        "error": None,
+        "metrics": None
+    }
+    
+    # Start background task
+    background_tasks.add_task(
+        process_visualizer,
+        job_id,
+        audio_data,
+        audio_file.filename,
+        config,
+        preview,
+        render_key
+    )
+    
+    return VisualizerResponse(
+        job_id=job_id,
+        status="processing",
+        message="Visualizer preview job started" if preview else "Visualizer job started"
+    )
+
 @router.get("/types")
 async def get_visualizer_types():
     """Get available visualizer types"""
@@ -106,9 +196,12 @@ async def create_visualizer(
     fill_alpha: float = 0.5,
     border_alpha: float = 1.0,
     smooth_arcs: bool = False,
-    enhanced_mode: Optional[str] = None
+    enhanced_mode: Optional[str] = None,
+    render_mode: str = "final",
+    preview_start: float = 0.0,
+    preview_duration: float = PREVIEW_DURATION
 ):
-    """Create a visualizer video from audio file"""
+    """Create a visualizer video from audio file (render_mode="preview" for a low-resolution proxy of one time window)"""
     
     # Validate visualizer type
     try:
@@ -116,8 +209,7 @@ async def create_visualizer(
     except ValueError:
         raise HTTPException(status_code=400, detail=f"Invalid visualizer type: {visualizer_type}")
     
-    # Generate job ID
-    job_id = str(uuid.uuid4())
+    preview = _preview_settings(render_mode, preview_start, preview_duration)
     
     # Parse color
     try:
@@ -170,27 +262,7 @@ async def create_visualizer(
         enhanced_mode=enhanced_mode_dict
     )
     
-    # Initialize job status
-    job_status[job_id] = {
-        "status": "processing",
-        "progress": 0,
-        "output_path": None,
-        "error": None
-    }
-    
-    # Start background task
-    background_tasks.add_task(
-        process_visualizer,
-        job_id,
-        audio_file,
-        config
-    )
-    
-    return VisualizerResponse(
-        job_id=job_id,
-        status="processing",
-        message="Visualizer job started"
-    )
+    return await _start_visualizer_job(background_tasks, audio_file, config, preview)
 
 @router.post("/create-from-request", response_model=VisualizerResponse)
 async def create_visualizer_from_request(
@@ -209,8 +281,7 @@ async def create_visualizer_from_request(
     except ValueError:
         raise HTTPException(status_code=400, detail=f"Invalid visualizer type: {request.visualizer_type}")
     
-    # Generate job ID
-    job_id = str(uuid.uuid4())
+    preview = _preview_settings(request.render_mode, request.preview_start, request.preview_duration)
     
     # Create config
     config = VisualizerConfig(
@@ -246,27 +317,7 @@ async def create_visualizer_from_request(
         enhanced_mode=request.enhanced_mode
     )
     
-    # Initialize job status
-    job_status[job_id] = {
-        "status": "processing",
-        "progress": 0,
-        "output_path": None,
-        "error": None
-    }
-    
-    # Start background task
-    background_tasks.add_task(
-        process_visualizer,
-        job_id,
-        audio_file,
-        config
-    )
-    
-    return VisualizerResponse(
-        job_id=job_id,
-        status="processing",
-        message="Visualizer job started"
-    )
+    return await _start_visualizer_job(background_tasks, audio_file, config, preview)
 
 @router.get("/status/{job_id}", response_model=VisualizerStatus)
 async def get_visualizer_status(job_id: str):
@@ -330,8 +381,27 @@ async def list_visualizer_jobs():
         ]
     }
 
-async def process_visualizer(job_id: str, audio_file: UploadFile, config: VisualizerConfig):
-    """Background task to process visualizer"""
+@router.get("/metrics/{job_id}")
+async def get_visualizer_metrics(job_id: str):
+    """Per-stage timings, frame throughput and peak memory of a job's render"""
+    if job_id not in job_status:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    metrics = job_status[job_id].get("metrics")
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="Render metrics not available yet")
+    return metrics
+
+@router.get("/cache/stats")
+async def get_render_cache_stats():
+    """Hit/miss/coalescing counters and storage usage of the render result cache"""
+    return render_cache.stats()
+
+async def process_visualizer(job_id: str, audio_data: bytes, filename: str, config: VisualizerConfig,
+                             preview: Optional[PreviewSettings], render_key: str):
+    """Background task to process visualizer (identical concurrent jobs share one render)"""
+    prefix = "preview" if preview else "visualizer"
+    metrics = _job_metrics(job_id, preview)
     try:
         # Update job status
         job_status[job_id]["status"] = "processing"
@@ -340,44 +410,50 @@ async def process_visualizer(job_id: str, audio_file: UploadFile, config: Visual
         # Create temporary directory for processing
         with tempfile.TemporaryDirectory() as temp_dir:
             # Save uploaded audio file
-            audio_path = os.path.join(temp_dir, f"audio_{job_id}.{audio_file.filename.split('.')[-1]}")
+            audio_path = os.path.join(temp_dir, f"audio_{job_id}.{filename.split('.')[-1]}")
             with open(audio_path, "wb") as f:
-                content = await audio_file.read()
-                f.write(content)
+                f.write(audio_data)
             
             job_status[job_id]["progress"] = 20
             
             # Create output path
             output_dir = os.path.join(temp_dir, "output")
             os.makedirs(output_dir, exist_ok=True)
-            output_path = os.path.join(output_dir, f"visualizer_{job_id}.mp4")
+            output_path = os.path.join(output_dir, f"{prefix}_{job_id}.mp4")
             
             job_status[job_id]["progress"] = 30
             
-            # Process visualizer
-            result_path = visualizer_service.render_visualizer(
-                audio_path=audio_path,
-                output_path=output_path,
-                config=config
+            # Process visualizer off the event loop, through the render cache
+            result_path, cached = await asyncio.to_thread(
+                render_cache.get_or_render, render_key, output_path,
+                lambda dest: visualizer_service.render_visualizer(
+                    audio_path=audio_path,
+                    output_path=dest,
+                    config=config,
+                    preview=preview,
+                    metrics=metrics
+                ),
+                counted=True  # _start_visualizer_job already looked the key up
             )
+            metrics.info["cached"] = cached
             
             job_status[job_id]["progress"] = 90
             
             # Move to permanent storage
-            permanent_dir = os.path.join("storage", "visualizers")
-            os.makedirs(permanent_dir, exist_ok=True)
-            permanent_path = os.path.join(permanent_dir, f"visualizer_{job_id}.mp4")
+            permanent_path = _output_path(job_id, preview)
             
             import shutil
             shutil.move(result_path, permanent_path)
             
             # Update job status
+            job_status[job_id]["metrics"] = metrics.finish().record()
             job_status[job_id]["status"] = "completed"
             job_status[job_id]["progress"] = 100
             job_status[job_id]["output_path"] = permanent_path
             
     except Exception as e:
         # Update job status with error
+        job_status[job_id]["metrics"] = metrics.finish().record()
         job_status[job_id]["status"] = "failed"
         job_status[job_id]["error"] = str(e)
         job_status[job_id]["progress"] = 0
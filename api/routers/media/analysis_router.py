@@ -1,19 +1,237 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from api.db import get_db
+from api.db import get_db, SessionLocal
 from api.models import Track, Video, Image, User, Project
 from api.schemas import AnalysisResponse
 from api.services import analysis_service, storage_service
+from api.services.media.analysis_engine import analysis_engine
+from api.services.media.analysis_service import run_batch_analysis, run_music_analysis
+from api.services.utils.vercel_compatibility import select_analysis_engine
 from ..auth.auth_router import get_current_user
-import os, uuid, datetime
+import asyncio, json, os, time, uuid, datetime
+from typing import List
 from urllib.parse import urlparse
 
 router = APIRouter(tags=["Analysis"])
 
 
+async def _refine_track_analysis(track_id: str, local_path: str):
+    """Background step: run the full analysis and replace the track's preview result; deletes local_path"""
+    try:
+        # Only the path goes to the worker, which decodes the file itself (pickling decoded PCM costs more)
+        analysis_result = await analysis_engine.run(run_music_analysis, local_path)
+        if "error" in analysis_result:
+            print(f"⚠️ Full analysis failed for track {track_id}: {analysis_result['error']}")
+            return
+        description = analysis_service.generate_music_description(analysis_result)
+
+        db = SessionLocal()
+        try:
+            track = db.query(Track).filter(Track.id == track_id).first()
+            if track is not None:
+                track.analysis = {
+                    "raw": analysis_result,
+                    "description": description,
+                    "analyzed_at": datetime.datetime.utcnow().isoformat(),
+                    "quality": "full",
+                }
+                db.commit()
+                print(f"✅ Full analysis stored for track {track_id}")
+        finally:
+            db.close()
+    except Exception as e:
+        print(f"⚠️ Full analysis failed for track {track_id}: {e}")
+    finally:
+        if os.path.exists(local_path):
+            os.remove(local_path)
+
+
+BATCH_STAGES = ("download", "queue", "analysis", "describe", "persist")
+
+
+def _local_temp_path(file_path: str) -> str:
+    """Temporary download path keeping only the source's extension (query strings stripped)"""
+    try:
+        if isinstance(file_path, str) and file_path.startswith(("http://", "https://")):
+            base_name = os.path.basename(urlparse(file_path).path)
+        else:
+            base_name = os.path.basename(file_path or "")
+        _, ext = os.path.splitext(base_name)
+    except Exception:
+        ext = ""
+    return f"/tmp/{uuid.uuid4()}{ext}"
+
+
+def _persist_track_analysis(track_id: str, analysis_result: dict, description: str) -> None:
+    """Store one batch result on its track (own session: the request's session is gone while streaming)"""
+    db = SessionLocal()
+    try:
+        track = db.query(Track).filter(Track.id == track_id).first()
+        if track is not None:
+            track.analysis = {
+                "raw": analysis_result,
+                "description": description,
+                "analyzed_at": datetime.datetime.utcnow().isoformat(),
+                "quality": analysis_result.get("quality", "full"),
+            }
+            db.commit()
+    finally:
+        db.close()
+
+
+def _remove_temp_file(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _remove_when_settled(call: asyncio.Future, path: str) -> None:
+    """Delete path once call (a download thread or engine job still using it) has finished"""
+    def settled(done: asyncio.Future) -> None:
+        if not done.cancelled():
+            done.exception()  # nobody awaits a cancelled item's call: mark its error as retrieved
+        _remove_temp_file(path)
+    call.add_done_callback(settled)
+
+
+async def _analyze_batch_item(item: dict) -> dict:
+    """Download (tracks only), analyze in the engine and persist one batch item, timing each stage"""
+    item["started"] = True
+    timings = dict.fromkeys(BATCH_STAGES, 0.0)
+    # The download thread or engine job using local_path. Awaited through a shield: cancelling the item
+    # cannot stop a thread or a queued/running pool worker, so it must keep its file until it settles
+    in_flight = None
+    try:
+        if item.get("track_id"):
+            started = time.perf_counter()
+            in_flight = asyncio.ensure_future(
+                asyncio.to_thread(storage_service.download_file_from_path, item["file_path"], item["local_path"]))
+            await asyncio.shield(in_flight)
+            timings["download"] = time.perf_counter() - started
+
+        submitted_at = time.time()
+        in_flight = asyncio.ensure_future(analysis_engine.run(run_batch_analysis, item["local_path"]))
+        output = await asyncio.shield(in_flight)
+        timings["queue"] = max(0.0, output["started_at"] - submitted_at)
+        timings.update(output["timings"])
+
+        analysis_result = output["analysis"]
+        if "error" in analysis_result:
+            raise RuntimeError(analysis_result["error"])
+
+        if item.get("track_id"):
+            started = time.perf_counter()
+            await asyncio.to_thread(_persist_track_analysis, item["track_id"], analysis_result, output["description"])
+            timings["persist"] = time.perf_counter() - started
+
+        return {"type": "result", "track_id": item.get("track_id"), "filename": item["filename"], "success": True,
+                "analysis": analysis_result, "description": output["description"], "timings": timings}
+    except Exception as e:
+        print(f"⚠️ Batch analysis failed for {item.get('track_id') or item['filename']}: {e}")
+        return {"type": "result", "track_id": item.get("track_id"), "filename": item["filename"], "success": False,
+                "error": str(e), "timings": timings}
+    finally:
+        if in_flight is not None and not in_flight.done():
+            _remove_when_settled(in_flight, item["local_path"])  # cancelled while the file is in use
+        else:
+            _remove_temp_file(item["local_path"])
+
+
+def _batch_summary(results: list, elapsed: float) -> dict:
+    """Throughput and per-stage timing for a finished batch, for tuning ANALYSIS_WORKERS"""
+    succeeded = [r for r in results if r["success"]]
+    stage_total = {stage: sum(r["timings"][stage] for r in results) for stage in BATCH_STAGES}
+    return {
+        "type": "summary",
+        "total_tracks": len(results),
+        "successful_analyses": len(succeeded),
+        "failed_analyses": len(results) - len(succeeded),
+        "elapsed_seconds": round(elapsed, 3),
+        "tracks_per_minute": round(60.0 * len(succeeded) / elapsed, 2) if elapsed > 0 else 0.0,
+        "workers": analysis_engine.max_workers,
+        "stage_seconds_total": {k: round(v, 3) for k, v in stage_total.items()},
+        "stage_seconds_mean": {k: round(v / len(results), 3) if results else 0.0 for k, v in stage_total.items()},
+    }
+
+
+@router.post("/music/batch")
+async def analyze_music_batch(
+    track_ids: List[str] = Form(default=[]),
+    files: List[UploadFile] = File(default=[]),
+    stream_format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Analyze several tracks and/or uploaded files on the analysis process pool.
+
+    Results are streamed as each one completes (NDJSON lines, or SSE events
+    with ``stream_format=sse``) and track results are persisted to
+    ``Track.analysis`` as they arrive. The last message is a ``summary`` with
+    throughput (tracks/min) and per-stage timings.
+    """
+    if not track_ids and not files:
+        raise HTTPException(status_code=400, detail="Provide track_ids and/or files")
+
+    tracks = db.query(Track).join(Track.project).filter(
+        Track.id.in_(track_ids), Project.user_id == str(current_user.id)
+    ).all() if track_ids else []
+    missing = set(track_ids) - {str(t.id) for t in tracks}
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Tracks not found: {', '.join(sorted(missing))}")
+
+    items = [{"track_id": str(t.id), "filename": t.title or os.path.basename(t.file_path), "file_path": t.file_path,
+              "local_path": _local_temp_path(t.file_path)} for t in tracks]
+    for upload in files:
+        local_path = _local_temp_path(upload.filename)
+        with open(local_path, "wb") as f:
+            f.write(await upload.read())
+        items.append({"track_id": None, "filename": upload.filename, "local_path": local_path})
+
+    def encode(message: dict) -> str:
+        payload = json.dumps(message, default=str)
+        if stream_format == "sse":
+            return f"event: {message['type']}\ndata: {payload}\n\n"
+        return payload + "\n"
+
+    async def stream():
+        print(f"🎵 Batch analysis of {len(items)} track(s) on {analysis_engine.max_workers} worker(s)")
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(_analyze_batch_item(item)) for item in items]
+        results = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                results.append(result)
+                yield encode(result)
+            summary = _batch_summary(results, time.perf_counter() - started)
+            print(f"✅ Batch analysis done: {summary['successful_analyses']}/{summary['total_tracks']} "
+                  f"at {summary['tracks_per_minute']} tracks/min")
+            yield encode(summary)
+        finally:
+            # Client went away: cancel the remaining items. A started item removes its own temp file once
+            # its download or engine job settles; an item cancelled before it started never runs, so its
+            # upload is removed here
+            for task in tasks:
+                task.cancel()
+            for item in items:
+                if not item.get("started"):
+                    _remove_temp_file(item["local_path"])
+
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type)
+
+
 @router.post("/music/{track_id}", response_model=AnalysisResponse)
-async def analyze_music(track_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    """Analyze an uploaded or generated music track."""
+async def analyze_music(track_id: str, background_tasks: BackgroundTasks, preview: bool = False,
+                        engine: str = Query("auto", pattern="^(auto|full|lite)$"),
+                        db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """Analyze an uploaded or generated music track.
+
+    With ``preview=true`` a fast preview (quality "preview") is stored and
+    returned immediately, and the full analysis replaces it in the background.
+    ``engine=lite`` runs the numpy-only analyzer (quality "lite"); ``auto``
+    does so only while librosa is still importing past its time budget.
+    """
     track = db.query(Track).join(Track.project).filter(Track.id == track_id, Project.user_id == str(current_user.id)).first()
     if not track:
         raise HTTPException(status_code=404, detail="Track not found")
@@ -29,28 +247,41 @@ async def analyze_music(track_id: str, db: Session = Depends(get_db), current_us
     except Exception:
         ext = ""
     local_path = f"/tmp/{uuid.uuid4()}{ext}"
+    refining = False
     try:
         # Use the storage service helper to handle different file path formats
         storage_service.download_file_from_path(track.file_path, local_path)
-        
-        analysis_result = analysis_service.analyze_music(local_path)
+
+        if await asyncio.to_thread(select_analysis_engine, engine) == "lite":
+            analysis_result = await asyncio.to_thread(analysis_service.analyze_music_lite, local_path)
+        elif preview:
+            analysis_result = await asyncio.to_thread(analysis_service.analyze_music_preview, local_path)
+        else:
+            analysis_result = await analysis_engine.run(run_music_analysis, local_path)
         description = analysis_service.generate_music_description(analysis_result)
+        quality = analysis_result.get("quality", "full")
 
         track.analysis = {
             "raw": analysis_result,
             "description": description,
             "analyzed_at": datetime.datetime.utcnow().isoformat(),
+            "quality": quality,
         }
         db.commit()
         db.refresh(track)
 
+        if quality == "preview":
+            # The refine task owns the downloaded file from here on
+            background_tasks.add_task(_refine_track_analysis, str(track.id), local_path)
+            refining = True
+
         return {"track_id": str(track.id), "analysis": analysis_result, "description": description}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
     finally:
-        if os.path.exists(local_path):
+        if not refining and os.path.exists(local_path):
             os.remove(local_path)
 
 
@@ -12,6 +12,8 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath('.')))
 
 from api.services.media.music_analyzer_service import music_analyzer_service
+from api.services.media.analysis_cache import analysis_cache
+from api.services.media.analysis_engine import analysis_engine
 
 router = APIRouter(prefix="/api/music-analysis", tags=["Music Analysis"])
 
@@ -69,6 +71,8 @@ async def analyze_music_comprehensive(
             if os.path.exists(tmp_file_path):
                 os.unlink(tmp_file_path)
 
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
@@ -118,6 +122,8 @@ async def analyze_music_simple(
             if os.path.exists(tmp_file_path):
                 os.unlink(tmp_file_path)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
@@ -358,6 +364,16 @@ async def get_available_genres():
         "total_count": len(music_analyzer_service.theory_categorizer.genres)
     }
 
+@router.get("/cache/stats")
+async def get_analysis_cache_stats():
+    """Hit/miss counters and tier usage of the analysis result cache"""
+    return analysis_cache.stats()
+
+@router.get("/engine/stats")
+async def get_analysis_engine_stats():
+    """Worker pool configuration and task counters of the analysis engine"""
+    return analysis_engine.stats()
+
 @router.get("/analysis-types")
 async def get_analysis_types():
     """Get available analysis types and their descriptions"""
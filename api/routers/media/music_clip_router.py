@@ -1338,7 +1338,8 @@ def analyze_project_tracks_parallel(
                 track.analysis = {
                     "raw": result["analysis"],
                     "description": result["description"],
-                    "analyzed_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(result["analyzed_at"]))
+                    "analyzed_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(result["analyzed_at"])),
+                    "quality": "full"
                 }
 
         # Commit all changes
@@ -1,11 +1,15 @@
 from .music_analyzer_service import MusicAnalyzerService
 from .analysis_service import analysis_service
+from .analysis_cache import analysis_cache
+from .render_cache import render_cache
 from .media_service import MediaService
 from .sanitizer_service import InputSanitizer
 
 __all__ = [
     "MusicAnalyzerService",
     "analysis_service",
+    "analysis_cache",
+    "render_cache",
     "MediaService", 
     "InputSanitizer"
 ]
@@ -0,0 +1,294 @@
+"""
+Content-addressed cache for music analysis results
+
+Entries are keyed on the SHA-256 of the audio bytes plus a hash of the
+analysis parameters, so the same audio uploaded to several projects (or
+re-analyzed) is only analyzed once. Long recordings that are streamed
+from disk are keyed on their file digest, which equals the digest of their
+bytes. Two tiers:
+- an in-process LRU holding serialized results, bounded by entry count and bytes
+- a SQLite tier of zlib-compressed JSON, bounded by a byte budget with LRU eviction
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+from api.config.logging import get_service_logger
+from api.config.settings import settings
+
+logger = get_service_logger("analysis_service")
+
+# Encoded audio bytes, or the SHA-256 of a file too large to read into memory
+Audio = Union[bytes, str]
+
+# Bump when analyzer output changes so stale entries stop matching
+ANALYSIS_CACHE_VERSION = 2
+
+# analyze_audio_bytes defaults; every segmentation key hashes the full set
+SEGMENTATION_DEFAULTS = {
+    "sr": 22050, "hop": 512,
+    "target_segments": 6, "max_segments": 8, "hi_q": 0.70, "lo_q": 0.35,
+    "w_novelty": 0.6, "w_energy": 0.25, "w_flux": 0.15,
+    "use_beat_energy": True, "short_ma_beats": 4, "long_ma_beats": 16, "min_gap_seconds": 11.0,
+    "spread_prom_q": 0.75, "use_pelt": True, "pelt_penalty": 4.5,
+}
+
+
+def segmentation_params(**overrides) -> Dict[str, Any]:
+    """Full analyze_audio_bytes parameter set with the given overrides applied"""
+    return {**SEGMENTATION_DEFAULTS, **overrides}
+
+
+def audio_digest(data: Union[bytes, str]) -> str:
+    """SHA-256 of the raw audio bytes; a str is taken as an already computed digest (streamed files)"""
+    if isinstance(data, str):
+        return data
+    return hashlib.sha256(data).hexdigest()
+
+
+def params_digest(namespace: str, params: Dict[str, Any]) -> str:
+    """Stable hash of an analysis namespace and its parameters"""
+    canonical = json.dumps(
+        {"namespace": namespace, "version": ANALYSIS_CACHE_VERSION, "params": params},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _to_json(value: Any) -> Any:
+    """json.dumps fallback for numpy scalars and arrays"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class AnalysisCache:
+    """Two-tier (memory + SQLite) LRU cache for analysis results"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_disk_bytes: int = 512 * 1024 * 1024,
+                 max_memory_entries: int = 128, max_memory_bytes: int = 64 * 1024 * 1024,
+                 enabled: bool = True):
+        self.enabled = enabled
+        self.max_disk_bytes = int(max_disk_bytes)
+        self.max_memory_entries = int(max_memory_entries)
+        self.max_memory_bytes = int(max_memory_bytes)
+        self.db_path = None
+        if cache_dir:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            self.db_path = os.path.join(cache_dir, "analysis_cache.sqlite3")
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0,
+            "stores": 0, "memory_evictions": 0, "disk_evictions": 0, "errors": 0
+        }
+        if self.enabled and self.db_path:
+            self._init_db()
+
+    # --- keys ---------------------------------------------------------------
+
+    @staticmethod
+    def make_key(namespace: str, audio_data: Audio, params: Dict[str, Any]) -> str:
+        return f"{namespace}:{audio_digest(audio_data)}:{params_digest(namespace, params)}"
+
+    # --- public API ---------------------------------------------------------
+
+    def get(self, namespace: str, audio_data: Audio, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return a fresh copy of the cached result, or None on a miss"""
+        if not self.enabled:
+            return None
+        return self.get_by_key(self.make_key(namespace, audio_data, params))
+
+    def put(self, namespace: str, audio_data: Audio, params: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Store a result in both tiers"""
+        if not self.enabled:
+            return
+        self.put_by_key(self.make_key(namespace, audio_data, params), result)
+
+    def get_or_compute(self, namespace: str, audio_data: Audio, params: Dict[str, Any],
+                       compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Return the cached result or compute, store and return it"""
+        if not self.enabled:
+            return compute()
+        key = self.make_key(namespace, audio_data, params)
+        cached = self.get_by_key(key)
+        if cached is not None:
+            return cached
+        result = compute()
+        self.put_by_key(key, result)
+        return result
+
+    def get_by_key(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return json.loads(payload)
+
+        payload = self._disk_get(key)
+        if payload is None:
+            with self._lock:
+                self._counters["misses"] += 1
+            return None
+
+        with self._lock:
+            self._counters["disk_hits"] += 1
+            self._memory_put(key, payload)
+        return json.loads(payload)
+
+    def put_by_key(self, key: str, result: Dict[str, Any]) -> None:
+        try:
+            payload = json.dumps(result, default=_to_json).encode("utf-8")
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Analysis result not cacheable for {key}: {e}")
+            with self._lock:
+                self._counters["errors"] += 1
+            return
+
+        with self._lock:
+            self._counters["stores"] += 1
+            self._memory_put(key, payload)
+        self._disk_put(key, payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier usage, for sizing the cache"""
+        with self._lock:
+            counters = dict(self._counters)
+            memory_entries, memory_bytes = len(self._memory), self._memory_bytes
+
+        disk_entries, disk_bytes = 0, 0
+        if self.enabled and self.db_path:
+            try:
+                with self._connect() as conn:
+                    disk_entries, disk_bytes = conn.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                    ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Analysis cache stats unavailable: {e}")
+
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        return {
+            "enabled": self.enabled,
+            **counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": memory_entries,
+            "memory_bytes": memory_bytes,
+            "max_memory_entries": self.max_memory_entries,
+            "max_memory_bytes": self.max_memory_bytes,
+            "disk_entries": disk_entries,
+            "disk_bytes": disk_bytes,
+            "max_disk_bytes": self.max_disk_bytes,
+        }
+
+    # --- memory tier (call with self._lock held) -----------------------------
+
+    def _memory_put(self, key: str, payload: bytes) -> None:
+        if len(payload) > self.max_memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = payload
+        self._memory_bytes += len(payload)
+        while self._memory and (len(self._memory) > self.max_memory_entries
+                                or self._memory_bytes > self.max_memory_bytes):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._counters["memory_evictions"] += 1
+
+    # --- disk tier ----------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_db(self) -> None:
+        try:
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                    "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)")
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis cache disk tier disabled ({self.db_path}): {e}")
+            self.db_path = None
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        if not self.db_path:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            return zlib.decompress(row[0])
+        except (sqlite3.Error, zlib.error) as e:
+            logger.warning(f"Analysis cache read failed for {key}: {e}")
+            with self._lock:
+                self._counters["errors"] += 1
+            return None
+
+    def _disk_put(self, key: str, payload: bytes) -> None:
+        if not self.db_path:
+            return
+        blob = zlib.compress(payload, 6)
+        if len(blob) > self.max_disk_bytes:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, blob, len(blob), time.time())
+                )
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                evicted = 0
+                while total > self.max_disk_bytes:
+                    row = conn.execute(
+                        "SELECT key, size FROM entries ORDER BY last_access ASC LIMIT 1"
+                    ).fetchone()
+                    if row is None:
+                        break
+                    conn.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+                    total -= row[1]
+                    evicted += 1
+            if evicted:
+                with self._lock:
+                    self._counters["disk_evictions"] += evicted
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis cache write failed for {key}: {e}")
+            with self._lock:
+                self._counters["errors"] += 1
+
+
+# Global cache instance
+analysis_cache = AnalysisCache(
+    cache_dir=settings.analysis_cache_dir,
+    max_disk_bytes=settings.analysis_cache_max_bytes,
+    max_memory_entries=settings.analysis_cache_memory_entries,
+    max_memory_bytes=settings.analysis_cache_memory_bytes,
+    enabled=settings.analysis_cache_enabled,
+)
@@ -0,0 +1,193 @@
+"""
+Process-pool engine for CPU-bound music analysis
+
+librosa, ruptures and HPSS hold the GIL for most of their run time, so running
+them on the event loop (or in a thread) stalls every other request on the
+worker. AnalysisEngine runs analysis callables in a managed ProcessPoolExecutor
+whose workers pre-import the audio stack, and awaits them with a per-task
+timeout.
+
+A timed-out task cannot be interrupted inside its worker, so the pool it
+runs in is retired: new tasks go to a fresh pool right away, and the old
+pool's worker processes are killed as soon as its other tasks have finished.
+A hung decode therefore never holds a worker for longer than the timeout.
+"""
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Set
+
+from api.config.logging import get_service_logger
+from api.config.settings import settings
+
+logger = get_service_logger("analysis_service")
+
+
+class AnalysisTimeoutError(Exception):
+    """Raised when an analysis task exceeds its timeout"""
+    pass
+
+
+class AnalysisTaskError(Exception):
+    """Picklable error carrying an HTTP status out of a worker process"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _warm_worker():
+    """Process initializer: import the audio stack and compile librosa's numba kernels once"""
+    try:
+        import numpy as np
+        import librosa
+        import ruptures  # noqa: F401
+        import soundfile  # noqa: F401
+        from scipy.signal import find_peaks  # noqa: F401
+
+        y = 0.1 * np.random.default_rng(0).standard_normal(22050 * 2).astype(np.float32)
+        librosa.beat.beat_track(y=y, sr=22050)
+    except Exception as e:
+        print(f"⚠️ Analysis worker warm-up incomplete: {e}")
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class AnalysisEngine:
+    """Managed process pool for analysis tasks
+
+    max_workers=0 runs tasks on the loop's default thread executor instead
+    (no process isolation; useful for development and constrained hosts).
+    """
+
+    def __init__(self, max_workers: int = 2, task_timeout: float = 600.0, warm: bool = True):
+        self.max_workers = max(0, int(max_workers))
+        self.task_timeout = float(task_timeout)
+        self.warm = warm
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # In-flight and timed-out tasks per pool; a retired pool is killed once all it runs has timed out
+        self._tasks: Dict[ProcessPoolExecutor, Set[Future]] = {}
+        self._hung: Dict[ProcessPoolExecutor, Set[Future]] = {}
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "timed_out": 0, "pool_restarts": 0}
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.max_workers == 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    # spawn: never fork a process that is running an event loop and threads
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker if self.warm else None,
+                )
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._stats["pool_restarts"] += 1
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, executor: ProcessPoolExecutor, call: Callable[[], Any]) -> Future:
+        task = executor.submit(call)
+        with self._lock:
+            self._tasks.setdefault(executor, set()).add(task)
+        task.add_done_callback(functools.partial(self._task_done, executor))
+        return task
+
+    def _task_done(self, executor: ProcessPoolExecutor, task: Future) -> None:
+        with self._lock:
+            self._tasks.get(executor, set()).discard(task)
+        self._kill_if_idle(executor)
+
+    def _retire_executor(self, executor: ProcessPoolExecutor, task: Future) -> None:
+        """Route new tasks to a fresh pool; kill this one once its remaining tasks are all timed out"""
+        with self._lock:
+            self._hung.setdefault(executor, set()).add(task)
+            if self._executor is executor:
+                self._executor = None
+                self._stats["pool_restarts"] += 1
+        self._kill_if_idle(executor)
+
+    def _kill_if_idle(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            hung = self._hung.get(executor)
+            if hung is None or not self._tasks.get(executor, set()) <= hung:
+                return
+            del self._hung[executor]
+            self._tasks.pop(executor, None)
+        logger.warning(f"Killing {len(hung)} hung analysis task(s)")
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def start(self) -> None:
+        """Spawn and warm every worker up front so the first requests don't pay for it"""
+        executor = self._get_executor()
+        if executor is None:
+            return
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*[loop.run_in_executor(executor, _ping) for _ in range(self.max_workers)])
+        logger.info(f"Analysis engine ready with {len(set(pids))} worker process(es)")
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run a picklable callable in the pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        timeout = self.task_timeout if timeout is None else timeout
+
+        self._stats["submitted"] += 1
+        call = functools.partial(fn, *args, **kwargs)
+        task = None if executor is None else self._submit(executor, call)
+        future = loop.run_in_executor(None, call) if task is None else asyncio.wrap_future(task)
+        try:
+            result = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._stats["timed_out"] += 1
+            if task is not None and not task.cancel() and not task.done():
+                # Already running: the worker cannot be interrupted, only killed with its pool
+                self._retire_executor(executor, task)
+            raise AnalysisTimeoutError(f"Analysis exceeded {timeout:.0f}s timeout")
+        except BrokenProcessPool:
+            self._stats["failed"] += 1
+            logger.error("Analysis worker process died; restarting pool")
+            self._reset_executor()
+            raise
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+        self._stats["completed"] += 1
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._tasks.clear()
+            self._hung.clear()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "task_timeout": self.task_timeout,
+            "running": self._executor is not None,
+            **self._stats,
+        }
+
+
+# Global engine instance
+analysis_engine = AnalysisEngine(
+    max_workers=settings.analysis_workers,
+    task_timeout=settings.analysis_task_timeout,
+)
@@ -5,33 +5,59 @@ import json
 import os
 from typing import Dict, Any, Optional, List, Union
 import sys
+import time
 import os
 
 # Conditional imports for Vercel compatibility
 try:
     import numpy as np
-    import librosa
     from mutagen import File as MutagenFile
-    ML_AVAILABLE = True
-    print(f"✅ ML libraries loaded successfully: numpy={np.__version__}, librosa={librosa.__version__}")
 except ImportError as e:
     np = None
-    librosa = None
     MutagenFile = None
-    ML_AVAILABLE = False
     print(f"❌ ML libraries import failed: {e}")
 
+from api.config.settings import settings
+from api.services.media.analysis_cache import analysis_cache, segmentation_params
+from api.services.utils.vercel_compatibility import LIBROSA_AVAILABLE
+from api.workflows.generator.feature_cache import feature_cache
+
 # Add the workflows/analyzer directory to the path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 analyzer_dir = os.path.join(current_dir, '..', '..', 'workflows', 'analyzer')
 sys.path.insert(0, analyzer_dir)
 
-# Try to import music analyzer with fallback
+FULL_ANALYSIS_PARAMS = segmentation_params(use_beat_energy=True, short_ma_beats=4, long_ma_beats=16, min_gap_seconds=11.0)
+LITE_ANALYSIS_PARAMS = {"engine": "lite", "min_gap_seconds": 11.0, "max_segments": 11}
+
+# librosa and the music analyzer are imported on first use (see _load_ml_stack): importing them
+# costs seconds of cold start, which select_analysis_engine answers with the lite analyzer meanwhile
+ML_AVAILABLE = np is not None and MutagenFile is not None and LIBROSA_AVAILABLE
+librosa = None
 analyze_audio_bytes = None
-if ML_AVAILABLE:
+analyze_audio_preview = None
+load_preview_context = None
+AudioContext = None
+StreamingAudioContext = None
+
+def _load_ml_stack() -> bool:
+    """Import librosa and the music analyzer (once); True when the full analyzer is usable"""
+    global librosa, analyze_audio_bytes, analyze_audio_preview, load_preview_context, AudioContext, StreamingAudioContext
+    if not ML_AVAILABLE:
+        return False
+    if analyze_audio_bytes is not None:
+        return True
+
+    try:
+        import librosa as _librosa
+    except ImportError as e:
+        print(f"❌ ML libraries import failed: {e}")
+        return False
+    print(f"✅ ML libraries loaded successfully: numpy={np.__version__}, librosa={_librosa.__version__}")
+
     print(f"🔍 Trying to import music_analyzer from: {analyzer_dir}")
     try:
-        from music_analyzer import analyze_audio_bytes
+        import music_analyzer
         print("✅ Successfully imported analyze_audio_bytes from music_analyzer")
     except ImportError as e:
         print(f"❌ Failed to import from music_analyzer: {e}")
@@ -43,11 +69,35 @@ if ML_AVAILABLE:
             spec = importlib.util.spec_from_file_location("music_analyzer", music_analyzer_path)
             music_analyzer = importlib.util.module_from_spec(spec)
             spec.loader.exec_module(music_analyzer)
-            analyze_audio_bytes = music_analyzer.analyze_audio_bytes
             print("✅ Successfully imported analyze_audio_bytes via direct import")
         except ImportError as e2:
             print(f"❌ Failed direct import: {e2}")
-            analyze_audio_bytes = None
+            return False
+
+    librosa = _librosa
+    analyze_audio_preview = music_analyzer.analyze_audio_preview
+    load_preview_context = music_analyzer.load_preview_context
+    AudioContext = music_analyzer.AudioContext
+    StreamingAudioContext = music_analyzer.StreamingAudioContext
+    analyze_audio_bytes = music_analyzer.analyze_audio_bytes
+    return True
+
+# The numpy-only lite analyzer works without librosa
+try:
+    import lite_analyzer
+except ImportError as e:
+    lite_analyzer = None
+    print(f"❌ Failed to import lite_analyzer: {e}")
+
+def wants_streaming(file_path: str) -> bool:
+    """Whether a recording is long enough to analyze block by block instead of decoding it whole"""
+    try:
+        import soundfile as sf
+        return sf.info(file_path).duration >= settings.analysis_streaming_min_seconds
+    except Exception:
+        # libsndfile cannot read it, so it cannot be streamed either; the in-memory path falls back to audioread
+        return False
+
 
 class AnalysisService:
     """Service for analyzing media files"""
@@ -77,8 +127,16 @@ class AnalysisService:
             title = name_without_ext.replace('_', ' ').replace('-', ' ')
             return ' '.join(word.capitalize() for word in title.split())
 
-    def analyze_audio_features(self, y: Union[Any, None], sr: int) -> Dict[str, Any]:
-        """Extract essential audio features from audio data"""
+    def analyze_audio_features(self, y: Union[Any, None], sr: Optional[int] = None) -> Dict[str, Any]:
+        """Extract essential audio features from audio data or a shared AudioContext"""
+        _load_ml_stack()
+        if AudioContext is not None and isinstance(y, AudioContext):
+            try:
+                return y.summary_features()
+            except Exception as e:
+                print(f"Error analyzing audio: {e}")
+                y, sr = y.samples, y.sr
+
         if not ML_AVAILABLE or librosa is None or np is None:
             return {
                 'duration': len(y) / sr if y is not None else 0,
@@ -130,6 +188,14 @@ class AnalysisService:
                 'error': str(e)
             }
 
+    def analyze_segment_features(self, ctx, start_time: float, end_time: float) -> Dict[str, Any]:
+        """Segment features as range reductions over the track's frame-level features"""
+        try:
+            return ctx.segment_features(start_time, end_time)
+        except Exception as e:
+            print(f"Error analyzing segment {start_time:.2f}-{end_time:.2f}s: {e}")
+            return self.analyze_audio_features(ctx.segment(start_time, end_time), ctx.sr)
+
     def generate_music_descriptors(self, features: Dict[str, Any]) -> List[str]:
         """Generate human-readable music descriptors including Long MA characteristics"""
         descriptors = []
@@ -224,15 +290,124 @@ class AnalysisService:
 
         return descriptors
 
+    def analyze_music_preview(self, file_path: str) -> Dict[str, Any]:
+        """Fast first-pass analysis (quality "preview") to show while the full analysis runs"""
+        if not _load_ml_stack():
+            return self.analyze_music(file_path)
+
+        try:
+            title = self.extract_title(file_path)
+
+            with open(file_path, 'rb') as audio_file:
+                audio_data = audio_file.read()
+
+            # A full result for this audio already exists: no need for a preview
+            cached = analysis_cache.get("analyze_music", audio_data, FULL_ANALYSIS_PARAMS)
+            if cached is not None:
+                cached['title'] = title
+                cached['quality'] = 'full'
+                return cached
+
+            ctx = load_preview_context(audio_data, source=file_path)
+            result = analyze_audio_preview(ctx, min_gap_seconds=11.0)
+            result['title'] = title
+
+            # Whole-track features that need neither HPSS nor a tempogram
+            result['audio_features'] = {
+                'duration': ctx.duration,
+                'tempo': result['tempo'],
+                'spectral_centroid': float(np.mean(librosa.feature.spectral_centroid(S=ctx.magnitude, sr=ctx.sr)[0])),
+                'rms_energy': float(np.mean(ctx.rms) * ctx.peak),
+            }
+            # Descriptors depend on the harmonic ratio; they arrive with the full analysis
+            result['music_descriptors'] = []
+
+            segments_sec = result.get('segments_sec', [])
+            result['segments'] = [
+                {
+                    'segment_index': i,
+                    'start_time': segments_sec[i],
+                    'end_time': segments_sec[i + 1],
+                    'duration': segments_sec[i + 1] - segments_sec[i]
+                }
+                for i in range(len(segments_sec) - 1)
+            ]
+            result['segment_analysis'] = []
+            return result
+
+        except FileNotFoundError:
+            return {"error": f"Audio file not found: {file_path}"}
+        except Exception as e:
+            import traceback
+            error_details = traceback.format_exc()
+            return {"error": f"Preview analysis failed: {str(e)}", "traceback": error_details}
+
+    def analyze_music_lite(self, file_path: str) -> Dict[str, Any]:
+        """numpy-only analysis (quality "lite") for cold-start workers or hosts without librosa"""
+        if lite_analyzer is None:
+            return {"error": "Lite analyzer not available"}
+
+        try:
+            title = self.extract_title(file_path)
+
+            with open(file_path, 'rb') as audio_file:
+                audio_data = audio_file.read()
+
+            # A full result for this audio already exists: serve that instead
+            cached = analysis_cache.get("analyze_music", audio_data, FULL_ANALYSIS_PARAMS)
+            if cached is not None:
+                cached['title'] = title
+                cached['quality'] = 'full'
+                return cached
+
+            result = analysis_cache.get_or_compute(
+                "analyze_music_lite", audio_data, LITE_ANALYSIS_PARAMS,
+                lambda: lite_analyzer.analyze_audio_bytes(
+                    audio_data,
+                    audio_file=os.path.basename(file_path),
+                    min_gap_seconds=LITE_ANALYSIS_PARAMS["min_gap_seconds"],
+                    max_segments=LITE_ANALYSIS_PARAMS["max_segments"],
+                    include_features=True
+                )
+            )
+            result['title'] = title
+            result['quality'] = 'lite'
+            # Descriptors depend on the harmonic ratio, which the lite analyzer does not compute
+            result['music_descriptors'] = []
+
+            segments_sec = result.get('segments_sec', [])
+            result['segments'] = [
+                {
+                    'segment_index': i,
+                    'start_time': segments_sec[i],
+                    'end_time': segments_sec[i + 1],
+                    'duration': segments_sec[i + 1] - segments_sec[i]
+                }
+                for i in range(len(segments_sec) - 1)
+            ]
+            result['segment_analysis'] = []
+            return result
+
+        except FileNotFoundError:
+            return {"error": f"Audio file not found: {file_path}"}
+        except Exception as e:
+            import traceback
+            error_details = traceback.format_exc()
+            return {"error": f"Lite analysis failed: {str(e)}", "traceback": error_details}
+
     def analyze_music(self, file_path: str) -> Dict[str, Any]:
         """Analyze music file and return analysis results"""
         try:
             # Extract title
             title = self.extract_title(file_path)
 
-            # Check if ML libraries are available
+            # Check if ML libraries are available (imports them on the first full analysis)
+            ml_ready = _load_ml_stack()
             print(f"🔍 Analysis check: ML_AVAILABLE={ML_AVAILABLE}, analyze_audio_bytes={analyze_audio_bytes is not None}")
-            if not ML_AVAILABLE:
+            if not ml_ready and lite_analyzer is not None:
+                print("⚠️ ML libraries not available - using the lite analyzer")
+                return self.analyze_music_lite(file_path)
+            if not ml_ready:
                 print("⚠️ Using fallback analysis - ML libraries not available")
                 # Use fallback analysis
                 from api.services.utils.vercel_compatibility import get_analysis_service
@@ -256,56 +431,48 @@ class AnalysisService:
                         }
                     }
             
-            # If analyze_audio_bytes is not available, try to import it directly
-            if analyze_audio_bytes is None:
-                print("🔧 analyze_audio_bytes not available, trying direct import...")
-                try:
-                    import sys
-                    import os
-                    current_dir = os.path.dirname(os.path.abspath(__file__))
-                    analyzer_dir = os.path.join(current_dir, '..', '..', 'workflows', 'analyzer')
-                    sys.path.insert(0, analyzer_dir)
-                    from music_analyzer import analyze_audio_bytes
-                    print("✅ Successfully imported analyze_audio_bytes directly")
-                except ImportError as e:
-                    print(f"❌ Failed to import analyze_audio_bytes: {e}")
-                    # Fall back to basic analysis
-                    return {
-                        'title': title,
-                        'analysis_type': 'basic_fallback',
-                        'message': f'Music analyzer not available: {e}',
-                        'audio_features': {
-                            'duration': 0,
-                            'tempo': 120.0,
-                            'spectral_centroid': 0.0,
-                            'rms_energy': 0.0,
-                            'harmonic_ratio': 0.5
-                        }
-                    }
-
-            # Read audio file as bytes
-            with open(file_path, 'rb') as audio_file:
-                audio_data = audio_file.read()
-
-            # Load audio for feature analysis
-            y, sr = librosa.load(file_path, sr=22050)
+            # Long recordings are streamed from disk: key the cache on the file digest instead of reading the bytes
+            streaming = wants_streaming(file_path)
+            if streaming:
+                audio_data = feature_cache.digest(file_path)
+            else:
+                with open(file_path, 'rb') as audio_file:
+                    audio_data = audio_file.read()
+
+            # Identical audio was analyzed before: return the stored result
+            params = FULL_ANALYSIS_PARAMS
+            cached = analysis_cache.get("analyze_music", audio_data, params)
+            if cached is not None:
+                cached['title'] = title
+                cached['quality'] = 'full'
+                return cached
+
+            # Decode once; segmentation, features and segment slices share this context
+            if streaming:
+                ctx = StreamingAudioContext.from_file(file_path, sr=22050)
+            else:
+                ctx = AudioContext.from_bytes(audio_data, sr=22050, source=file_path)
 
             # Analyze using the music analyzer
-            result = analyze_audio_bytes(
-                data=audio_data,
-                create_plot=False,  # No visualization, just return dictionary
-                audio_file=os.path.basename(file_path),
-                use_beat_energy=True,
-                short_ma_beats=4,
-                long_ma_beats=16,
-                min_gap_seconds=11.0
+            result = analysis_cache.get_or_compute(
+                "segmentation", audio_data, params,
+                lambda: analyze_audio_bytes(
+                    data=ctx,
+                    create_plot=False,  # No visualization, just return dictionary
+                    audio_file=os.path.basename(file_path),
+                    use_beat_energy=True,
+                    short_ma_beats=4,
+                    long_ma_beats=16,
+                    min_gap_seconds=11.0
+                )
             )
 
             # Add title to result
             result['title'] = title
+            result['quality'] = 'full'
 
             # Analyze overall audio features
-            overall_features = self.analyze_audio_features(y, sr)
+            overall_features = self.analyze_audio_features(ctx)
             result['audio_features'] = overall_features
 
             # Generate music descriptors for overall track
@@ -330,14 +497,9 @@ class AnalysisService:
                 }
                 segments.append(segment)
 
-                # Extract segment audio for analysis
-                start_frame = int(start_time * sr)
-                end_frame = int(end_time * sr)
-                segment_audio = y[start_frame:end_frame]
-
-                if len(segment_audio) > 0:
-                    # Analyze segment features
-                    segment_features = self.analyze_audio_features(segment_audio, sr)
+                if end_time > start_time:
+                    # Reduce the whole-track frame features over the segment's frame range
+                    segment_features = self.analyze_segment_features(ctx, start_time, end_time)
                     segment_features['start_time'] = start_time
                     segment_features['end_time'] = end_time
                     segment_features['duration'] = end_time - start_time
@@ -358,6 +520,8 @@ class AnalysisService:
             # Keep segments_sec for backward compatibility
             result['segments_sec'] = segments_sec
 
+            analysis_cache.put("analyze_music", audio_data, params, result)
+
             # Return the enhanced analysis result dictionary
             return result
 
@@ -424,3 +588,25 @@ class AnalysisService:
 
 # Global instance
 analysis_service = AnalysisService()
+
+
+def run_music_analysis(file_path: str) -> Dict[str, Any]:
+    """Picklable entry point for running the full analysis in an analysis worker (only the path is sent)"""
+    return analysis_service.analyze_music(file_path)
+
+
+def run_batch_analysis(file_path: str) -> Dict[str, Any]:
+    """Picklable batch entry point: full analysis plus description, with worker-side stage timings"""
+    started_at = time.time()
+    analysis_result = analysis_service.analyze_music(file_path)
+    analyzed_at = time.time()
+    description = analysis_service.generate_music_description(analysis_result)
+    return {
+        "analysis": analysis_result,
+        "description": description,
+        "started_at": started_at,
+        "timings": {
+            "analysis": analyzed_at - started_at,
+            "describe": time.time() - analyzed_at,
+        },
+    }
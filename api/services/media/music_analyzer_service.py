@@ -5,29 +5,31 @@ Combines all music analysis capabilities into a single FastAPI service
 
 import os
 import json
+import importlib.util
 import tempfile
 from typing import Dict, List, Any, Optional
 from fastapi import HTTPException, UploadFile
 import warnings
+
+from api.services.media.analysis_cache import analysis_cache, segmentation_params
+from api.services.media.analysis_engine import analysis_engine, AnalysisTaskError, AnalysisTimeoutError
+from api.services.media.analysis_service import wants_streaming
+from api.services.utils.vercel_compatibility import LIBROSA_AVAILABLE
+from api.workflows.generator.feature_cache import feature_cache
 warnings.filterwarnings('ignore')
 
-# Conditional imports for Vercel compatibility
+# Conditional imports for Vercel compatibility. librosa and scipy are imported where they are
+# used: importing them costs seconds of cold start (see select_analysis_engine)
 try:
-    import librosa
     import numpy as np
     import mutagen
     import wave
-    from scipy.signal import find_peaks
-    from scipy.ndimage import gaussian_filter1d
-    CORE_ML_AVAILABLE = True
-    print(f"✅ Music analyzer ML libraries loaded: librosa={librosa.__version__}, numpy={np.__version__}")
+    CORE_ML_AVAILABLE = LIBROSA_AVAILABLE and importlib.util.find_spec("scipy") is not None
+    print(f"✅ Music analyzer ML libraries located: librosa={LIBROSA_AVAILABLE}, numpy={np.__version__}")
 except ImportError as e:
-    librosa = None
     np = None
     mutagen = None
     wave = None
-    find_peaks = None
-    gaussian_filter1d = None
     CORE_ML_AVAILABLE = False
     print(f"❌ Music analyzer ML libraries import failed: {e}")
 
@@ -42,6 +44,47 @@ except ImportError:
 # ML_AVAILABLE is True if we have the core libraries needed for comprehensive analysis
 ML_AVAILABLE = CORE_ML_AVAILABLE
 
+# Cache key parameters for the full comprehensive result
+COMPREHENSIVE_PARAMS = {
+    "segmentation": segmentation_params(use_beat_energy=True, short_ma_beats=4, long_ma_beats=16, min_gap_seconds=11.0),
+    "peaks": {"min_peaks": 2, "min_gap_seconds": 2.0},
+}
+
+def _load_music_analyzer():
+    """Import the music_analyzer workflow module (it lives outside the api package)"""
+    import sys
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    analyzer_dir = os.path.join(current_dir, '..', '..', 'workflows', 'analyzer')
+    if analyzer_dir not in sys.path:
+        sys.path.insert(0, analyzer_dir)
+
+    try:
+        import music_analyzer
+    except ImportError:
+        import importlib.util
+        spec = importlib.util.spec_from_file_location("music_analyzer", os.path.join(analyzer_dir, "music_analyzer.py"))
+        music_analyzer = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(music_analyzer)
+    return music_analyzer
+
+def load_audio_context(file_path: str, audio_data: Optional[bytes] = None, streaming: Optional[bool] = None):
+    """Decode a file once into a shared AudioContext, or None without the ML stack
+
+    Long recordings (see wants_streaming; decided from the file unless ``streaming``
+    is given) get a StreamingAudioContext, decoded block by block in bounded memory.
+    """
+    if not ML_AVAILABLE:
+        return None
+    music_analyzer = _load_music_analyzer()
+    if streaming is None:
+        streaming = audio_data is None and wants_streaming(file_path)
+    if streaming:
+        return music_analyzer.StreamingAudioContext.from_file(file_path)
+    AudioContext = music_analyzer.AudioContext
+    if audio_data is not None:
+        return AudioContext.from_bytes(audio_data, source=file_path)
+    return AudioContext.from_file(file_path)
+
 class MusicTheoryCategorizer:
     """Enhanced music theory analysis with comprehensive genre detection"""
 
@@ -85,8 +128,8 @@ class MusicTheoryCategorizer:
             }
         }
 
-    def extract_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Extract comprehensive metadata from audio file"""
+    def extract_metadata(self, file_path: str, ctx=None) -> Dict[str, Any]:
+        """Extract comprehensive metadata from audio file (ctx avoids re-decoding for the duration fallback)"""
         metadata = {
             'title': 'Unknown', 'artist': 'Unknown', 'album': 'Unknown',
             'genre': 'Unknown', 'year': 'Unknown', 'duration': 0,
@@ -129,13 +172,14 @@ class MusicTheoryCategorizer:
         except Exception as e:
             print(f"Metadata extraction failed: {e}")
 
-        # If duration is still 0, try to get it using librosa
+        # If duration is still 0, take it from the decoded audio
         if metadata['duration'] == 0:
             try:
-                import librosa
-                y, sr = librosa.load(file_path, sr=None)
-                metadata['duration'] = len(y) / sr
-                metadata['sample_rate'] = sr
+                if ctx is None:
+                    ctx = load_audio_context(file_path)
+                if ctx is not None:
+                    metadata['duration'] = ctx.native_duration
+                    metadata['sample_rate'] = ctx.native_sr
             except Exception as librosa_error:
                 print(f"Librosa duration calculation failed: {librosa_error}")
 
@@ -147,30 +191,14 @@ class MusicTheoryCategorizer:
 
         return metadata
 
-    def analyze_audio_features(self, file_path: str) -> Dict[str, Any]:
-        """Extract comprehensive audio features using librosa and music21"""
-        if not ML_AVAILABLE or np is None:
+    def analyze_audio_features(self, ctx) -> Dict[str, Any]:
+        """Extract comprehensive audio features from a shared AudioContext using librosa and music21"""
+        if not ML_AVAILABLE or np is None or ctx is None:
             return {}
             
         try:
-            y, sr = librosa.load(file_path)
-            features = {}
-
-            features['duration'] = len(y) / sr
-            tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
-            features['tempo'] = float(tempo)
-
-            spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-            features['spectral_centroid'] = float(np.mean(spectral_centroids))
-
-            rms = librosa.feature.rms(y=y)[0]
-            features['rms_energy'] = float(np.mean(rms))
-
-            harmonic, percussive = librosa.effects.hpss(y)
-            features['harmonic_ratio'] = float(np.sum(harmonic**2) / (np.sum(harmonic**2) + np.sum(percussive**2)))
-
-            onset_frames = librosa.onset.onset_detect(y=y, sr=sr)
-            features['onset_rate'] = len(onset_frames) / (len(y) / sr)
+            features = ctx.summary_features()
+            file_path = ctx.source or ''
 
             # Music21 analysis (skip if file format is not supported or Music21 not available)
             if MUSIC21_AVAILABLE:
@@ -211,12 +239,32 @@ class MusicTheoryCategorizer:
             print(f"Error analyzing audio: {e}")
             return {}
 
+    def analyze_segment_features(self, ctx, start_time: float, end_time: float) -> Dict[str, Any]:
+        """Segment features as range reductions over the track's frame-level features"""
+        if not ML_AVAILABLE or np is None or ctx is None:
+            return {}
+
+        try:
+            features = ctx.segment_features(start_time, end_time)
+
+            # For segment analysis, we'll skip music21 analysis as it requires file paths
+            features['key'] = 'Unknown'
+            features['time_signature'] = 'Unknown'
+
+            return features
+
+        except Exception as e:
+            print(f"Error analyzing segment {start_time:.2f}-{end_time:.2f}s: {e}")
+            return self.analyze_audio_features_from_array(ctx.segment(start_time, end_time), ctx.sr)
+
     def analyze_audio_features_from_array(self, y, sr: int) -> Dict[str, Any]:
         """Extract comprehensive audio features from audio array using librosa"""
         if not ML_AVAILABLE or np is None:
             return {}
             
         try:
+            import librosa
+
             features = {}
 
             features['duration'] = len(y) / sr
@@ -299,29 +347,13 @@ class SimpleMusicAnalyzer:
             "Marches / Traditional Ensembles"
         ]
 
-    def analyze_audio_features(self, file_path: str) -> Dict[str, Any]:
-        """Extract essential audio features"""
-        if not ML_AVAILABLE or np is None:
+    def analyze_audio_features(self, ctx) -> Dict[str, Any]:
+        """Extract essential audio features from a shared AudioContext"""
+        if not ML_AVAILABLE or np is None or ctx is None:
             return {}
             
         try:
-            y, sr = librosa.load(file_path)
-            features = {}
-
-            features['duration'] = len(y) / sr
-            tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
-            features['tempo'] = float(tempo)
-
-            spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-            features['spectral_centroid'] = float(np.mean(spectral_centroids))
-
-            rms = librosa.feature.rms(y=y)[0]
-            features['rms_energy'] = float(np.mean(rms))
-
-            harmonic, percussive = librosa.effects.hpss(y)
-            features['harmonic_ratio'] = float(np.sum(harmonic**2) / (np.sum(harmonic**2) + np.sum(percussive**2)))
-
-            return features
+            return ctx.summary_features(include_onsets=False)
 
         except Exception as e:
             print(f"Error analyzing audio: {e}")
@@ -377,17 +409,26 @@ class SimpleMusicAnalyzer:
 class MusicPeakDetector:
     """Detect musical peaks and segments in audio"""
 
-    def detect_music_peaks(self, file_path: str, min_peaks: int = 2,
+    def detect_music_peaks(self, ctx, min_peaks: int = 2,
                           min_gap_seconds: float = 2.0) -> Dict[str, Any]:
         """Detect musical peaks using moving average difference method"""
-        if not ML_AVAILABLE or np is None or find_peaks is None or gaussian_filter1d is None:
+        if not ML_AVAILABLE or np is None or ctx is None:
             return {'peak_times': [], 'peak_scores': [], 'total_peaks': 0, 'analysis_duration': 0}
             
         try:
-            y, sr = librosa.load(file_path, sr=None)
+            import librosa
+            from scipy.ndimage import gaussian_filter1d
+            from scipy.signal import find_peaks
+
+            if ctx.streaming:
+                # No samples kept: use the context's own frame RMS (same 512-sample hop at its rate)
+                rms, sr = ctx.rms, ctx.sr
+            else:
+                # Peaks are measured at the file's native rate
+                y, sr = ctx.native, ctx.native_sr
+                rms = librosa.feature.rms(y=y, frame_length=1024, hop_length=512)[0]
 
             # RMS energy to dB
-            rms = librosa.feature.rms(y=y, frame_length=1024, hop_length=512)[0]
             rms_db = librosa.amplitude_to_db(rms, ref=np.max)
             rms_db = np.nan_to_num(rms_db, nan=np.min(rms_db))
 
@@ -423,7 +464,7 @@ class MusicPeakDetector:
                 'peak_times': peak_times.tolist(),
                 'peak_scores': peak_scores.tolist(),
                 'total_peaks': len(peak_times),
-                'analysis_duration': len(y) / sr
+                'analysis_duration': ctx.native_duration
             }
 
         except Exception as e:
@@ -438,6 +479,15 @@ class MusicAnalyzerService:
         self.simple_analyzer = SimpleMusicAnalyzer()
         self.peak_detector = MusicPeakDetector()
 
+    async def _dispatch(self, method_name: str, *args) -> Dict[str, Any]:
+        """Run a blocking analysis method in the analysis engine's worker pool"""
+        try:
+            return await analysis_engine.run(_run_service_method, method_name, *args)
+        except AnalysisTaskError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        except AnalysisTimeoutError as e:
+            raise HTTPException(status_code=504, detail=str(e))
+
     async def analyze_music_comprehensive(self, file_path: str) -> Dict[str, Any]:
         """Perform comprehensive music analysis including theory, genre, peaks, and segmentation"""
         try:
@@ -460,33 +510,46 @@ class MusicAnalyzerService:
                         'message': 'ML libraries not available, using basic analysis',
                         'error': 'Heavy ML libraries not available in Vercel environment'
                     }
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
-            # Read audio file as bytes for the complete workflow
-            with open(file_path, 'rb') as audio_file:
-                audio_data = audio_file.read()
-
-            # Use the complete music_analyzer workflow
-            import sys
-            import os
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            analyzer_dir = os.path.join(current_dir, '..', '..', 'workflows', 'analyzer')
-            sys.path.insert(0, analyzer_dir)
+        return await self._dispatch("_analyze_music_comprehensive", file_path)
 
-            try:
-                from music_analyzer import analyze_audio_bytes
-            except ImportError:
-                import importlib.util
-                spec = importlib.util.spec_from_file_location("music_analyzer", os.path.join(analyzer_dir, "music_analyzer.py"))
-                music_analyzer = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(music_analyzer)
-                analyze_audio_bytes = music_analyzer.analyze_audio_bytes
+    def _analyze_music_comprehensive(self, file_path: str) -> Dict[str, Any]:
+        """Blocking implementation of analyze_music_comprehensive; runs in an analysis worker"""
+        try:
+            # Long recordings are streamed from disk: key the cache on the file digest instead of reading the bytes
+            streaming = wants_streaming(file_path)
+            if streaming:
+                audio_data = feature_cache.digest(file_path)
+            else:
+                with open(file_path, 'rb') as audio_file:
+                    audio_data = audio_file.read()
+
+            # Identical audio was analyzed before: skip decoding entirely
+            cached = analysis_cache.get("comprehensive", audio_data, COMPREHENSIVE_PARAMS)
+            if cached is not None:
+                cached['file_path'] = file_path
+                return cached
+
+            # Decode once; every stage below shares this context
+            analyze_audio_bytes = _load_music_analyzer().analyze_audio_bytes
+            ctx = load_audio_context(file_path, None if streaming else audio_data, streaming=streaming)
+
+            def segment(**params):
+                return analysis_cache.get_or_compute(
+                    "segmentation", audio_data, segmentation_params(**params),
+                    lambda: analyze_audio_bytes(
+                        data=ctx,
+                        create_plot=False,  # No visualization for API
+                        audio_file=os.path.basename(file_path),
+                        **params
+                    )
+                )
 
             # Perform comprehensive analysis with segmentation
             try:
-                result = analyze_audio_bytes(
-                    data=audio_data,
-                    create_plot=False,  # No visualization for API
-                    audio_file=os.path.basename(file_path),
+                result = segment(
                     use_beat_energy=True,
                     short_ma_beats=4,
                     long_ma_beats=16,
@@ -496,10 +559,7 @@ class MusicAnalyzerService:
                 # If segmentation fails, try with simpler parameters
                 print(f"Segmentation failed with complex parameters: {e}")
                 print("Trying with simpler parameters...")
-                result = analyze_audio_bytes(
-                    data=audio_data,
-                    create_plot=False,  # No visualization for API
-                    audio_file=os.path.basename(file_path),
+                result = segment(
                     use_beat_energy=False,  # Disable beat energy segmentation
                     short_ma_beats=4,
                     long_ma_beats=16,
@@ -507,10 +567,10 @@ class MusicAnalyzerService:
                 )
 
             # Extract metadata using existing service
-            metadata = self.theory_categorizer.extract_metadata(file_path)
+            metadata = self.theory_categorizer.extract_metadata(file_path, ctx)
 
             # Calculate genre scores using existing service
-            features = self.theory_categorizer.analyze_audio_features(file_path)
+            features = self.theory_categorizer.analyze_audio_features(ctx)
             if not features:
                 raise HTTPException(status_code=400, detail="Could not analyze audio features")
 
@@ -522,7 +582,7 @@ class MusicAnalyzerService:
             confidence = sorted_scores[0][1] * 100 if sorted_scores else 0
 
             # Detect peaks using existing service
-            peak_analysis = self.peak_detector.detect_music_peaks(file_path)
+            peak_analysis = self.peak_detector.detect_music_peaks(ctx)
 
             # Process segments from segments_sec
             segments_sec = result.get('segments_sec', [])
@@ -530,10 +590,6 @@ class MusicAnalyzerService:
             segment_analysis = []
 
             if len(segments_sec) > 1:
-                # Load audio for segment analysis
-                import librosa
-                y, sr = librosa.load(file_path, sr=22050)
-
                 for i in range(len(segments_sec) - 1):
                     start_time = segments_sec[i]
                     end_time = segments_sec[i + 1]
@@ -547,14 +603,9 @@ class MusicAnalyzerService:
                     }
                     segments.append(segment)
 
-                    # Extract segment audio for analysis
-                    start_frame = int(start_time * sr)
-                    end_frame = int(end_time * sr)
-                    segment_audio = y[start_frame:end_frame]
-
-                    if len(segment_audio) > 0:
-                        # Analyze segment features using the theory categorizer
-                        segment_features = self.theory_categorizer.analyze_audio_features_from_array(segment_audio, sr)
+                    if end_time > start_time:
+                        # Reduce the whole-track frame features over the segment's frame range
+                        segment_features = self.theory_categorizer.analyze_segment_features(ctx, start_time, end_time)
                         if segment_features:
                             segment_features['start_time'] = start_time
                             segment_features['end_time'] = end_time
@@ -590,6 +641,7 @@ class MusicAnalyzerService:
                 'debug': result.get('debug', {})
             }
 
+            analysis_cache.put("comprehensive", audio_data, COMPREHENSIVE_PARAMS, comprehensive_result)
             return comprehensive_result
 
         except Exception as e:
@@ -601,12 +653,18 @@ class MusicAnalyzerService:
 
     async def analyze_music_simple(self, file_path: str) -> Dict[str, Any]:
         """Perform simplified music analysis focused on essential features"""
+        return await self._dispatch("_analyze_music_simple", file_path)
+
+    def _analyze_music_simple(self, file_path: str) -> Dict[str, Any]:
+        """Blocking implementation of analyze_music_simple; runs in an analysis worker"""
         try:
+            ctx = load_audio_context(file_path)
+
             # Extract basic metadata
-            metadata = self.theory_categorizer.extract_metadata(file_path)
+            metadata = self.theory_categorizer.extract_metadata(file_path, ctx)
 
             # Analyze audio features
-            features = self.simple_analyzer.analyze_audio_features(file_path)
+            features = self.simple_analyzer.analyze_audio_features(ctx)
             if not features:
                 raise HTTPException(status_code=400, detail="Could not analyze audio features")
 
@@ -627,8 +685,14 @@ class MusicAnalyzerService:
     async def detect_peaks_only(self, file_path: str, min_peaks: int = 2,
                                min_gap_seconds: float = 2.0) -> Dict[str, Any]:
         """Detect only musical peaks and segments"""
+        return await self._dispatch("_detect_peaks_only", file_path, min_peaks, min_gap_seconds)
+
+    def _detect_peaks_only(self, file_path: str, min_peaks: int = 2,
+                           min_gap_seconds: float = 2.0) -> Dict[str, Any]:
+        """Blocking implementation of detect_peaks_only; runs in an analysis worker"""
         try:
-            peak_analysis = self.peak_detector.detect_music_peaks(file_path, min_peaks, min_gap_seconds)
+            ctx = load_audio_context(file_path)
+            peak_analysis = self.peak_detector.detect_music_peaks(ctx, min_peaks, min_gap_seconds)
             return {
                 'file_path': file_path,
                 'peak_analysis': peak_analysis,
@@ -660,5 +724,13 @@ class MusicAnalyzerService:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"File analysis failed: {str(e)}")
 
+def _run_service_method(method_name: str, *args) -> Dict[str, Any]:
+    """Worker-process entry point: call a blocking MusicAnalyzerService method"""
+    try:
+        return getattr(music_analyzer_service, method_name)(*args)
+    except HTTPException as e:
+        # HTTPException does not survive pickling back to the parent process
+        raise AnalysisTaskError(e.status_code, e.detail) from None
+
 # Global service instance
 music_analyzer_service = MusicAnalyzerService()
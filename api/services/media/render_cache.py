@@ -0,0 +1,369 @@
+"""
+Content-addressed cache for rendered visualizer and particle videos
+
+Entries are keyed on the SHA-256 of the audio bytes plus a hash of the
+normalized render parameters (config with defaults resolved, resolution,
+fps, preview window) and the code version, so double clicks, retries and
+users sharing a template get the finished file back instead of a new
+render. The videos live in object storage (S3, or a local directory in
+development); a SQLite index holds each entry's size and last access for
+byte-budgeted LRU eviction. Identical renders running at the same time in
+this process are coalesced: the first one renders, the others wait for it
+and copy its result.
+"""
+import dataclasses
+import functools
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from api.config.logging import get_service_logger
+from api.config.settings import settings
+
+logger = get_service_logger("render_cache")
+
+# Bump when rendered output changes in a way the generator sources do not capture
+RENDER_CACHE_VERSION = 1
+
+GENERATOR_DIR = Path(__file__).resolve().parents[2] / "workflows" / "generator"
+
+
+@functools.lru_cache(maxsize=None)
+def generator_code_version() -> str:
+    """Hash of the generator sources, so any change to the drawing code invalidates old renders"""
+    digest = hashlib.sha256(str(RENDER_CACHE_VERSION).encode())
+    for path in sorted(GENERATOR_DIR.rglob("*.py")):
+        digest.update(str(path.relative_to(GENERATOR_DIR)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def normalize_params(value: Any) -> Any:
+    """JSON-ready canonical form: enums by value, configs as dicts, tuples as lists, every number as float"""
+    if isinstance(value, Enum):
+        return value.value
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return normalize_params(dataclasses.asdict(value))
+    if isinstance(value, dict):
+        return {str(k): normalize_params(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_params(v) for v in value]
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)  # 3 and 3.0 render the same
+    if hasattr(value, "item"):  # numpy scalars
+        return normalize_params(value.item())
+    if hasattr(value, "__dict__"):
+        return normalize_params(vars(value))
+    return str(value)
+
+
+def params_digest(namespace: str, params: Dict[str, Any]) -> str:
+    """Stable hash of a render namespace, its normalized parameters and the code version"""
+    canonical = json.dumps(
+        {"namespace": namespace, "code_version": generator_code_version(), "params": normalize_params(params)},
+        sort_keys=True
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LocalRenderStore:
+    """Cached renders as files under a directory"""
+
+    def __init__(self, root: str):
+        self.root = root
+        Path(root).mkdir(parents=True, exist_ok=True)
+
+    def put(self, object_key: str, src_path: str) -> None:
+        target = os.path.join(self.root, object_key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp = f"{target}.{threading.get_ident()}.tmp"
+        shutil.copyfile(src_path, temp)
+        os.replace(temp, target)
+
+    def get(self, object_key: str, dest_path: str) -> bool:
+        source = os.path.join(self.root, object_key)
+        if not os.path.exists(source):
+            return False
+        shutil.copyfile(source, dest_path)
+        return True
+
+    def delete(self, object_key: str) -> None:
+        try:
+            os.remove(os.path.join(self.root, object_key))
+        except FileNotFoundError:
+            pass
+
+
+class S3RenderStore:
+    """Cached renders as objects in the application bucket"""
+
+    def __init__(self, storage):
+        self.storage = storage  # api.storage.s3.S3Storage
+
+    def put(self, object_key: str, src_path: str) -> None:
+        self.storage.s3.upload_file(src_path, self.storage.bucket, object_key,
+                                    ExtraArgs={"ContentType": "video/mp4"})
+
+    def get(self, object_key: str, dest_path: str) -> bool:
+        if not self.storage.file_exists(object_key):
+            return False
+        self.storage.download_file(object_key, dest_path)
+        return True
+
+    def delete(self, object_key: str) -> None:
+        self.storage.delete_file(object_key)
+
+
+class RenderCache:
+    """Render outputs in object storage, indexed in SQLite with per-entry sizes and LRU eviction"""
+
+    def __init__(self, store, index_dir: str, max_bytes: int = 5 * 1024 ** 3,
+                 prefix: str = "cache/renders", enabled: bool = True):
+        self.store = store
+        self.enabled = enabled
+        self.max_bytes = int(max_bytes)
+        self.prefix = prefix.strip("/")
+        self.db_path = os.path.join(index_dir, "render_cache.sqlite3")
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._counters = {"hits": 0, "misses": 0, "coalesced": 0, "stores": 0, "evictions": 0, "errors": 0}
+        if self.enabled:
+            self._init_db()
+
+    # --- keys ---------------------------------------------------------------
+
+    @staticmethod
+    def make_key(namespace: str, audio: Optional[str], params: Dict[str, Any]) -> str:
+        """Key from a namespace ('visualizer', 'particles'), the audio SHA-256 (None without audio) and the parameters"""
+        return f"{namespace}:{audio or 'silent'}:{params_digest(namespace, params)}"
+
+    def object_key(self, key: str) -> str:
+        namespace, audio, params = key.split(":")
+        return "/".join(filter(None, [self.prefix, namespace, audio[:2], f"{audio}_{params[:32]}.mp4"]))
+
+    # --- public API ---------------------------------------------------------
+
+    def fetch(self, key: str, dest_path: str) -> bool:
+        """Copy the cached render to dest_path; False on a miss. Counts one lookup: call it once per request"""
+        found = self.probe(key, dest_path)
+        if self.enabled:
+            with self._lock:
+                self._counters["hits" if found else "misses"] += 1
+        return found
+
+    def probe(self, key: str, dest_path: str) -> bool:
+        """fetch() without counting a lookup, for re-checks within a request that was already counted"""
+        if not self.enabled or not self._index_touch(key):
+            return False
+        os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+        try:
+            found = self.store.get(self.object_key(key), dest_path)
+        except Exception as e:
+            logger.warning(f"Render cache read failed for {key}: {e}")
+            found = False
+            with self._lock:
+                self._counters["errors"] += 1
+        if not found:
+            # The object vanished behind the index's back
+            self._index_delete(key)
+        return found
+
+    def put(self, key: str, src_path: str) -> None:
+        """Upload a finished render and account for its size, evicting least recently used entries over budget"""
+        if not self.enabled:
+            return
+        size = os.path.getsize(src_path)
+        if size > self.max_bytes:
+            return
+        try:
+            self.store.put(self.object_key(key), src_path)
+        except Exception as e:
+            logger.warning(f"Render cache upload failed for {key}: {e}")
+            with self._lock:
+                self._counters["errors"] += 1
+            return
+        with self._lock:
+            self._counters["stores"] += 1
+        self._index_put(key, size)
+
+    def get_or_render(self, key: str, dest_path: str, render: Callable[[str], Any],
+                      counted: bool = False) -> Tuple[str, bool]:
+        """
+        The render for `key` at dest_path: copied from the cache, from a concurrent
+        identical render, or produced by render(dest_path) and stored.
+
+        Counts one lookup, unless `counted` says the caller already looked the
+        key up with fetch() for this request. Returns (dest_path, cached).
+        Blocking; call it from a worker thread.
+        """
+        if not self.enabled:
+            render(dest_path)
+            return dest_path, False
+        if (self.probe if counted else self.fetch)(key, dest_path):
+            return dest_path, True
+
+        with self._lock:
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                self._inflight[key] = owner = Future()
+        if inflight is not None:
+            with self._lock:
+                self._counters["coalesced"] += 1
+            inflight.result()  # re-raises the render's error
+            if self.probe(key, dest_path):
+                return dest_path, True
+            render(dest_path)  # the first render could not be stored (too large, storage down)
+            return dest_path, False
+
+        try:
+            # An identical render may have been stored between the lookup and registering this one
+            if self.probe(key, dest_path):
+                owner.set_result(dest_path)
+                return dest_path, True
+            render(dest_path)
+            self.put(key, dest_path)
+            owner.set_result(dest_path)
+            return dest_path, False
+        except BaseException as e:
+            owner.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        if not self.enabled:
+            return
+        with self._connect() as conn:
+            keys = [row[0] for row in conn.execute("SELECT key FROM entries")]
+            conn.execute("DELETE FROM entries")
+        for key in keys:
+            self._delete_object(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/coalescing counters and storage usage, for sizing the cache"""
+        with self._lock:
+            counters = dict(self._counters)
+            inflight = len(self._inflight)
+        entries, total = 0, 0
+        if self.enabled:
+            try:
+                with self._connect() as conn:
+                    entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Render cache stats unavailable: {e}")
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "enabled": self.enabled,
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+            "inflight": inflight,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+        }
+
+    # --- index --------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_db(self) -> None:
+        try:
+            Path(os.path.dirname(self.db_path)).mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    "key TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+                    "created REAL NOT NULL, last_access REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)")
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Render cache disabled ({self.db_path}): {e}")
+            self.enabled = False
+
+    def _index_touch(self, key: str) -> bool:
+        try:
+            with self._connect() as conn:
+                updated = conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)).rowcount
+            return updated > 0
+        except sqlite3.Error as e:
+            logger.warning(f"Render cache lookup failed for {key}: {e}")
+            with self._lock:
+                self._counters["errors"] += 1
+            return False
+
+    def _index_put(self, key: str, size: int) -> None:
+        evicted = []
+        try:
+            with self._connect() as conn:
+                now = time.time()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, size, created, last_access) VALUES (?, ?, ?, ?)",
+                    (key, size, now, now)
+                )
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                while total > self.max_bytes:
+                    row = conn.execute(
+                        "SELECT key, size FROM entries WHERE key != ? ORDER BY last_access ASC LIMIT 1", (key,)
+                    ).fetchone()
+                    if row is None:
+                        break
+                    conn.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+                    total -= row[1]
+                    evicted.append(row[0])
+        except sqlite3.Error as e:
+            logger.warning(f"Render cache index write failed for {key}: {e}")
+            with self._lock:
+                self._counters["errors"] += 1
+            return
+        for old in evicted:
+            self._delete_object(old)
+        if evicted:
+            with self._lock:
+                self._counters["evictions"] += len(evicted)
+
+    def _index_delete(self, key: str) -> None:
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning(f"Render cache index delete failed for {key}: {e}")
+
+    def _delete_object(self, key: str) -> None:
+        try:
+            self.store.delete(self.object_key(key))
+        except Exception as e:
+            logger.warning(f"Render cache delete failed for {key}: {e}")
+
+
+def _default_cache() -> RenderCache:
+    """Cache on the application bucket (RENDER_CACHE_BACKEND=s3) or under RENDER_CACHE_DIR"""
+    if settings.render_cache_backend == "s3":
+        from api.services.storage.storage_service import storage_service
+        store, prefix = S3RenderStore(storage_service.storage), settings.render_cache_s3_prefix
+    else:
+        store, prefix = LocalRenderStore(settings.render_cache_dir), "objects"
+    return RenderCache(
+        store=store,
+        index_dir=settings.render_cache_dir,
+        max_bytes=settings.render_cache_max_bytes,
+        prefix=prefix,
+        enabled=settings.render_cache_enabled,
+    )
+
+
+# Global cache instance
+render_cache = _default_cache()
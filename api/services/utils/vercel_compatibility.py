@@ -4,21 +4,21 @@ Provides fallback implementations when heavy libraries are not available
 """
 
 import os
+import sys
 import json
 import tempfile
+import threading
+import time
+import importlib.util
 from typing import Dict, List, Any, Optional, Union
 import warnings
 
 # Suppress warnings for cleaner logs
 warnings.filterwarnings('ignore')
 
-# Try to import heavy dependencies, fallback to None if not available
-try:
-    import librosa
-    LIBROSA_AVAILABLE = True
-except ImportError:
-    librosa = None
-    LIBROSA_AVAILABLE = False
+# librosa is only located here, not imported: importing it (and numba) costs
+# seconds of cold start, see start_librosa_import / select_analysis_engine
+LIBROSA_AVAILABLE = importlib.util.find_spec("librosa") is not None
 
 try:
     import music21
@@ -64,6 +64,89 @@ except ImportError:
     sf = None
     SOUNDFILE_AVAILABLE = False
 
+# Modules the full analyzer needs before its first request (librosa loads submodules lazily)
+LIBROSA_STACK = ("librosa", "librosa.beat", "librosa.onset", "librosa.feature", "scipy.signal")
+
+_librosa_import = {"started": None, "seconds": None, "error": None}
+_librosa_import_done = threading.Event()
+_librosa_import_lock = threading.Lock()
+
+
+def _import_librosa_stack():
+    started = time.perf_counter()
+    try:
+        for module in LIBROSA_STACK:
+            importlib.import_module(module)
+    except Exception as e:
+        _librosa_import["error"] = str(e)
+        print(f"❌ librosa import failed: {e}")
+    finally:
+        _librosa_import["seconds"] = time.perf_counter() - started
+        _librosa_import_done.set()
+        if _librosa_import["error"] is None:
+            print(f"✅ librosa stack imported in {_librosa_import['seconds']:.2f}s")
+
+
+def start_librosa_import():
+    """Begin importing the librosa stack in a background thread (once)"""
+    if not LIBROSA_AVAILABLE:
+        return
+    with _librosa_import_lock:
+        if _librosa_import["started"] is not None:
+            return
+        _librosa_import["started"] = time.perf_counter()
+    threading.Thread(target=_import_librosa_stack, name="librosa-import", daemon=True).start()
+
+
+def librosa_ready(budget: Optional[float] = None) -> bool:
+    """True once the librosa stack is imported; waits at most until ``budget`` seconds after the import began"""
+    if not LIBROSA_AVAILABLE:
+        return False
+    if budget is None:
+        from api.config.settings import settings
+        budget = settings.analysis_librosa_import_budget
+    start_librosa_import()
+    remaining = _librosa_import["started"] + budget - time.perf_counter()
+    _librosa_import_done.wait(max(0.0, remaining))
+    return _librosa_import_done.is_set() and _librosa_import["error"] is None
+
+
+def librosa_import_status() -> Dict[str, Any]:
+    return {
+        "available": LIBROSA_AVAILABLE,
+        "started": _librosa_import["started"] is not None,
+        "done": _librosa_import_done.is_set(),
+        "seconds": _librosa_import["seconds"],
+        "error": _librosa_import["error"],
+    }
+
+
+def select_analysis_engine(requested: str = "auto", budget: Optional[float] = None) -> str:
+    """Resolve a requested analysis engine ("auto", "full" or "lite") to "full" or "lite"
+
+    "auto" picks the librosa analyzer once its import has finished and the
+    lite analyzer while the import is still running past ``budget``.
+    Blocks for up to ``budget`` seconds; call it off the event loop.
+    """
+    if requested == "lite":
+        return "lite"
+    if requested == "full":
+        return "full" if LIBROSA_AVAILABLE else "lite"
+    return "full" if librosa_ready(budget) else "lite"
+
+
+def _load_lite_analyzer():
+    """Import the numpy-only lite analyzer (it lives outside the api package), or None"""
+    analyzer_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'workflows', 'analyzer')
+    if analyzer_dir not in sys.path:
+        sys.path.insert(0, analyzer_dir)
+    try:
+        import lite_analyzer
+        return lite_analyzer
+    except ImportError:
+        return None
+
+
 class VercelCompatibilityError(Exception):
     """Raised when a feature is not available in Vercel environment"""
     pass
@@ -192,6 +275,25 @@ class LightweightMusicAnalyzer:
             # Genre detection (simplified)
             genre = self._detect_genre_basic(file_path)
             
+            # Beats, tempo and segments from the numpy-only analyzer when it can run here
+            lite_analyzer = _load_lite_analyzer() if self.available.get('numpy') else None
+            if lite_analyzer is not None:
+                with open(file_path, 'rb') as audio_file:
+                    lite = lite_analyzer.analyze_audio_bytes(audio_file.read())
+                return {
+                    'basic_analysis': basic_analysis,
+                    'peak_analysis': peak_analysis,
+                    'genre': genre,
+                    'tempo': lite['tempo'],
+                    'duration': lite['duration'],
+                    'segments_sec': lite['segments_sec'],
+                    'beat_times_sec': lite['beat_times_sec'],
+                    'downbeats_sec': lite['downbeats_sec'],
+                    'analysis_type': 'comprehensive_lite',
+                    'ml_available': self.available,
+                    'message': 'Comprehensive analysis completed with the lite analyzer'
+                }
+
             # Tempo estimation (simplified)
             tempo = self._estimate_tempo_basic(file_path)
             
@@ -246,7 +348,7 @@ def get_analysis_service():
     core_libraries = ['librosa', 'numpy', 'scipy', 'soundfile']
     core_available = all(ml_available.get(lib, False) for lib in core_libraries)
     
-    if core_available:
+    if core_available and librosa_ready():
         # Core ML capabilities available
         try:
             from api.services.media.analysis_service import AnalysisService
@@ -264,7 +366,7 @@ def get_music_analyzer_service():
     core_libraries = ['librosa', 'numpy', 'scipy', 'soundfile']
     core_available = all(ml_available.get(lib, False) for lib in core_libraries)
     
-    if core_available:
+    if core_available and librosa_ready():
         # Core ML capabilities available
         try:
             from api.services.media.music_analyzer_service import MusicAnalyzerService
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Streaming batch analysis endpoint.
+
+POST /music/batch streams one "result" message per item as it completes
+(NDJSON lines, or SSE events) and finishes with a "summary" from
+_batch_summary. A failing item must not stop the others: it is reported
+with success false and counted in failed_analyses. Track results are
+persisted and every temporary file is removed, also when the client goes
+away mid-batch: then only after the worker still reading it has finished.
+"""
+
+import asyncio
+import importlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "clipizy_test.db"))
+os.environ.setdefault("ANALYSIS_CACHE_ENABLED", "false")
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi import FastAPI, UploadFile
+from fastapi.testclient import TestClient
+
+from api.db import Base, SessionLocal, engine, get_db
+from api.models import Project, Track, User
+from api.routers.auth.auth_router import get_current_user
+from api.services.media.analysis_engine import AnalysisEngine
+
+analysis_router = importlib.import_module("api.routers.media.analysis_router")  # the package re-exports the router under the module's name
+
+
+def _write_track(path: str, seconds: float = 40.0, sr: int = 22050):
+    """A tone with a noise click on every beat (120 BPM)"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sr)) / sr
+    y = 0.2 * np.sin(2 * np.pi * 220 * t)
+    for beat in np.arange(0, seconds, 0.5):
+        i0 = int(beat * sr)
+        burst = np.exp(-np.arange(1500) / 200.0) * rng.standard_normal(1500)
+        y[i0:i0 + len(burst)] += 0.5 * burst[:len(y) - i0]
+    sf.write(path, (0.5 * y).astype(np.float32), sr)
+
+
+@pytest.fixture(scope="module")
+def audio_path():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "song.wav")
+        _write_track(path)
+        yield path
+
+
+@pytest.fixture
+def client(monkeypatch, audio_path):
+    """The analysis routes on a fresh SQLite database with one track, analyzed on the thread executor"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(email="batch@example.com")
+    db.add(user)
+    db.flush()
+    project = Project(user_id=user.id, type="music-clip")
+    db.add(project)
+    db.flush()
+    track = Track(project_id=project.id, file_path="music/song.wav")
+    db.add(track)
+    db.commit()
+
+    local_paths = []
+
+    def download(file_path, local_path):
+        local_paths.append(local_path)
+        shutil.copyfile(audio_path, local_path)
+
+    monkeypatch.setattr(analysis_router.storage_service, "download_file_from_path", download)
+    monkeypatch.setattr(analysis_router, "analysis_engine", AnalysisEngine(max_workers=0))
+
+    app = FastAPI()
+    app.include_router(analysis_router.router, prefix="/api/analysis")
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        yield TestClient(app), str(track.id), local_paths
+    finally:
+        db.close()
+
+
+def _post_batch(http, track_id, stream_format):
+    # One stored track that analyzes, one upload that is not audio at all
+    return http.post("/api/analysis/music/batch", params={"stream_format": stream_format},
+                     data={"track_ids": [track_id]},
+                     files=[("files", ("broken.wav", io.BytesIO(b"not audio"), "audio/wav"))])
+
+
+def _check_messages(messages, track_id):
+    *results, summary = messages
+    assert [m["type"] for m in results] == ["result", "result"] and summary["type"] == "summary"
+
+    by_name = {m["filename"]: m for m in results}
+    ok, broken = by_name["song.wav"], by_name["broken.wav"]
+    assert ok["success"] and ok["track_id"] == track_id and ok["analysis"]["duration"] == pytest.approx(40.0, abs=0.1)
+    assert ok["timings"]["download"] > 0 and ok["timings"]["analysis"] > 0
+    assert not broken["success"] and broken["track_id"] is None and broken["error"]
+    assert set(broken["timings"]) == set(analysis_router.BATCH_STAGES)
+
+    assert (summary["total_tracks"], summary["successful_analyses"], summary["failed_analyses"]) == (2, 1, 1)
+    assert summary["tracks_per_minute"] > 0 and summary["stage_seconds_total"]["analysis"] > 0
+
+
+def test_ndjson_stream_reports_each_item_then_the_summary(client):
+    http, track_id, local_paths = client
+    response = _post_batch(http, track_id, "ndjson")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("application/x-ndjson")
+    _check_messages([json.loads(line) for line in response.text.splitlines()], track_id)
+
+    db = SessionLocal()
+    try:
+        stored = db.query(Track).filter(Track.id == track_id).first().analysis
+    finally:
+        db.close()
+    assert stored["quality"] == "full" and stored["description"]
+    assert local_paths and not any(os.path.exists(p) for p in local_paths)
+
+
+def test_sse_stream_names_each_event(client):
+    http, track_id, _ = client
+    response = _post_batch(http, track_id, "sse")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    assert [event for event, _ in events] == ["event: result", "event: result", "event: summary"]
+    _check_messages([json.loads(data[len("data: "):]) for _, data in events], track_id)
+
+
+def test_disconnect_keeps_files_until_running_workers_finish(monkeypatch):
+    """The client reads one result and leaves while the other items are still being analyzed"""
+    seen, finished = {}, threading.Event()
+
+    def slow_analysis(local_path):
+        started_at = time.time()
+        time.sleep(0.05 if local_path.endswith(".fast") else 0.5)
+        seen[local_path] = os.path.exists(local_path)
+        if len(seen) == 3:
+            finished.set()
+        return {"analysis": {"duration": 1.0}, "description": "", "started_at": started_at, "timings": {}}
+
+    monkeypatch.setattr(analysis_router, "analysis_engine", AnalysisEngine(max_workers=0))
+    monkeypatch.setattr(analysis_router, "run_batch_analysis", slow_analysis)
+
+    async def read_one_and_leave():
+        files = [UploadFile(io.BytesIO(b"audio"), filename=name) for name in ("a.fast", "b.slow", "c.slow")]
+        response = await analysis_router.analyze_music_batch(track_ids=[], files=files, stream_format="ndjson",
+                                                             db=None, current_user=None)
+        stream = response.body_iterator
+        first = json.loads(await stream.__anext__())
+        await stream.aclose()  # the client disconnected: remaining items are cancelled
+        assert first["filename"] == "a.fast" and first["success"]
+        assert len(seen) == 1
+        await asyncio.to_thread(finished.wait, 5)
+        await asyncio.sleep(0.05)  # done-callbacks run on the loop
+        return list(seen)
+
+    paths = asyncio.run(read_one_and_leave())
+    assert all(seen.values()), seen  # no worker lost its input to the cancellation
+    assert not any(os.path.exists(p) for p in paths)
+
+
+def test_batch_summary_counts_and_stage_means():
+    timings = dict.fromkeys(analysis_router.BATCH_STAGES, 0.0)
+    results = [
+        {"success": True, "timings": {**timings, "analysis": 3.0, "download": 1.0}},
+        {"success": True, "timings": {**timings, "analysis": 1.0}},
+        {"success": False, "timings": timings},
+    ]
+    summary = analysis_router._batch_summary(results, elapsed=30.0)
+    assert (summary["total_tracks"], summary["successful_analyses"], summary["failed_analyses"]) == (3, 2, 1)
+    assert summary["tracks_per_minute"] == 4.0
+    assert summary["stage_seconds_total"]["analysis"] == 4.0 and summary["stage_seconds_mean"]["download"] == pytest.approx(0.333)
+    assert analysis_router._batch_summary([], elapsed=0.0)["tracks_per_minute"] == 0.0
+
+
+if __name__ == "__main__":
+    print("🧪 ===== ANALYSIS BATCH TEST =====")
+    test_batch_summary_counts_and_stage_means()
+    print("✅ Batch summaries count results and average stage timings")
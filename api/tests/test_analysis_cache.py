@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Content-addressed analysis result cache.
+
+The memory tier must evict least recently used entries past its entry and
+byte bounds, a result must come back from the SQLite tier once the memory
+tier no longer holds it (a restarted process), keys must change with every
+segmentation parameter, and get() must hand out copies callers can modify.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "clipizy_test.db"))
+
+from api.services.media.analysis_cache import AnalysisCache, segmentation_params
+
+PARAMS = segmentation_params()
+
+
+def _result(i):
+    return {"duration": 180.0 + i, "segments_sec": [0.0, 42.5, 97.0], "peaks": [{"time": 12.0, "score": 0.9}]}
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = AnalysisCache(max_memory_entries=2)
+    for i in range(2):
+        cache.put("music", b"track-%d" % i, PARAMS, _result(i))
+    assert cache.get("music", b"track-0", PARAMS) == _result(0)  # track-0 is now the most recently used
+    cache.put("music", b"track-2", PARAMS, _result(2))
+
+    assert cache.get("music", b"track-1", PARAMS) is None
+    assert cache.get("music", b"track-0", PARAMS) == _result(0)
+    stats = cache.stats()
+    assert stats["memory_evictions"] == 1 and stats["memory_entries"] == 2 and stats["misses"] == 1
+
+    # The byte bound evicts as well, and an entry larger than the whole tier is not kept at all
+    small = AnalysisCache(max_memory_bytes=300)
+    for i in range(5):
+        small.put("music", b"track-%d" % i, PARAMS, _result(i))
+    assert small.stats()["memory_bytes"] <= 300 and small.stats()["memory_evictions"] >= 1
+    small.put("music", b"huge", PARAMS, {"samples": list(range(200))})
+    assert small.get("music", b"huge", PARAMS) is None
+
+
+def test_disk_tier_hit_after_memory_is_gone():
+    with tempfile.TemporaryDirectory() as tmp:
+        AnalysisCache(cache_dir=tmp).put("music", b"track", PARAMS, _result(0))
+
+        restarted = AnalysisCache(cache_dir=tmp)  # empty memory tier, same SQLite file
+        assert restarted.get("music", b"track", PARAMS) == _result(0)
+        assert restarted.get("music", b"track", PARAMS) == _result(0)
+        stats = restarted.stats()
+        assert stats["disk_hits"] == 1 and stats["memory_hits"] == 1 and stats["disk_entries"] == 1
+        assert 0 < stats["disk_bytes"] < len(str(_result(0)))  # stored zlib-compressed
+
+        restarted.clear()
+        assert AnalysisCache(cache_dir=tmp).get("music", b"track", PARAMS) is None
+
+
+def test_keys_follow_audio_namespace_and_segmentation_params():
+    key = AnalysisCache.make_key("music", b"track", PARAMS)
+    assert key == AnalysisCache.make_key("music", b"track", segmentation_params())
+    assert key != AnalysisCache.make_key("music", b"other", PARAMS)
+    assert key != AnalysisCache.make_key("simple", b"track", PARAMS)
+    for name, value in (("min_gap_seconds", 8.0), ("use_beat_energy", False), ("pelt_penalty", 3.0)):
+        assert key != AnalysisCache.make_key("music", b"track", segmentation_params(**{name: value})), name
+
+    cache = AnalysisCache()
+    cache.put("music", b"track", PARAMS, _result(0))
+    assert cache.get("music", b"track", segmentation_params(min_gap_seconds=8.0)) is None
+
+
+def test_get_returns_independent_copies():
+    cache = AnalysisCache()
+    result = _result(0)
+    cache.put("music", b"track", PARAMS, result)
+    result["segments_sec"].append(150.0)  # the stored entry is a snapshot
+
+    first = cache.get("music", b"track", PARAMS)
+    first["segments_sec"].clear()
+    first["peaks"][0]["score"] = 0.0
+    assert cache.get("music", b"track", PARAMS) == _result(0)
+
+    assert cache.get_or_compute("music", b"track", PARAMS, lambda: {"recomputed": True}) == _result(0)
+    assert AnalysisCache(enabled=False).get_or_compute("music", b"track", PARAMS, lambda: {"recomputed": True}) \
+        == {"recomputed": True}
+
+
+if __name__ == "__main__":
+    print("🧪 ===== ANALYSIS CACHE TEST =====")
+    test_memory_tier_evicts_least_recently_used()
+    test_disk_tier_hit_after_memory_is_gone()
+    test_keys_follow_audio_namespace_and_segmentation_params()
+    test_get_returns_independent_copies()
+    print("✅ Analysis results are cached in memory and SQLite and handed out as copies")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Event-loop responsiveness test for the process-pool analysis engine.
+
+Runs N simple music analyses concurrently through AnalysisEngine while a probe
+coroutine measures how late the event loop wakes it up. With the analysis off
+the loop, the lag must stay far below the duration of a single analysis. A
+task past its timeout must not keep its worker busy for the tasks after it.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "clipizy_test.db"))
+os.environ.setdefault("ANALYSIS_CACHE_ENABLED", "false")
+
+import numpy as np
+import soundfile as sf
+
+from api.services.media.analysis_engine import AnalysisEngine, AnalysisTimeoutError
+from api.services.media.music_analyzer_service import _run_service_method
+
+N_ANALYSES = 4
+PROBE_INTERVAL = 0.01
+MAX_LOOP_LAG = 0.25
+
+
+def _write_click_track(path: str, seconds: float = 20.0, bpm: float = 120.0, sr: int = 22050):
+    """Sine bed with noise bursts on every beat"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sr)) / sr
+    y = 0.2 * np.sin(2 * np.pi * 220 * t)
+    for beat in np.arange(0, seconds, 60.0 / bpm):
+        i0 = int(beat * sr)
+        burst = np.exp(-np.arange(1500) / 200.0) * rng.standard_normal(1500)
+        y[i0:i0 + len(burst)] += 0.6 * burst[:len(y) - i0]
+    sf.write(path, (0.5 * y).astype(np.float32), sr)
+
+
+async def _probe_loop_lag(stop: asyncio.Event) -> float:
+    """Largest delay between a requested wake-up and the actual one"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        worst = max(worst, time.perf_counter() - start - PROBE_INTERVAL)
+    return worst
+
+
+async def _run_concurrent_analyses(audio_path: str):
+    engine = AnalysisEngine(max_workers=2, task_timeout=300)
+    try:
+        await engine.start()
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe_loop_lag(stop))
+        started = time.perf_counter()
+        results = await asyncio.gather(*[
+            engine.run(_run_service_method, "_analyze_music_simple", audio_path)
+            for _ in range(N_ANALYSES)
+        ])
+        elapsed = time.perf_counter() - started
+        stop.set()
+        lag = await probe
+        return results, lag, elapsed
+    finally:
+        engine.shutdown()
+
+
+def test_event_loop_stays_responsive():
+    """Concurrent analyses must not stall the event loop"""
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_path = os.path.join(tmp, "click.wav")
+        _write_click_track(audio_path)
+
+        results, lag, elapsed = asyncio.run(_run_concurrent_analyses(audio_path))
+
+    print(f"  {N_ANALYSES} analyses in {elapsed:.2f}s, worst event-loop lag {lag * 1000:.1f}ms")
+    assert len(results) == N_ANALYSES
+    for result in results:
+        assert result["features"]["tempo"] > 0
+    assert lag < MAX_LOOP_LAG
+
+
+def test_task_timeout():
+    """A task over its timeout raises AnalysisTimeoutError instead of hanging the request"""
+    async def run():
+        engine = AnalysisEngine(max_workers=1, task_timeout=0.5, warm=False)
+        try:
+            await engine.run(time.sleep, 5)
+        finally:
+            engine.shutdown(wait=False)
+
+    try:
+        asyncio.run(run())
+    except AnalysisTimeoutError:
+        return
+    raise AssertionError("expected AnalysisTimeoutError")
+
+
+def test_timed_out_task_releases_its_worker():
+    """After a timeout the pool is recycled: a follow-up task runs on a fresh worker instead of queueing"""
+    async def run():
+        engine = AnalysisEngine(max_workers=1, task_timeout=600, warm=False)
+        try:
+            first_pid = await engine.run(os.getpid)
+            try:
+                await engine.run(time.sleep, 600, timeout=0.5)  # would hold the only worker for 10 minutes
+            except AnalysisTimeoutError:
+                pass
+            started = time.perf_counter()
+            follow_up_pid = await engine.run(os.getpid, timeout=120)
+            return first_pid, follow_up_pid, time.perf_counter() - started, engine.stats()
+        finally:
+            engine.shutdown(wait=False)
+
+    first_pid, follow_up_pid, elapsed, stats = asyncio.run(run())
+    print(f"  follow-up task after a timeout ran in {elapsed:.2f}s")
+    assert follow_up_pid != first_pid and elapsed < 120
+    assert stats["timed_out"] == 1 and stats["pool_restarts"] == 1 and stats["completed"] == 2
+
+if __name__ == "__main__":
+    print("🧪 ===== ANALYSIS ENGINE TEST =====")
+    test_event_loop_stays_responsive()
+    test_task_timeout()
+    test_timed_out_task_releases_its_worker()
+    print("✅ Analysis engine keeps the event loop responsive")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Lite analysis engine and the "auto" engine choice on a cold start.
+
+The numpy-only lite analyzer must return the keys and types of the librosa
+analyzer (analyze_audio_bytes), and the service's lite result those of the
+full analysis. Importing the app must not import librosa, so that while its
+background import is slow (or librosa is missing) engine="auto" answers
+with the lite analyzer instead of waiting for it.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "clipizy_test.db"))
+os.environ.setdefault("ANALYSIS_CACHE_ENABLED", "false")
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+
+def _write_track(path: str, seconds: float = 40.0, sr: int = 22050):
+    """Two sections (quiet tone, then louder chords) with a noise click on every beat"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sr)) / sr
+    y = np.where(t < seconds / 2, 0.1 * np.sin(2 * np.pi * 220 * t),
+                 0.3 * (np.sin(2 * np.pi * 330 * t) + np.sin(2 * np.pi * 440 * t)))
+    for beat in np.arange(0, seconds, 0.5):
+        i0 = int(beat * sr)
+        burst = np.exp(-np.arange(1500) / 200.0) * rng.standard_normal(1500)
+        y[i0:i0 + len(burst)] += 0.5 * burst[:len(y) - i0]
+    sf.write(path, (0.5 * y).astype(np.float32), sr)
+
+
+@pytest.fixture(scope="module")
+def audio_path():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "song.wav")
+        _write_track(path)
+        yield path
+
+
+def test_lite_analyzer_matches_the_librosa_schema(audio_path):
+    sys.path.insert(1, str(project_root / "api" / "workflows" / "analyzer"))
+    import lite_analyzer
+    import music_analyzer
+
+    data = Path(audio_path).read_bytes()
+    lite, full = lite_analyzer.analyze_audio_bytes(data), music_analyzer.analyze_audio_bytes(data)
+    assert {k: type(v) for k, v in lite.items()} == {k: type(v) for k, v in full.items()}
+    assert lite["duration"] == pytest.approx(full["duration"], abs=0.05)
+    assert lite["tempo"] == pytest.approx(full["tempo"], rel=0.05)
+    assert lite["segments_sec"][0] == 0.0 and lite["segments_sec"][-1] == pytest.approx(lite["duration"], abs=0.05)
+    assert np.diff(lite["beat_times_sec"]).mean() == pytest.approx(0.5, abs=0.02)
+
+
+def test_lite_service_result_matches_the_full_schema(audio_path):
+    from api.services.media.analysis_service import analysis_service
+
+    lite, full = analysis_service.analyze_music_lite(audio_path), analysis_service.analyze_music(audio_path)
+    assert lite["quality"] == "lite" and full["quality"] == "full"
+    assert set(lite) == set(full)
+    assert set(lite["audio_features"]) <= set(full["audio_features"])
+    assert set(lite["segments"][0]) <= set(full["segments"][0])
+
+
+# Runs in a fresh interpreter: the test process has imported librosa already
+COLD_START = r"""
+import importlib.abc, importlib.machinery, json, os, shutil, sys, time
+
+class SlowLibrosa(importlib.abc.MetaPathFinder):
+    # Stands in for a cold import of librosa and numba: found at once, loaded 30s later
+    def find_spec(self, name, path=None, target=None):
+        if name != "librosa":
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(name, path)
+        exec_module = spec.loader.exec_module
+
+        def slow_exec_module(module):
+            time.sleep(30)
+            exec_module(module)
+
+        spec.loader.exec_module = slow_exec_module
+        return spec
+
+if os.environ["LIBROSA_MODE"] == "missing":
+    sys.modules["librosa"] = None  # import librosa raises ImportError
+else:
+    sys.meta_path.insert(0, SlowLibrosa())
+sys.path.insert(0, os.environ["PROJECT_ROOT"])
+
+from api.main import app
+imported = hasattr(sys.modules.get("librosa"), "__version__")
+
+from fastapi.testclient import TestClient
+from api.db import Base, SessionLocal, engine, get_db
+from api.models import Project, Track, User
+from api.routers.auth.auth_router import get_current_user
+from api.services import storage_service
+
+Base.metadata.create_all(bind=engine)
+db = SessionLocal()
+user = User(email="cold@example.com")
+db.add(user)
+db.flush()
+project = Project(user_id=user.id, type="music-clip")
+db.add(project)
+db.flush()
+track = Track(project_id=project.id, file_path="music/song.wav")
+db.add(track)
+db.commit()
+
+storage_service.download_file_from_path = lambda file_path, local_path: shutil.copyfile(os.environ["AUDIO_PATH"], local_path)
+app.dependency_overrides[get_db] = lambda: db
+app.dependency_overrides[get_current_user] = lambda: user
+
+started = time.perf_counter()
+response = TestClient(app).post(f"/api/analysis/music/{track.id}", params={"engine": "auto"})
+print(json.dumps({
+    "imported_at_startup": imported,
+    "status": response.status_code,
+    "body": response.json(),
+    "seconds": time.perf_counter() - started,
+    "librosa_loaded": hasattr(sys.modules.get("librosa"), "__version__"),
+}))
+"""
+
+
+@pytest.mark.parametrize("mode", ["slow", "missing"])
+def test_auto_engine_answers_lite_on_a_cold_start(audio_path, mode):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "PROJECT_ROOT": str(project_root), "AUDIO_PATH": audio_path, "LIBROSA_MODE": mode,
+               "ANALYSIS_LIBROSA_IMPORT_BUDGET": "0.5", "ANALYSIS_CACHE_ENABLED": "false",
+               "DATABASE_URL": "sqlite:///" + os.path.join(tmp, "cold.db")}
+        child = subprocess.run([sys.executable, "-c", COLD_START], env=env, cwd=project_root,
+                               capture_output=True, text=True, timeout=300)
+    assert child.returncode == 0, child.stderr[-3000:]
+    outcome = json.loads(child.stdout.strip().splitlines()[-1])
+
+    assert not outcome["imported_at_startup"] and not outcome["librosa_loaded"]
+    assert outcome["status"] == 200, outcome["body"]
+    analysis = outcome["body"]["analysis"]
+    assert analysis["quality"] == "lite" and "error" not in analysis
+    assert analysis["duration"] == pytest.approx(40.0, abs=0.05) and analysis["segments"]
+    assert outcome["seconds"] < 20  # answered within the budget, not after the 30s import
+
+
+if __name__ == "__main__":
+    print("🧪 ===== LITE ANALYSIS TEST =====")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "song.wav")
+        _write_track(path)
+        test_lite_analyzer_matches_the_librosa_schema(path)
+        test_lite_service_result_matches_the_full_schema(path)
+        for mode in ("slow", "missing"):
+            test_auto_engine_answers_lite_on_a_cold_start(path, mode)
+    print("✅ engine=auto answers with the lite analyzer while librosa is not importable")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Preview analysis tier and its background refinement.
+
+The preview result (quality "preview") must have the schema of the full
+analysis so clients can render it unchanged. Through the /music/{track_id}
+route, a preview request stores the preview, then the background refine
+task stores the full result and deletes the downloaded file; without
+preview the full analysis runs on the analysis engine, off the event loop.
+"""
+
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "clipizy_test.db"))
+os.environ.setdefault("ANALYSIS_CACHE_ENABLED", "false")
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.db import Base, SessionLocal, engine, get_db
+from api.models import Project, Track, User
+from api.routers.auth.auth_router import get_current_user
+from api.services.media.analysis_engine import AnalysisEngine
+from api.services.media.analysis_service import analysis_service
+
+analysis_router = importlib.import_module("api.routers.media.analysis_router")  # the package re-exports the router under the module's name
+
+
+def _write_track(path: str, seconds: float = 40.0, sr: int = 22050):
+    """Two sections (quiet tone, then louder chords) with a noise click on every beat"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sr)) / sr
+    y = np.where(t < seconds / 2, 0.1 * np.sin(2 * np.pi * 220 * t),
+                 0.3 * (np.sin(2 * np.pi * 330 * t) + np.sin(2 * np.pi * 440 * t)))
+    for beat in np.arange(0, seconds, 0.5):
+        i0 = int(beat * sr)
+        burst = np.exp(-np.arange(1500) / 200.0) * rng.standard_normal(1500)
+        y[i0:i0 + len(burst)] += 0.5 * burst[:len(y) - i0]
+    sf.write(path, (0.5 * y).astype(np.float32), sr)
+
+
+def _schema(result: dict) -> dict:
+    return {
+        "top": set(result) - {"debug", "quality"},
+        "audio_features": set(result["audio_features"]),
+        "segment": set(result["segments"][0]) if result["segments"] else set(),
+    }
+
+
+@pytest.fixture(scope="module")
+def audio_path():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "song.wav")
+        _write_track(path)
+        yield path
+
+
+def test_preview_matches_the_full_schema(audio_path):
+    preview = analysis_service.analyze_music_preview(audio_path)
+    full = analysis_service.analyze_music(audio_path)
+    assert "error" not in preview and "error" not in full
+    assert preview["quality"] == "preview" and full["quality"] == "full"
+
+    expected = _schema(full)
+    got = _schema(preview)
+    assert expected["top"] <= got["top"], expected["top"] - got["top"]
+    assert got["audio_features"] >= {"duration", "tempo", "rms_energy"}
+    assert got["segment"] <= expected["segment"] | {"features", "descriptors"}
+    assert abs(preview["duration"] - full["duration"]) < 0.1 and preview["tempo"] > 0
+    assert preview["segments_sec"][0] == 0.0 and preview["segments_sec"][-1] == pytest.approx(preview["duration"], abs=0.1)
+
+
+def test_preview_context_feeds_the_preview_analyzer(audio_path):
+    sys.path.insert(1, str(project_root / "api" / "workflows" / "analyzer"))
+    from music_analyzer import PREVIEW_HOP, PREVIEW_SR, analyze_audio_bytes, analyze_audio_preview, load_preview_context
+
+    data = Path(audio_path).read_bytes()
+    ctx = load_preview_context(data, source=audio_path)
+    assert (ctx.sr, ctx.hop) == (PREVIEW_SR, PREVIEW_HOP) and ctx.duration == pytest.approx(40.0, abs=0.05)
+
+    preview = analyze_audio_preview(ctx)
+    assert preview == analyze_audio_preview(data)  # a context and raw bytes give the same result
+    full = analyze_audio_bytes(data)
+    assert set(full) - {"debug", "quality"} <= set(preview)
+    assert preview["tempo"] == pytest.approx(full["tempo"], rel=0.05)
+    assert np.diff(preview["beat_times_sec"]).mean() == pytest.approx(0.5, abs=0.02)
+
+
+@pytest.fixture
+def client(monkeypatch, audio_path):
+    """The analysis routes on a fresh SQLite database, with downloads copying the test track"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(email="preview@example.com")
+    db.add(user)
+    db.flush()
+    project = Project(user_id=user.id, type="music-clip")
+    db.add(project)
+    db.flush()
+    track = Track(project_id=project.id, file_path="music/song.wav")
+    db.add(track)
+    db.commit()
+
+    downloads, runs = [], []
+    engine_ = AnalysisEngine(max_workers=0)  # the default thread executor: no worker processes in tests
+
+    async def run(fn, *args, **kwargs):
+        runs.append((fn.__name__, args))
+        return await AnalysisEngine.run(engine_, fn, *args, **kwargs)
+
+    def download(file_path, local_path):
+        downloads.append(local_path)
+        shutil.copyfile(audio_path, local_path)
+
+    monkeypatch.setattr(analysis_router.storage_service, "download_file_from_path", download)
+    monkeypatch.setattr(analysis_router, "analysis_engine", engine_)
+    monkeypatch.setattr(engine_, "run", run)
+    monkeypatch.setattr(analysis_router, "select_analysis_engine", lambda requested: "full")
+
+    app = FastAPI()
+    app.include_router(analysis_router.router, prefix="/api/analysis")
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        yield TestClient(app), str(track.id), downloads, runs
+    finally:
+        db.close()
+
+
+def _stored_analysis(track_id: str) -> dict:
+    db = SessionLocal()
+    try:
+        return db.query(Track).filter(Track.id == track_id).first().analysis
+    finally:
+        db.close()
+
+
+def test_preview_is_refined_in_the_background(client):
+    http, track_id, downloads, runs = client
+    response = http.post(f"/api/analysis/music/{track_id}", params={"preview": "true"})
+    assert response.status_code == 200, response.text
+    assert response.json()["analysis"]["quality"] == "preview"
+
+    # TestClient runs background tasks before returning: the refine task has stored the full result
+    assert runs == [("run_music_analysis", (downloads[0],))]  # only the path crosses to the worker
+    stored = _stored_analysis(track_id)
+    assert stored["quality"] == "full" and stored["raw"]["quality"] == "full"
+    assert not os.path.exists(downloads[0])  # the refine task deleted the download
+
+
+def test_full_analysis_runs_on_the_engine(client):
+    http, track_id, downloads, runs = client
+    response = http.post(f"/api/analysis/music/{track_id}")
+    assert response.status_code == 200, response.text
+    assert response.json()["analysis"]["quality"] == "full"
+    assert [name for name, _ in runs] == ["run_music_analysis"]
+    assert _stored_analysis(track_id)["quality"] == "full"
+    assert not os.path.exists(downloads[0])
+
+
+if __name__ == "__main__":
+    print("🧪 ===== ANALYSIS PREVIEW TEST =====")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "song.wav")
+        _write_track(path)
+        test_preview_matches_the_full_schema(path)
+        test_preview_context_feeds_the_preview_analyzer(path)
+    print("✅ Preview results have the full analysis schema")
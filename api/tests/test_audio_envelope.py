@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Shared per-frame audio band envelopes.
+
+band_envelopes must give the same values as the per-frame rfft loops the
+bass circle and the particle generators used to carry (one FFT per video
+frame), for Hz bands and FFT bin bands alike. load_envelopes must store the
+result as float16 on disk and hand back the same arrays whether it computed
+them or read them from the memory or disk cache.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+import pytest
+
+pytest.importorskip("librosa")
+
+from api.workflows.generator import audio_envelope
+from api.workflows.generator.audio_envelope import BASS, DEFAULT_BANDS, Band, EnvelopeSpec, band_envelopes, ema
+from api.workflows.generator.feature_cache import feature_cache
+from api.workflows.generator.render_metrics import RenderMetrics
+
+SR = 22050
+
+
+def tone(seconds, hz, sr=SR, noise=0.05, seed=0):
+    t = np.arange(int(seconds * sr)) / sr
+    noise = noise * np.random.default_rng(seed).standard_normal(len(t))
+    return (0.5 * np.sin(2 * np.pi * hz * t) * (1 + np.sin(2 * np.pi * 1.5 * t)) + noise).astype(np.float32)
+
+
+def per_frame_loop(y, sr, fps, frames, select, frame_peak=False):
+    """The generators' former extraction: one windowed rfft per video frame"""
+    samples_per_frame = max(1, int(sr / fps))
+    window = np.hanning(samples_per_frame).astype(np.float32)
+    values = np.zeros(frames, dtype=np.float32)
+    for i in range(frames):
+        segment = y[i * samples_per_frame:(i + 1) * samples_per_frame]
+        if not len(segment):
+            continue
+        segment = np.pad(segment, (0, samples_per_frame - len(segment)))
+        mag = np.abs(np.fft.rfft(segment * window))
+        if frame_peak and mag.max() >= 1e-6:
+            mag = mag / mag.max()
+        values[i] = np.mean(select(mag, np.fft.rfftfreq(samples_per_frame, 1 / sr)))
+    return values
+
+
+def test_batched_envelopes_match_the_per_frame_loop():
+    y = tone(7.3, 60)
+    for fps, frames in ((30, None), (60, 600), (24, 10)):
+        spec = EnvelopeSpec(fps, bands=(BASS,), frames=frames)
+        expected_frames = frames if frames is not None else int(len(y) / SR * fps)
+        expected = per_frame_loop(y, SR, fps, expected_frames, lambda mag, freqs: mag[freqs <= 250])
+        expected /= expected.max()
+        assert np.allclose(band_envelopes(y, SR, spec)["bass"], expected, atol=1e-6)
+
+    # The bass circle's band: FFT bins 1-3 of each frame's peak-scaled spectrum, intro cut off
+    spec = EnvelopeSpec(30, bands=(Band("bass", bins=(1, 4)),), skip_intro=1.5, frame_peak=True, normalize=False)
+    rest = y[int(1.5 * SR):]
+    expected = per_frame_loop(rest, SR, 30, int(len(rest) / SR * 30), lambda mag, freqs: mag[1:4], frame_peak=True)
+    assert np.allclose(band_envelopes(y, SR, spec)["bass"], expected, atol=1e-6)
+
+
+def test_bands_intro_padding_and_smoothing():
+    # One second of a 100 Hz tone, then one of a 1 kHz tone, then one of a 6 kHz tone
+    y = np.concatenate([tone(1.0, hz, noise=0.002) for hz in (100, 1000, 6000)])
+    envelopes = band_envelopes(y, SR, EnvelopeSpec(30))
+    assert list(envelopes) == [band.name for band in DEFAULT_BANDS]
+    for second, loudest in enumerate(("bass", "mid", "high")):
+        frames = slice(30 * second + 2, 30 * second + 28)
+        assert all(envelopes[loudest][frames].mean() > 2 * envelopes[name][frames].mean()
+                   for name in envelopes if name != loudest), loudest
+    assert all(values.dtype == np.float32 and values.max() == 1.0 for values in envelopes.values())
+
+    skipped = band_envelopes(y, SR, EnvelopeSpec(30, skip_intro=1.0))
+    assert len(skipped["mid"]) == 60 and np.allclose(skipped["mid"][5:25], envelopes["mid"][35:55] * (
+        envelopes["mid"].max() / envelopes["mid"][30:].max()), atol=1e-6)
+
+    padded = band_envelopes(y, SR, EnvelopeSpec(30, bands=(BASS,), frames=120))["bass"]
+    assert len(padded) == 120 and not padded[90:].any()
+
+    smoothed = band_envelopes(y, SR, EnvelopeSpec(30, bands=(BASS,), smoothing=0.8))["bass"]
+    assert np.allclose(smoothed, ema(envelopes["bass"], 0.8), atol=1e-6)
+    assert np.abs(np.diff(smoothed)).max() < np.abs(np.diff(envelopes["bass"])).max()
+
+
+def test_envelopes_are_cached_on_disk_as_float16():
+    sf = pytest.importorskip("soundfile")
+    cache_dir = audio_envelope.ENVELOPE_CACHE_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_path = os.path.join(tmp, "tone.wav")
+        sf.write(audio_path, tone(2.0, 80), SR)
+        audio_envelope.ENVELOPE_CACHE_DIR = os.path.join(tmp, "envelopes")
+        spec = EnvelopeSpec(30, frames=75)
+        try:
+            feature_cache.clear()
+            computed_metrics = RenderMetrics()
+            computed = audio_envelope.load_envelopes(audio_path, spec, computed_metrics)
+            assert computed_metrics.info["features_cached"] is False
+            assert "audio_decode" in computed_metrics.record()["stages"]
+
+            path = audio_envelope._cache_path(feature_cache.digest(audio_path), spec)
+            with np.load(path) as stored:
+                assert stored["bass"].dtype == np.float16 and len(stored["bass"]) == 75
+
+            # A fresh process: nothing in memory, read back from disk without decoding
+            feature_cache.clear()
+            cached_metrics = RenderMetrics()
+            cached = audio_envelope.load_envelopes(audio_path, spec, cached_metrics)
+            assert cached_metrics.info["features_cached"] is True
+            assert "audio_decode" not in cached_metrics.record()["stages"]
+            for name in computed:
+                assert np.array_equal(computed[name], cached[name]) and cached[name].dtype == np.float32
+
+            # Other frame rates or bands are other entries
+            other = EnvelopeSpec(24, frames=75)
+            assert other.key() != spec.key()
+            audio_envelope.load_envelopes(audio_path, other)
+            assert len(os.listdir(os.path.dirname(path))) == 2
+        finally:
+            audio_envelope.ENVELOPE_CACHE_DIR = cache_dir
+            feature_cache.clear()
+
+
+if __name__ == "__main__":
+    print("🧪 ===== AUDIO ENVELOPE TEST =====")
+    test_batched_envelopes_match_the_per_frame_loop()
+    test_bands_intro_padding_and_smoothing()
+    test_envelopes_are_cached_on_disk_as_float16()
+    print("✅ Batched band envelopes match the per-frame FFT loops")
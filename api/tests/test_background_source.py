@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Sequential background decoding for the generators.
+
+BackgroundSource must hand out the same frame for an index whether it got
+there by decoding from the start or by seeking (a worker's range start),
+loop or hold short videos, and scale in ffmpeg. Still images need no
+ffmpeg; the video checks are skipped without it.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import cv2
+import numpy as np
+import pytest
+
+from api.workflows.generator.background_source import BackgroundSource
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+
+WIDTH, HEIGHT, FPS = 160, 120, 30
+
+
+def _write_test_video(path, seconds=2):
+    """Intra-only test pattern at the output rate, so seeks land on exact frames"""
+    subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", f"testsrc=size=320x240:rate={FPS}:duration={seconds}",
+                    "-c:v", "mjpeg", "-q:v", "2", path], check=True)
+
+
+def _frames(path, start, stop, **kwargs):
+    with BackgroundSource(path, WIDTH, HEIGHT, FPS, start_frame=start, **kwargs) as background:
+        return [background.frame(i) for i in range(start, stop)]
+
+
+def test_still_image_is_scaled_once_and_copied_per_frame():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "still.png")
+        cv2.imwrite(path, np.full((60, 80, 3), (10, 20, 30), dtype=np.uint8))
+        with BackgroundSource(path, WIDTH, HEIGHT, FPS) as background:
+            first = background.frame(0)
+            assert first.shape == (HEIGHT, WIDTH, 3) and first.dtype == np.uint8
+            first[:] = 0  # callers draw on the frame they get
+            assert (background.frame(100) == (10, 20, 30)).all()
+
+
+@needs_ffmpeg
+def test_seeked_start_matches_sequential_decode():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "background.avi")
+        _write_test_video(path)
+        sequential = _frames(path, 0, 60)
+        assert sequential[0].shape == (HEIGHT, WIDTH, 3)
+        for start in (1, 17, 45):
+            for i, frame in enumerate(_frames(path, start, min(start + 5, 60)), start):
+                assert np.array_equal(frame, sequential[i]), (start, i)
+
+
+@needs_ffmpeg
+def test_short_video_loops_or_holds_its_last_frame():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "background.avi")
+        _write_test_video(path, seconds=1)
+        looped = _frames(path, 0, 75)
+        assert all(np.array_equal(looped[i], looped[i + FPS]) for i in range(45))
+        assert np.array_equal(_frames(path, 40, 41)[0], looped[40])  # a worker starting in the second pass
+
+        held = _frames(path, 0, 50, loop=False)
+        assert all(np.array_equal(frame, held[FPS - 1]) for frame in held[FPS:])
+        assert np.array_equal(_frames(path, 45, 46, loop=False)[0], held[FPS - 1])
+
+
+@needs_ffmpeg
+def test_going_back_restarts_the_decoder():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "background.avi")
+        _write_test_video(path)
+        with BackgroundSource(path, WIDTH, HEIGHT, FPS) as background:
+            frames = [background.frame(i) for i in range(20)]
+            assert np.array_equal(background.frame(5), frames[5])
+            assert np.array_equal(background.frame(19), frames[19])
+
+
+if __name__ == "__main__":
+    print("🧪 ===== BACKGROUND SOURCE TEST =====")
+    test_still_image_is_scaled_once_and_copied_per_frame()
+    if shutil.which("ffmpeg"):
+        test_seeked_start_matches_sequential_decode()
+        test_short_video_loops_or_holds_its_last_frame()
+        test_going_back_restarts_the_decoder()
+        print("✅ Seeked, looped and held frames match sequential decoding")
+    else:
+        print("⚠️ ffmpeg not installed; skipped the video checks")
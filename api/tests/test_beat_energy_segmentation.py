@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Regression test and benchmark for beat-energy segmentation.
+
+segments_from_beat_energy_pro is checked against fixtures recorded from the
+loop-based implementation on deterministic synthetic inputs (250, 1k and 10k
+beats). Run this file directly to benchmark it at 1k/10k beats, or with
+--record to re-record the fixtures after an intentional output change.
+"""
+
+import sys
+import time
+import types
+from pathlib import Path
+
+# The analyzer modules import each other as top-level modules
+analyzer_dir = Path(__file__).parent.parent / "workflows" / "analyzer"
+sys.path.insert(0, str(analyzer_dir))
+
+import numpy as np
+
+import music_analyzer
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "beat_energy_segmentation.npz"
+BEAT_COUNTS = (250, 1000, 10000)
+SR, HOP = 22050, 512
+
+
+def synthetic_context(n_beats: int, bpm: float = 120.0, seed: int = 0):
+    """Frame-level stand-in for AudioContext: sectioned loudness, a hit on every beat, noise"""
+    rng = np.random.default_rng(seed)
+    period = 60.0 / bpm
+    beat_times = np.cumsum(period + rng.normal(0.0, 0.004, n_beats))
+    duration = float(beat_times[-1] + period)
+    frame_times = np.arange(int(duration * SR / HOP) + 1) * HOP / SR
+
+    edges = np.cumsum(rng.integers(16, 65, size=n_beats // 16 + 1)) * period
+    levels = rng.uniform(0.1, 1.0, size=len(edges) + 1)
+    level = levels[np.searchsorted(edges, frame_times)]
+    since_beat = frame_times - beat_times[np.clip(np.searchsorted(beat_times, frame_times) - 1, 0, None)]
+    pulse = 1.0 + 2.0 * np.exp(-np.clip(since_beat, 0, None) / 0.05)
+    frame_power = (level * pulse * rng.lognormal(0.0, 0.3, len(frame_times)) * 50.0).astype(np.float32)
+    rms = np.sqrt(frame_power / 2048.0).astype(np.float32)
+
+    return types.SimpleNamespace(duration=duration, frame_times=frame_times, frame_power=frame_power,
+                                 rms=rms, rms_times=frame_times, beat_times=beat_times)
+
+
+def _segment(n_beats: int):
+    ctx = synthetic_context(n_beats)
+    return music_analyzer.segments_from_beat_energy_pro(ctx, beat_times=ctx.beat_times)
+
+
+def record_fixtures():
+    arrays = {}
+    for n in BEAT_COUNTS:
+        segments, debug = _segment(n)
+        arrays[f"{n}_segments"] = np.asarray(segments)
+        arrays[f"{n}_E"] = np.asarray(debug["E"])
+        arrays[f"{n}_candidates"] = np.asarray(debug["candidates_beats"])
+        arrays[f"{n}_scores"] = np.asarray(debug["candidate_scores"])
+        arrays[f"{n}_kept"] = np.asarray(debug["kept_beats"])
+        arrays[f"{n}_merged"] = np.asarray(debug["merged_boundaries"])
+    FIXTURE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(FIXTURE_PATH, **arrays)
+    print(f"✅ Recorded {FIXTURE_PATH}")
+
+
+def test_matches_recorded_fixtures():
+    """Boundaries, energies and kept candidates are bit-identical to the recorded implementation"""
+    fixtures = np.load(FIXTURE_PATH)
+    for n in BEAT_COUNTS:
+        segments, debug = _segment(n)
+        assert np.array_equal(segments, fixtures[f"{n}_segments"]), n
+        assert np.array_equal(debug["E"], fixtures[f"{n}_E"]), n
+        assert np.array_equal(debug["candidates_beats"], fixtures[f"{n}_candidates"]), n
+        assert np.array_equal(debug["kept_beats"], fixtures[f"{n}_kept"]), n
+        assert np.array_equal(debug["merged_boundaries"], fixtures[f"{n}_merged"]), n
+        # window means come from prefix sums now: equal up to summation order
+        assert np.allclose(debug["candidate_scores"], fixtures[f"{n}_scores"], rtol=0, atol=1e-12), n
+
+
+def benchmark(repeats: int = 3):
+    """Time the scoring/merge stages and the full segmentation at 1k and 10k beats"""
+    for n in (1000, 10000):
+        ctx = synthetic_context(n)
+        bt = ctx.beat_times
+        E = music_analyzer._calculate_beat_energy_for_times(ctx, bt)
+
+        def best_of(fn):
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - start)
+            return min(times)
+
+        cand = np.arange(1, len(bt) - 1, 24)
+        med_beat = float(np.median(np.diff(bt)))
+        t_energy = best_of(lambda: music_analyzer._calculate_beat_energy_for_times(ctx, bt))
+        t_score = best_of(lambda: music_analyzer._score_candidates(cand, E, E, len(bt), 22))
+        t_merge = best_of(lambda: music_analyzer._merge_close_boundaries(
+            bt[cand], bt, ctx.rms_times, ctx.rms, med_beat))
+        t_avg = best_of(lambda: music_analyzer._average_close_boundaries(
+            bt[cand], 11.0, bt, ctx.rms_times, ctx.rms, 0.75 * 4 * med_beat))
+        t_total = best_of(lambda: music_analyzer.segments_from_beat_energy_pro(ctx, beat_times=bt))
+        print(f"  {n:>6} beats: energy {t_energy * 1e3:8.2f}ms  scoring {t_score * 1e3:7.2f}ms  "
+              f"merge {t_merge * 1e3:7.2f}ms  average {t_avg * 1e3:7.2f}ms  total {t_total:6.2f}s")
+
+
+if __name__ == "__main__":
+    if "--record" in sys.argv:
+        record_fixtures()
+    else:
+        print("🧪 ===== BEAT ENERGY SEGMENTATION TEST =====")
+        test_matches_recorded_fixtures()
+        print("✅ Matches recorded fixtures")
+        benchmark()
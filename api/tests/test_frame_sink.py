@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Single-pass ffmpeg encoding of the generator renders.
+
+FrameSink must produce the video the previous two-pass path produced (an
+mp4v file from cv2.VideoWriter, then an ffmpeg run muxing the audio in):
+the same frames, the same frame count and an audio stream. It must only
+ever leave a complete file behind: an aborted render (an exception in the
+with block) or a failing encoder removes the temporary file and leaves a
+previous output untouched. Needs ffmpeg and is skipped without it.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import cv2
+import numpy as np
+import pytest
+import soundfile as sf
+
+from api.workflows.generator.frame_sink import FrameSink
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+
+WIDTH, HEIGHT, FPS, FRAMES = 160, 96, 24, 36
+
+
+def synthetic_frames():
+    """Smooth gradients that move every frame, so frames can be told apart after lossy encoding"""
+    y, x = np.mgrid[0:HEIGHT, 0:WIDTH]
+    for i in range(FRAMES):
+        frame = np.empty((HEIGHT, WIDTH, 3), dtype=np.uint8)
+        frame[..., 0] = (x + 4 * i) % 256
+        frame[..., 1] = (y * 2 + 3 * i) % 256
+        frame[..., 2] = 128 + 100 * np.sin(i / 5.0)
+        yield frame
+
+
+def decode(path):
+    capture = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    return np.array(frames)
+
+
+def streams(path):
+    # ffmpeg with no output lists the input's streams on stderr ("Stream #0:1[...]: Audio: aac ...")
+    info = subprocess.run(["ffmpeg", "-hide_banner", "-i", path], capture_output=True, text=True).stderr
+    return sorted(re.findall(r"Stream #\d+:\d+.*?: (Audio|Video):", info))
+
+
+def two_pass_render(output_path, audio_path):
+    """The previous path: an mp4v intermediate from cv2, then ffmpeg re-encodes it with the audio"""
+    temp_path = output_path + ".mp4v.mp4"
+    writer = cv2.VideoWriter(temp_path, cv2.VideoWriter_fourcc(*"mp4v"), FPS, (WIDTH, HEIGHT))
+    for frame in synthetic_frames():
+        writer.write(frame)
+    writer.release()
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-i", temp_path, "-i", audio_path,
+                    "-map", "0:v:0", "-map", "1:a:0", "-c:v", "libx264", "-crf", "0", "-pix_fmt", "yuv420p",
+                    "-c:a", "aac", output_path], check=True)
+    os.remove(temp_path)
+
+
+@pytest.fixture
+def workdir():
+    with tempfile.TemporaryDirectory() as tmp:
+        sr = 22050
+        t = np.arange(int(FRAMES / FPS * sr)) / sr
+        sf.write(os.path.join(tmp, "audio.wav"), 0.3 * np.sin(2 * np.pi * 440 * t), sr)
+        yield tmp
+
+
+def test_single_pass_matches_the_two_pass_render(workdir):
+    audio_path = os.path.join(workdir, "audio.wav")
+    output_path = os.path.join(workdir, "out", "single.mp4")
+    with FrameSink(output_path, WIDTH, HEIGHT, FPS, audio_path=audio_path, crf=0) as sink:
+        for frame in synthetic_frames():
+            sink.write(frame)
+            frame[:] = 0  # the sink copied the frame: reusing the buffer must not change the video
+    assert sink.frames_written == FRAMES
+    assert os.listdir(os.path.dirname(output_path)) == ["single.mp4"]
+
+    two_pass_path = os.path.join(workdir, "two_pass.mp4")
+    two_pass_render(two_pass_path, audio_path)
+
+    single, previous, source = decode(output_path), decode(two_pass_path), np.array(list(synthetic_frames()))
+    assert single.shape == previous.shape == source.shape
+    assert streams(output_path) == streams(two_pass_path) == ["Audio", "Video"]
+    # Single pass encodes once (only the yuv420p conversion loses detail); the old path went through mp4v first
+    single_error = np.abs(single.astype(int) - source).mean()
+    assert single_error < 3.0 and single_error <= np.abs(previous.astype(int) - source).mean()
+
+
+def test_abort_leaves_no_partial_output(workdir):
+    output_path = os.path.join(workdir, "render.mp4")
+    with open(output_path, "wb") as previous:
+        previous.write(b"previous render")
+
+    with pytest.raises(KeyboardInterrupt):
+        with FrameSink(output_path, WIDTH, HEIGHT, FPS, queue_frames=2) as sink:
+            for i, frame in enumerate(synthetic_frames()):
+                if i == FRAMES // 2:
+                    raise KeyboardInterrupt  # the render loop dies mid-video
+                sink.write(frame)
+    assert sorted(os.listdir(workdir)) == ["audio.wav", "render.mp4"]
+    assert Path(output_path).read_bytes() == b"previous render"
+    sink.abort()  # idempotent
+    assert sorted(os.listdir(workdir)) == ["audio.wav", "render.mp4"]
+
+
+def test_encoder_failure_leaves_no_partial_output(workdir):
+    output_path = os.path.join(workdir, "odd.mp4")
+    sink = FrameSink(output_path, WIDTH + 1, HEIGHT + 1, FPS)  # yuv420p needs even dimensions: ffmpeg fails
+    with pytest.raises(RuntimeError, match="ffmpeg encoder failed"):
+        for _ in range(FRAMES):
+            sink.write(np.zeros((HEIGHT + 1, WIDTH + 1, 3), dtype=np.uint8))
+        sink.close()
+    sink.abort()
+    assert sorted(os.listdir(workdir)) == ["audio.wav"]
+
+    sink = FrameSink(output_path, WIDTH, HEIGHT, FPS)
+    with pytest.raises(ValueError):
+        sink.write(np.zeros((HEIGHT, WIDTH), dtype=np.uint8))
+    sink.abort()
+    assert sorted(os.listdir(workdir)) == ["audio.wav"]
+
+
+if __name__ == "__main__":
+    print("🧪 ===== FRAME SINK TEST =====")
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Logo cutout of the bass-circle visualizer.
+
+The fixed-point blend over the cached logo layer must match the float blend
+over the full logo rectangle it replaced (to 1 LSB), leave pixels outside
+the logo's visible bounding box alone, and reuse the layer per logo size.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("librosa")  # bassCircle computes the bass series with librosa
+
+from api.workflows.generator.visualizers.bassCircle import BassCircleLogoVisualizer
+
+
+def _logo():
+    logo = np.zeros((200, 200, 4), dtype=np.uint8)
+    cv2.circle(logo, (100, 100), 60, (255, 255, 255, 255), -1)
+    cv2.circle(logo, (100, 100), 30, (0, 0, 0, 128), -1)
+    return logo
+
+
+def _float_cutout(vis, frame, logo, background):
+    """The float32 blend over the whole (clamped) logo rectangle, as drawn before"""
+    target = int(vis.cmin * 1.6 * vis.logo_scale)
+    resized = cv2.resize(logo, (target, target), interpolation=cv2.INTER_AREA)
+    alpha = cv2.GaussianBlur(resized[:, :, 3].astype(np.float32) / 255.0, (3, 3), 0.5)
+    x0 = max(0, min(int(vis.cx - target // 2), vis.W - target))
+    y0 = max(0, min(int(vis.cy - target // 2), vis.H - target))
+    h, w = min(target, vis.H - y0), min(target, vis.W - x0)
+    alpha_3d = np.stack([alpha[:h, :w]] * 3, axis=2)
+    roi = frame[y0:y0 + h, x0:x0 + w].astype(np.float32)
+    blended = (1.0 - alpha_3d) * roi + alpha_3d * background[y0:y0 + h, x0:x0 + w].astype(np.float32)
+    out = frame.copy()
+    out[y0:y0 + h, x0:x0 + w] = np.clip(blended, 0, 255).astype(np.uint8)
+    return out
+
+
+@pytest.mark.parametrize("position", [(0.5, 0.5), (0.98, 0.03)])  # centered, and clamped at a corner
+def test_fixed_point_cutout_matches_float_blend(position):
+    vis = BassCircleLogoVisualizer(width=320, height=240, circle_min_radius=40,
+                                   x_position=position[0], y_position=position[1])
+    logo = _logo()
+    vis._preprocess_logo(logo)
+    layer = vis._logo_layer
+
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    drawn = rng.integers(0, 256, (240, 320, 3), dtype=np.uint8)  # background with circles on top
+
+    expected = _float_cutout(vis, drawn, logo, background)
+    actual = vis._apply_logo_cutout(drawn.copy(), background[layer["rows"], layer["cols"]].copy())
+    assert np.abs(actual.astype(int) - expected.astype(int)).max() <= 1
+
+    outside = np.ones((240, 320), dtype=bool)
+    outside[layer["rows"], layer["cols"]] = False
+    assert np.array_equal(actual[outside], drawn[outside])
+
+    # no background: the logo punches a hole to black
+    expected = _float_cutout(vis, drawn, logo, np.zeros_like(background))
+    assert np.abs(vis._apply_logo_cutout(drawn.copy()).astype(int) - expected.astype(int)).max() <= 1
+
+
+def test_logo_layer_is_cached_per_size():
+    vis = BassCircleLogoVisualizer(width=320, height=240, circle_min_radius=40)
+    logo = _logo()
+    vis._preprocess_logo(logo)
+    first = vis._logo_layer
+    vis._preprocess_logo(logo.copy())
+    assert vis._logo_layer is first
+
+    vis.cmin = 60
+    vis._preprocess_logo(logo)
+    assert vis._logo_layer is not first and len(vis._logo_layers) == 2
+
+
+if __name__ == "__main__":
+    print("🧪 ===== LOGO CUTOUT TEST =====")
+    for position in [(0.5, 0.5), (0.98, 0.03)]:
+        test_fixed_point_cutout_matches_float_blend(position)
+    test_logo_layer_is_cached_per_size()
+    print("✅ Fixed-point cutout matches the float blend")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Struct-of-arrays particle engine.
+
+ParticleArrays must spawn, respawn in place and kill (stable compaction)
+without disturbing the other live rows, and the vectorized update kernels
+must move particles exactly like the list-of-dicts engine they replace
+(kept in api.benchmarks.particles.legacy) whenever no random draws are
+involved, and keep their invariants (bounds, population caps) otherwise.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+import pytest
+
+from api.workflows.generator.particle_engine import FLOAT_FIELDS, ParticleArrays
+
+cv2 = pytest.importorskip("cv2")
+
+from api.benchmarks.particles import DictParticleSystem, run_case
+from api.workflows.generator.particles.unified_particle_system import (
+    ParticleConfig,
+    ParticleType,
+    UnifiedParticleSystem,
+)
+
+COMPARED = ("x", "y", "vx", "vy", "brightness", "life")
+
+
+def to_arrays(particles):
+    """The dict engine's particles as ParticleArrays (attributes both engines share)"""
+    arrays = ParticleArrays(len(particles))
+    names = [name for name in particles[0] if name in FLOAT_FIELDS or name == "age"]
+    arrays.extend(**{name: np.array([p[name] for p in particles]) for name in names})
+    return arrays
+
+
+def twin_systems(particle_type, count, **config):
+    """A dict and a numpy system sharing the same initial particles, with silent audio"""
+    np.random.seed(7)
+    config = ParticleConfig(width=640, height=360, particle_count=count, max_particles=count, **config)
+    legacy = DictParticleSystem(particle_type, config)
+    system = UnifiedParticleSystem(particle_type, config)
+    if particle_type == ParticleType.CONTINUOUS_SPAWNING:
+        legacy.particles = [legacy._spawn_continuous_particle() for _ in range(count)]
+    system.particles = to_arrays(legacy.particles)
+    legacy.bass_frequencies = system.bass_frequencies = np.zeros(1200, dtype=np.float32)
+    return legacy, system
+
+
+def test_particle_arrays_spawn_respawn_and_kill():
+    p = ParticleArrays(capacity=2)
+    rows = p.extend(x=[1.0, 2.0, 3.0], color=2)
+    assert rows == slice(0, 3) and len(p) == 3 and p.capacity >= 3
+    assert list(p["color"]) == [2, 2, 2] and list(p["size"]) == [1.0] * 3  # defaults for the rest
+
+    p["x"] += 10.0
+    p.assign(np.array([1]), x=-1.0, size=4.0)
+    assert list(p["x"]) == [11.0, -1.0, 13.0] and list(p["size"]) == [1.0, 4.0, 1.0]
+
+    p.keep(p["x"] > 0)
+    assert list(p["x"]) == [11.0, 13.0] and list(p["size"]) == [1.0, 1.0]  # survivors keep their order
+
+    p.extend(count=100, x=0.5)
+    assert len(p) == 102 and p["x"][:2].tolist() == [11.0, 13.0] and p["x"][2:].min() == 0.5
+    with pytest.raises(KeyError):
+        p.extend(x=[1.0], weight=[2.0])
+    p.clear()
+    assert len(p) == 0 and p["x"].size == 0
+
+
+def test_snow_kernel_matches_dict_engine_below_threshold():
+    legacy, system = twin_systems(ParticleType.SNOW, 200)
+    count = len(legacy.particles)
+    for frame in range(30):
+        legacy._update_particles(frame / 30, frame)
+        system._update_particles(frame / 30, frame)
+    # Both engines append their spawns after the original particles
+    expected = to_arrays(legacy.particles[:count])
+    for name in COMPARED:
+        assert np.allclose(system.particles[name][:count], expected[name]), name
+    assert len(system.particles) <= 2 * 200
+
+
+def test_continuous_kernel_matches_dict_engine_including_removal():
+    legacy, system = twin_systems(ParticleType.CONTINUOUS_SPAWNING, 300, steady_spawn_rate=0.0)
+    for frame in range(600):
+        legacy._update_particles(frame / 30, frame)
+        system._update_particles(frame / 30, frame)
+    assert 0 < len(system.particles) < 300  # particles left the frame and were killed
+    expected = to_arrays(legacy.particles)
+    assert len(system.particles) == len(expected)
+    for name in COMPARED + ("age",):
+        assert np.allclose(system.particles[name], expected[name]), name
+
+
+@pytest.mark.parametrize("particle_type", [ParticleType.BOUNCING, ParticleType.ENHANCED, ParticleType.ZEN])
+def test_standard_kernels_keep_particles_on_screen(particle_type):
+    config = ParticleConfig(width=320, height=180, particle_count=500, seed=3)
+    system = UnifiedParticleSystem(particle_type, config)
+    system.bass_frequencies = np.random.default_rng(4).random(240).astype(np.float32)
+    for frame in range(240):
+        system._update_particles(frame / 30, frame)
+    p = system.particles
+    assert len(p) == 500 and np.isfinite(p["x"]).all() and np.isfinite(p["y"]).all()
+    if particle_type == ParticleType.BOUNCING:
+        assert p["x"].min() >= 0 and p["x"].max() <= 320 and p["y"].min() >= 0 and p["y"].max() <= 180
+
+    frame = np.zeros((180, 320, 3), dtype=np.uint8)
+    system._draw_particles(frame)
+    assert frame.any()
+
+
+def test_benchmark_case_reports_both_engines():
+    for engine in ("dict", "numpy"):
+        case = run_case("enhanced", 100, engine, frames=3, width=320, height=180)
+        assert case["final_particles"] == 100 and case["frame_ms"] > 0 and case["realtime_factor"] > 0
+
+
+if __name__ == "__main__":
+    print("🧪 ===== PARTICLE ENGINE TEST =====")
+    test_particle_arrays_spawn_respawn_and_kill()
+    test_snow_kernel_matches_dict_engine_below_threshold()
+    test_continuous_kernel_matches_dict_engine_including_removal()
+    for particle_type in (ParticleType.BOUNCING, ParticleType.ENHANCED, ParticleType.ZEN):
+        test_standard_kernels_keep_particles_on_screen(particle_type)
+    print("✅ Vectorized particle kernels match the dict engine")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Spatial-hash pairwise particle interactions.
+
+SpatialGrid must find exactly the pairs a brute-force O(n^2) comparison
+finds (each once, far-away and negative coordinates included). The
+interaction kernels must act equally and oppositely on both particles of a
+pair, and the optional stage must plug into the particle system without
+breaking its determinism.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+import pytest
+
+from api.workflows.generator.particle_engine import ParticleArrays
+from api.workflows.generator.particle_grid import SpatialGrid, interact
+
+
+def brute_force_pairs(x, y, radius):
+    distance = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+    i, j = np.nonzero(np.triu(distance < radius, 1))
+    return set(zip(i.tolist(), j.tolist()))
+
+
+def particles(x, y, vx=0.0, vy=0.0, size=1.0):
+    p = ParticleArrays(len(x))
+    p.extend(x=x, y=y, vx=vx, vy=vy, size=size)
+    return p
+
+
+@pytest.mark.parametrize("count", [2, 40, 800])
+def test_grid_pairs_match_brute_force(count):
+    rng = np.random.default_rng(count)
+    x, y = rng.uniform(-40, 220, count), rng.uniform(-60, 140, count)
+    x[:2] = [1e7, -1e7]  # far outside the field: alone in their cells
+    i, j, dx, dy, distance = SpatialGrid(10.0).build(x, y).pairs(radius=10.0)
+    found = set(zip(np.minimum(i, j).tolist(), np.maximum(i, j).tolist()))
+    assert len(found) == len(i) and found == brute_force_pairs(x, y, 10.0)
+    assert np.allclose(dx, x[i] - x[j]) and np.allclose(distance, np.hypot(dx, dy))
+    with pytest.raises(ValueError):
+        SpatialGrid(10.0).build(x, y).pairs(radius=11.0)
+
+
+@pytest.mark.parametrize("mode", ["repel", "collide", "flock"])
+def test_kernels_conserve_momentum(mode):
+    rng = np.random.default_rng(1)
+    p = particles(rng.uniform(0, 60, 300), rng.uniform(0, 60, 300), rng.normal(0, 1, 300), rng.normal(0, 1, 300),
+                  rng.uniform(1, 3, 300))
+    before = p['vx'].sum(), p['vy'].sum()
+    assert interact(p, mode, radius=8.0, strength=0.5) > 0
+    if mode != "flock":  # steering toward the neighbors' mean velocity is not pairwise symmetric
+        assert np.allclose((p['vx'].sum(), p['vy'].sum()), before)
+    with pytest.raises(ValueError):
+        interact(p, "gravity", radius=8.0, strength=0.5)
+
+
+def test_kernels_push_apart_collide_and_align():
+    p = particles(np.array([10.0, 14.0]), np.array([5.0, 5.0]))
+    interact(p, "repel", radius=8.0, strength=1.0)
+    assert p['vx'][0] < 0 < p['vx'][1] and np.allclose(p['vy'], 0.0)
+
+    # Head-on, equal masses, full restitution: the velocities are exchanged and the discs separated
+    p = particles(np.array([10.0, 13.0]), np.array([5.0, 5.0]), vx=np.array([1.0, -0.5]), size=2.0)
+    interact(p, "collide", radius=1.0, strength=1.0)
+    assert np.allclose(p['vx'], [-0.5, 1.0]) and p['x'][1] - p['x'][0] == pytest.approx(4.0)
+
+    rng = np.random.default_rng(2)
+    angle = rng.uniform(0, 2 * np.pi, 200)
+    p = particles(rng.uniform(0, 100, 200), rng.uniform(0, 100, 200), np.cos(angle), np.sin(angle))
+    spread = np.hypot(p['vx'] - p['vx'].mean(), p['vy'] - p['vy'].mean()).mean()
+    for _ in range(40):
+        interact(p, "flock", radius=12.0, strength=1.0)
+        p['x'] += p['vx']
+        p['y'] += p['vy']
+    assert np.hypot(p['vx'] - p['vx'].mean(), p['vy'] - p['vy'].mean()).mean() < 0.5 * spread
+
+
+def test_particle_system_interaction_stage():
+    from api.workflows.generator.particles.unified_particle_system import (
+        ParticleConfig,
+        ParticleType,
+        UnifiedParticleSystem,
+    )
+
+    def simulate(**config):
+        system = UnifiedParticleSystem(ParticleType.BOUNCING, ParticleConfig(
+            width=320, height=180, particle_count=400, seed=4, **config))
+        system.bass_frequencies = np.random.default_rng(5).random(60).astype(np.float32)
+        system.advance(60)
+        return system
+
+    plain, repelled, again = simulate(), simulate(interaction="repel"), simulate(interaction="repel")
+    assert not np.array_equal(plain.particles['x'], repelled.particles['x'])
+    assert np.array_equal(repelled.particles['x'], again.particles['x'])
+    assert repelled.get_status()["config"]["interaction"] == "repel"
+
+
+def test_benchmark_interaction_cases_report_scaling():
+    from api.benchmarks.particles import run_interaction_cases
+
+    cases = run_interaction_cases([200, 800], modes=["repel"], frames=2)
+    assert [case["particle_count"] for case in cases] == [200, 800] and cases[0]["scaling"] == 1.0
+    assert all(case["pairs"] > 0 and case["us_per_particle"] > 0 for case in cases)
+
+
+if __name__ == "__main__":
+    print("🧪 ===== PARTICLE GRID TEST =====")
+    for count in (2, 40, 800):
+        test_grid_pairs_match_brute_force(count)
+    for mode in ("repel", "collide", "flock"):
+        test_kernels_conserve_momentum(mode)
+    test_kernels_push_apart_collide_and_align()
+    test_particle_system_interaction_stage()
+    print("✅ Spatial hash pairs match brute force")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Batched particle rasterizer against per-particle cv2.circle drawing.
+
+The default "over" blend must be pixel-identical to drawing the discs one by
+one with cv2.circle (later particles on top, clipped at the frame edges).
+The antialiased "max" and "add" blends must keep each disc's size and
+brightness within a tolerance of the cv2 disc, and must not depend on the
+order the particles are drawn in.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from api.workflows.generator.particle_raster import DiscRasterizer, disc_sprite
+
+W, H = 320, 180
+
+
+def cv2_discs(x, y, radius, colors):
+    frame = np.zeros((H, W, 3), dtype=np.uint8)
+    for xi, yi, ri, ci in zip(x.tolist(), y.tolist(), radius.tolist(), colors.tolist()):
+        cv2.circle(frame, (xi, yi), ri, tuple(ci), -1)
+    return frame
+
+
+def random_discs(count, seed=0):
+    rng = np.random.default_rng(seed)
+    # Centers up to a few pixels outside the frame exercise the edge clipping
+    return (rng.integers(-4, W + 4, count), rng.integers(-4, H + 4, count), rng.integers(0, 7, count),
+            rng.integers(0, 256, (count, 3)))
+
+
+def grid_discs():
+    """Non-overlapping discs of every radius, away from the edges"""
+    ys, xs = np.mgrid[12:H - 12:24, 12:W - 12:24]
+    x, y = xs.ravel(), ys.ravel()
+    radius = np.arange(len(x)) % 7
+    colors = np.stack([np.full(len(x), 255), 40 + 30 * radius, 200 - 20 * radius], axis=1)
+    return x, y, radius, colors
+
+
+def test_over_blend_is_pixel_identical_to_cv2_circle():
+    x, y, radius, colors = random_discs(2000)
+    raster = DiscRasterizer(W, H)
+    for _ in range(2):  # the scratch buffer is reset between frames
+        frame = raster.draw(np.zeros((H, W, 3), dtype=np.uint8), x, y, radius, colors)
+        assert np.array_equal(frame, cv2_discs(x, y, radius, colors))
+    assert raster.draw(np.zeros((H, W, 3), dtype=np.uint8), x[:0], y[:0], radius[:0], colors[:0]).sum() == 0
+
+
+def test_antialiased_sprites_keep_the_cv2_disc_area():
+    for radius in range(8):
+        hard = disc_sprite(radius)[2].sum()
+        assert abs(disc_sprite(radius, antialias=True)[2].sum() - hard) <= max(0.1, 0.02 * hard)
+    halo = disc_sprite(3, glow_level=4, antialias=True)
+    assert len(halo[0]) > len(disc_sprite(3, antialias=True)[0]) and halo[2].max() == 1.0
+
+
+@pytest.mark.parametrize("blend", ["max", "add"])
+def test_soft_blends_match_cv2_within_tolerance(blend):
+    x, y, radius, colors = grid_discs()
+    reference = cv2_discs(x, y, radius, colors).astype(np.float64)
+    frame = DiscRasterizer(W, H, blend).draw(np.zeros((H, W, 3), dtype=np.uint8), x, y, radius, colors)
+    # Same light per disc (antialiased edges only move it around) and close once seen at a slight blur
+    assert abs(frame.sum() - reference.sum()) < 0.02 * reference.sum()
+    seen = np.abs(cv2.GaussianBlur(frame.astype(np.float64), (0, 0), 1.0) - cv2.GaussianBlur(reference, (0, 0), 1.0))
+    assert seen.mean() < 0.5 and seen.max() < 32
+
+
+def test_soft_blends_do_not_depend_on_draw_order():
+    x, y, radius, colors = random_discs(1500, seed=1)
+    order = np.random.default_rng(2).permutation(len(x))
+    for blend in ("max", "add"):
+        raster = DiscRasterizer(W, H, blend, glow=0.5)
+        a = raster.draw(np.zeros((H, W, 3), dtype=np.uint8), x, y, radius, colors)
+        b = raster.draw(np.zeros((H, W, 3), dtype=np.uint8), x[order], y[order], radius[order], colors[order])
+        assert np.array_equal(a, b)
+
+    # Additive stamps saturate instead of wrapping around
+    stacked = DiscRasterizer(W, H, "add").draw(np.zeros((H, W, 3), dtype=np.uint8), np.full(4, 50), np.full(4, 50),
+                                               np.full(4, 3), np.full((4, 3), 200))
+    assert stacked[50, 50].tolist() == [255, 255, 255]
+
+
+@pytest.mark.parametrize("count, gray", [(258, 255), (656, 100), (5000, 1)])
+def test_add_blend_saturates_past_the_uint16_range(count, gray):
+    # More than 65535 summed on one pixel (SNOW spawns every particle at the center) must not wrap
+    raster = DiscRasterizer(W, H, "add")
+    stacked = raster.draw(np.zeros((H, W, 3), dtype=np.uint8), np.full(count, 50), np.full(count, 50),
+                          np.full(count, 2), np.full((count, 3), gray))
+    expected = min(255, count * gray)
+    assert stacked[50, 50].tolist() == [expected] * 3
+    assert stacked[0, 0].tolist() == [0, 0, 0]
+
+
+def test_particle_system_draws_through_the_rasterizer():
+    from api.workflows.generator.particles.unified_particle_system import (
+        ParticleConfig,
+        ParticleType,
+        UnifiedParticleSystem,
+    )
+
+    config = ParticleConfig(width=W, height=H, particle_count=300)
+    system = UnifiedParticleSystem(ParticleType.SNOW, config)
+    p = system.particles
+    x, y = p['x'].astype(np.int64), p['y'].astype(np.int64)
+    visible = (x >= 0) & (x < W) & (y >= 0) & (y < H)
+    gray = (255 * (p['brightness'][visible] * p['life'][visible])).astype(np.int64)
+    expected = cv2_discs(x[visible], y[visible], p['size'][visible].astype(np.int64), np.repeat(gray[:, None], 3, axis=1))
+    assert np.array_equal(system._draw_particles(np.zeros((H, W, 3), dtype=np.uint8)), expected)
+
+    system.update_config({"blend": "max", "glow": 0.5})
+    soft = system._draw_particles(np.zeros((H, W, 3), dtype=np.uint8))
+    assert system._raster.blend == "max" and (soft > 0).sum() > (expected > 0).sum()
+
+
+if __name__ == "__main__":
+    print("🧪 ===== PARTICLE RASTER TEST =====")
+    test_over_blend_is_pixel_identical_to_cv2_circle()
+    test_antialiased_sprites_keep_the_cv2_disc_area()
+    for blend in ("max", "add"):
+        test_soft_blends_match_cv2_within_tolerance(blend)
+    test_soft_blends_do_not_depend_on_draw_order()
+    for count, gray in ((258, 255), (656, 100), (5000, 1)):
+        test_add_blend_saturates_past_the_uint16_range(count, gray)
+    test_particle_system_draws_through_the_rasterizer()
+    print("✅ Batched particle drawing matches cv2.circle")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Render result cache for visualizer and particle videos.
+
+Keys must not depend on how equivalent parameters are spelled (3 vs 3.0,
+tuple vs list, enum vs value), a stored render must come back on the next
+lookup, the byte budget must evict least recently used entries, and
+identical renders running at the same time must be rendered only once.
+Every request counts as exactly one lookup in the hit/miss counters.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.services.media.render_cache import LocalRenderStore, RenderCache
+
+
+def _cache(tmp, max_bytes=1000):
+    return RenderCache(LocalRenderStore(os.path.join(tmp, "objects")), index_dir=tmp, max_bytes=max_bytes, prefix="")
+
+
+def _renderer(size, calls, delay=0.0):
+    def render(dest):
+        calls.append(dest)
+        time.sleep(delay)
+        with open(dest, "wb") as f:
+            f.write(b"x" * size)
+    return render
+
+
+def test_keys_are_canonical():
+    a = RenderCache.make_key("visualizer", "ab" * 32, {"fps": 30, "color": (255, 0, 0), "preview": None})
+    b = RenderCache.make_key("visualizer", "ab" * 32, {"preview": None, "color": [255, 0, 0], "fps": 30.0})
+    assert a == b
+    assert a != RenderCache.make_key("visualizer", "ab" * 32, {"fps": 24, "color": (255, 0, 0), "preview": None})
+    assert a != RenderCache.make_key("particles", "ab" * 32, {"fps": 30, "color": (255, 0, 0), "preview": None})
+    assert RenderCache.make_key("particles", None, {}).split(":")[1] == "silent"
+
+
+def test_hit_after_store_and_lru_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = _cache(tmp, max_bytes=1000)
+        calls = []
+        keys = [RenderCache.make_key("visualizer", str(i) * 64, {}) for i in range(3)]
+
+        _, cached = cache.get_or_render(keys[0], os.path.join(tmp, "a.mp4"), _renderer(400, calls))
+        assert not cached
+        _, cached = cache.get_or_render(keys[0], os.path.join(tmp, "b.mp4"), _renderer(400, calls))
+        assert cached and len(calls) == 1 and os.path.getsize(os.path.join(tmp, "b.mp4")) == 400
+
+        cache.get_or_render(keys[1], os.path.join(tmp, "c.mp4"), _renderer(400, calls))
+        cache.fetch(keys[0], os.path.join(tmp, "d.mp4"))  # keys[0] is now the most recently used
+        cache.get_or_render(keys[2], os.path.join(tmp, "e.mp4"), _renderer(400, calls))
+
+        stats = cache.stats()
+        assert stats["evictions"] == 1 and stats["entries"] == 2 and stats["bytes"] == 800
+        assert cache.fetch(keys[0], os.path.join(tmp, "f.mp4"))
+        assert not cache.fetch(keys[1], os.path.join(tmp, "g.mp4"))
+        assert not os.path.exists(os.path.join(tmp, "objects", cache.object_key(keys[1])))
+
+
+def test_concurrent_identical_renders_are_coalesced():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = _cache(tmp)
+        calls, results = [], []
+        key = RenderCache.make_key("particles", "cd" * 32, {"particle_type": "sparkles"})
+
+        def job(i):
+            results.append(cache.get_or_render(key, os.path.join(tmp, f"out_{i}.mp4"), _renderer(100, calls, delay=0.2)))
+
+        threads = [threading.Thread(target=job, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert sorted(cached for _, cached in results) == [False, True, True, True]
+        assert all(os.path.getsize(path) == 100 for path, _ in results)
+        stats = cache.stats()
+        assert stats["hits"] + stats["misses"] == 4  # the coalesced waiters' re-checks are not lookups
+
+
+def test_one_lookup_per_request():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = _cache(tmp)
+        calls = []
+        key = RenderCache.make_key("visualizer", "ef" * 32, {})
+
+        # A router's lookup misses and queues the job, whose render must not count the request again
+        assert not cache.fetch(key, os.path.join(tmp, "a.mp4"))
+        cache.get_or_render(key, os.path.join(tmp, "a.mp4"), _renderer(100, calls), counted=True)
+        assert (cache.stats()["hits"], cache.stats()["misses"]) == (0, 1)
+
+        assert cache.probe(key, os.path.join(tmp, "b.mp4")) and cache.stats()["hits"] == 0
+        assert cache.fetch(key, os.path.join(tmp, "c.mp4"))
+        assert cache.get_or_render(key, os.path.join(tmp, "d.mp4"), _renderer(100, calls))[1]
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 1, 0.6667) and len(calls) == 1
+
+
+if __name__ == "__main__":
+    print("🧪 ===== RENDER CACHE TEST =====")
+    test_keys_are_canonical()
+    test_hit_after_store_and_lru_eviction()
+    test_concurrent_identical_renders_are_coalesced()
+    test_one_lookup_per_request()
+    print("✅ Renders are cached, evicted and coalesced")
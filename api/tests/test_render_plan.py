@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Precomputed bar values of the visualizers (render_plan).
+
+build_render_plan must reproduce the old draw loop frame by frame: the
+fade from _calculate_opacity, the bars cut or zero-padded to bar_count,
+the velocity-clamped frame smoothing that only advances on visible frames,
+and the enhanced-mode boost that draw_frame applied per bar, also through
+render() of visualizers/visualizer.py. The reference below is that
+per-frame code, run on short synthetic FFT data.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+import pytest
+
+from api.workflows.generator.render_plan import RenderPlan, build_render_plan, fade_curve, smooth_frames
+from api.workflows.generator.visualizers import visualizer
+
+
+def old_opacity(frame_idx, total, start, fadein, fadeout, delay_outro):
+    """The previous _calculate_opacity"""
+    end = total - fadeout - delay_outro
+    if frame_idx < start:
+        return 0.0
+    if frame_idx < start + fadein:
+        return (frame_idx - start) / fadein
+    if frame_idx >= end:
+        return max(0.0, 1 - (frame_idx - end) / fadeout)
+    return 1.0
+
+
+def old_frame_smoothing(values, smoothness_factor, smoothing_buffer, previous_values, velocity_buffer, moving_average_buffer):
+    """The previous _apply_frame_smoothing"""
+    if smoothing_buffer is None or previous_values is None:
+        return values
+    velocity = values - previous_values
+    max_velocity = 0.3 if smoothness_factor < 0.3 else 0.1 + (0.2 * smoothness_factor)
+    velocity = np.clip(velocity, -max_velocity, max_velocity)
+    velocity_buffer = 0.5 * velocity_buffer + 0.5 * velocity if velocity_buffer is not None else velocity
+    smoothed_values = previous_values + velocity_buffer
+    if smoothness_factor >= 0.6 and moving_average_buffer is not None and len(moving_average_buffer) > 1:
+        blend_factor = (smoothness_factor - 0.6) / 0.4
+        smoothed_values = (1 - blend_factor) * smoothed_values + blend_factor * np.mean(moving_average_buffer, axis=0)
+    alpha = 0.5 if smoothness_factor < 0.3 else 0.2 + (0.3 * smoothness_factor)
+    return (1 - alpha) * smoothing_buffer + alpha * smoothed_values
+
+
+def old_enhanced_mode(values, enhanced_mode, height_range):
+    """The previous per-bar _apply_enhanced_mode of the draw functions"""
+    if not enhanced_mode or not enhanced_mode.get("active", False):
+        return values
+    threshold, factor = enhanced_mode.get("threshold", 0.3), enhanced_mode.get("factor", 2.0)
+    enhanced = values.copy()
+    for i in range(len(enhanced)):
+        if enhanced[i] * height_range >= height_range * threshold:
+            enhanced[i] = 0.8 * min(1.0, enhanced[i] * factor) + 0.2 * enhanced[i]
+    return enhanced
+
+
+def old_draw_loop(fft_data, bar_count, total_frames, fade, smoothness_factor, enhanced_mode=None, height_range=0):
+    """Bar values and opacity of every frame, as the previous render loop handed them to draw_frame"""
+    smoothing_buffer = previous_values = velocity_buffer = moving_average_buffer = None
+    values_out = np.zeros((total_frames, bar_count))
+    opacity_out = np.zeros(total_frames)
+    for i in range(total_frames):
+        opacity = opacity_out[i] = old_opacity(i, total_frames, *fade)
+        if opacity <= 0:
+            continue
+        values = fft_data[i] * opacity
+        if bar_count < len(values):
+            values = values[:bar_count]
+        elif bar_count > len(values):
+            padded_values = np.zeros(bar_count)
+            padded_values[:len(values)] = values
+            values = padded_values
+        if smoothness_factor > 0:
+            values = old_frame_smoothing(values, smoothness_factor, smoothing_buffer, previous_values,
+                                         velocity_buffer, moving_average_buffer)
+            if smoothing_buffer is None:
+                velocity_buffer = np.zeros_like(values)
+                moving_average_buffer = [values.copy()]
+            else:
+                if len(moving_average_buffer) >= 3:
+                    moving_average_buffer.pop(0)
+                moving_average_buffer.append(values.copy())
+            smoothing_buffer = values.copy()
+            previous_values = values.copy()
+        values_out[i] = old_enhanced_mode(values, enhanced_mode, height_range)
+    return values_out, opacity_out
+
+
+FADES = [
+    (0, 30, 30, 0),   # start, fadein, fadeout, delay_outro (frames)
+    (12, 20, 15, 9),  # time_in and delay_outro: hidden frames at both ends
+]
+
+
+@pytest.mark.parametrize("fade", FADES)
+def test_fade_curve_matches_calculate_opacity(fade):
+    total = 120
+    expected = [old_opacity(i, total, *fade) for i in range(total)]
+    assert np.allclose(fade_curve(total, *fade), expected, atol=1e-7)
+
+    # fadeout 0 used to divide by zero at the last frames; the curve ends at 0 instead
+    assert np.all(fade_curve(total, 0, 10, 0, 5)[total - 5:] == 0) and fade_curve(total, 0, 10, 0, 5)[50] == 1
+
+
+@pytest.mark.parametrize("fade", FADES)
+@pytest.mark.parametrize("bar_count", [24, 80])  # fewer bars than segments: cut; more: zero-padded
+@pytest.mark.parametrize("smoothness", [0.0, 0.2, 0.5, 0.6, 0.8, 1.0])
+def test_plan_matches_the_per_frame_loop(fade, bar_count, smoothness):
+    total = 120
+    fft_data = np.random.default_rng(bar_count).random((total, 60)).astype(np.float32)
+    plan = build_render_plan(fft_data, bar_count, fade_curve(total, *fade), smoothness)
+    expected_values, expected_opacity = old_draw_loop(fft_data, bar_count, total, fade, smoothness)
+
+    assert plan.values.shape == (total, bar_count) and plan.values.dtype == np.float32
+    assert np.allclose(plan.opacity, expected_opacity, atol=1e-7)
+    assert np.abs(plan.values - expected_values).max() < 1e-6
+    assert [plan.visible(i) for i in range(total)] == list(expected_opacity > 0)
+
+
+@pytest.mark.parametrize("smoothness", [0.0, 0.8])
+def test_enhanced_mode_matches_the_per_bar_boost(smoothness):
+    total, height_range, fade = 90, 270, FADES[1]
+    fft_data = np.random.default_rng(7).random((total, 40)).astype(np.float32)
+    enhanced_mode = {"active": True, "threshold": 0.35, "factor": 1.8}
+    plan = build_render_plan(fft_data, 40, fade_curve(total, *fade), smoothness, enhanced_mode, height_range)
+    expected_values, _ = old_draw_loop(fft_data, 40, total, fade, smoothness, enhanced_mode, height_range)
+    assert np.abs(plan.values - expected_values).max() < 1e-6
+
+    inactive = build_render_plan(fft_data, 40, fade_curve(total, *fade), smoothness, {"active": False}, height_range)
+    assert np.array_equal(inactive.values, build_render_plan(fft_data, 40, fade_curve(total, *fade), smoothness).values)
+
+
+class _NullWriter:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write(self, frame):
+        pass
+
+
+@pytest.mark.parametrize("cls", [visualizer.LinearBarsVisualizer, visualizer.LinearDotsVisualizer, visualizer.WaveformVisualizer])
+def test_visualizer_render_feeds_draw_frame_the_enhanced_plan(cls, monkeypatch):
+    """visualizers/visualizer.py: render() folds enhanced mode into the plan, draw_frame only indexes it"""
+    total, fps, width, height, fade = 60, 30, 320, 180, FADES[1]
+    fft_data = np.random.default_rng(11).random((total, 40)).astype(np.float32)
+    enhanced_mode = {"active": True, "threshold": 0.35, "factor": 1.8}
+    vis = cls()
+
+    def prepare_fft_data(*args, **kwargs):
+        vis.fade_params = {"fadein_frames": fade[1], "fadeout_frames": fade[2], "delay_outro_frames": fade[3]}
+        return None, fft_data, total / fps, total, 735
+
+    drawn = {}
+
+    def draw_frame(frame, values, frame_idx, *args):
+        drawn[frame_idx] = values.copy()
+        return vis.draw_frame(frame, values, frame_idx, *args)
+
+    monkeypatch.setattr(vis, "_prepare_fft_data", prepare_fft_data)
+    monkeypatch.setattr(vis, "_init_writer", lambda *args: _NullWriter())
+    vis.render("song.wav", "out.mp4", width=width, height=height, fps=fps, n_segments=40, bar_count=40,
+               time_in=fade[0] / fps, bar_height_min=10, bar_height_max=35, smoothness=80,
+               draw_frame_fn=draw_frame, enhanced_mode=enhanced_mode)
+
+    height_range = int(height * 35 / 100) - int(height * 10 / 100)
+    expected_values, expected_opacity = old_draw_loop(fft_data, 40, total, fade, 0.8, enhanced_mode, height_range)
+    assert sorted(drawn) == list(np.flatnonzero(expected_opacity > 0))
+    assert max(np.abs(values - expected_values[i]).max() for i, values in drawn.items()) < 1e-6
+    assert not hasattr(vis, "_apply_enhanced_mode")  # no second, per-frame boost inside draw_frame
+
+
+def test_plan_round_trips_through_arrays():
+    plan = build_render_plan(np.ones((10, 8), dtype=np.float32), 8, fade_curve(10, 2, 3, 3), 0.5)
+    copy = RenderPlan.from_arrays({k: v.copy() for k, v in plan.arrays().items()})
+    assert np.array_equal(copy.values, plan.values) and np.array_equal(copy.opacity, plan.opacity)
+    assert smooth_frames(np.ones((1, 4)), 0.9).shape == (1, 4)
+
+
+if __name__ == "__main__":
+    print("🧪 ===== RENDER PLAN TEST =====")
+    for fade in FADES:
+        test_fade_curve_matches_calculate_opacity(fade)
+        for bar_count in (24, 80):
+            for smoothness in (0.0, 0.2, 0.5, 0.6, 0.8, 1.0):
+                test_plan_matches_the_per_frame_loop(fade, bar_count, smoothness)
+    test_enhanced_mode_matches_the_per_bar_boost(0.8)
+    for cls in (visualizer.LinearBarsVisualizer, visualizer.LinearDotsVisualizer, visualizer.WaveformVisualizer):
+        test_visualizer_render_feeds_draw_frame_the_enhanced_plan(cls, pytest.MonkeyPatch())
+    test_plan_round_trips_through_arrays()
+    print("✅ Render plans match the per-frame draw loop")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Low-resolution proxy previews for the visualizer and particle renders.
+
+A preview window must sample the final timeline (each preview frame reads
+the feature row of the final frame at the same instant), keep the final
+aspect ratio at even dimensions, never upscale, and share feature arrays
+with the final render through the content-keyed feature cache. The render
+check needs ffmpeg and the audio stack and is skipped without them.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+import pytest
+
+from api.workflows.generator.feature_cache import FeatureCache
+from api.workflows.generator.preview import PreviewSettings, scale_length
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+
+
+def test_preview_size_and_rate():
+    preview = PreviewSettings(height=480, fps=15)
+    assert preview.size(1920, 1080) == (854, 480)
+    assert preview.size(1080, 1920) == (270, 480)
+    assert preview.rate(30) == 15 and preview.rate(12) == 12
+    assert preview.size(640, 360) == (640, 360)  # never upscaled
+    assert scale_length(4, preview.scale(1080)) == 2 and scale_length(1, 0.25) == 1
+
+
+def test_preview_window_samples_the_final_timeline():
+    preview = PreviewSettings(start=2.0, duration=20.0, fps=15)
+    start, stop = preview.frame_window(final_frames=1800, final_fps=30)
+    assert (start, stop) == (30, 330)
+    source = preview.source_frames(stop, 30, 1800)
+    assert source[start] == 60 and np.all(np.diff(source) == 2)
+
+    # Clamped at the end of the track; a window past the end is empty
+    assert PreviewSettings(start=5.0, duration=20.0, fps=15).frame_window(300, 30) == (75, 150)
+    start, stop = PreviewSettings(start=12.0, duration=5.0, fps=15).frame_window(300, 30)
+    assert stop <= start
+
+    # Rates that do not divide evenly pick the final frame at or before the preview instant
+    source = PreviewSettings(fps=15).source_frames(16, 25, 1000)
+    assert list(source[:4]) == [0, 1, 3, 5] and source[15] == 25
+
+
+def test_feature_cache_is_keyed_on_audio_content():
+    cache = FeatureCache(max_entries=2)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"bass": np.arange(4, dtype=np.float32)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, name) for name in ("a.wav", "copy.wav", "other.wav")]
+        for path, data in zip(paths, (b"same", b"same", b"different")):
+            with open(path, "wb") as f:
+                f.write(data)
+
+        first = cache.get_or_compute(paths[0], ("bass", 30), compute)
+        assert cache.get_or_compute(paths[1], ("bass", 30), compute) is first  # same bytes, other upload path
+        assert not first["bass"].flags.writeable
+        cache.get_or_compute(paths[0], ("bass", 15), compute)
+        cache.get_or_compute(paths[2], ("bass", 30), compute)
+        assert len(calls) == 3 and (cache.hits, cache.misses) == (1, 3)
+        cache.get_or_compute(paths[0], ("bass", 30), compute)  # evicted as least recently used
+        assert len(calls) == 4
+
+
+@needs_ffmpeg
+def test_visualizer_preview_renders_the_window_at_preview_size():
+    pytest.importorskip("pydub")
+    sf = pytest.importorskip("soundfile")
+    import cv2
+    from api.workflows.generator.feature_cache import feature_cache
+    from api.workflows.generator.unified_visualizers import AudioVisualizerBase, VisualizerConfig, VisualizerType
+
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_path = os.path.join(tmp, "tone.wav")
+        sr = 22050
+        t = np.arange(6 * sr) / sr
+        sf.write(audio_path, (0.4 * np.sin(2 * np.pi * 80 * t)).astype(np.float32), sr)
+
+        config = VisualizerConfig(VisualizerType.LINEAR_BARS, width=640, height=360, fps=30, fadein=0.0, fadeout=0.0)
+        visualizer = AudioVisualizerBase("preview_test")
+        output_path = os.path.join(tmp, "preview.mp4")
+        hits = feature_cache.hits
+        visualizer.render(audio_path, output_path, config, preview=PreviewSettings(start=1.0, duration=3.0, height=180, fps=15))
+        visualizer.render(audio_path, output_path, config, preview=PreviewSettings(start=2.0, duration=3.0, height=180, fps=15))
+        assert feature_cache.hits == hits + 1  # the second preview reused the band magnitudes
+
+        cap = cv2.VideoCapture(output_path)
+        frames = []
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(frame)
+        cap.release()
+        assert len(frames) == 45 and frames[0].shape == (180, 320, 3)
+        assert all(frame.any() for frame in frames)
+
+
+if __name__ == "__main__":
+    print("🧪 ===== RENDER PREVIEW TEST =====")
+    test_preview_size_and_rate()
+    test_preview_window_samples_the_final_timeline()
+    test_feature_cache_is_keyed_on_audio_content()
+    print("✅ Preview windows sample the final timeline")
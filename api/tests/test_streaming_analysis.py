@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Memory-ceiling test for streaming music analysis.
+
+Analyzes a synthetic 1-hour signal through StreamingAudioContext and asserts
+that peak traced memory stays bounded by the block size and beat count. The
+in-memory path would hold ~320MB of samples and ~1.3GB of STFT for the same
+signal. The descriptors computed from the streamed frame columns must match
+the in-memory ones, and the analysis services must pick the streaming path
+for recordings past ANALYSIS_STREAMING_MIN_SECONDS.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# The analyzer modules import each other as top-level modules
+analyzer_dir = Path(__file__).parent.parent / "workflows" / "analyzer"
+sys.path.insert(0, str(analyzer_dir))
+sys.path.insert(1, str(Path(__file__).parent.parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "clipizy_test.db"))
+os.environ.setdefault("ANALYSIS_CACHE_ENABLED", "false")
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from audio_context import AudioContext
+from music_analyzer import analyze_audio_bytes
+from streaming_context import StreamingAudioContext
+
+SR = 22050
+HOUR = 3600
+BLOCK = SR * 10
+MEMORY_CEILING_MB = 200
+
+
+def _synthetic_blocks(seconds: int, bpm: float = 120.0):
+    """Tone bed that changes every 90s with a noise click on every beat, generated block by block"""
+    rng = np.random.default_rng(0)
+    beat = int(SR * 60.0 / bpm)
+    click = (np.exp(-np.arange(1500) / 200.0) * rng.standard_normal(1500)).astype(np.float32)
+    total = SR * seconds
+    for start in range(0, total, BLOCK):
+        n = min(BLOCK, total - start)
+        t = (start + np.arange(n)) / SR
+        section = (start // (SR * 90)) % 3
+        x = (0.1 + 0.1 * section) * np.sin(2 * np.pi * (220 + 110 * section) * t)
+        for offset in range(-(start % beat) % beat, n, beat):
+            hit = click[:n - offset]
+            x[offset:offset + len(hit)] += 0.5 * hit
+        yield x.astype(np.float32)
+
+
+def test_streaming_matches_in_memory():
+    """On a short signal the streaming context reproduces the in-memory beats and envelopes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "short.wav")
+        sf.write(path, np.concatenate(list(_synthetic_blocks(60))), SR)
+        full = AudioContext.from_file(path)
+        streamed = StreamingAudioContext.from_file(path, block_seconds=3.3)
+
+    assert streamed.duration == full.duration
+    assert np.allclose(streamed.rms, full.rms, atol=1e-5)
+    assert np.allclose(streamed.beat_envelope, full.beat_envelope, atol=1e-3)
+    assert np.array_equal(streamed.beat_times, full.beat_times)
+
+
+def test_streamed_descriptors_match_in_memory():
+    """Summary and segment descriptors come from streamed frame columns; only HPSS is missing"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "short.wav")
+        sf.write(path, np.concatenate(list(_synthetic_blocks(120))), SR)
+        full = AudioContext.from_file(path)
+        streamed = StreamingAudioContext.from_file(path, block_seconds=3.3)
+
+    summary, expected = streamed.summary_features(), full.summary_features()
+    assert summary.keys() == expected.keys() and summary['harmonic_ratio'] == 0.5
+    for name in ('duration', 'tempo', 'spectral_centroid', 'rms_energy', 'onset_rate'):
+        assert summary[name] == pytest.approx(expected[name], rel=1e-4), name
+
+    segment, expected = streamed.segment_features(30.0, 75.0), full.segment_features(30.0, 75.0)
+    assert segment.keys() == expected.keys()
+    for name in ('tempo', 'spectral_centroid', 'spectral_rolloff', 'spectral_bandwidth', 'zero_crossing_rate',
+                 'rms_energy', 'rms_energy_std', 'onset_rate'):
+        assert segment[name] == pytest.approx(expected[name], rel=1e-4, abs=1e-6), name
+
+
+def test_services_stream_long_recordings(monkeypatch):
+    """Past the duration threshold the services never decode the whole recording"""
+    import audio_context
+    from api.config.settings import settings
+    from api.services.media.analysis_service import analysis_service, wants_streaming
+    from api.services.media.music_analyzer_service import music_analyzer_service
+
+    def in_memory_decode(*args, **kwargs):
+        raise AssertionError("long recording decoded in memory")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mix.wav")
+        sf.write(path, np.concatenate(list(_synthetic_blocks(120))), SR)
+        assert not wants_streaming(path)
+
+        monkeypatch.setattr(settings, "analysis_streaming_min_seconds", 60.0)
+        monkeypatch.setattr(audio_context.AudioContext, "from_bytes", in_memory_decode)
+        monkeypatch.setattr(audio_context.AudioContext, "from_file", in_memory_decode)
+        assert wants_streaming(path)
+
+        result = analysis_service.analyze_music(path)
+        assert "error" not in result, result.get("traceback")
+        assert result["quality"] == "full" and abs(result["duration"] - 120) < 0.1
+        assert len(result["segments"]) >= 1 and result["audio_features"]["harmonic_ratio"] == 0.5
+
+        comprehensive = music_analyzer_service._analyze_music_comprehensive(path)
+        assert comprehensive["peak_analysis"]["analysis_duration"] == pytest.approx(120, abs=0.1)
+        assert len(comprehensive["segments_sec"]) >= 2
+
+
+def test_one_hour_memory_ceiling():
+    """Peak memory for a 1-hour analysis is O(block + beats), not O(track length)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        ctx = StreamingAudioContext.from_blocks(lambda: _synthetic_blocks(HOUR), SR, sr=SR)
+        result = analyze_audio_bytes(ctx)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+    print(f"  1h streaming analysis in {time.perf_counter() - started:.1f}s, peak {peak_mb:.0f}MB")
+    assert abs(result["duration"] - HOUR) < 1.0
+    assert len(result["beat_times_sec"]) > 7000
+    assert len(result["segments_sec"]) > 2
+    assert peak_mb < MEMORY_CEILING_MB
+
+
+if __name__ == "__main__":
+    print("🧪 ===== STREAMING ANALYSIS TEST =====")
+    test_streaming_matches_in_memory()
+    test_streamed_descriptors_match_in_memory()
+    test_one_hour_memory_ceiling()
+    print("✅ Streaming analysis stays within its memory ceiling")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Vectorized FFT preparation of the audio visualizers.
+
+_prepare_fft_data (visualizers/visualizer.py and unified_visualizers.py)
+must give the bars the old per-frame loop gave: one rfft per video frame
+(Hann-windowed above smoothness 0.3), the lowest n_segments/2 bins, the
+exponential smoothing above smoothness 0.5, per-band normalization and the
+mirrored layout. The reference below is that loop, ported from torch to
+numpy, run on the same decoded samples.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from api.workflows.generator import unified_visualizers
+from api.workflows.generator.visualizers import visualizer
+
+VISUALIZERS = [visualizer.AudioVisualizerBase, unified_visualizers.AudioVisualizerBase]
+
+
+def per_frame_fft(y, sr, fps, n_segments, smoothness_factor):
+    """The previous implementation: a loop over video frames"""
+    total_frames = int(len(y) / sr * fps)
+    samples_per_frame = int(sr / fps)
+    if smoothness_factor > 0.3:
+        window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(samples_per_frame) / samples_per_frame)  # torch.hann_window
+    else:
+        window = np.ones(samples_per_frame)
+
+    magnitudes = []
+    for i in range(total_frames):
+        frame = np.zeros(samples_per_frame)
+        chunk = y[i * samples_per_frame:(i + 1) * samples_per_frame]
+        frame[:len(chunk)] = chunk
+        magnitudes.append(np.abs(np.fft.rfft(frame * window))[:n_segments // 2])
+    magnitudes = np.array(magnitudes)
+
+    if smoothness_factor > 0.5:
+        alpha = 0.1 + 0.3 * smoothness_factor
+        smoothed = np.zeros_like(magnitudes)
+        smoothed[0] = magnitudes[0]
+        for i in range(1, len(magnitudes)):
+            smoothed[i] = alpha * magnitudes[i] + (1 - alpha) * smoothed[i - 1]
+        magnitudes = smoothed
+
+    for band in range(magnitudes.shape[1]):
+        if magnitudes[:, band].max() > 0:
+            magnitudes[:, band] /= magnitudes[:, band].max()
+    return np.concatenate([magnitudes, magnitudes[:, ::-1]], axis=1)[:, :n_segments], total_frames
+
+
+@pytest.fixture(scope="module")
+def audio_path():
+    """3 s of stereo 16-bit audio: a kick-like pulse, a chord and some noise, silent for the first 0.2 s"""
+    sr = 22050
+    rng = np.random.default_rng(3)
+    t = np.arange(3 * sr) / sr
+    pulse = np.exp(-(t % 0.5) * 12) * np.sin(2 * np.pi * 60 * t)
+    chord = 0.3 * (np.sin(2 * np.pi * 440 * t) + np.sin(2 * np.pi * 554 * t))
+    left = 0.5 * pulse + chord + 0.05 * rng.standard_normal(len(t))
+    right = 0.5 * pulse - chord + 0.05 * rng.standard_normal(len(t))
+    stereo = 0.4 * np.stack([left, right], axis=1)
+    stereo[:int(0.2 * sr)] = 0.0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "song.wav")
+        sf.write(path, stereo, sr, subtype="PCM_16")
+        yield path
+
+
+@pytest.mark.parametrize("cls", VISUALIZERS)
+def test_decode_matches_a_mono_float_read(cls, audio_path):
+    y, sr = cls()._decode_audio(audio_path)
+    reference, reference_sr = sf.read(audio_path, dtype="float32")
+    assert sr == reference_sr and y.dtype == np.float32
+    assert np.allclose(y, reference.mean(axis=1), atol=1e-6)
+
+    trimmed, _ = cls()._decode_audio(audio_path, duration_intro=1.0)
+    assert np.allclose(trimmed, y[sr:], atol=1e-6)
+
+
+@pytest.mark.parametrize("cls", VISUALIZERS)
+@pytest.mark.parametrize("n_segments", [60, 400])  # few bins: partial DFT basis; many: batched rfft
+@pytest.mark.parametrize("smoothness", [0.0, 0.4, 0.8])  # no window; Hann window; Hann window and EMA
+def test_fft_bars_match_the_per_frame_loop(cls, audio_path, n_segments, smoothness):
+    fps = 30
+    y, fft_data, duration, total_frames, samples_per_frame = cls()._prepare_fft_data(
+        audio_path, fps, n_segments, smoothness_factor=smoothness)
+    expected, expected_frames = per_frame_fft(y.astype(np.float64), 22050, fps, n_segments, smoothness)
+
+    assert (total_frames, samples_per_frame, duration) == (expected_frames, 735, pytest.approx(3.0))
+    assert fft_data.shape == expected.shape == (90, n_segments) and fft_data.dtype == np.float32
+    assert np.abs(fft_data - expected).max() < 1e-4
+    assert np.all(fft_data[:6] < 1e-6)  # the silent intro stays silent, EMA included
+
+
+@pytest.mark.parametrize("cls", VISUALIZERS)
+def test_smoothing_filter_matches_the_recurrence(cls):
+    values = np.random.default_rng(4).random((50, 8)).astype(np.float32)
+    smoothed = cls()._apply_smoothing_filter(values, alpha=0.25)
+    expected = values.astype(np.float64).copy()
+    for i in range(1, len(expected)):
+        expected[i] = 0.25 * values[i] + 0.75 * expected[i - 1]
+    assert np.allclose(smoothed, expected, atol=1e-6)
+    assert cls()._apply_smoothing_filter(values[:0]).shape == (0, 8)
+
+
+if __name__ == "__main__":
+    print("🧪 ===== VISUALIZER FFT TEST =====")
+    for cls in VISUALIZERS:
+        test_smoothing_filter_matches_the_recurrence(cls)
+    print("✅ Exponential smoothing matches the per-frame recurrence")
@@ -27,7 +27,7 @@ from api.routers import (
 from api.routers.business.points_router import router as points_router
 
 # Import services for initialization
-from api.services.utils.vercel_compatibility import check_ml_availability
+from api.services.utils.vercel_compatibility import check_ml_availability, start_librosa_import
 from api.db import create_tables
 from api.config.settings import settings
 
@@ -74,6 +74,8 @@ async def lifespan(app: FastAPI):
     # Check ML availability
     ml_status = check_ml_availability()
     print(f"📊 ML Libraries Status: {ml_status}")
+    # Warm the librosa stack in the background; until it is ready, analysis uses the lite analyzer
+    start_librosa_import()
 
     # Create database tables
     try:
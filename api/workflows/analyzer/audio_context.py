@@ -0,0 +1,312 @@
+import io
+from functools import cached_property
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+# =============================================================================
+# SHARED AUDIO CONTEXT
+# =============================================================================
+
+N_FFT = 2048
+HOP = 512
+
+
+def _decode(source):
+    """Decode an audio source (path or file-like) to mono float32 at its native rate."""
+    y, file_sr = sf.read(source, always_2d=False, dtype='float32')
+    if y.ndim > 1:
+        y = np.mean(y, axis=1)
+    return np.ascontiguousarray(y, dtype=np.float32), int(file_sr)
+
+
+class AudioContext:
+    """Decoded audio shared by every analysis stage.
+
+    The file is decoded once and resampled once to ``sr``. Derived arrays
+    (STFT, RMS, onset envelopes, beats, HPSS) are computed on first access
+    and memoized, so a full analysis pays for each of them exactly once.
+    Frame-level arrays all use ``n_fft``/``hop`` on the normalized signal ``y``.
+    """
+
+    streaming = False  # StreamingAudioContext keeps per-frame series only, no samples
+
+    def __init__(self, native, native_sr, sr=22050, hop=HOP, n_fft=N_FFT, source=None):
+        self.native = native
+        self.native_sr = int(native_sr)
+        self.sr = int(sr)
+        self.hop = int(hop)
+        self.n_fft = int(n_fft)
+        self.source = source
+
+    @classmethod
+    def from_bytes(cls, data: bytes, sr=22050, hop=HOP, n_fft=N_FFT, source=None):
+        """Build a context from encoded audio bytes (``source`` path is used for the audioread fallback)."""
+        try:
+            native, native_sr = _decode(io.BytesIO(data))
+        except Exception:
+            if source is None:
+                raise
+            native, native_sr = librosa.load(source, sr=None, mono=True)
+            native = np.ascontiguousarray(native, dtype=np.float32)
+        return cls(native, native_sr, sr=sr, hop=hop, n_fft=n_fft, source=source)
+
+    @classmethod
+    def from_file(cls, file_path: str, sr=22050, hop=HOP, n_fft=N_FFT):
+        """Build a context from an audio file, falling back to audioread for formats libsndfile rejects."""
+        try:
+            native, native_sr = _decode(file_path)
+        except Exception:
+            native, native_sr = librosa.load(file_path, sr=None, mono=True)
+            native = np.ascontiguousarray(native, dtype=np.float32)
+        return cls(native, native_sr, sr=sr, hop=hop, n_fft=n_fft, source=file_path)
+
+    # --- signal -------------------------------------------------------------
+
+    @cached_property
+    def samples(self) -> np.ndarray:
+        """Mono PCM resampled to ``sr``, not normalized (same as ``librosa.load``)."""
+        if self.native_sr == self.sr:
+            return self.native
+        return librosa.resample(self.native, orig_sr=self.native_sr, target_sr=self.sr).astype(np.float32)
+
+    @cached_property
+    def peak(self) -> float:
+        """Gain removed by normalization, so amplitude features can be reported on the raw scale."""
+        peak = float(np.max(np.abs(self.samples))) if len(self.samples) else 0.0
+        return peak if peak > np.finfo(np.float32).tiny else 1.0
+
+    @cached_property
+    def y(self) -> np.ndarray:
+        """Peak-normalized mono PCM at ``sr``; input to every frame-level feature."""
+        return librosa.util.normalize(self.samples).astype(np.float32)
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sr
+
+    @property
+    def native_duration(self) -> float:
+        return len(self.native) / self.native_sr
+
+    def segment(self, start_time: float, end_time: float) -> np.ndarray:
+        """Raw samples between two times, as the per-segment analyzers expect."""
+        return self.samples[int(start_time * self.sr):int(end_time * self.sr)]
+
+    # --- spectral -----------------------------------------------------------
+
+    @cached_property
+    def stft(self) -> np.ndarray:
+        return librosa.stft(self.y, n_fft=self.n_fft, hop_length=self.hop)
+
+    @cached_property
+    def magnitude(self) -> np.ndarray:
+        return np.abs(self.stft)
+
+    @cached_property
+    def frame_power(self) -> np.ndarray:
+        """Broadband power per STFT frame."""
+        return (self.magnitude ** 2).sum(axis=0)
+
+    @cached_property
+    def frame_times(self) -> np.ndarray:
+        return librosa.frames_to_time(np.arange(self.stft.shape[1]), sr=self.sr, hop_length=self.hop)
+
+    @cached_property
+    def mel_db(self) -> np.ndarray:
+        mel = librosa.feature.melspectrogram(S=self.magnitude ** 2, sr=self.sr)
+        return librosa.power_to_db(mel)
+
+    @cached_property
+    def rms(self) -> np.ndarray:
+        return librosa.feature.rms(y=self.y, frame_length=self.n_fft, hop_length=self.hop)[0]
+
+    @cached_property
+    def rms_times(self) -> np.ndarray:
+        return librosa.frames_to_time(np.arange(len(self.rms)), sr=self.sr, hop_length=self.hop)
+
+    # --- rhythm -------------------------------------------------------------
+
+    @cached_property
+    def onset_envelope(self) -> np.ndarray:
+        """Mean-aggregated onset strength (``librosa.onset.onset_detect`` default)."""
+        return librosa.onset.onset_strength(S=self.mel_db, sr=self.sr, hop_length=self.hop, n_fft=self.n_fft)
+
+    @cached_property
+    def beat_envelope(self) -> np.ndarray:
+        """Median-aggregated onset strength (``librosa.beat.beat_track`` default)."""
+        return librosa.onset.onset_strength(S=self.mel_db, sr=self.sr, hop_length=self.hop,
+                                            n_fft=self.n_fft, aggregate=np.median)
+
+    @cached_property
+    def _beat_track(self):
+        tempo, frames = librosa.beat.beat_track(onset_envelope=self.beat_envelope, sr=self.sr,
+                                                hop_length=self.hop)
+        # librosa >= 0.10 returns the tempo as a one-element array
+        return float(np.atleast_1d(tempo)[0]), np.asarray(frames)
+
+    @property
+    def tempo(self):
+        return self._beat_track[0]
+
+    @property
+    def beat_frames(self) -> np.ndarray:
+        return self._beat_track[1]
+
+    @cached_property
+    def beat_times(self) -> np.ndarray:
+        return librosa.frames_to_time(self.beat_frames, sr=self.sr, hop_length=self.hop)
+
+    @cached_property
+    def onset_frames(self) -> np.ndarray:
+        return librosa.onset.onset_detect(onset_envelope=self.onset_envelope, sr=self.sr,
+                                          hop_length=self.hop)
+
+    # --- harmonic / percussive ----------------------------------------------
+
+    @cached_property
+    def hpss(self):
+        """Harmonic and percussive STFTs."""
+        return librosa.decompose.hpss(self.stft)
+
+    @cached_property
+    def hpss_signals(self):
+        """Harmonic and percussive time-domain signals (``librosa.effects.hpss``)."""
+        H, P = self.hpss
+        kw = dict(dtype=self.y.dtype, n_fft=self.n_fft, hop_length=self.hop, length=len(self.y))
+        return librosa.istft(H, **kw), librosa.istft(P, **kw)
+
+    # --- frame-level feature matrix -----------------------------------------
+
+    @cached_property
+    def frame_features(self) -> "FrameFeatures":
+        """Whole-track frame features; per-segment descriptors are range reductions over it."""
+        return FrameFeatures.from_context(self)
+
+    def segment_features(self, start_time: float, end_time: float) -> dict:
+        """Descriptor features for ``[start_time, end_time)`` without re-analyzing the slice."""
+        return self.frame_features.describe(start_time, end_time)
+
+    # --- summaries ----------------------------------------------------------
+
+    def summary_features(self, include_onsets=True) -> dict:
+        """Whole-track descriptor features (tempo, centroid, energy, HPSS ratio, onset rate)."""
+        harmonic, percussive = self.hpss_signals
+        h_energy, p_energy = np.sum(harmonic**2), np.sum(percussive**2)
+        features = {
+            'duration': self.duration,
+            'tempo': float(self.tempo),
+            'spectral_centroid': float(np.mean(librosa.feature.spectral_centroid(S=self.magnitude, sr=self.sr)[0])),
+            # frame features run on the normalized signal; report energy on the file's own scale
+            'rms_energy': float(np.mean(self.rms) * self.peak),
+            'harmonic_ratio': float(h_energy / (h_energy + p_energy)),
+        }
+        if include_onsets:
+            features['onset_rate'] = len(self.onset_frames) / self.duration
+        return features
+
+
+# =============================================================================
+# FRAME FEATURES + RANGE REDUCTIONS
+# =============================================================================
+
+class FrameFeatures:
+    """Frame-level features for a whole track with O(1) range mean/std.
+
+    Every column shares the STFT framing of the context. Prefix sums of each
+    column and its square are built once, so the mean and std over any frame
+    range cost two lookups; describing all segments of a track is O(frames)
+    in total instead of re-running beat tracking, HPSS and onset detection
+    on every slice. Percentiles (tempo median included) slice the column.
+    """
+
+    COLUMNS = ('tempo', 'spectral_centroid', 'spectral_rolloff', 'spectral_bandwidth',
+               'zero_crossing_rate', 'rms', 'harmonic_energy', 'percussive_energy', 'onset_strength')
+
+    def __init__(self, columns: dict, onset_frames, sr: int, hop: int, gain: float = 1.0):
+        n = min(len(v) for v in columns.values())
+        self.data = {k: np.asarray(columns[k][:n], dtype=np.float64) for k in self.COLUMNS}
+        self.n_frames = n
+        self.sr = int(sr)
+        self.hop = int(hop)
+        self.gain = float(gain)
+        self._sum = {k: np.concatenate(([0.0], np.cumsum(v))) for k, v in self.data.items()}
+        self._sum_sq = {k: np.concatenate(([0.0], np.cumsum(v * v))) for k, v in self.data.items()}
+        onset_frames = np.asarray(onset_frames, dtype=int)
+        counts = np.bincount(onset_frames[(onset_frames >= 0) & (onset_frames < n)], minlength=n)
+        self._onsets = np.concatenate(([0], np.cumsum(counts)))
+
+    @classmethod
+    def from_context(cls, ctx: "AudioContext") -> "FrameFeatures":
+        S, sr, hop = ctx.magnitude, ctx.sr, ctx.hop
+        H, P = ctx.hpss
+        columns = {
+            'tempo': librosa.feature.tempo(onset_envelope=ctx.beat_envelope, sr=sr, hop_length=hop,
+                                           aggregate=None),
+            'spectral_centroid': librosa.feature.spectral_centroid(S=S, sr=sr)[0],
+            'spectral_rolloff': librosa.feature.spectral_rolloff(S=S, sr=sr)[0],
+            'spectral_bandwidth': librosa.feature.spectral_bandwidth(S=S, sr=sr)[0],
+            'zero_crossing_rate': librosa.feature.zero_crossing_rate(ctx.y, frame_length=ctx.n_fft,
+                                                                     hop_length=hop)[0],
+            'rms': ctx.rms,
+            'harmonic_energy': (np.abs(H) ** 2).sum(axis=0),
+            'percussive_energy': (np.abs(P) ** 2).sum(axis=0),
+            'onset_strength': ctx.onset_envelope,
+        }
+        return cls(columns, ctx.onset_frames, sr, hop, gain=ctx.peak)
+
+    # --- frame ranges -------------------------------------------------------
+
+    def frame_range(self, start_time: float, end_time: float):
+        """Half-open frame range whose centers fall in ``[start_time, end_time)``."""
+        a = int(np.clip(np.ceil(start_time * self.sr / self.hop), 0, self.n_frames))
+        b = int(np.clip(np.ceil(end_time * self.sr / self.hop), a, self.n_frames))
+        if b == a and a < self.n_frames:
+            b = a + 1  # sub-hop segments still get the frame they start in
+        return a, b
+
+    def mean(self, column: str, a: int, b: int) -> float:
+        if b <= a:
+            return 0.0
+        return float((self._sum[column][b] - self._sum[column][a]) / (b - a))
+
+    def std(self, column: str, a: int, b: int) -> float:
+        if b <= a:
+            return 0.0
+        m = self.mean(column, a, b)
+        var = (self._sum_sq[column][b] - self._sum_sq[column][a]) / (b - a) - m * m
+        return float(np.sqrt(max(var, 0.0)))
+
+    def total(self, column: str, a: int, b: int) -> float:
+        return float(self._sum[column][b] - self._sum[column][a])
+
+    def percentile(self, column: str, a: int, b: int, q) -> float:
+        if b <= a:
+            return 0.0
+        return float(np.percentile(self.data[column][a:b], q))
+
+    def onset_count(self, a: int, b: int) -> int:
+        return int(self._onsets[b] - self._onsets[a])
+
+    # --- descriptors --------------------------------------------------------
+
+    def describe(self, start_time: float, end_time: float) -> dict:
+        """Segment descriptors with the keys of ``AudioContext.summary_features``, plus spreads."""
+        a, b = self.frame_range(start_time, end_time)
+        duration = max(end_time - start_time, 0.0)
+        h, p = self.total('harmonic_energy', a, b), self.total('percussive_energy', a, b)
+        return {
+            'duration': duration,
+            'tempo': self.percentile('tempo', a, b, 50),
+            'spectral_centroid': self.mean('spectral_centroid', a, b),
+            'spectral_rolloff': self.mean('spectral_rolloff', a, b),
+            'spectral_bandwidth': self.mean('spectral_bandwidth', a, b),
+            'zero_crossing_rate': self.mean('zero_crossing_rate', a, b),
+            # frame features run on the normalized signal; report energy on the file's own scale
+            'rms_energy': self.mean('rms', a, b) * self.gain,
+            'rms_energy_std': self.std('rms', a, b) * self.gain,
+            'harmonic_ratio': float(h / (h + p)) if (h + p) > 0 else 0.5,
+            'onset_strength': self.mean('onset_strength', a, b),
+            'onset_rate': self.onset_count(a, b) / duration if duration > 0 else 0.0,
+        }
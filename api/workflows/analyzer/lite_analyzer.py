@@ -0,0 +1,418 @@
+"""
+Lite music analyzer: numpy only
+
+Produces the same output schema as music_analyzer.analyze_audio_bytes without
+librosa, numba, ruptures or even scipy (scipy.signal alone takes ~1s to
+import), so cold-start and serverless workers can answer after ~0.1s of
+imports. Pipeline: strided-frame STFT -> log-mel spectral flux onset
+envelope -> autocorrelation tempo -> dynamic programming beat tracking
+(Ellis 2007) -> beat-synchronous novelty curve segmentation.
+
+Decoding uses soundfile when it is installed and falls back to the standard
+library's PCM WAV reader otherwise.
+"""
+import io
+import wave
+
+import numpy as np
+
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
+SR = 22050
+HOP = 512
+N_FFT = 2048
+N_MELS = 64
+TOP_DB = 80.0
+FRAME_CHUNK = 4096  # STFT frames transformed at once (bounds peak memory)
+
+# =============================================================================
+# DECODE / RESAMPLE
+# =============================================================================
+
+def decode(data):
+    """Encoded bytes (or a path) -> mono float32 samples and sample rate."""
+    source = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+    if sf is not None:
+        y, sr = sf.read(source, dtype='float32', always_2d=True)
+        return y.mean(axis=1).astype(np.float32), int(sr)
+
+    with wave.open(source, 'rb') as w:
+        width, channels, sr = w.getsampwidth(), w.getnchannels(), w.getframerate()
+        raw = w.readframes(w.getnframes())
+    if width == 3:
+        # 24-bit PCM: sign-extend into int32
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        y = (b[:, 0].astype(np.int32) << 8 | b[:, 1].astype(np.int32) << 16 | b[:, 2].astype(np.int32) << 24) >> 8
+        scale = float(1 << 23)
+    elif width == 1:
+        y = np.frombuffer(raw, dtype=np.uint8).astype(np.int32) - 128
+        scale = 128.0
+    else:
+        y = np.frombuffer(raw, dtype={2: '<i2', 4: '<i4'}[width])
+        scale = float(1 << (8 * width - 1))
+    y = (y.astype(np.float32) / scale).reshape(-1, channels).mean(axis=1)
+    return y.astype(np.float32), int(sr)
+
+
+def _hann(n):
+    """Periodic Hann window (``scipy.signal.get_window('hann', n)``)."""
+    return (0.5 - 0.5 * np.cos(2.0 * np.pi * np.arange(n) / n)).astype(np.float32)
+
+
+def decimate(y, factor, taps_per_phase=8):
+    """Kaiser-windowed sinc lowpass + integer downsampling, computed only at the kept samples."""
+    if factor <= 1:
+        return y
+    n_taps = taps_per_phase * factor + 1
+    t = np.arange(n_taps) - (n_taps - 1) / 2.0
+    cutoff = 0.45 / factor  # cycles/sample, just under the new Nyquist
+    h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(n_taps, 8.6)
+    h /= h.sum()
+
+    # Polyphase form: view the signal as rows of ``factor`` samples; each
+    # phase (column) is correlated with every ``factor``-th filter tap
+    half = (n_taps - 1) // 2
+    n_out = (len(y) + factor - 1) // factor
+    n_rows = -(-n_taps // factor)
+    g = np.zeros(n_rows * factor, dtype=np.float32)
+    g[:n_taps] = h[::-1]
+    padded = np.zeros((n_out + n_rows) * factor, dtype=np.float32)
+    padded[half:half + len(y)] = y
+    rows = padded.reshape(-1, factor)
+    out = np.zeros(n_out, dtype=np.float32)
+    for p in range(factor):
+        out += np.correlate(np.ascontiguousarray(rows[:, p]), g[p::factor], 'valid')[:n_out]
+    return out
+
+
+def analysis_rate(native_sr, sr=SR):
+    """Rate reached by the largest integer decimation that stays at or above ``sr``."""
+    factor = max(1, int(native_sr // sr))
+    return factor, native_sr / factor
+
+# =============================================================================
+# SPECTRAL FRAMES
+# =============================================================================
+
+def _hz_to_mel(f):
+    """Slaney mel scale (linear below 1 kHz, logarithmic above)."""
+    f = np.asanyarray(f, dtype=float)
+    mel = f / (200.0 / 3)
+    log_region = f >= 1000.0
+    return np.where(log_region, 15.0 + np.log(np.maximum(f, 1e-10) / 1000.0) / (np.log(6.4) / 27.0), mel)
+
+
+def _mel_to_hz(m):
+    m = np.asanyarray(m, dtype=float)
+    return np.where(m >= 15.0, 1000.0 * np.exp((np.log(6.4) / 27.0) * (m - 15.0)), m * (200.0 / 3))
+
+
+def mel_filterbank(sr, n_fft, n_mels=N_MELS):
+    """Slaney-normalized triangular mel filters, shape (n_mels, 1 + n_fft // 2)."""
+    fft_freqs = np.fft.rfftfreq(n_fft, 1.0 / sr)
+    edges = _mel_to_hz(np.linspace(_hz_to_mel(0.0), _hz_to_mel(sr / 2.0), n_mels + 2))
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (fft_freqs - lower) / (center - lower)
+    falling = (upper - fft_freqs) / (upper - center)
+    weights = np.maximum(0.0, np.minimum(rising, falling))
+    weights *= (2.0 / (edges[2:] - edges[:-2]))[:, None]
+    return weights.astype(np.float32)
+
+
+def spectral_frames(y, sr, n_fft=N_FFT, hop=HOP, n_mels=N_MELS):
+    """Centered strided frames -> per-frame mel power, RMS and spectral centroid.
+
+    Frames are views into the padded signal (no copy); the FFT runs
+    FRAME_CHUNK frames at a time, so only the mel/scalar outputs scale with
+    track length.
+    """
+    pad = n_fft // 2
+    padded = np.pad(np.asarray(y, dtype=np.float32), (pad, pad))
+    if len(padded) < n_fft:
+        padded = np.pad(padded, (0, n_fft - len(padded)))
+    frames = np.lib.stride_tricks.sliding_window_view(padded, n_fft)[::hop]
+    n_frames = frames.shape[0]
+
+    window = _hann(n_fft)
+    mel_t = mel_filterbank(sr, n_fft, n_mels).T
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sr).astype(np.float32)
+
+    mel_power = np.empty((n_frames, n_mels), dtype=np.float32)
+    rms = np.empty(n_frames, dtype=np.float32)
+    centroid = np.empty(n_frames, dtype=np.float32)
+    for start in range(0, n_frames, FRAME_CHUNK):
+        block = frames[start:start + FRAME_CHUNK]
+        stop = start + len(block)
+        rms[start:stop] = np.sqrt(np.mean(block * block, axis=1))
+        power = np.abs(np.fft.rfft(block * window, axis=1)) ** 2
+        mel_power[start:stop] = power @ mel_t
+        magnitude = np.sqrt(power)
+        centroid[start:stop] = (magnitude @ freqs) / np.maximum(magnitude.sum(axis=1), 1e-10)
+    return mel_power, rms, centroid
+
+
+def power_to_db(power, top_db=TOP_DB):
+    db = 10.0 * np.log10(np.maximum(power, 1e-10))
+    return np.maximum(db, db.max() - top_db) if db.size else db
+
+
+def onset_envelope(mel_db, n_fft=N_FFT, hop=HOP):
+    """Spectral flux: mean positive log-mel difference, aligned to frame centers like librosa."""
+    flux = np.maximum(0.0, np.diff(mel_db, axis=0)).mean(axis=1)
+    lead = np.zeros(1 + n_fft // (2 * hop), dtype=np.float32)
+    return np.concatenate((lead, flux.astype(np.float32)))[:len(mel_db)]
+
+# =============================================================================
+# TEMPO AND BEATS
+# =============================================================================
+
+def autocorrelate(x, max_size):
+    """Autocorrelation via FFT, first ``max_size`` lags."""
+    n_fft = 1 << int(2 * len(x) - 1).bit_length()
+    spectrum = np.fft.rfft(x, n=n_fft)
+    return np.fft.irfft(np.abs(spectrum) ** 2, n=n_fft)[:max_size]
+
+
+def autocorrelation_tempo(onset_env, sr, hop, start_bpm=120.0, std_bpm=1.0, min_bpm=60.0, max_bpm=200.0):
+    """Global tempo from the onset envelope's autocorrelation, weighted by a log-normal prior."""
+    fps = sr / hop
+    max_lag = int(np.ceil(fps * 60.0 / min_bpm)) + 2
+    ac = autocorrelate(onset_env - np.mean(onset_env), max_size=max_lag)
+    lags = np.arange(1, max_lag)
+    bpms = 60.0 * fps / lags
+    prior = np.exp(-0.5 * (np.log2(bpms / start_bpm) / std_bpm) ** 2)
+    score = np.where((bpms >= min_bpm) & (bpms <= max_bpm), ac[1:] * prior, -np.inf)
+    k = int(np.argmax(score))
+
+    # parabolic interpolation around the peak lag for a sub-frame period
+    lag = float(lags[k])
+    if 0 < k < len(lags) - 1:
+        a, b, c = ac[k], ac[k + 1], ac[k + 2]
+        denom = a - 2 * b + c
+        if denom < 0:
+            lag += 0.5 * (a - c) / denom
+    return 60.0 * fps / lag
+
+
+def track_beats(onset_env, tempo, sr, hop, tightness=100.0):
+    """Dynamic-programming beat tracker (Ellis 2007, as in librosa.beat.beat_track).
+
+    Returns beat frame indices. Each frame's best predecessor is searched
+    between half and two beat periods back, penalized by the squared log
+    deviation from the period.
+    """
+    onset_env = np.asarray(onset_env, dtype=float)
+    if len(onset_env) < 3 or not onset_env.any():
+        return np.zeros(0, dtype=int)
+
+    period = 60.0 * sr / hop / tempo
+    fpb = int(round(period))
+    norm = onset_env / onset_env.std(ddof=1)
+    kernel = np.exp(-0.5 * (np.arange(-fpb, fpb + 1) * 32.0 / fpb) ** 2)
+    localscore = np.convolve(norm, kernel, 'same')
+
+    # predecessor offsets relative to the current frame, furthest first
+    offsets = np.arange(-2 * fpb, -int(np.round(fpb / 2)) + 1)
+    txcost = -tightness * np.log(-offsets / period) ** 2
+
+    n = len(localscore)
+    cumscore = np.zeros(n)
+    backlink = np.full(n, -1, dtype=int)
+    threshold = 0.01 * localscore.max()
+    first_beat = True
+    for i in range(n):
+        prev = i + offsets
+        candidates = txcost.copy()
+        valid = prev >= 0
+        candidates[valid] += cumscore[prev[valid]]
+        best = int(np.argmax(candidates))
+        cumscore[i] = localscore[i] + candidates[best]
+        if first_beat and localscore[i] < threshold:
+            backlink[i] = -1
+        else:
+            backlink[i] = prev[best]
+            first_beat = False
+
+    # last beat: the final local max of the cumulative score above half the median max
+    maxes = np.flatnonzero((cumscore[1:-1] >= cumscore[:-2]) & (cumscore[1:-1] >= cumscore[2:])) + 1
+    if not len(maxes):
+        return np.zeros(0, dtype=int)
+    med = np.median(cumscore[maxes])
+    last = int(maxes[cumscore[maxes] >= 0.5 * med][-1])
+
+    beats = [last]
+    while backlink[beats[-1]] >= 0:
+        beats.append(int(backlink[beats[-1]]))
+    beats = np.array(beats[::-1], dtype=int)
+
+    # trim weak leading/trailing beats
+    smooth = np.convolve(localscore[beats], _hann(5), 'same')
+    strong = np.flatnonzero(smooth >= 0.5 * np.sqrt(np.mean(smooth ** 2)))
+    if len(strong):
+        beats = beats[strong[0]:strong[-1] + 1]
+    return beats
+
+
+def downbeats_from_beats(beat_times, onset_at_beats, duration, beats_per_bar=4):
+    """Every ``beats_per_bar``-th beat, on the phase with the strongest onsets, extended to the edges."""
+    beat_times = np.asarray(beat_times, dtype=float)
+    if len(beat_times) < beats_per_bar:
+        return np.array([0.0, duration])
+    phase = int(np.argmax([np.mean(onset_at_beats[p::beats_per_bar]) for p in range(beats_per_bar)]))
+    db = beat_times[phase::beats_per_bar]
+    bar = float(np.median(np.diff(db))) if len(db) > 1 else beats_per_bar * float(np.median(np.diff(beat_times)))
+    # Skip extrapolated bars that would land within a quarter bar of either edge
+    back = np.arange(db[0] - bar, 0.25 * bar, -bar)[::-1]
+    fwd = np.arange(db[-1] + bar, duration - 0.25 * bar, bar)
+    grid = np.concatenate(([0.0], back, db, fwd, [duration]))
+    grid = np.unique(np.clip(grid, 0.0, duration))
+    return grid[np.r_[True, np.diff(grid) > 1e-3]]
+
+# =============================================================================
+# NOVELTY SEGMENTATION
+# =============================================================================
+
+def beat_sync(features, beat_frames):
+    """Mean of each feature row over the frames of every beat interval, shape (n_beats, d)."""
+    bounds = np.clip(beat_frames, 0, len(features) - 1)
+    sums = np.add.reduceat(features, bounds, axis=0)
+    counts = np.diff(np.r_[bounds, len(features)])[:, None]
+    return sums / counts
+
+
+def novelty_curve(beat_features, half_width):
+    """Distance between the mean features of the ``half_width`` beats before and after each beat.
+
+    This is the checkerboard-kernel novelty of a box kernel, computed from
+    prefix sums in O(beats) instead of from a beats x beats self-similarity
+    matrix.
+    """
+    n = len(beat_features)
+    novelty = np.zeros(n)
+    if n < 2 * half_width + 1:
+        return novelty
+    z = (beat_features - beat_features.mean(axis=0)) / (beat_features.std(axis=0) + 1e-8)
+    c = np.vstack((np.zeros((1, z.shape[1])), np.cumsum(z, axis=0)))
+    i = np.arange(half_width, n - half_width)
+    before = (c[i] - c[i - half_width]) / half_width
+    after = (c[i + half_width] - c[i]) / half_width
+    novelty[i] = np.linalg.norm(after - before, axis=1) / np.sqrt(z.shape[1])
+    return novelty
+
+
+def smooth_gaussian(x, sigma=1.0):
+    """Gaussian smoothing with symmetric edges (``scipy.ndimage.gaussian_filter1d``)."""
+    radius = int(4 * sigma + 0.5)
+    kernel = np.exp(-0.5 * (np.arange(-radius, radius + 1) / sigma) ** 2)
+    padded = np.pad(np.asarray(x, dtype=float), radius, mode='symmetric')
+    return np.convolve(padded, kernel / kernel.sum(), 'valid')
+
+
+def pick_peaks(x, distance, height):
+    """Local maxima at least ``height`` tall, suppressing any within ``distance`` of a taller one."""
+    if len(x) < 3:
+        return np.zeros(0, dtype=int)
+    peaks = np.flatnonzero((x[1:-1] > x[:-2]) & (x[1:-1] >= x[2:])) + 1
+    peaks = peaks[x[peaks] >= height]
+    kept = []
+    for p in peaks[np.argsort(-x[peaks], kind='stable')]:
+        if all(abs(p - q) >= distance for q in kept):
+            kept.append(p)
+    return np.array(sorted(kept), dtype=int)
+
+
+def novelty_segments(novelty, beat_times, duration, min_gap_seconds=11.0, max_segments=11,
+                     peak_threshold=0.35, min_novelty=0.5):
+    """Pick novelty peaks at least ``min_gap_seconds`` apart as segment boundaries.
+
+    A peak must reach ``peak_threshold`` of the largest peak and
+    ``min_novelty`` (in feature standard deviations), so a track without
+    sections stays in one segment.
+    """
+    if len(beat_times) < 3 or not novelty.any():
+        return np.array([0.0, duration]), np.zeros(0, dtype=int)
+    med_beat = float(np.median(np.diff(beat_times)))
+    min_gap_beats = max(2, int(round(min_gap_seconds / max(med_beat, 1e-6))))
+    smooth = smooth_gaussian(novelty, 1.0)
+    peaks = pick_peaks(smooth, min_gap_beats, max(min_novelty, peak_threshold * smooth.max()))
+
+    # keep clear of the edges, then the strongest peaks up to the segment budget
+    t = beat_times[peaks]
+    peaks = peaks[(t >= 0.5 * min_gap_seconds) & (t <= duration - 0.5 * min_gap_seconds)]
+    peaks = np.sort(peaks[np.argsort(-smooth[peaks], kind='stable')[:max(0, max_segments - 1)]])
+    segments = np.unique(np.round(np.r_[0.0, beat_times[peaks], duration], 6))
+    return segments, peaks
+
+# =============================================================================
+# MAIN ENTRY
+# =============================================================================
+
+def analyze_audio_bytes(data, sr=SR, hop=HOP, create_plot=False, audio_file="audio.wav",
+                        max_segments=11, min_gap_seconds=11.0, include_features=False, **_unused):
+    """Analyze encoded audio; same result keys as music_analyzer.analyze_audio_bytes.
+
+    Audio is decimated by the largest integer factor that keeps at least
+    ``sr`` (44.1 kHz -> 22.05 kHz, 48 kHz -> 24 kHz). Segmentation parameters
+    specific to the librosa path (beat-energy moving averages, Pelt
+    penalties, ...) are accepted and ignored. ``create_plot``
+    is not supported (no matplotlib here). With ``include_features`` the
+    result also carries whole-track ``audio_features``.
+    """
+    native, native_sr = decode(data)
+    factor, sr = analysis_rate(native_sr, sr)
+    y = decimate(native, factor)
+    duration = len(native) / float(native_sr)
+    peak = float(np.max(np.abs(y))) if len(y) else 0.0
+    if peak > 0:
+        y = y / peak
+
+    mel_power, rms, centroid = spectral_frames(y, sr, hop=hop)
+    mel_db = power_to_db(mel_power.T).T
+    onset_env = onset_envelope(mel_db, hop=hop)
+
+    tempo = autocorrelation_tempo(onset_env, sr, hop)
+    beat_frames = track_beats(onset_env, tempo, sr, hop)
+    beat_times = beat_frames * hop / float(sr)
+    if len(beat_times) >= 2:
+        # report the tempo the beats realize; averaging regular intervals undoes the hop quantization
+        ibi = np.diff(beat_times)
+        regular = ibi[np.abs(ibi - np.median(ibi)) <= 0.25 * np.median(ibi)]
+        tempo = 60.0 / float(np.mean(regular))
+
+    segments = np.array([0.0, duration])
+    novelty = np.zeros(len(beat_times))
+    if len(beat_times) >= 3:
+        rms_db = 20.0 * np.log10(np.maximum(rms, 1e-5))[:, None]
+        features = beat_sync(np.hstack((mel_db, 4.0 * rms_db)), beat_frames)
+        med_beat = float(np.median(np.diff(beat_times)))
+        half_width = int(np.clip(round(0.5 * min_gap_seconds / med_beat), 4, 32))
+        novelty = novelty_curve(features, half_width)
+        segments, _ = novelty_segments(novelty, beat_times, duration,
+                                       min_gap_seconds=min_gap_seconds, max_segments=max_segments)
+
+    onset_at_beats = onset_env[np.clip(beat_frames, 0, len(onset_env) - 1)] if len(beat_frames) else np.zeros(0)
+    downbeats = downbeats_from_beats(beat_times, onset_at_beats, duration)
+
+    result = {
+        "duration": duration,
+        "tempo": float(tempo),
+        "segments_sec": segments.tolist(),
+        "beat_times_sec": beat_times.tolist(),
+        "downbeats_sec": downbeats.tolist(),
+        "debug": {
+            "method": "lite_novelty",
+            "num_segments": len(segments) - 1,
+            "segment_lengths": np.diff(segments).tolist(),
+        }
+    }
+    if include_features:
+        result["audio_features"] = {
+            "duration": duration,
+            "tempo": float(tempo),
+            "spectral_centroid": float(np.mean(centroid)) if len(centroid) else 0.0,
+            "rms_energy": float(np.mean(rms) * peak) if len(rms) else 0.0,
+        }
+    return result
@@ -1,4 +1,3 @@
-import io
 import os
 from functools import lru_cache
 
@@ -6,17 +5,25 @@ import librosa
 import matplotlib.pyplot as plt
 import numpy as np
 import ruptures as rpt
-import soundfile as sf
 from scipy.signal import find_peaks, savgol_filter
 
+try:
+    from audio_context import AudioContext
+    from streaming_context import StreamingAudioContext
+except ImportError:
+    from .audio_context import AudioContext
+    from .streaming_context import StreamingAudioContext
+
+# ruptures' rbf cost keeps an n×n Gram matrix; past this many beats Pelt uses l2 (linear memory)
+RBF_MAX_BEATS = 4096
+
 # =============================================================================
 # CORE SEGMENTATION FUNCTIONS
 # =============================================================================
 
-def _beat_times(y, sr):
+def _beat_times(ctx):
     """Extract beat times and tempo from audio."""
-    tempo, bt = librosa.beat.beat_track(y=y, sr=sr, units="time")
-    return tempo, np.asarray(bt)
+    return ctx.tempo, np.asarray(ctx.beat_times)
 
 # --- helper: extend downbeats to the audio edges -----------------
 
@@ -67,6 +74,40 @@ def _downbeats_from_beats(beat_times, prefer=(4,3), duration=None):
     return _extend_downbeats_to_edges(db, duration)
 
 
+def _snap_to_dip_and_beat(times, beat_times=None, rms_t=None, rms=None, half_window=1.0, beat_snap=0.25):
+    """Snap each time to the deepest RMS dip within ±half_window, then to a beat.
+
+    Vectorized over ``times``: the RMS windows are gathered into one padded
+    matrix, so every dip comes out of a single argmax. A time moves to the next
+    beat if it lies within ``beat_snap``, else to the nearest beat (earlier beat
+    on ties). ``beat_times`` must be sorted.
+    """
+    t = np.asarray(times, dtype=float)
+    if len(t) == 0:
+        return t
+
+    if rms_t is not None and rms is not None and len(rms):
+        inv = 1.0 - (rms / (np.max(rms) + 1e-9))
+        i0 = np.searchsorted(rms_t, np.maximum(0.0, t - half_window))
+        i1 = np.searchsorted(rms_t, t + half_window)
+        width = int(np.max(i1 - i0))
+        if width > 0:
+            idx = i0[:, None] + np.arange(width)
+            window = np.where(idx < i1[:, None], inv[np.minimum(idx, len(inv) - 1)], -np.inf)
+            k = np.minimum(i0 + np.argmax(window, axis=1), len(rms_t) - 1)
+            t = np.where(i1 > i0, rms_t[k], t)
+
+    if beat_times is not None and len(beat_times):
+        bt = np.asarray(beat_times, dtype=float)
+        j = np.searchsorted(bt, t, side="left")  # first beat >= t
+        after = bt[np.minimum(j, len(bt) - 1)]
+        before = bt[np.maximum(j - 1, 0)]
+        has_after = j < len(bt)
+        nearest = np.where((j > 0) & (~has_after | (np.abs(before - t) <= np.abs(after - t))), before, after)
+        t = np.where(has_after & ((after - t) <= beat_snap), after, nearest)
+    return t
+
+
 def _average_close_boundaries(
     times: np.ndarray,
     min_gap_sec: float,
@@ -80,56 +121,29 @@ def _average_close_boundaries(
     if len(times) <= 1:
         return times.astype(float)
 
-    t = list(times.astype(float))
-    out = []
-    i = 0
-
-    def snap_to_best_position(t0):
-        """Snap time to RMS dip and nearest beat."""
-        if rms_t is not None and rms is not None:
-            i0 = np.searchsorted(rms_t, max(0.0, t0 - snap_window_sec))
-            i1 = np.searchsorted(rms_t, t0 + snap_window_sec)
-            if i1 > i0:
-                inv = 1.0 - (rms / (np.max(rms) + 1e-9))
-                k = i0 + int(np.argmax(inv[i0:i1]))
-                t0 = float(rms_t[k])
-
-        if beat_times is not None and len(beat_times):
-            future = beat_times[beat_times >= t0]
-            if len(future) and (future[0] - t0) <= beat_snap_sec:
-                return float(future[0])
-            return float(beat_times[np.argmin(np.abs(beat_times - t0))])
-        return t0
-
-    while i < len(t):
-        if i == len(t) - 1:
-            out.append(t[i])
-            break
-
-        if t[i+1] - t[i] < min_gap_sec:
-            j = i + 1
-            while j + 1 < len(t) and (t[j+1] - t[j] < min_gap_sec):
-                j += 1
-            avg = 0.5 * (t[i] + t[j])
-            out.append(snap_to_best_position(avg))
-            i = j + 1
-        else:
-            out.append(t[i])
-            i += 1
+    t = times.astype(float)
+
+    # runs of boundaries closer than min_gap_sec collapse to their snapped midpoint
+    starts = np.r_[0, np.flatnonzero(~(np.diff(t) < min_gap_sec)) + 1]
+    ends = np.r_[starts[1:], len(t)] - 1
+    out = t[starts].copy()
+    runs = ends > starts
+    if np.any(runs):
+        mid = 0.5 * (t[starts[runs]] + t[ends[runs]])
+        out[runs] = _snap_to_dip_and_beat(mid, beat_times, rms_t, rms,
+                                          half_window=snap_window_sec, beat_snap=beat_snap_sec)
 
     return np.array(sorted(np.unique(np.round(out, 6))), float)
 
 # --- bar novelty (also returns a complete downbeat grid) ---------
 
-def _bar_novelty_with_grid(y, sr, duration, prefer_meters=(3,4)):
+def _bar_novelty_with_grid(ctx, duration, prefer_meters=(3,4)):
     """Compute bar-level novelty scores for segmentation."""
     # beat-synced features (chroma + MFCC over beats)
-    hop = 512
-    S = np.abs(librosa.stft(y, n_fft=2048, hop_length=hop))**2
-    mel = librosa.feature.melspectrogram(S=S, sr=sr)
+    y, sr, hop = ctx.y, ctx.sr, ctx.hop
     chroma = librosa.feature.chroma_cqt(y=y, sr=sr)
-    mfcc  = librosa.feature.mfcc(S=librosa.power_to_db(mel), sr=sr, n_mfcc=13)
-    tempo, bt = librosa.beat.beat_track(y=y, sr=sr, units="time")
+    mfcc  = librosa.feature.mfcc(S=ctx.mel_db, sr=sr, n_mfcc=13)
+    bt = ctx.beat_times
     if len(bt) < 3:
         return np.array([]), np.array([]), np.array([0.0, duration])
 
@@ -183,45 +197,38 @@ def _bar_novelty_with_grid(y, sr, duration, prefer_meters=(3,4)):
 # BEAT ENERGY SEGMENTATION
 # =============================================================================
 
-def _beat_energy(y, sr, hop=512):
+def _integrate_beat_power(ctx, beat_times):
+    """Broadband frame power summed over each beat interval (b[i-1], b[i]].
+
+    Frame times are sorted, so each interval is a contiguous slice located by
+    searchsorted; slicing sums the same elements in the same order as a mask
+    over all frames, at O(frames in the beat) instead of O(all frames).
+    """
+    pow_t = ctx.frame_times
+    pow_sum = ctx.frame_power  # broadband power
+    edges = np.searchsorted(pow_t, beat_times, side="right")
+    return np.array([pow_sum[a:b].sum() for a, b in zip(edges[:-1], edges[1:])], dtype=float)
+
+def _beat_energy(ctx):
     """Compute beat-synchronous energy for segmentation."""
-    tempo, bt = _beat_times(y, sr)
+    tempo, bt = _beat_times(ctx)
     if len(bt) < 3:
         # fallback to fixed 0.5s bins
         step = 0.5
-        bt = np.arange(0, len(y)/sr + step, step)
-    # frame energies
-    S = np.abs(librosa.stft(y, n_fft=2048, hop_length=hop))**2
-    pow_t = librosa.frames_to_time(np.arange(S.shape[1]), sr=sr, hop_length=hop)
-    pow_sum = S.sum(axis=0)  # broadband power
-    # integrate per beat interval by summing frames inside (b[i-1], b[i]]
-    e = []
-    for i in range(1, len(bt)):
-        m = (pow_t > bt[i-1]) & (pow_t <= bt[i])
-        e.append(pow_sum[m].sum())
-    e = np.array(e, dtype=float)
+        bt = np.arange(0, ctx.duration + step, step)
+    e = _integrate_beat_power(ctx, bt)
     # log scale and normalize
     e = np.log1p(e)
     e = (e - e.min()) / (e.max() - e.min() + 1e-9)
     # align to beats from index 1..K-1
     return bt[1:], e
 
-def _calculate_beat_energy_for_times(y, sr, beat_times, hop=512):
+def _calculate_beat_energy_for_times(ctx, beat_times):
     """Calculate beat energy for specific beat times."""
     if len(beat_times) < 3:
         return np.array([])
 
-    # frame energies
-    S = np.abs(librosa.stft(y, n_fft=2048, hop_length=hop))**2
-    pow_t = librosa.frames_to_time(np.arange(S.shape[1]), sr=sr, hop_length=hop)
-    pow_sum = S.sum(axis=0)  # broadband power
-
-    # integrate per beat interval by summing frames inside (b[i-1], b[i]]
-    e = []
-    for i in range(1, len(beat_times)):
-        m = (pow_t > beat_times[i-1]) & (pow_t <= beat_times[i])
-        e.append(pow_sum[m].sum())
-    e = np.array(e, dtype=float)
+    e = _integrate_beat_power(ctx, beat_times)
 
     # log scale and normalize
     e = np.log1p(e)
@@ -252,7 +259,10 @@ def _merge_close_boundaries(
     beat_snap: float = 0.25,
     prefer: str = "median"
     ) -> np.ndarray:
-    """Merge boundaries that are too close together."""
+    """Merge boundaries that are too close together.
+
+    ``prefer`` is kept for callers; a two-boundary cluster's mean and median coincide.
+    """
     if len(cut_times) <= 1:
         return cut_times
 
@@ -262,46 +272,27 @@ def _merge_close_boundaries(
     bar_len = beats_per_bar * med_beat
     thr_time = closeness * bar_len
 
-    # Cluster close boundaries
-    clusters, cur = [], [cut_times[0]]
-    for t in cut_times[1:]:
-        if (t - cur[-1] < thr_time) or (beats_apart(t, cur[-1]) <= min_beats_between):
-            cur.append(t)
-        else:
-            clusters.append(cur)
-            cur = [t]
-    clusters.append(cur)
+    # Cluster close boundaries: a new cluster starts wherever consecutive cuts are far apart
+    cut_times = np.asarray(cut_times, dtype=float)
+    gaps = np.diff(cut_times)
+    close = (gaps < thr_time) | (np.abs(gaps) / max(med_beat, 1e-6) <= min_beats_between)
+    starts = np.r_[0, np.flatnonzero(~close) + 1]
+    sizes = np.diff(np.r_[starts, len(cut_times)])
 
     # RMS preparation for snapping
-    inv = 1.0 - (rms / (np.max(rms) + 1e-9))
     half_w = max(med_beat * snap_window_bars * beats_per_bar / 2.0, med_beat)
 
-    def snap_to_dip_and_beat(t):
-        i0 = np.searchsorted(rms_t, max(0.0, t - half_w))
-        i1 = np.searchsorted(rms_t, t + half_w)
-        if i1 > i0:
-            k = i0 + int(np.argmax(inv[i0:i1]))
-            t = float(rms_t[k])
-
-        future = beat_times[beat_times >= t]
-        if len(future) and (future[0] - t) <= beat_snap:
-            return float(future[0])
-        return float(beat_times[np.argmin(np.abs(beat_times - t))])
-
-    # Merge clusters
-    merged = []
-    for cluster in clusters:
-        if len(cluster) == 1:
-            t = cluster[0]
-        elif len(cluster) == 2:
-            t = float(np.mean(cluster)) if prefer == "mean" else float(np.median(cluster))
-        else:
-            # Choose position with strongest RMS dip
-            local_means = [np.mean(rms[np.searchsorted(rms_t, max(0.0, ti - half_w)):
-                                     np.searchsorted(rms_t, ti + half_w)]) for ti in cluster]
-            idx = int(np.argmin(local_means))
-            t = float(cluster[idx])
-        merged.append(snap_to_dip_and_beat(t))
+    # Singletons stay, pairs collapse to their midpoint (mean == median for two)
+    merged = cut_times[starts].copy()
+    pairs = sizes == 2
+    merged[pairs] = (cut_times[starts[pairs]] + cut_times[starts[pairs] + 1]) / 2
+    # Larger clusters keep the member sitting in the strongest RMS dip
+    for c in np.flatnonzero(sizes > 2):
+        cluster = cut_times[starts[c]:starts[c] + sizes[c]]
+        local_means = [np.mean(rms[np.searchsorted(rms_t, max(0.0, ti - half_w)):
+                                 np.searchsorted(rms_t, ti + half_w)]) for ti in cluster]
+        merged[c] = float(cluster[int(np.argmin(local_means))])
+    merged = _snap_to_dip_and_beat(merged, beat_times, rms_t, rms, half_window=half_w, beat_snap=beat_snap)
 
     # Remove boundaries that are still too close
     merged = np.array(sorted(np.unique(np.round(merged, 6))), float)
@@ -311,8 +302,31 @@ def _merge_close_boundaries(
             keep.append(t)
     return np.array(keep, float)
 
+def _score_candidates(cand, E_n, spread_n, n_beats, w):
+    """Boundary score for every candidate beat index in one pass over prefix sums.
+
+    Each candidate c compares the mean of E_n and spread_n over the w beats
+    before it, [c-w, c), with the w beats from it on, [c, c+w) (both clipped
+    to the series), plus the local energy jump across c.
+    """
+    if len(cand) == 0:
+        return np.array([])
+    c = np.asarray(cand, dtype=int)
+    n = len(E_n)
+    left = np.maximum(0, c - w)
+    right = np.minimum(np.minimum(n_beats - 1, c + w - 1) + 1, n)
+
+    def window_delta(x):
+        cs = np.r_[0.0, np.cumsum(x)]
+        mean_left = (cs[c] - cs[left]) / (c - left)
+        mean_right = (cs[right] - cs[c]) / (right - c)
+        return np.abs(mean_right - mean_left)
+
+    local = np.abs(E_n[np.maximum(0, c - 1)] - E_n[np.minimum(n - 1, c + 1)])
+    return 0.55 * window_delta(E_n) + 0.35 * window_delta(spread_n) + 0.10 * local
+
 def segments_from_beat_energy_pro(
-    y, sr,
+    ctx,
     short_ma_beats=4,
     long_ma_beats=16,
     min_gap_seconds=11.0,
@@ -324,15 +338,15 @@ def segments_from_beat_energy_pro(
     beat_times=None
     ):
     """Segment audio using beat energy analysis with changepoint detection."""
-    duration = len(y) / sr
+    duration = ctx.duration
 
     # Use provided beat times or calculate new ones
     if beat_times is not None:
         bt = np.array(beat_times)
         # Calculate beat energy for the provided beat times
-        E = _calculate_beat_energy_for_times(y, sr, bt)
+        E = _calculate_beat_energy_for_times(ctx, bt)
     else:
-        bt, E = _beat_energy(y, sr)
+        bt, E = _beat_energy(ctx)
 
     if len(bt) < long_ma_beats + 4:
         return np.array([0.0, duration]), {"beat_times": bt.tolist(), "E": E.tolist()}
@@ -351,7 +365,8 @@ def segments_from_beat_energy_pro(
     max_gap_beats = max(min_gap_beats + 1, int(round(max_gap_seconds / max(med_beat, 1e-6))))
 
     Z = np.vstack([E_n, spread_n]).T
-    pelt = rpt.Pelt(model="rbf", min_size=min_gap_beats).fit(Z)
+    pelt_model = "rbf" if len(Z) <= RBF_MAX_BEATS else "l2"
+    pelt = rpt.Pelt(model=pelt_model, min_size=min_gap_beats).fit(Z)
     cps_pelt = np.array(pelt.predict(pen=pelt_penalty))[:-1]
 
     binseg = rpt.Binseg(model="l2", min_size=min_gap_beats).fit(E_n.reshape(-1, 1))
@@ -370,20 +385,7 @@ def segments_from_beat_energy_pro(
     cand = np.unique(np.clip(np.r_[cps_pelt, cps_bin, zc_idx], 1, len(bt)-2))
 
     # scoring
-    def window_means(c, w):
-        L0, R0 = max(0, c - w), c - 1
-        R1, R2 = c, min(len(bt)-1, c + w - 1)
-        mEL = E_n[L0:R0+1].mean(); mER = E_n[R1:R2+1].mean()
-        mSL = spread_n[L0:R0+1].mean(); mSR = spread_n[R1:R2+1].mean()
-        return abs(mER - mEL), abs(mSR - mSL)
-
-    scores = []
-    wctx = min_gap_beats  # context window
-    for c in cand:
-        dE, dS = window_means(int(c), wctx)
-        local = abs(E_n[max(0, c-1)] - E_n[min(len(E_n)-1, c+1)])
-        scores.append(0.55*dE + 0.35*dS + 0.10*local)
-    scores = np.array(scores) if len(cand) else np.array([])
+    scores = _score_candidates(cand, E_n, spread_n, len(bt), min_gap_beats)
 
     kept = []
     if len(cand):
@@ -402,10 +404,8 @@ def segments_from_beat_energy_pro(
     cuts = bt[np.array(kept, dtype=int)] if len(kept) else np.array([])
 
     # --- NEW: merge boundaries that are too close (≈ same bar) ---
-    # compute RMS once for snapping
-    hop = 512
-    rms = librosa.feature.rms(y=y, frame_length=2048, hop_length=hop)[0]
-    rms_t = librosa.frames_to_time(np.arange(len(rms)), sr=sr, hop_length=hop)
+    # RMS for snapping (shared with the caller through the context)
+    rms, rms_t = ctx.rms, ctx.rms_times
 
     cuts = _merge_close_boundaries(
         cut_times=cuts,
@@ -495,7 +495,7 @@ def segments_from_beat_energy_pro(
 # --- sparse selector using peaks + minima + DP + NMS -------------
 
 def bar_level_segments(
-    y, sr, duration,
+    ctx, duration,
     min_segment_seconds=14.0,
     max_segment_seconds=55.0,
     target_segments=6,
@@ -509,7 +509,7 @@ def bar_level_segments(
     ):
     """Segment audio using bar-level novelty analysis."""
     # --- bar candidates & novelty ---
-    b_times, nov, downbeats_full = _bar_novelty_with_grid(y, sr, duration)
+    b_times, nov, downbeats_full = _bar_novelty_with_grid(ctx, duration)
     if len(b_times) == 0:
         return np.array([0.0, duration]), downbeats_full, {"novelty": [], "picked": []}
 
@@ -520,10 +520,7 @@ def bar_level_segments(
 
     # --- auxiliary bar-wise signals: energy jump & percussive flux ---
     # bar energies (RMS per bar) on the same grid used in _bar_novelty_with_grid
-    hop = 512
-    import librosa
-    rms = librosa.feature.rms(y=y, frame_length=2048, hop_length=hop)[0]
-    t_rms = librosa.frames_to_time(np.arange(len(rms)), sr=sr, hop_length=hop)
+    rms, t_rms = ctx.rms, ctx.rms_times
     # bar mean RMS
     b_idx = np.searchsorted(downbeats_full, t_rms, side="right") - 1
     E = np.zeros(len(downbeats_full)); C = np.zeros(len(downbeats_full)) + 1e-9
@@ -537,11 +534,10 @@ def bar_level_segments(
     dE = dE[:len(b_times)]
 
     # percussive flux (fast changes)
-    S = librosa.stft(y, n_fft=2048, hop_length=hop)
-    H, P = librosa.decompose.hpss(S)
+    H, P = ctx.hpss
     flux = np.maximum(0.0, np.diff(np.abs(P), axis=1)).mean(axis=0)
     flux = np.r_[0.0, flux]
-    t_flux = librosa.frames_to_time(np.arange(len(flux)), sr=sr, hop_length=hop)
+    t_flux = librosa.frames_to_time(np.arange(len(flux)), sr=ctx.sr, hop_length=ctx.hop)
     # bar mean flux and jump
     f_idx = np.searchsorted(downbeats_full, t_flux, side="right") - 1
     F = np.zeros(len(downbeats_full)); C2 = np.zeros(len(downbeats_full)) + 1e-9
@@ -680,7 +676,7 @@ def bar_level_segments(
     if beat_times is not None:
         beat_times_for_snapping = np.array(beat_times)
     else:
-        tempo, beat_times_for_snapping = _beat_times(y, sr)
+        tempo, beat_times_for_snapping = _beat_times(ctx)
 
     segments_all = snap_segments_to_beats(segments_all, beat_times_for_snapping, snap_threshold=0.5)
 
@@ -830,40 +826,41 @@ def create_visualization(y, sr, rms_t, rms, beat_times, downbeats, segments, bar
 
 def load_audio_bytes(data: bytes, sr=22050):
     """Load and preprocess audio from bytes."""
-    y, file_sr = sf.read(io.BytesIO(data), always_2d=False, dtype='float32')
+    ctx = AudioContext.from_bytes(data, sr=sr)
+    return ctx.y, ctx.sr
 
-    # Convert to mono if stereo
-    if y.ndim > 1:
-        y = np.mean(y, axis=1)
-
-    # Resample if needed
-    if file_sr != sr:
-        y = librosa.resample(y, orig_sr=file_sr, target_sr=sr)
-
-    # Ensure audio is floating-point and normalized
-    y = y.astype(np.float32)
-    y = librosa.util.normalize(y)
-
-    return y, sr
-
-def analyze_audio_bytes(data: bytes, sr=22050, hop=512, create_plot=False, audio_file="audio.wav",
+def analyze_audio_bytes(data, sr=22050, hop=512, create_plot=False, audio_file="audio.wav",
                        target_segments=6, max_segments=8, hi_q=0.70, lo_q=0.35,
                        w_novelty=0.6, w_energy=0.25, w_flux=0.15, use_beat_energy=True,
                        short_ma_beats=4, long_ma_beats=16, min_gap_seconds=11.0,
-                       spread_prom_q=0.75, use_pelt=True, pelt_penalty=4.5):
-    """Analyze audio and return segmentation results."""
-    y, sr = load_audio_bytes(data, sr)
-    duration = len(y) / sr
+                       spread_prom_q=0.75, use_pelt=True, pelt_penalty=4.5, streaming=False):
+    """Analyze audio and return segmentation results.
+
+    ``data`` is an :class:`AudioContext` (preferred, so callers can reuse its
+    decoded audio and derived arrays) or raw encoded bytes. With
+    ``streaming=True`` bytes are decoded block by block into a
+    :class:`StreamingAudioContext`, keeping memory bounded for long
+    recordings; only beat-energy segmentation is available in that mode.
+    """
+    if isinstance(data, AudioContext):
+        ctx = data
+    elif streaming:
+        ctx = StreamingAudioContext.from_bytes(data, sr=sr, hop=hop)
+    else:
+        ctx = AudioContext.from_bytes(data, sr=sr, hop=hop)
+    if isinstance(ctx, StreamingAudioContext) and not use_beat_energy:
+        raise ValueError("Streaming analysis supports beat-energy segmentation only (use_beat_energy=True)")
+    sr = ctx.sr
+    duration = ctx.duration
 
     # Get basic audio features
-    rms = librosa.feature.rms(y=y, frame_length=2048, hop_length=hop)[0]
-    rms_t = librosa.frames_to_time(np.arange(len(rms)), sr=sr, hop_length=hop)
-    tempo, beat_times = _beat_times(y, sr)
+    rms, rms_t = ctx.rms, ctx.rms_times
+    tempo, beat_times = _beat_times(ctx)
     # Choose segmentation method
     if use_beat_energy:
         # Use beat energy segmentation (PRO version)
         segments_all, beat_energy_debug = segments_from_beat_energy_pro(
-            y, sr,
+            ctx,
             short_ma_beats=short_ma_beats,
             long_ma_beats=long_ma_beats,
             min_gap_seconds=min_gap_seconds,
@@ -880,7 +877,7 @@ def analyze_audio_bytes(data: bytes, sr=22050, hop=512, create_plot=False, audio
     else:
         # Use enhanced bar-level segments using energy + flux approach
         segments_all, downbeats_full, debug = bar_level_segments(
-            y, sr, duration,
+            ctx, duration,
             min_segment_seconds=14.0,
             max_segment_seconds=55.0,  # safety net for backfill
             target_segments=target_segments,
@@ -922,7 +919,7 @@ def analyze_audio_bytes(data: bytes, sr=22050, hop=512, create_plot=False, audio
 
     # Create visualization if requested
     if create_plot:
-        fig = create_visualization(y, sr, rms_t, rms, beat_times, downbeats_full, segments_all, bar_novelty, audio_file, beat_energy_debug)
+        fig = create_visualization(ctx.y, sr, rms_t, rms, beat_times, downbeats_full, segments_all, bar_novelty, audio_file, beat_energy_debug)
         result["plot"] = fig
 
     return result
@@ -941,6 +938,89 @@ def analyze_and_plot(data: bytes, audio_file="audio.wav", output_dir="."):
 
     return result
 
+# =============================================================================
+# PREVIEW ANALYSIS
+# =============================================================================
+
+PREVIEW_SR = 11025
+PREVIEW_HOP = 256     # same ~23 ms frame rate as the full analysis at 22050/512
+PREVIEW_N_FFT = 1024
+
+def _autocorrelation_tempo(onset_env, sr, hop, start_bpm=120.0, std_bpm=1.0, min_bpm=60.0, max_bpm=200.0):
+    """Global tempo from the onset envelope's autocorrelation, weighted by a log-normal prior."""
+    fps = sr / hop
+    max_lag = int(np.ceil(fps * 60.0 / min_bpm)) + 2
+    ac = librosa.autocorrelate(onset_env - np.mean(onset_env), max_size=max_lag)
+    lags = np.arange(1, max_lag)
+    bpms = 60.0 * fps / lags
+    prior = np.exp(-0.5 * (np.log2(bpms / start_bpm) / std_bpm) ** 2)
+    score = np.where((bpms >= min_bpm) & (bpms <= max_bpm), ac[1:] * prior, -np.inf)
+    k = int(np.argmax(score))
+
+    # parabolic interpolation around the peak lag for a sub-frame period
+    lag = float(lags[k])
+    if 0 < k < len(lags) - 1:
+        a, b, c = ac[k], ac[k + 1], ac[k + 2]
+        denom = a - 2 * b + c
+        if denom < 0:
+            lag += 0.5 * (a - c) / denom
+    return 60.0 * fps / lag
+
+def load_preview_context(data: bytes, source=None):
+    """Decode audio bytes into a context framed for the preview tier."""
+    return AudioContext.from_bytes(data, sr=PREVIEW_SR, hop=PREVIEW_HOP, n_fft=PREVIEW_N_FFT, source=source)
+
+def analyze_audio_preview(data, min_gap_seconds=11.0, max_segments=11, seconds_per_segment=30.0):
+    """Fast first-pass segmentation for immediate display.
+
+    Decodes at PREVIEW_SR, skips HPSS and the tempogram (tempo comes from the
+    onset autocorrelation and only seeds the beat tracker), and cuts the
+    beat-energy curve with an l2 Binseg. Returns the same keys as
+    :func:`analyze_audio_bytes` plus ``quality: "preview"``; the full analysis
+    is expected to replace it.
+    """
+    ctx = data if isinstance(data, AudioContext) else load_preview_context(data)
+    duration = ctx.duration
+
+    tempo = _autocorrelation_tempo(ctx.beat_envelope, ctx.sr, ctx.hop)
+    _, beat_frames = librosa.beat.beat_track(onset_envelope=ctx.beat_envelope, sr=ctx.sr,
+                                             hop_length=ctx.hop, bpm=tempo)
+    beat_times = librosa.frames_to_time(beat_frames, sr=ctx.sr, hop_length=ctx.hop)
+    if len(beat_times) < 3:
+        beat_times = np.arange(0, duration, 0.5)
+
+    segments = np.array([0.0, duration])
+    if len(beat_times) >= 3:
+        E = _calculate_beat_energy_for_times(ctx, beat_times)
+        med_beat = float(np.median(np.diff(beat_times)))
+        min_gap_beats = max(2, int(round(min_gap_seconds / max(med_beat, 1e-6))))
+        n_bkps = min(max_segments - 1, int(duration // seconds_per_segment), len(E) // min_gap_beats - 1)
+        if n_bkps >= 1:
+            binseg = rpt.Binseg(model="l2", min_size=min_gap_beats).fit(E.reshape(-1, 1))
+            cps = np.array(binseg.predict(n_bkps=n_bkps))[:-1]
+            cuts = _average_close_boundaries(
+                beat_times[cps], min_gap_sec=min_gap_seconds, beat_times=beat_times,
+                rms_t=ctx.rms_times, rms=ctx.rms,
+                snap_window_sec=0.75 * 4 * med_beat, beat_snap_sec=0.25
+            )
+            segments = np.unique(np.round(np.clip(np.r_[0.0, cuts, duration], 0.0, duration), 6))
+            segments = snap_segments_to_beats(segments, beat_times, snap_threshold=0.5)
+
+    downbeats_full = _downbeats_from_beats(np.asarray(beat_times), duration=duration)
+    return {
+        "duration": duration,
+        "tempo": float(tempo),
+        "segments_sec": np.asarray(segments).tolist(),
+        "beat_times_sec": np.asarray(beat_times).tolist(),
+        "downbeats_sec": downbeats_full.tolist(),
+        "quality": "preview",
+        "debug": {
+            "method": "preview_binseg",
+            "num_segments": len(segments) - 1,
+            "segment_lengths": np.diff(segments).tolist()
+        }
+    }
+
 # =============================================================================
 # MAIN EXECUTION
 # =============================================================================
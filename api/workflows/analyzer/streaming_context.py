@@ -0,0 +1,260 @@
+import io
+from functools import cached_property
+
+import librosa
+import numpy as np
+import soundfile as sf
+import soxr
+
+try:
+    from audio_context import AudioContext, FrameFeatures, HOP, N_FFT
+except ImportError:
+    from .audio_context import AudioContext, FrameFeatures, HOP, N_FFT
+
+# =============================================================================
+# STREAMING AUDIO CONTEXT (bounded memory)
+# =============================================================================
+
+BLOCK_SECONDS = 10.0  # native-rate audio decoded per block
+TOP_DB = 80.0         # power_to_db clipping used by onset_strength
+TEMPOGRAM_CHUNK = 2048  # tempogram columns materialized at once
+AC_SIZE = 8.0           # librosa.feature.tempo autocorrelation window (seconds)
+ROLL_PERCENT = 0.85     # librosa.feature.spectral_rolloff default
+SPECTRAL_COLUMNS = ('spectral_centroid', 'spectral_rolloff', 'spectral_bandwidth', 'zero_crossing_rate')
+
+
+def _mono(block):
+    block = np.asarray(block, dtype=np.float32)
+    return block.mean(axis=1) if block.ndim > 1 else block
+
+
+class _FrameAccumulator:
+    """Frames a sample stream exactly like ``librosa.stft(center=True)`` and keeps only per-frame scalars.
+
+    Holds at most one block plus ``n_fft`` samples of audio; the outputs
+    (RMS, broadband power, onset-strength differences, spectral shape and
+    zero-crossing rate) are one float per frame.
+    """
+
+    def __init__(self, sr, hop, n_fft):
+        self.sr, self.hop, self.n_fft = sr, hop, n_fft
+        self.window = librosa.filters.get_window('hann', n_fft, fftbins=True).astype(np.float32)[:, None]
+        self.mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft)
+        self.freqs = librosa.fft_frequencies(sr=sr, n_fft=n_fft)[:, None]
+        self.buf = np.zeros(n_fft // 2, dtype=np.float32)  # centered framing pads with zeros
+        self.n_samples = 0
+        self.db_max = -np.inf
+        self.prev_db = None
+        self.rms, self.power, self.onset_mean, self.onset_median = [], [], [], []
+        self.spectral = {name: [] for name in SPECTRAL_COLUMNS}
+
+    def push(self, x):
+        self.n_samples += len(x)
+        self._consume(np.concatenate((self.buf, x)))
+
+    def finish(self):
+        self._consume(np.concatenate((self.buf, np.zeros(self.n_fft // 2, dtype=np.float32))))
+        n_frames = 1 + self.n_samples // self.hop
+        cat = lambda parts: (np.concatenate(parts) if parts else np.zeros(0, np.float32))[:n_frames]
+        spectral = {name: cat(parts) for name, parts in self.spectral.items()}
+        return cat(self.rms), cat(self.power), cat(self.onset_mean), cat(self.onset_median), spectral
+
+    def _consume(self, buf):
+        n = 1 + (len(buf) - self.n_fft) // self.hop if len(buf) >= self.n_fft else 0
+        if n:
+            frames = librosa.util.frame(buf[:(n - 1) * self.hop + self.n_fft],
+                                        frame_length=self.n_fft, hop_length=self.hop)
+            self._process(frames)
+        self.buf = buf[n * self.hop:].copy()
+
+    def _process(self, frames):
+        self.rms.append(np.sqrt(np.mean(frames ** 2, axis=0)).astype(np.float32))
+
+        power = np.abs(np.fft.rfft(self.window * frames, axis=0)) ** 2
+        self.power.append(power.sum(axis=0).astype(np.float32))
+        self._spectral_shape(np.sqrt(power), frames)
+
+        # onset strength on the mel dB spectrogram; the top_db floor uses the running max
+        db = 10.0 * np.log10(np.maximum(1e-10, self.mel_basis @ power))
+        self.db_max = max(self.db_max, float(db.max()))
+        cols = db if self.prev_db is None else np.hstack((self.prev_db, db))
+        self.prev_db = db[:, -1:]
+        if cols.shape[1] > 1:
+            cols = np.maximum(cols, self.db_max - TOP_DB)
+            rise = np.maximum(0.0, cols[:, 1:] - cols[:, :-1])
+            self.onset_mean.append(rise.mean(axis=0).astype(np.float32))
+            self.onset_median.append(np.median(rise, axis=0).astype(np.float32))
+
+    def _spectral_shape(self, magnitude, frames):
+        """librosa's spectral centroid, rolloff, bandwidth and zero-crossing rate of each frame"""
+        total = magnitude.sum(axis=0)
+        weights = magnitude / np.where(total > 0, total, 1.0)
+        centroid = (self.freqs * weights).sum(axis=0)
+        cumulative = np.cumsum(magnitude, axis=0)
+        rolloff = self.freqs[np.argmax(cumulative >= ROLL_PERCENT * cumulative[-1], axis=0), 0]
+        bandwidth = np.sqrt((weights * (self.freqs - centroid) ** 2).sum(axis=0))
+        signs = np.signbit(np.where(np.abs(frames) <= 1e-10, 0.0, frames))
+        crossings = (signs[1:] != signs[:-1]).sum(axis=0) / self.n_fft
+        for name, values in zip(SPECTRAL_COLUMNS, (centroid, rolloff, bandwidth, crossings)):
+            self.spectral[name].append(values.astype(np.float32))
+
+
+class StreamingAudioContext(AudioContext):
+    """AudioContext built from decoded blocks without ever holding the whole signal.
+
+    Peak RSS is O(block size + frame/beat count): only per-frame scalars (RMS,
+    broadband power, onset envelopes, spectral shape) are kept, so beat
+    tracking, beat-energy segmentation and the summary and segment
+    descriptors run on compact series. Features that need the full signal or
+    spectrogram (HPSS, chroma, mel/MFCC) are unavailable; the descriptors
+    report a neutral harmonic ratio of 0.5 and peak detection uses the frame
+    RMS instead of the native-rate samples.
+
+    Results track the in-memory context closely but not bit-exactly: FFTs
+    run in a different precision and the onset dB floor follows the running
+    spectrogram max instead of the global one.
+    """
+
+    streaming = True
+
+    def __init__(self, native_sr, n_samples, rms, frame_power, onset_envelope, beat_envelope,
+                 peak=1.0, sr=22050, hop=HOP, n_fft=N_FFT, source=None, spectral=None):
+        super().__init__(None, native_sr, sr=sr, hop=hop, n_fft=n_fft, source=source)
+        self.n_samples = int(n_samples)
+        self.spectral = spectral or {name: np.zeros(len(frame_power), np.float32) for name in SPECTRAL_COLUMNS}
+        # Pre-fill AudioContext's memoized slots so it never reaches for samples
+        self.__dict__.update(
+            peak=peak,
+            rms=rms,
+            frame_power=frame_power,
+            frame_times=librosa.frames_to_time(np.arange(len(frame_power)), sr=self.sr, hop_length=self.hop),
+            onset_envelope=onset_envelope,
+            beat_envelope=beat_envelope,
+        )
+
+    @classmethod
+    def from_blocks(cls, open_blocks, native_sr, sr=22050, hop=HOP, n_fft=N_FFT, source=None, peak=None):
+        """Analyze a block stream; ``open_blocks()`` must return a fresh iterator of native-rate blocks.
+
+        Without ``peak`` the stream is decoded twice: once for the normalization peak, once for features.
+        """
+        def resampled():
+            resampler = None
+            if int(native_sr) != int(sr):
+                resampler = soxr.ResampleStream(native_sr, sr, 1, dtype='float32', quality='HQ')
+            for block in open_blocks():
+                x = _mono(block)
+                yield x if resampler is None else resampler.resample_chunk(x, last=False)
+            if resampler is not None:
+                yield resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+
+        if peak is None:
+            # librosa.util.normalize scales by the peak of the resampled signal
+            peak = max((float(np.max(np.abs(x))) for x in resampled() if len(x)), default=0.0)
+        peak = peak if peak > np.finfo(np.float32).tiny else 1.0
+
+        acc = _FrameAccumulator(int(sr), int(hop), int(n_fft))
+        gain = np.float32(1.0 / peak)
+        for x in resampled():
+            acc.push(x * gain)
+
+        rms, power, d_mean, d_median, spectral = acc.finish()
+        # onset_strength pads lag + n_fft // (2 * hop) leading zeros and trims to the frame count
+        lead = np.zeros(1 + n_fft // (2 * hop), dtype=np.float32)
+        onset_envelope = np.concatenate((lead, d_mean))[:len(power)]
+        beat_envelope = np.concatenate((lead, d_median))[:len(power)]
+        return cls(native_sr, acc.n_samples, rms, power, onset_envelope, beat_envelope,
+                   peak=peak, sr=sr, hop=hop, n_fft=n_fft, source=source, spectral=spectral)
+
+    @classmethod
+    def from_file(cls, file_path: str, sr=22050, hop=HOP, n_fft=N_FFT, block_seconds=BLOCK_SECONDS):
+        native_sr = sf.info(file_path).samplerate
+        blocksize = max(n_fft, int(block_seconds * native_sr))
+        open_blocks = lambda: sf.blocks(file_path, blocksize=blocksize, dtype='float32', always_2d=True)
+        return cls.from_blocks(open_blocks, native_sr, sr=sr, hop=hop, n_fft=n_fft, source=file_path)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, sr=22050, hop=HOP, n_fft=N_FFT, source=None, block_seconds=BLOCK_SECONDS):
+        native_sr = sf.info(io.BytesIO(data)).samplerate
+        blocksize = max(n_fft, int(block_seconds * native_sr))
+        open_blocks = lambda: sf.blocks(io.BytesIO(data), blocksize=blocksize, dtype='float32', always_2d=True)
+        return cls.from_blocks(open_blocks, native_sr, sr=sr, hop=hop, n_fft=n_fft, source=source)
+
+    # --- rhythm -------------------------------------------------------------
+
+    def _tempogram_chunks(self):
+        """``librosa.feature.tempogram`` of the beat envelope, TEMPOGRAM_CHUNK columns at a time.
+
+        The stock tempogram is a (window x frames) matrix, which for an
+        hour-long track is larger than the audio itself.
+        """
+        env = self.beat_envelope
+        n = len(env)
+        win = librosa.time_to_frames(AC_SIZE, sr=self.sr, hop_length=self.hop).item()
+        padded = np.pad(env, win // 2, mode='linear_ramp', end_values=[0, 0])
+        window = librosa.filters.get_window('hann', win, fftbins=True)[:, None]
+        for start in range(0, n, TEMPOGRAM_CHUNK):
+            stop = min(n, start + TEMPOGRAM_CHUNK)
+            frames = librosa.util.frame(padded[start:stop + win - 1], frame_length=win, hop_length=1)
+            ac = librosa.autocorrelate(frames * window, axis=0)
+            yield librosa.util.normalize(ac, norm=np.inf, axis=0)
+
+    def _tempo_estimate(self):
+        """``librosa.feature.tempo`` on the beat envelope, averaging the tempogram chunk by chunk"""
+        total = sum(tg.sum(axis=1) for tg in self._tempogram_chunks())
+        return librosa.feature.tempo(sr=self.sr, hop_length=self.hop,
+                                     tg=(total / max(len(self.beat_envelope), 1))[:, None], aggregate=None)
+
+    @cached_property
+    def frame_tempo(self) -> np.ndarray:
+        """Per-frame tempo (``librosa.feature.tempo(aggregate=None)``), chunk by chunk"""
+        return np.concatenate([librosa.feature.tempo(sr=self.sr, hop_length=self.hop, tg=tg, aggregate=None)
+                               for tg in self._tempogram_chunks()] or [np.zeros(0)])
+
+    @cached_property
+    def _beat_track(self):
+        tempo, frames = librosa.beat.beat_track(onset_envelope=self.beat_envelope, sr=self.sr,
+                                                hop_length=self.hop, bpm=self._tempo_estimate())
+        # librosa >= 0.10 returns the tempo as a one-element array
+        return float(np.atleast_1d(tempo)[0]), np.asarray(frames)
+
+    # --- no sample buffers --------------------------------------------------
+
+    @property
+    def samples(self):
+        raise ValueError("StreamingAudioContext keeps no samples; use AudioContext for sample-level features")
+
+    @property
+    def y(self):
+        return self.samples
+
+    @property
+    def duration(self) -> float:
+        return self.n_samples / self.sr
+
+    @property
+    def native_duration(self) -> float:
+        return self.duration
+
+    # --- descriptors from the streamed frame columns ------------------------
+
+    @cached_property
+    def frame_features(self) -> FrameFeatures:
+        no_hpss = np.zeros(len(self.frame_power), dtype=np.float32)  # harmonic_ratio falls back to 0.5
+        columns = dict(self.spectral, tempo=self.frame_tempo, rms=self.rms, harmonic_energy=no_hpss,
+                       percussive_energy=no_hpss, onset_strength=self.onset_envelope)
+        return FrameFeatures(columns, self.onset_frames, self.sr, self.hop, gain=self.peak)
+
+    def summary_features(self, include_onsets=True) -> dict:
+        """Whole-track descriptors with the keys of ``AudioContext.summary_features``"""
+        track = self.frame_features.describe(0.0, self.duration)
+        features = {
+            'duration': self.duration,
+            'tempo': float(self.tempo),
+            'spectral_centroid': track['spectral_centroid'],
+            'rms_energy': float(np.mean(self.rms) * self.peak),
+            'harmonic_ratio': track['harmonic_ratio'],
+        }
+        if include_onsets:
+            features['onset_rate'] = len(self.onset_frames) / self.duration
+        return features
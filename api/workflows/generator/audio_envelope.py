@@ -0,0 +1,198 @@
+"""
+Per-video-frame band envelopes of an audio track, shared by the generators.
+
+Every generator reads the same kind of feature: for each video frame, the
+mean FFT magnitude of one or more frequency bands over the audio samples of
+that frame (bass for the particles and the bass circle). band_envelopes
+computes all bands for all frames at once: the track is cut into
+non-overlapping frames of int(sr / fps) samples, a strided (frames, samples)
+view of it, windowed and transformed by one batched rfft per block of
+frames.
+
+Bands are Hz ranges (inclusive, like the particle generators' 0-250 Hz bass)
+or FFT bin ranges (like the bass circle's first N bins). Intro skipping,
+per-frame peak scaling, per-band normalization and smoothing are options of
+the EnvelopeSpec.
+
+load_envelopes adds caching: envelopes are stored as float16, in memory
+(feature_cache) and on disk under RENDER_ENVELOPE_CACHE_DIR, keyed on the
+audio SHA-256 plus the spec. Every renderer of a track therefore decodes
+and transforms it once. Freshly computed envelopes go through the same
+float16 rounding, so a render is identical whether or not the cache hit.
+
+    spec = EnvelopeSpec(fps=30, bands=(BASS,), frames=int(duration * 30))
+    bass = load_envelopes(audio_path, spec, metrics)["bass"]
+"""
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy.signal import lfilter
+
+try:
+    from api.workflows.generator.feature_cache import feature_cache
+    from api.workflows.generator.render_metrics import RenderMetrics
+except ImportError:  # run as a script from the generator directories
+    from feature_cache import feature_cache
+    from render_metrics import RenderMetrics
+
+ENVELOPE_CACHE_DIR = os.getenv("RENDER_ENVELOPE_CACHE_DIR", "storage/cache/envelopes")  # empty: memory only
+BLOCK_FRAMES = int(os.getenv("RENDER_ENVELOPE_BLOCK_FRAMES", "2048"))  # frames per batched rfft
+
+# Bump when the envelope values change so stale cache files stop matching
+ENVELOPE_VERSION = 1
+
+Envelopes = Dict[str, np.ndarray]
+
+
+@dataclass(frozen=True)
+class Band:
+    name: str
+    low_hz: float = 0.0
+    high_hz: Optional[float] = None             # inclusive; None: up to Nyquist
+    bins: Optional[Tuple[int, int]] = None      # FFT bins [start, stop) instead of the Hz range
+
+
+BASS = Band("bass", 0.0, 250.0)
+MID = Band("mid", 250.0, 4000.0)
+HIGH = Band("high", 4000.0)
+DEFAULT_BANDS = (BASS, MID, HIGH)
+
+
+@dataclass(frozen=True)
+class EnvelopeSpec:
+    fps: float
+    bands: Tuple[Band, ...] = DEFAULT_BANDS
+    frames: Optional[int] = None     # output length (zeros past the audio); None: the whole frames of the audio
+    skip_intro: float = 0.0          # seconds cut from the start of the audio
+    frame_peak: bool = False         # scale each frame's spectrum to its own peak before averaging
+    normalize: bool = True           # divide each band by its peak over the track
+    smoothing: float = 0.0           # exponential smoothing: weight of the previous frame, 0 to <1
+
+    def key(self) -> str:
+        """Stable hash of the spec (and the envelope version) for cache keys"""
+        canonical = json.dumps({"version": ENVELOPE_VERSION, **asdict(self)}, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def ema(values: np.ndarray, smoothing: float) -> np.ndarray:
+    """Exponential moving average seeded with the first value; `smoothing` is the weight of the previous output"""
+    if smoothing <= 0 or len(values) == 0:
+        return values
+    alpha = 1.0 - smoothing
+    smoothed, _ = lfilter([alpha], [1.0, -smoothing], values, zi=[smoothing * values[0]])
+    return smoothed.astype(values.dtype, copy=False)
+
+
+def _band_bins(band: Band, sr: int, samples_per_frame: int) -> Tuple[int, int]:
+    """Contiguous FFT bin range [start, stop) of a band (empty when no bin falls inside it)"""
+    n_bins = samples_per_frame // 2 + 1
+    if band.bins is not None:
+        start, stop = band.bins
+        return max(0, start), max(0, min(stop, n_bins))
+    freqs = np.fft.rfftfreq(samples_per_frame, 1 / sr)
+    inside = np.flatnonzero((freqs >= band.low_hz) & (freqs <= (np.inf if band.high_hz is None else band.high_hz)))
+    return (int(inside[0]), int(inside[-1]) + 1) if len(inside) else (0, 0)
+
+
+def band_envelopes(y: np.ndarray, sr: int, spec: EnvelopeSpec) -> Envelopes:
+    """Per-frame band energies (float32, one array per band) of mono samples `y` at rate `sr`"""
+    if spec.skip_intro > 0:
+        y = y[int(spec.skip_intro * sr):]
+    samples_per_frame = max(1, int(sr / spec.fps))
+    frames = spec.frames if spec.frames is not None else max(1, int(len(y) / sr * spec.fps))
+    envelopes = {band.name: np.zeros(frames, dtype=np.float32) for band in spec.bands}
+    # Frames that start inside the audio; the last one is zero-padded, later ones stay 0
+    audible = min(frames, -(-len(y) // samples_per_frame))
+    if audible <= 0:
+        return envelopes
+
+    samples = np.zeros(audible * samples_per_frame, dtype=np.float32)
+    usable = min(len(y), len(samples))
+    samples[:usable] = y[:usable]
+    segments = samples.reshape(audible, samples_per_frame)  # strided view: one row per video frame
+    window = np.hanning(samples_per_frame).astype(np.float32)
+    bins = [_band_bins(band, sr, samples_per_frame) for band in spec.bands]
+
+    for start in range(0, audible, BLOCK_FRAMES):
+        stop = min(start + BLOCK_FRAMES, audible)
+        mag = np.abs(np.fft.rfft(segments[start:stop] * window, axis=1))
+        if spec.frame_peak:
+            peak = mag.max(axis=1, keepdims=True)
+            mag = np.where(peak < 1e-6, mag, mag / np.maximum(peak, 1e-6))
+        for band, (low, high) in zip(spec.bands, bins):
+            if high > low:
+                envelopes[band.name][start:stop] = mag[:, low:high].mean(axis=1)
+
+    for name, values in envelopes.items():
+        if spec.normalize:
+            peak = values.max()
+            if peak > 0:
+                values /= peak
+        envelopes[name] = ema(values, spec.smoothing)
+    return envelopes
+
+
+def _cache_path(digest: str, spec: EnvelopeSpec) -> Optional[str]:
+    if not ENVELOPE_CACHE_DIR:
+        return None
+    return os.path.join(ENVELOPE_CACHE_DIR, digest[:2], f"{digest}_{spec.key()}.npz")
+
+
+def _read(path: Optional[str], spec: EnvelopeSpec) -> Optional[Envelopes]:
+    if path is None or not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as stored:
+            return {band.name: stored[band.name].astype(np.float32) for band in spec.bands}
+    except (OSError, KeyError, ValueError):  # truncated or foreign file: recompute and overwrite
+        return None
+
+
+def _write(path: Optional[str], envelopes: Envelopes) -> None:
+    """Store float16 envelopes; written to a temp file and renamed, so readers never see a partial file"""
+    if path is None:
+        return
+    tmp = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **{name: values.astype(np.float16) for name, values in envelopes.items()})
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️ Could not cache envelopes at {path}: {e}")
+        if tmp is not None and os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def load_envelopes(audio_path: str, spec: EnvelopeSpec, metrics: Optional[RenderMetrics] = None) -> Envelopes:
+    """
+    Band envelopes of an audio file, from memory, the disk cache, or decoded and computed.
+    Arrays are read-only (shared between renders); stage times go to `metrics`.
+    """
+    metrics = metrics or RenderMetrics()
+    metrics.info["features_cached"] = True
+
+    def compute() -> Envelopes:
+        path = _cache_path(feature_cache.digest(audio_path), spec)
+        envelopes = _read(path, spec)
+        if envelopes is not None:
+            return envelopes
+        metrics.info["features_cached"] = False
+        with metrics.stage("audio_decode"):
+            import librosa  # only on a cache miss: importing it costs seconds of cold start
+
+            y, sr = librosa.load(audio_path, sr=None, mono=True)
+        with metrics.stage("features"):
+            envelopes = band_envelopes(y, sr, spec)
+            # Rounded like a cache hit, so renders do not depend on the cache state
+            envelopes = {name: values.astype(np.float16).astype(np.float32) for name, values in envelopes.items()}
+        _write(path, envelopes)
+        return envelopes
+
+    return feature_cache.get_or_compute(audio_path, ("envelopes", spec.key()), compute)
@@ -0,0 +1,185 @@
+"""
+Sequential background decoder for the generators.
+
+BackgroundSource is the read-side counterpart of FrameSink. Render loops
+walk frames in order, so instead of a random-access get_frame(t) plus a
+cv2.resize per output frame it opens one ffmpeg process that decodes the
+background once, with the output rate (fps), size (scale) and looping
+(-stream_loop) applied inside ffmpeg, and writes raw BGR24 frames to a pipe.
+A prefetch thread reads them into a bounded ring of preallocated buffers,
+so decoding overlaps with drawing. Still images are loaded, scaled and kept
+as a single cached array.
+
+    with BackgroundSource(video_path, width, height, fps, start_frame=start) as background:
+        for i in range(start, stop):
+            frame = background.frame(i)
+"""
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+
+PREFETCH_FRAMES = int(os.getenv("RENDER_BACKGROUND_PREFETCH_FRAMES", "8"))
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff")
+
+_EOF = object()
+
+
+def video_duration(path: str) -> float:
+    """Duration in seconds from the container's frame count and rate (0.0 if unknown)"""
+    capture = cv2.VideoCapture(path)
+    try:
+        frames, fps = capture.get(cv2.CAP_PROP_FRAME_COUNT), capture.get(cv2.CAP_PROP_FPS)
+    finally:
+        capture.release()
+    return frames / fps if frames > 0 and fps > 0 else 0.0
+
+
+class BackgroundSource:
+    def __init__(self, path: str, width: int, height: int, fps: float, start_frame: int = 0,
+                 loop: bool = True, prefetch_frames: Optional[int] = None):
+        """
+        Args:
+            path: Background video or still image
+            width, height, fps: Geometry and rate of the frames handed to the render loop
+            start_frame: First output frame index that will be requested (a worker's range start)
+            loop: Loop a video shorter than the render; otherwise its last frame is held
+            prefetch_frames: Decoded frames buffered ahead of the render loop
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Background not found: {path}")
+        self.path = path
+        self.width, self.height, self.fps = int(width), int(height), fps
+        self.loop = loop
+        self.frame_bytes = self.width * self.height * 3
+        self._slots = max(2, prefetch_frames or PREFETCH_FRAMES)
+        self._proc = None
+        self._thread = None
+        self._image = None
+
+        if path.lower().endswith(IMAGE_EXTENSIONS):
+            self._image = self._load_image(path)
+            return
+        if shutil.which("ffmpeg") is None:
+            raise RuntimeError("ffmpeg not found on PATH")
+        self._duration = video_duration(path)
+        self._open(start_frame)
+
+    def frame(self, index: int) -> np.ndarray:
+        """
+        Background for output frame `index` as a fresh (height, width, 3) uint8 BGR array the caller may draw on.
+
+        Indices are expected in increasing order; skipping ahead discards frames,
+        going back restarts the decoder.
+        """
+        if self._image is not None:
+            return self._image.copy()
+        if index < self._index:
+            self._restart(index)
+        while self._index < index:
+            self._advance()
+        if self._current is None:  # nothing could be decoded
+            return np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        return self._current.copy()
+
+    def close(self) -> None:
+        if self._proc is None:
+            return
+        self._proc.kill()
+        # Unblock the prefetch thread whether it is waiting for a free slot or on the pipe
+        self._stop.set()
+        self._free.put(None)
+        self._thread.join()
+        self._proc.wait()
+        self._proc = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _load_image(self, path: str) -> np.ndarray:
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"Could not read background image: {path}")
+        if image.shape[:2] != (self.height, self.width):
+            image = cv2.resize(image, (self.width, self.height), interpolation=cv2.INTER_AREA)
+        return image
+
+    def _open(self, start_frame: int) -> None:
+        start = start_frame / self.fps
+        past_end = not self.loop and self._duration > 0 and start >= self._duration - 1 / self.fps
+        if past_end:
+            start = max(0.0, self._duration - 1.0)
+        elif self.loop and self._duration > 0:
+            start = start % self._duration  # seek inside the first pass of the looped input
+        cmd = ["ffmpeg", "-v", "error", "-nostdin"]
+        if self.loop:
+            cmd += ["-stream_loop", "-1"]
+        if start > 0:
+            cmd += ["-ss", f"{start:.6f}"]
+        cmd += [
+            "-i", self.path, "-an", "-sn",
+            "-vf", f"fps={self.fps},scale={self.width}:{self.height}:flags=area",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1",
+        ]
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+        # Ring of preallocated frame buffers: the prefetch thread fills free slots, frame() hands them back
+        self._free = queue.Queue()
+        for _ in range(self._slots):
+            self._free.put(np.empty((self.height, self.width, 3), dtype=np.uint8))
+        self._filled = queue.Queue()
+        self._stop = threading.Event()
+        self._index = start_frame - 1
+        self._current = None
+        self._ended = False
+        self._thread = threading.Thread(target=self._prefetch, daemon=True)
+        self._thread.start()
+        if past_end:
+            # Starting after the end of an unlooped video: decode its last second and hold the final frame
+            while not self._ended:
+                self._advance()
+            self._index = start_frame - 1
+
+    def _restart(self, start_frame: int) -> None:
+        self.close()
+        self._open(start_frame)
+
+    def _advance(self) -> None:
+        """Move to the next decoded frame; past the end of an unlooped video the last frame is held"""
+        self._index += 1
+        if self._ended:
+            return
+        slot = self._filled.get()
+        if slot is _EOF:
+            self._ended = True
+            return
+        if self._current is not None:
+            self._free.put(self._current)
+        self._current = slot
+
+    def _prefetch(self) -> None:
+        stdout = self._proc.stdout
+        while not self._stop.is_set():
+            slot = self._free.get()
+            if slot is None:
+                break
+            view = memoryview(slot).cast("B")
+            read = 0
+            while read < self.frame_bytes:
+                n = stdout.readinto(view[read:])
+                if not n:
+                    break
+                read += n
+            if read < self.frame_bytes:
+                break
+            self._filled.put(slot)
+        self._filled.put(_EOF)
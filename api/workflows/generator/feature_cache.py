@@ -0,0 +1,90 @@
+"""
+In-process cache of precomputed audio feature arrays for the generators.
+
+Feature extraction (decoding plus the FFT band or bass series) depends on
+the audio content and a few analysis parameters, not on the output size or
+the part of the timeline being drawn. Previews and the final render of the
+same track therefore share one set of arrays. Entries are keyed on the
+SHA-256 of the audio file plus the analysis parameters, so the same upload
+saved under another temp path still hits. The arrays are handed out
+read-only because every caller shares them.
+
+    features = feature_cache.get_or_compute(audio_path, ("bands", fps, n_segments), compute)
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Tuple
+
+import numpy as np
+
+FEATURE_CACHE_ENTRIES = int(os.getenv("RENDER_FEATURE_CACHE_ENTRIES", "16"))
+
+Features = Dict[str, np.ndarray]
+
+
+def file_digest(path: str, chunk_bytes: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_bytes), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """LRU of feature arrays keyed on (audio SHA-256, analysis parameters)"""
+
+    def __init__(self, max_entries: int = FEATURE_CACHE_ENTRIES):
+        self.max_entries = max(0, int(max_entries))
+        self._entries: "OrderedDict[Tuple[str, Hashable], Features]" = OrderedDict()
+        # (path, size, mtime) -> digest, so an unchanged file is hashed once
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def digest(self, path: str) -> str:
+        stat = os.stat(path)
+        file_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._digests.get(file_key)
+        if cached is None:
+            cached = file_digest(path)
+            with self._lock:
+                self._digests[file_key] = cached
+                while len(self._digests) > 4 * max(1, self.max_entries):
+                    del self._digests[next(iter(self._digests))]
+        return cached
+
+    def get_or_compute(self, audio_path: str, params: Hashable, compute: Callable[[], Features]) -> Features:
+        """Cached arrays for this audio and parameter tuple, computing (and storing) them on a miss"""
+        if self.max_entries == 0:
+            return compute()
+        key = (self.digest(audio_path), params)
+        with self._lock:
+            features = self._entries.get(key)
+            if features is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return features
+            self.misses += 1
+
+        features = compute()
+        for array in features.values():
+            array.setflags(write=False)
+        with self._lock:
+            self._entries[key] = features
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return features
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+
+
+feature_cache = FeatureCache()
@@ -0,0 +1,184 @@
+"""
+Single-pass video encoder for the generators.
+
+FrameSink spawns one ffmpeg process that reads raw BGR24 frames on stdin,
+optionally takes an audio file as a second input, and writes the final
+H.264/AAC MP4 directly. There is no mp4v intermediate file and no second
+ffmpeg run to mux the audio. Frames go through a bounded queue drained by a
+writer thread, so rendering overlaps with encoding. When ffmpeg falls
+behind, write() blocks rather than buffering the whole video in memory.
+
+    with FrameSink(output_path, width, height, fps, audio_path=audio_path) as sink:
+        for frame in frames:
+            sink.write(frame)
+"""
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+try:
+    from api.workflows.generator.render_metrics import RenderMetrics
+except ImportError:  # run as a script from the generator directories
+    from render_metrics import RenderMetrics
+
+X264_PRESET = os.getenv("RENDER_X264_PRESET", "veryfast")
+X264_CRF = int(os.getenv("RENDER_X264_CRF", "18"))
+WRITE_QUEUE_FRAMES = int(os.getenv("RENDER_WRITE_QUEUE_FRAMES", "8"))
+AUDIO_BITRATE = "320k"
+
+_STOP = object()
+
+
+class FrameSink:
+    def __init__(self, output_path: str, width: int, height: int, fps: float,
+                 audio_path: Optional[str] = None, preset: Optional[str] = None, crf: Optional[int] = None,
+                 shortest: bool = False, queue_frames: Optional[int] = None, audio_offset: float = 0.0,
+                 metrics: Optional[RenderMetrics] = None):
+        """
+        Args:
+            output_path: Final MP4 path (written to output_path + ".temp.mp4" and renamed on success)
+            width, height, fps: Geometry and rate of the frames passed to write()
+            audio_path: Optional audio muxed in the same pass (AAC); ignored if the file does not exist
+            preset, crf: libx264 speed/quality (defaults RENDER_X264_PRESET / RENDER_X264_CRF)
+            shortest: Stop at the shorter of video and audio instead of the longer
+            queue_frames: Frames buffered between the render loop and ffmpeg
+            audio_offset: Seconds of audio skipped before the first frame (preview windows)
+            metrics: RenderMetrics charged with encode time and frame progress; render loops time their stages on it
+        """
+        if shutil.which("ffmpeg") is None:
+            raise RuntimeError("ffmpeg not found on PATH")
+        self.output_path = output_path
+        self.temp_path = output_path + ".temp.mp4"
+        self.width, self.height = int(width), int(height)
+        self.frame_bytes = self.width * self.height * 3
+        self.frames_written = 0
+        self.metrics = metrics
+        self.has_audio = bool(audio_path) and os.path.exists(audio_path)
+
+        out_dir = os.path.dirname(output_path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+
+        cmd = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{self.width}x{self.height}", "-r", str(fps),
+            "-i", "pipe:0",
+        ]
+        if self.has_audio:
+            if audio_offset > 0:
+                cmd += ["-ss", f"{audio_offset:.6f}"]
+            cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0", "-c:a", "aac", "-b:a", AUDIO_BITRATE]
+            if shortest:
+                cmd.append("-shortest")
+        cmd += [
+            "-c:v", "libx264", "-preset", preset or X264_PRESET, "-crf", str(X264_CRF if crf is None else crf),
+            "-pix_fmt", "yuv420p", "-movflags", "+faststart",
+            self.temp_path,
+        ]
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        self._stderr = []
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stderr_thread.start()
+
+        self._queue = queue.Queue(maxsize=max(1, queue_frames or WRITE_QUEUE_FRAMES))
+        self._error = None
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def write(self, frame: np.ndarray) -> None:
+        """Queue one (height, width, 3) uint8 BGR frame; blocks while the queue is full"""
+        if self._error is not None:
+            raise RuntimeError(f"ffmpeg encoder failed: {self._error_message()}")
+        if frame.shape != (self.height, self.width, 3) or frame.dtype != np.uint8:
+            raise ValueError(f"Expected ({self.height}, {self.width}, 3) uint8 frame, got {frame.shape} {frame.dtype}")
+        # Copy now: callers are free to reuse or mutate the array after write() returns
+        if self.metrics is None:
+            self._queue.put(frame.tobytes())
+        else:
+            with self.metrics.stage("encode"):
+                self._queue.put(frame.tobytes())
+            self.metrics.frame_done()
+        self.frames_written += 1
+
+    def close(self) -> str:
+        """Flush queued frames, finish the MP4 and move it into place"""
+        if self._closed:
+            return self.output_path
+        self._closed = True
+        started = time.perf_counter()
+        self._queue.put(_STOP)
+        self._writer.join()
+        try:
+            self._proc.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        returncode = self._proc.wait()
+        self._stderr_thread.join()
+        if self.metrics is not None:
+            self.metrics.add("encode", time.perf_counter() - started)
+        if returncode != 0 or self._error is not None:
+            self._remove_temp()
+            raise RuntimeError(f"ffmpeg encoder failed ({returncode}): {self._error_message()}")
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+        os.rename(self.temp_path, self.output_path)
+        return self.output_path
+
+    def abort(self) -> None:
+        """Stop ffmpeg and discard the partial output"""
+        self._closed = True
+        self._error = self._error or "aborted"
+        # Unblock the writer thread whether it is waiting on the queue or on the pipe
+        self._proc.kill()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._proc.wait()
+        self._stderr_thread.join()
+        self._remove_temp()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def _write_loop(self) -> None:
+        stdin = self._proc.stdin
+        while True:
+            data = self._queue.get()
+            if data is _STOP:
+                return
+            if self._error is not None:
+                continue  # keep draining so write()/close() never block on a dead encoder
+            try:
+                stdin.write(data)
+            except (BrokenPipeError, OSError) as e:
+                self._error = str(e)
+
+    def _drain_stderr(self) -> None:
+        for line in self._proc.stderr:
+            self._stderr.append(line.decode(errors="replace").rstrip())
+            del self._stderr[:-20]
+
+    def _error_message(self) -> str:
+        return "; ".join(self._stderr[-5:]) or str(self._error)
+
+    def _remove_temp(self) -> None:
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
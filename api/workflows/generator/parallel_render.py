@@ -0,0 +1,195 @@
+"""
+Frame-range parallel rendering for the generators.
+
+Once the per-frame series (FFT values, smoothing, opacity) are precomputed,
+frames are independent. render_parallel therefore:
+1. splits [0, N) into contiguous ranges;
+2. copies the series into shared memory once;
+3. renders each range in a spawned worker process, which attaches to the
+   arrays without copying and encodes its range to its own H.264 segment
+   through FrameSink;
+4. joins the segments with the ffmpeg concat demuxer (stream copy), muxing
+   the audio in the same step.
+
+A render_chunk callable receives (arrays, start, stop, sink), writes frames
+[start, stop) to the sink and may return per-chunk stats. In a worker the
+sink carries that worker's RenderMetrics (sink.metrics); its stage times come
+back with the segment, and its frame count is published through shared
+memory so the parent can report progress while the workers run. It has to be
+picklable: a module-level function, or a bound method / functools.partial
+of a picklable object. The serial path calls the same callable once with
+(arrays, 0, N, sink), so serial and parallel renders draw identical frames.
+"""
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from api.workflows.generator.frame_sink import AUDIO_BITRATE, FrameSink
+    from api.workflows.generator.render_metrics import PROGRESS_INTERVAL, RenderMetrics, peak_rss_bytes
+except ImportError:  # run as a script from the generator directories
+    from frame_sink import AUDIO_BITRATE, FrameSink
+    from render_metrics import PROGRESS_INTERVAL, RenderMetrics, peak_rss_bytes
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "0"))  # 0 = one per CPU
+MIN_CHUNK_FRAMES = int(os.getenv("RENDER_MIN_CHUNK_FRAMES", "300"))
+
+PROGRESS_ARRAY = "__frames_done__"  # per-range frame counters, shared next to the render arrays
+
+RenderChunk = Callable[[Dict[str, np.ndarray], int, int, FrameSink], Any]
+
+
+def render_workers(total_frames: int, requested: Optional[int] = None) -> int:
+    """Worker count for a render: the requested count, else RENDER_WORKERS/CPUs limited to MIN_CHUNK_FRAMES per chunk"""
+    if requested is not None:
+        return max(1, min(int(requested), total_frames))
+    workers = RENDER_WORKERS or os.cpu_count() or 1
+    return max(1, min(workers, total_frames // max(1, MIN_CHUNK_FRAMES)))
+
+
+def frame_ranges(total_frames: int, chunks: int) -> List[Tuple[int, int]]:
+    """Split [0, total_frames) into at most `chunks` contiguous, near-equal ranges"""
+    chunks = max(1, min(chunks, total_frames))
+    bounds = np.linspace(0, total_frames, chunks + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+class SharedArrays:
+    """Numpy arrays copied once into shared memory; workers attach to them by name"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self._blocks = []
+        self.specs: Dict[str, Tuple[str, Tuple[int, ...], str]] = {}
+        self.views: Dict[str, np.ndarray] = {}  # this process's views onto the shared copies
+        try:
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+                self._blocks.append(block)
+                self.views[name] = np.ndarray(array.shape, array.dtype, buffer=block.buf)
+                self.views[name][...] = array
+                self.specs[name] = (block.name, array.shape, array.dtype.str)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        self.views.clear()
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _render_segment(render_chunk: RenderChunk, specs, start: int, stop: int, segment_path: str,
+                    width: int, height: int, fps: float, sink_options: Dict[str, Any], progress_slot: int):
+    """Worker: attach to the shared series and encode frames [start, stop) to one segment"""
+    blocks, arrays = [], {}
+    try:
+        for name, (block_name, shape, dtype) in specs.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        progress = arrays.pop(PROGRESS_ARRAY)
+        metrics = RenderMetrics(counter=progress[progress_slot:progress_slot + 1])
+        started = time.time()
+        with FrameSink(segment_path, width, height, fps, metrics=metrics, **sink_options) as sink:
+            stats = render_chunk(arrays, start, stop, sink)
+        return {"start": start, "stop": stop, "seconds": time.time() - started, "stats": stats,
+                "stages": metrics.stages, "peak_rss": peak_rss_bytes()}
+    finally:
+        progress = metrics = sink = None  # drop views onto the blocks before closing them
+        arrays.clear()
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                pass  # a view is still referenced (e.g. by a traceback); the mapping goes with the worker
+
+
+def concat_segments(segment_paths: List[str], output_path: str, audio_path: Optional[str] = None,
+                    shortest: bool = False) -> str:
+    """Join H.264 segments with the concat demuxer (no re-encode) and mux the audio"""
+    list_path = os.path.join(os.path.dirname(os.path.abspath(segment_paths[0])), "segments.txt")
+    with open(list_path, "w") as f:
+        for path in segment_paths:
+            f.write(f"file '{os.path.abspath(path)}'\n")
+
+    temp_path = output_path + ".temp.mp4"
+    cmd = ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path]
+    if audio_path and os.path.exists(audio_path):
+        cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0", "-c:a", "aac", "-b:a", AUDIO_BITRATE]
+        if shortest:
+            cmd.append("-shortest")
+    cmd += ["-c:v", "copy", "-movflags", "+faststart", temp_path]
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise RuntimeError(f"ffmpeg concat failed ({proc.returncode}): {proc.stderr.decode(errors='replace')[-500:]}")
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    os.rename(temp_path, output_path)
+    return output_path
+
+
+def render_parallel(render_chunk: RenderChunk, arrays: Dict[str, np.ndarray], total_frames: int,
+                    output_path: str, width: int, height: int, fps: float, audio_path: Optional[str] = None,
+                    workers: Optional[int] = None, shortest: bool = False,
+                    sink_options: Optional[Dict[str, Any]] = None, log: Callable[[str], None] = print,
+                    metrics: Optional[RenderMetrics] = None) -> List[Any]:
+    """
+    Render frames [0, total_frames) in worker processes and write the final MP4; returns per-chunk stats.
+    With `metrics`, frame progress is reported while the workers run and their stage times are merged in.
+    """
+    ranges = frame_ranges(total_frames, render_workers(total_frames, workers))
+    metrics = metrics or RenderMetrics()
+    metrics.workers = len(ranges)
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(out_dir, exist_ok=True)
+    segment_dir = tempfile.mkdtemp(prefix=".segments_", dir=out_dir)
+    started = time.time()
+    try:
+        segment_paths = [os.path.join(segment_dir, f"segment_{k:03d}.mp4") for k in range(len(ranges))]
+        shared_arrays = dict(arrays, **{PROGRESS_ARRAY: np.zeros(len(ranges), dtype=np.int64)})
+        with SharedArrays(shared_arrays) as shared, ProcessPoolExecutor(
+                max_workers=len(ranges), mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [
+                pool.submit(_render_segment, render_chunk, shared.specs, start, stop, path,
+                            width, height, fps, dict(sink_options or {}), k)
+                for k, ((start, stop), path) in enumerate(zip(ranges, segment_paths))
+            ]
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_EXCEPTION)
+                metrics.set_frames(int(shared.views[PROGRESS_ARRAY].sum()))
+                if any(future.exception() is not None for future in done):
+                    break
+            results = []
+            for future in futures:
+                result = future.result()
+                results.append(result)
+                metrics.merge(result["stages"], result["peak_rss"])
+                log(f"🧩 Frames {result['start']}-{result['stop']} rendered in {result['seconds']:.1f}s")
+        render_time = time.time() - started
+        with metrics.stage("mux"):
+            concat_segments(segment_paths, output_path, audio_path=audio_path, shortest=shortest)
+        log(f"🧵 {len(ranges)} chunks rendered in {render_time:.1f}s, joined in {time.time() - started - render_time:.1f}s")
+        return [result["stats"] for result in results]
+    finally:
+        shutil.rmtree(segment_dir, ignore_errors=True)
@@ -0,0 +1,147 @@
+"""
+Struct-of-arrays particle storage for the particle generators.
+
+Particle state lives in one contiguous numpy column per attribute (x, y,
+vx, vy, size, brightness, life, color index, ...). Live particles always
+occupy rows [0, n), in spawn order, so the update kernels are whole-column
+numpy expressions over the `n` live rows instead of a Python loop over
+dicts:
+
+    particles = ParticleArrays(capacity=1000)
+    particles.extend(x=xs, y=ys, vx=vxs, vy=vys)
+    x, vx = particles["x"], particles["vx"]   # views of the live rows
+    x += vx
+    particles["life"] = fade(x)               # whole-column assignment
+    particles.keep(x < width)                 # kill: order-preserving compaction
+
+Killing compacts the survivors to the front (stable, so draw order and
+overlap are unchanged); spawning appends after the last live row and grows
+the columns geometrically when they are full.
+
+snapshot() copies the live rows out and restore() puts them back, so a
+simulation can be checkpointed and resumed. pack_snapshots lays several
+snapshots end to end in one flat array per attribute (plus row offsets),
+the shape the render workers receive through shared memory.
+"""
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+# Float attributes every particle type may use, and their values for a fresh particle
+FLOAT_FIELDS = {
+    "x": 0.0, "y": 0.0,
+    "vx": 0.0, "vy": 0.0, "vz": 0.0,
+    "size": 1.0,
+    "brightness": 1.0,
+    "life": 1.0,
+    "pulse_phase": 0.0,
+    "rotation": 0.0, "rotation_speed": 0.0,
+    "drift_x": 0.0, "drift_y": 0.0,
+}
+# Integer attributes: palette index of the particle color, frames since spawn
+INT_FIELDS = {"color": 0, "age": 0}
+
+
+class ParticleArrays:
+    """Particle attributes as contiguous columns; rows [0, n) are the live particles"""
+
+    def __init__(self, capacity: int = 64):
+        self.n = 0
+        self._columns: Dict[str, np.ndarray] = {}
+        self._allocate(max(1, int(capacity)))
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Writable view of one attribute over the live particles"""
+        return self._columns[name][:self.n]
+
+    def __setitem__(self, name: str, values) -> None:
+        """Overwrite one attribute of every live particle (in-place operators on p[name] land here)"""
+        self._columns[name][:self.n] = values
+
+    @property
+    def capacity(self) -> int:
+        return len(self._columns["x"])
+
+    def fields(self) -> Iterable[str]:
+        return self._columns.keys()
+
+    def extend(self, count: Optional[int] = None, **values) -> slice:
+        """
+        Append particles; `values` maps attributes to per-particle arrays or scalars,
+        the rest start at their defaults. Returns the rows of the new particles.
+        """
+        unknown = set(values) - set(self._columns)
+        if unknown:
+            raise KeyError(f"Unknown particle attributes: {sorted(unknown)}")
+        if count is None:
+            count = max((np.size(v) for v in values.values()), default=0)
+        count = int(count)
+        if count <= 0:
+            return slice(self.n, self.n)
+        self._reserve(self.n + count)
+        rows = slice(self.n, self.n + count)
+        for name, column in self._columns.items():
+            column[rows] = values.get(name, FLOAT_FIELDS.get(name, INT_FIELDS.get(name)))
+        self.n += count
+        return rows
+
+    def assign(self, index: np.ndarray, **values) -> None:
+        """Reset the particles at `index` (respawn in place) to `values` and defaults"""
+        for name, column in self._columns.items():
+            column[:self.n][index] = values.get(name, FLOAT_FIELDS.get(name, INT_FIELDS.get(name)))
+
+    def keep(self, mask: np.ndarray) -> None:
+        """Kill every live particle where mask is False, keeping the survivors in order"""
+        survivors = int(np.count_nonzero(mask))
+        if survivors == self.n:
+            return
+        for column in self._columns.values():
+            column[:survivors] = column[:self.n][mask]
+        self.n = survivors
+
+    def clear(self) -> None:
+        self.n = 0
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """Copies of every attribute of the live particles"""
+        return {name: column[:self.n].copy() for name, column in self._columns.items()}
+
+    def restore(self, snapshot: Mapping[str, np.ndarray]) -> None:
+        """Replace the live particles with a snapshot's"""
+        self.clear()
+        self.extend(count=len(snapshot["x"]), **snapshot)
+
+    def _allocate(self, capacity: int) -> None:
+        old, n = self._columns, self.n
+        self._columns = {name: np.zeros(capacity, dtype=np.float64) for name in FLOAT_FIELDS}
+        self._columns.update({name: np.zeros(capacity, dtype=np.int64) for name in INT_FIELDS})
+        for name, column in old.items():
+            self._columns[name][:n] = column[:n]
+
+    def _reserve(self, needed: int) -> None:
+        if needed > self.capacity:
+            self._allocate(max(needed, 2 * self.capacity))
+
+
+def pack_snapshots(snapshots: List[Dict[str, np.ndarray]], prefix: str = "") -> Dict[str, np.ndarray]:
+    """
+    Snapshots laid end to end: one array per attribute, named prefix + attribute, and
+    prefix + "rows" holding the row offsets (snapshot k is rows[k]:rows[k + 1]).
+    """
+    rows = np.zeros(len(snapshots) + 1, dtype=np.int64)
+    rows[1:] = np.cumsum([len(snapshot["x"]) for snapshot in snapshots])
+    packed = {prefix + "rows": rows}
+    for name in (*FLOAT_FIELDS, *INT_FIELDS):
+        dtype = np.float64 if name in FLOAT_FIELDS else np.int64
+        packed[prefix + name] = np.concatenate([np.zeros(0, dtype=dtype)] + [s[name] for s in snapshots])
+    return packed
+
+
+def unpack_snapshot(packed: Mapping[str, np.ndarray], k: int, prefix: str = "") -> Dict[str, np.ndarray]:
+    """Snapshot k of pack_snapshots' output (views, not copies)"""
+    rows = packed[prefix + "rows"]
+    start, stop = int(rows[k]), int(rows[k + 1])
+    return {name: packed[prefix + name][start:stop] for name in (*FLOAT_FIELDS, *INT_FIELDS)}
@@ -1,11 +1,19 @@
 import os
+import sys
 import math
 import shutil
 import subprocess
 import time
 import numpy as np
 import cv2
-import librosa
+
+try:
+    from api.workflows.generator.audio_envelope import BASS, EnvelopeSpec, load_envelopes
+    from api.workflows.generator.particle_raster import DiscRasterizer
+except ImportError:  # run as a script from the particles directory
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from audio_envelope import BASS, EnvelopeSpec, load_envelopes
+    from particle_raster import DiscRasterizer
 
 
 class TrapNationParticles:
@@ -37,6 +45,7 @@ class TrapNationParticles:
         spawn_center_y=0.5,  # Center Y position for spawning area (0.0-1.0)
         spawn_area_width=0.0,  # Width of spawning area as percentage (0.0-1.0)
         spawn_area_height=0.0,  # Height of spawning area as percentage (0.0-1.0)
+        seed=0,  # Random generator seed: the same seed renders the same video
     ):
         self.W = width
         self.H = height
@@ -75,12 +84,16 @@ class TrapNationParticles:
         self.spawn_area_px_height = int(self.H * self.spawn_area_height)
         
         # Audio data
-        self.audio_data = None
-        self.sample_rate = None
         self.bass_frequencies = None
         
         # Pre-allocate black frame
         self.black_frame = np.zeros((self.H, self.W, 3), dtype=np.uint8)
+
+        # All particles of a frame are stamped in one batch
+        self.raster = DiscRasterizer(self.W, self.H)
+
+        # Every random draw comes from this generator, so renders are reproducible
+        self.rng = np.random.default_rng(seed)
         
         # Particle system - start with empty list for continuous spawning
         self.particles = []
@@ -93,30 +106,30 @@ class TrapNationParticles:
         # Start from spawning area (random position within area)
         if self.spawn_area_width > 0 and self.spawn_area_height > 0:
             # Spawn randomly within the spawning area
-            x = self.spawn_center_px_x + np.random.uniform(-self.spawn_area_px_width/2, self.spawn_area_px_width/2)
-            y = self.spawn_center_px_y + np.random.uniform(-self.spawn_area_px_height/2, self.spawn_area_px_height/2)
+            x = self.spawn_center_px_x + self.rng.uniform(-self.spawn_area_px_width/2, self.spawn_area_px_width/2)
+            y = self.spawn_center_px_y + self.rng.uniform(-self.spawn_area_px_height/2, self.spawn_area_px_height/2)
         else:
             # Spawn at center if no area specified
             x = self.spawn_center_px_x
             y = self.spawn_center_px_y
         
         # Bass-responsive speed and direction using enhanced mode factor
-        base_speed = np.random.uniform(0.5, 2.0)
+        base_speed = self.rng.uniform(0.5, 2.0)
         speed_factor = self.enhanced_mode.get("factor", 1.0) if self.enhanced_mode.get("active", False) else 1.0
         speed_multiplier = 1.0 + bass_level * speed_factor  # Bass increases speed based on factor
         speed = base_speed * speed_multiplier
         
         # Random direction
-        angle = np.random.uniform(0, 2 * np.pi)
+        angle = self.rng.uniform(0, 2 * np.pi)
         vx = speed * np.cos(angle)
         vy = speed * np.sin(angle)
         
         # Bass-responsive size and brightness
-        base_size = np.random.uniform(1, 3)
+        base_size = self.rng.uniform(1, 3)
         size_multiplier = 1.0 + bass_level * 0.5  # Bass increases size up to 1.5x
         size = base_size * size_multiplier
         
-        base_brightness = np.random.uniform(0.4, 0.8)
+        base_brightness = self.rng.uniform(0.4, 0.8)
         brightness_multiplier = 1.0 + bass_level * 0.5  # Bass increases brightness
         brightness = min(1.0, base_brightness * brightness_multiplier)
         
@@ -126,74 +139,18 @@ class TrapNationParticles:
             'vy': vy,
             'size': size,
             'brightness': brightness,
-            'pulse_phase': np.random.uniform(0, 2 * np.pi),
+            'pulse_phase': self.rng.uniform(0, 2 * np.pi),
             'life': 1.0,
             'age': 0,  # Track particle age
         }
 
     def load_audio(self, audio_path):
-        """Load audio file and extract bass frequencies"""
+        """Load the normalized 0-250 Hz bass energy of every frame"""
         print(f"🎵 Loading audio: {audio_path}")
-        self.audio_data, self.sample_rate = librosa.load(audio_path, sr=None, mono=True)
-        print(f"📊 Audio loaded: {len(self.audio_data)} samples at {self.sample_rate}Hz")
-        
-        # Extract bass frequencies (0-250 Hz)
-        self.bass_frequencies = self._extract_bass_frequencies()
+        spec = EnvelopeSpec(self.fps, bands=(BASS,), frames=int(self.duration * self.fps))
+        self.bass_frequencies = load_envelopes(audio_path, spec)["bass"]
         print(f"🎸 Bass frequencies extracted: {len(self.bass_frequencies)} frames")
 
-    def _extract_bass_frequencies(self):
-        """Extract bass frequency energy for each frame"""
-        if self.audio_data is None:
-            return np.zeros(int(self.duration * self.fps))
-        
-        # Calculate samples per frame
-        samples_per_frame = max(1, int(self.sample_rate / self.fps))
-        total_frames = int(self.duration * self.fps)
-        
-        # Create window for FFT
-        window = np.hanning(samples_per_frame).astype(np.float32)
-        bass_frequencies = np.zeros(total_frames, dtype=np.float32)
-        
-        # Bass frequency range (0-250 Hz)
-        bass_low = 0
-        bass_high = 250
-        
-        for i in range(total_frames):
-            start_idx = i * samples_per_frame
-            end_idx = min(start_idx + samples_per_frame, len(self.audio_data))
-            
-            if start_idx >= len(self.audio_data):
-                bass_frequencies[i] = 0.0
-                continue
-            
-            segment = self.audio_data[start_idx:end_idx].astype(np.float32)
-            if len(segment) < samples_per_frame:
-                segment = np.pad(segment, (0, samples_per_frame - len(segment)), mode="constant")
-            
-            # Apply window and FFT
-            segment_windowed = segment * window
-            spec = np.fft.rfft(segment_windowed)
-            mag = np.abs(spec)
-            
-            # Convert frequency bins to Hz
-            freqs = np.fft.rfftfreq(samples_per_frame, 1/self.sample_rate)
-            
-            # Extract bass frequencies
-            bass_mask = (freqs >= bass_low) & (freqs <= bass_high)
-            if np.any(bass_mask):
-                bass_energy = np.mean(mag[bass_mask])
-            else:
-                bass_energy = 0.0
-            
-            bass_frequencies[i] = bass_energy
-        
-        # Normalize bass frequencies
-        max_bass = np.max(bass_frequencies)
-        if max_bass > 0:
-            bass_frequencies = bass_frequencies / max_bass
-        
-        return bass_frequencies
-
     def _get_bass_level_at_frame(self, frame_idx):
         """Get bass level at specific frame"""
         if self.bass_frequencies is None or frame_idx >= len(self.bass_frequencies):
@@ -298,17 +255,15 @@ class TrapNationParticles:
 
     def _draw_particles(self, frame):
         """Draw particles with life fading"""
-        for particle in self.particles:
-            x, y = int(particle['x']), int(particle['y'])
-            if 0 <= x < self.W and 0 <= y < self.H:
-                size = int(particle['size'])
-                # Apply life fading
-                final_brightness = particle['brightness'] * particle['life']
-                brightness = int(255 * final_brightness)
-                
-                # Draw circular particles
-                cv2.circle(frame, (x, y), size, (brightness, brightness, brightness), -1)
-        return frame
+        if not self.particles:
+            return frame
+        x, y, size, brightness, life = np.array([(p['x'], p['y'], p['size'], p['brightness'], p['life'])
+                                                 for p in self.particles], dtype=np.float64).T
+        x, y = x.astype(np.int64), y.astype(np.int64)
+        visible = (x >= 0) & (x < self.W) & (y >= 0) & (y < self.H)
+        gray = (255 * (brightness[visible] * life[visible])).astype(np.int64)
+        colors = np.repeat(gray[:, None], 3, axis=1)
+        return self.raster.draw(frame, x[visible], y[visible], size[visible].astype(np.int64), colors)
 
     def _draw_bass_indicator(self, frame, frame_idx):
         """Draw bass level indicator and spawn rate info"""
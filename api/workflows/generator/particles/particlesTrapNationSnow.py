@@ -1,11 +1,19 @@
 import os
+import sys
 import math
 import shutil
 import subprocess
 import time
 import numpy as np
 import cv2
-import librosa
+
+try:
+    from api.workflows.generator.audio_envelope import BASS, EnvelopeSpec, load_envelopes
+    from api.workflows.generator.particle_raster import DiscRasterizer
+except ImportError:  # run as a script from the particles directory
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from audio_envelope import BASS, EnvelopeSpec, load_envelopes
+    from particle_raster import DiscRasterizer
 
 
 class TrapNationParticles:
@@ -33,6 +41,7 @@ class TrapNationParticles:
         bass_threshold=0.3,
         outer_movement_strength=2.0,
         inner_movement_strength=1.0,
+        seed=0,  # Random generator seed: the same seed renders the same video
     ):
         self.W = width
         self.H = height
@@ -61,13 +70,17 @@ class TrapNationParticles:
         }
 
         # Audio data
-        self.audio_data = None
-        self.sample_rate = None
         self.bass_frequencies = None
 
         # Pre-allocate black frame
         self.black_frame = np.zeros((self.H, self.W, 3), dtype=np.uint8)
 
+        # All particles of a frame are stamped in one batch
+        self.raster = DiscRasterizer(self.W, self.H)
+
+        # Every random draw comes from this generator, so renders are reproducible
+        self.rng = np.random.default_rng(seed)
+
         # Particle system
         self.particles = self._init_particles()
 
@@ -78,8 +91,8 @@ class TrapNationParticles:
             # Outward mode: start from center, move outward and disappear
             x = self.cx
             y = self.cy
-            angle = np.random.uniform(0, 2 * np.pi)
-            speed = np.random.uniform(0.5, 2.0)
+            angle = self.rng.uniform(0, 2 * np.pi)
+            speed = self.rng.uniform(0.5, 2.0)
             vx = speed * np.cos(angle)
             vy = speed * np.sin(angle)
 
@@ -87,13 +100,13 @@ class TrapNationParticles:
                 'x': x, 'y': y,
                 'vx': vx,
                 'vy': vy,
-                'size': np.random.uniform(1, 4),  # Snowflake size variation
-                'brightness': np.random.uniform(0.6, 1.0),  # Brighter for snowflakes
-                'pulse_phase': np.random.uniform(0, 2 * np.pi),
-                'rotation': np.random.uniform(0, 2 * np.pi),  # Rotation for snowflakes
-                'rotation_speed': np.random.uniform(-0.1, 0.1),  # Slow rotation
-                'drift_x': np.random.uniform(-0.2, 0.2),  # Gentle horizontal drift
-                'drift_y': np.random.uniform(-0.1, 0.1),  # Gentle vertical drift
+                'size': self.rng.uniform(1, 4),  # Snowflake size variation
+                'brightness': self.rng.uniform(0.6, 1.0),  # Brighter for snowflakes
+                'pulse_phase': self.rng.uniform(0, 2 * np.pi),
+                'rotation': self.rng.uniform(0, 2 * np.pi),  # Rotation for snowflakes
+                'rotation_speed': self.rng.uniform(-0.1, 0.1),  # Slow rotation
+                'drift_x': self.rng.uniform(-0.2, 0.2),  # Gentle horizontal drift
+                'drift_y': self.rng.uniform(-0.1, 0.1),  # Gentle vertical drift
                 'life': 1.0,  # Life value for fading
             })
         return particles
@@ -103,8 +116,8 @@ class TrapNationParticles:
         # Outward mode: start from center, move outward
         x = self.cx
         y = self.cy
-        angle = np.random.uniform(0, 2 * np.pi)
-        speed = np.random.uniform(0.5, 2.0)
+        angle = self.rng.uniform(0, 2 * np.pi)
+        speed = self.rng.uniform(0.5, 2.0)
         vx = speed * np.cos(angle)
         vy = speed * np.sin(angle)
 
@@ -112,79 +125,23 @@ class TrapNationParticles:
             'x': x, 'y': y,
             'vx': vx,
             'vy': vy,
-            'size': np.random.uniform(1, 4),
-            'brightness': np.random.uniform(0.6, 1.0),
-            'pulse_phase': np.random.uniform(0, 2 * np.pi),
-            'rotation': np.random.uniform(0, 2 * np.pi),
-            'rotation_speed': np.random.uniform(-0.1, 0.1),
-            'drift_x': np.random.uniform(-0.2, 0.2),
-            'drift_y': np.random.uniform(-0.1, 0.1),
+            'size': self.rng.uniform(1, 4),
+            'brightness': self.rng.uniform(0.6, 1.0),
+            'pulse_phase': self.rng.uniform(0, 2 * np.pi),
+            'rotation': self.rng.uniform(0, 2 * np.pi),
+            'rotation_speed': self.rng.uniform(-0.1, 0.1),
+            'drift_x': self.rng.uniform(-0.2, 0.2),
+            'drift_y': self.rng.uniform(-0.1, 0.1),
             'life': 1.0,
         }
 
     def load_audio(self, audio_path):
-        """Load audio file and extract bass frequencies"""
+        """Load the normalized 0-250 Hz bass energy of every frame"""
         print(f"🎵 Loading audio: {audio_path}")
-        self.audio_data, self.sample_rate = librosa.load(audio_path, sr=None, mono=True)
-        print(f"📊 Audio loaded: {len(self.audio_data)} samples at {self.sample_rate}Hz")
-
-        # Extract bass frequencies (0-250 Hz)
-        self.bass_frequencies = self._extract_bass_frequencies()
+        spec = EnvelopeSpec(self.fps, bands=(BASS,), frames=int(self.duration * self.fps))
+        self.bass_frequencies = load_envelopes(audio_path, spec)["bass"]
         print(f"🎸 Bass frequencies extracted: {len(self.bass_frequencies)} frames")
 
-    def _extract_bass_frequencies(self):
-        """Extract bass frequency energy for each frame"""
-        if self.audio_data is None:
-            return np.zeros(int(self.duration * self.fps))
-
-        # Calculate samples per frame
-        samples_per_frame = max(1, int(self.sample_rate / self.fps))
-        total_frames = int(self.duration * self.fps)
-
-        # Create window for FFT
-        window = np.hanning(samples_per_frame).astype(np.float32)
-        bass_frequencies = np.zeros(total_frames, dtype=np.float32)
-
-        # Bass frequency range (0-250 Hz)
-        bass_low = 0
-        bass_high = 250
-
-        for i in range(total_frames):
-            start_idx = i * samples_per_frame
-            end_idx = min(start_idx + samples_per_frame, len(self.audio_data))
-
-            if start_idx >= len(self.audio_data):
-                bass_frequencies[i] = 0.0
-                continue
-
-            segment = self.audio_data[start_idx:end_idx].astype(np.float32)
-            if len(segment) < samples_per_frame:
-                segment = np.pad(segment, (0, samples_per_frame - len(segment)), mode="constant")
-
-            # Apply window and FFT
-            segment_windowed = segment * window
-            spec = np.fft.rfft(segment_windowed)
-            mag = np.abs(spec)
-
-            # Convert frequency bins to Hz
-            freqs = np.fft.rfftfreq(samples_per_frame, 1/self.sample_rate)
-
-            # Extract bass frequencies
-            bass_mask = (freqs >= bass_low) & (freqs <= bass_high)
-            if np.any(bass_mask):
-                bass_energy = np.mean(mag[bass_mask])
-            else:
-                bass_energy = 0.0
-
-            bass_frequencies[i] = bass_energy
-
-        # Normalize bass frequencies
-        max_bass = np.max(bass_frequencies)
-        if max_bass > 0:
-            bass_frequencies = bass_frequencies / max_bass
-
-        return bass_frequencies
-
     def _get_bass_level_at_frame(self, frame_idx):
         """Get bass level at specific frame"""
         if self.bass_frequencies is None or frame_idx >= len(self.bass_frequencies):
@@ -249,7 +206,7 @@ class TrapNationParticles:
                 base_respawn_probability = (bass_level - self.bass_threshold) * 0.3  # 0-30% base chance
                 respawn_probability = base_respawn_probability * speed_multiplier  # Speed multiplies respawn chance
 
-                if np.random.random() < respawn_probability:
+                if self.rng.random() < respawn_probability:
                     particles_to_respawn.append(i)
 
             # Update rotation for snowflake effect
@@ -294,17 +251,15 @@ class TrapNationParticles:
 
     def _draw_particles(self, frame):
         """Draw circular particles with life fading"""
-        for particle in self.particles:
-            x, y = int(particle['x']), int(particle['y'])
-            if 0 <= x < self.W and 0 <= y < self.H:
-                size = int(particle['size'])
-                # Apply life fading
-                final_brightness = particle['brightness'] * particle['life']
-                brightness = int(255 * final_brightness)
-
-                # Draw circular particles
-                cv2.circle(frame, (x, y), size, (brightness, brightness, brightness), -1)
-        return frame
+        if not self.particles:
+            return frame
+        x, y, size, brightness, life = np.array([(p['x'], p['y'], p['size'], p['brightness'], p['life'])
+                                                 for p in self.particles], dtype=np.float64).T
+        x, y = x.astype(np.int64), y.astype(np.int64)
+        visible = (x >= 0) & (x < self.W) & (y >= 0) & (y < self.H)
+        gray = (255 * (brightness[visible] * life[visible])).astype(np.int64)
+        colors = np.repeat(gray[:, None], 3, axis=1)
+        return self.raster.draw(frame, x[visible], y[visible], size[visible].astype(np.int64), colors)
 
     def _draw_bass_indicator(self, frame, frame_idx):
         """Draw bass level indicator on screen"""
@@ -1,15 +1,40 @@
+import functools
 import os
+import sys
 import math
-import shutil
-import subprocess
-import time
 import numpy as np
 import cv2
-import librosa
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Mapping, Optional, Tuple, Any
 from enum import Enum
 from dataclasses import dataclass
 
+try:
+    from api.workflows.generator.audio_envelope import BASS, EnvelopeSpec, load_envelopes
+    from api.workflows.generator.frame_sink import FrameSink
+    from api.workflows.generator.parallel_render import render_parallel, render_workers
+    from api.workflows.generator.particle_engine import ParticleArrays, pack_snapshots, unpack_snapshot
+    from api.workflows.generator.particle_grid import interact
+    from api.workflows.generator.particle_raster import DiscRasterizer
+    from api.workflows.generator.preview import PreviewSettings
+    from api.workflows.generator.render_metrics import RenderMetrics
+except ImportError:  # run as a script from the generator directories
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from audio_envelope import BASS, EnvelopeSpec, load_envelopes
+    from frame_sink import FrameSink
+    from parallel_render import render_parallel, render_workers
+    from particle_engine import ParticleArrays, pack_snapshots, unpack_snapshot
+    from particle_grid import interact
+    from particle_raster import DiscRasterizer
+    from preview import PreviewSettings
+    from render_metrics import RenderMetrics
+
+# Palette row of white, the color of particles without one of their own (continuous spawning)
+WHITE = 0
+
+# Frames between simulation snapshots of split renders: the most a render worker simulates before its first frame
+CHECKPOINT_FRAMES = int(os.getenv("RENDER_PARTICLE_CHECKPOINT_FRAMES", "150"))
+CHECKPOINT_PREFIX = "checkpoint_"
+
 
 class ParticleType(Enum):
     SNOW = "snow"
@@ -44,6 +69,12 @@ class ParticleConfig:
     spawn_center_y: float = 0.5
     spawn_area_width: float = 0.0
     spawn_area_height: float = 0.0
+    blend: str = "over"     # particle compositing: "over" (like cv2.circle), "max" or "add" (see particle_raster)
+    glow: float = 0.0       # soft halo around each particle, in particle radii
+    seed: int = 0           # random generator seed: the same seed and config render the same video
+    interaction: Optional[str] = None   # particle-particle stage: "repel", "collide" or "flock" (see particle_grid)
+    interaction_radius: float = 12.0    # pixels within which particles interact
+    interaction_strength: float = 0.5
 
 
 class UnifiedParticleSystem:
@@ -83,6 +114,7 @@ class UnifiedParticleSystem:
         
         # Particle appearance and behavior settings
         self.particle_colors = self.config.particle_colors or [(255, 255, 255)]
+        self.palette = self._palette(self.particle_colors)
         self.speed_x = float(self.config.speed_x)
         self.speed_y = float(self.config.speed_y)
         self.speed_z = float(self.config.speed_z)
@@ -112,237 +144,152 @@ class UnifiedParticleSystem:
         self.spawn_area_px_height = int(self.H * self.spawn_area_height)
         
         # Audio data
-        self.audio_data = None
-        self.sample_rate = None
+        self.audio_path = None
         self.bass_frequencies = None
         
         # Pre-allocate black frame
         self.black_frame = np.zeros((self.H, self.W, 3), dtype=np.uint8)
         
-        # Particle system
+        # Particles of a frame are stamped in one batch; rebuilt when the frame size or blending changes
+        self._raster: Optional[DiscRasterizer] = None
+        
+        # Particle system: attributes as numpy columns, updated by one vectorized kernel per type.
+        # Random draws come from self.rng, a fresh stream per frame (see _frame_rng)
+        self.seed = int(self.config.seed)
         self.particles = self._init_particles()
         
         # Spawning tracking for continuous spawning
         self.spawn_accumulator = 0.0
+        
+        # Next frame to simulate
+        self.frame = 0
+
+    def __getstate__(self):
+        # Render workers get the configuration, audio features and simulation state; scratch buffers are rebuilt
+        state = self.__dict__.copy()
+        state["_raster"] = None
+        state["black_frame"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.black_frame = np.zeros((self.H, self.W, 3), dtype=np.uint8)
+
+    def _frame_rng(self, frame_idx: int) -> np.random.Generator:
+        """
+        Random stream of one frame's update (frame -1: the initial particles). Counter-based
+        (Philox keyed by the seed and the frame), so frame k draws the same numbers whatever
+        ran before it, and a simulation can resume from any snapshot.
+        """
+        key = np.array([self.seed % 2**64, frame_idx + 1], dtype=np.uint64)
+        return np.random.Generator(np.random.Philox(key=key))
+
+    @staticmethod
+    def _palette(colors) -> np.ndarray:
+        """(k + 1, 3) BGR rows: white, then the configured colors (malformed ones are drawn white)"""
+        rows = [(255, 255, 255)] + [
+            tuple(color[:3]) if isinstance(color, (list, tuple)) and len(color) >= 3 else (255, 255, 255)
+            for color in colors
+        ]
+        return np.array(rows, dtype=np.float64)
 
     def _init_particles(self):
         """Initialize particle system based on particle type"""
-        particles = []
+        particles = ParticleArrays(capacity=max(64, self.particle_count))
+        self.rng = self._frame_rng(-1)
         
         if self.particle_type == ParticleType.SNOW:
-            return self._init_snow_particles()
-        elif self.particle_type == ParticleType.CONTINUOUS_SPAWNING:
-            return []  # Start empty for continuous spawning
-        else:
-            return self._init_standard_particles()
-    
-    def _init_snow_particles(self):
-        """Initialize snowflake particles with outward movement"""
-        particles = []
-        for _ in range(self.particle_count):
-            x = self.cx
-            y = self.cy
-            angle = np.random.uniform(0, 2 * np.pi)
-            speed = np.random.uniform(0.5, 2.0)
-            vx = speed * np.cos(angle)
-            vy = speed * np.sin(angle)
-            
-            particles.append({
-                'x': x, 'y': y,
-                'vx': vx, 'vy': vy,
-                'size': np.random.uniform(1, 4),
-                'brightness': np.random.uniform(0.6, 1.0),
-                'pulse_phase': np.random.uniform(0, 2 * np.pi),
-                'rotation': np.random.uniform(0, 2 * np.pi),
-                'rotation_speed': np.random.uniform(-0.1, 0.1),
-                'drift_x': np.random.uniform(-0.2, 0.2),
-                'drift_y': np.random.uniform(-0.1, 0.1),
-                'life': 1.0,
-            })
-        return particles
-    
-    def _init_standard_particles(self):
-        """Initialize standard particles for most particle types"""
-        particles = []
-        for _ in range(self.particle_count):
-            angle = np.random.uniform(0, 2 * np.pi)
-            distance = np.random.uniform(200, 400)
-            x = self.cx + distance * np.cos(angle)
-            y = self.cy + distance * np.sin(angle)
-            
-            # Speed initialization
-            vx = np.random.uniform(-0.5, 0.5) if self.speed_x == 0 else self.speed_x
-            vy = np.random.uniform(-0.5, 0.5) if self.speed_y == 0 else self.speed_y
-            vz = np.random.uniform(-0.1, 0.1) if self.speed_z == 0 else self.speed_z
-            
-            # Color selection
-            color = np.random.choice(self.particle_colors) if len(self.particle_colors) > 1 else self.particle_colors[0]
-            
-            particles.append({
-                'x': x, 'y': y,
-                'vx': vx, 'vy': vy,
-                'vz': vz,
-                'size': np.random.uniform(1, 3),
-                'base_size': np.random.uniform(1, 3),
-                'brightness': np.random.uniform(0.3, 1.0),
-                'pulse_phase': np.random.uniform(0, 2 * np.pi),
-                'color': color,
-                'life': 1.0,
-                'age': 0,
-            })
+            particles.extend(**self._spawn_snow_particles(self.particle_count))
+        elif self.particle_type != ParticleType.CONTINUOUS_SPAWNING:  # continuous spawning starts empty
+            particles.extend(**self._spawn_standard_particles(self.particle_count))
         return particles
 
-    def _spawn_new_particle(self, bass_level=0.0):
-        """Spawn a new particle based on particle type"""
+    def _spawn_particles(self, count: int, bass_level: float = 0.0) -> Dict[str, np.ndarray]:
+        """Attributes of `count` new particles for the current particle type"""
         if self.particle_type == ParticleType.SNOW:
-            return self._spawn_snow_particle()
+            return self._spawn_snow_particles(count)
         elif self.particle_type == ParticleType.CONTINUOUS_SPAWNING:
-            return self._spawn_continuous_particle(bass_level)
+            return self._spawn_continuous_particles(count, bass_level)
         else:
-            return self._spawn_standard_particle()
+            return self._spawn_standard_particles(count)
     
-    def _spawn_snow_particle(self):
-        """Spawn a new snowflake particle"""
-        x = self.cx
-        y = self.cy
-        angle = np.random.uniform(0, 2 * np.pi)
-        speed = np.random.uniform(0.5, 2.0)
-        vx = speed * np.cos(angle)
-        vy = speed * np.sin(angle)
-        
+    def _spawn_snow_particles(self, count: int) -> Dict[str, np.ndarray]:
+        """New snowflakes at the center, moving outward"""
+        rng = self.rng
+        angle = rng.uniform(0, 2 * np.pi, count)
+        speed = rng.uniform(0.5, 2.0, count)
         return {
-            'x': x, 'y': y,
-            'vx': vx, 'vy': vy,
-            'size': np.random.uniform(1, 4),
-            'brightness': np.random.uniform(0.6, 1.0),
-            'pulse_phase': np.random.uniform(0, 2 * np.pi),
-            'rotation': np.random.uniform(0, 2 * np.pi),
-            'rotation_speed': np.random.uniform(-0.1, 0.1),
-            'drift_x': np.random.uniform(-0.2, 0.2),
-            'drift_y': np.random.uniform(-0.1, 0.1),
+            'x': self.cx, 'y': self.cy,
+            'vx': speed * np.cos(angle), 'vy': speed * np.sin(angle),
+            'size': rng.uniform(1, 4, count),
+            'brightness': rng.uniform(0.6, 1.0, count),
+            'pulse_phase': rng.uniform(0, 2 * np.pi, count),
+            'rotation': rng.uniform(0, 2 * np.pi, count),
+            'rotation_speed': rng.uniform(-0.1, 0.1, count),
+            'drift_x': rng.uniform(-0.2, 0.2, count),
+            'drift_y': rng.uniform(-0.1, 0.1, count),
             'life': 1.0,
         }
     
-    def _spawn_continuous_particle(self, bass_level=0.0):
-        """Spawn a new particle for continuous spawning mode"""
+    def _spawn_continuous_particles(self, count: int, bass_level: float = 0.0) -> Dict[str, np.ndarray]:
+        """New particles for continuous spawning mode, sized and sped up by the bass"""
+        rng = self.rng
         # Start from spawning area
         if self.spawn_area_width > 0 and self.spawn_area_height > 0:
-            x = self.spawn_center_px_x + np.random.uniform(-self.spawn_area_px_width/2, self.spawn_area_px_width/2)
-            y = self.spawn_center_px_y + np.random.uniform(-self.spawn_area_px_height/2, self.spawn_area_px_height/2)
+            x = self.spawn_center_px_x + rng.uniform(-self.spawn_area_px_width/2, self.spawn_area_px_width/2, count)
+            y = self.spawn_center_px_y + rng.uniform(-self.spawn_area_px_height/2, self.spawn_area_px_height/2, count)
         else:
             x = self.spawn_center_px_x
             y = self.spawn_center_px_y
         
         # Bass-responsive speed
-        base_speed = np.random.uniform(0.5, 2.0)
         speed_factor = self.enhanced_mode.get("factor", 1.0) if self.enhanced_mode.get("active", False) else 1.0
-        speed_multiplier = 1.0 + bass_level * speed_factor
-        speed = base_speed * speed_multiplier
-        
-        angle = np.random.uniform(0, 2 * np.pi)
-        vx = speed * np.cos(angle)
-        vy = speed * np.sin(angle)
+        speed = rng.uniform(0.5, 2.0, count) * (1.0 + bass_level * speed_factor)
+        angle = rng.uniform(0, 2 * np.pi, count)
         
         # Bass-responsive size and brightness
-        base_size = np.random.uniform(1, 3)
-        size_multiplier = 1.0 + bass_level * 0.5
-        size = base_size * size_multiplier
-        
-        base_brightness = np.random.uniform(0.4, 0.8)
-        brightness_multiplier = 1.0 + bass_level * 0.5
-        brightness = min(1.0, base_brightness * brightness_multiplier)
+        size = rng.uniform(1, 3, count) * (1.0 + bass_level * 0.5)
+        brightness = np.minimum(1.0, rng.uniform(0.4, 0.8, count) * (1.0 + bass_level * 0.5))
         
         return {
             'x': x, 'y': y,
-            'vx': vx, 'vy': vy,
+            'vx': speed * np.cos(angle), 'vy': speed * np.sin(angle),
             'size': size,
             'brightness': brightness,
-            'pulse_phase': np.random.uniform(0, 2 * np.pi),
+            'pulse_phase': rng.uniform(0, 2 * np.pi, count),
+            'color': WHITE,
             'life': 1.0,
             'age': 0,
         }
     
-    def _spawn_standard_particle(self):
-        """Spawn a new standard particle"""
-        angle = np.random.uniform(0, 2 * np.pi)
-        distance = np.random.uniform(200, 400)
-        x = self.cx + distance * np.cos(angle)
-        y = self.cy + distance * np.sin(angle)
-        
-        vx = np.random.uniform(-0.5, 0.5) if self.speed_x == 0 else self.speed_x
-        vy = np.random.uniform(-0.5, 0.5) if self.speed_y == 0 else self.speed_y
-        vz = np.random.uniform(-0.1, 0.1) if self.speed_z == 0 else self.speed_z
-        
-        color = np.random.choice(self.particle_colors) if len(self.particle_colors) > 1 else self.particle_colors[0]
+    def _spawn_standard_particles(self, count: int) -> Dict[str, np.ndarray]:
+        """New particles on a ring around the center"""
+        rng = self.rng
+        angle = rng.uniform(0, 2 * np.pi, count)
+        distance = rng.uniform(200, 400, count)
         
         return {
-            'x': x, 'y': y,
-            'vx': vx, 'vy': vy,
-            'vz': vz,
-            'size': np.random.uniform(1, 3),
-            'base_size': np.random.uniform(1, 3),
-            'brightness': np.random.uniform(0.3, 1.0),
-            'pulse_phase': np.random.uniform(0, 2 * np.pi),
-            'color': color,
+            'x': self.cx + distance * np.cos(angle),
+            'y': self.cy + distance * np.sin(angle),
+            'vx': rng.uniform(-0.5, 0.5, count) if self.speed_x == 0 else self.speed_x,
+            'vy': rng.uniform(-0.5, 0.5, count) if self.speed_y == 0 else self.speed_y,
+            'vz': rng.uniform(-0.1, 0.1, count) if self.speed_z == 0 else self.speed_z,
+            'size': rng.uniform(1, 3, count),
+            'brightness': rng.uniform(0.3, 1.0, count),
+            'pulse_phase': rng.uniform(0, 2 * np.pi, count),
+            'color': rng.integers(1, len(self.palette), count),
             'life': 1.0,
             'age': 0,
         }
 
-    def load_audio(self, audio_path: str):
-        """Load audio file and extract bass frequencies"""
+    def load_audio(self, audio_path: str, metrics: Optional[RenderMetrics] = None):
+        """Load the normalized 0-250 Hz bass energy of every frame (shared with earlier renders of the same audio)"""
         print(f"🎵 Loading audio: {audio_path}")
-        self.audio_data, self.sample_rate = librosa.load(audio_path, sr=None, mono=True)
-        print(f"📊 Audio loaded: {len(self.audio_data)} samples at {self.sample_rate}Hz")
-        
-        self.bass_frequencies = self._extract_bass_frequencies()
+        spec = EnvelopeSpec(self.fps, bands=(BASS,), frames=int(self.duration * self.fps))
+        self.bass_frequencies = load_envelopes(audio_path, spec, metrics)["bass"]
+        self.audio_path = audio_path
         print(f"🎸 Bass frequencies extracted: {len(self.bass_frequencies)} frames")
 
-    def _extract_bass_frequencies(self):
-        """Extract bass frequency energy for each frame"""
-        if self.audio_data is None:
-            return np.zeros(int(self.duration * self.fps))
-        
-        samples_per_frame = max(1, int(self.sample_rate / self.fps))
-        total_frames = int(self.duration * self.fps)
-        
-        window = np.hanning(samples_per_frame).astype(np.float32)
-        bass_frequencies = np.zeros(total_frames, dtype=np.float32)
-        
-        bass_low = 0
-        bass_high = 250
-        
-        for i in range(total_frames):
-            start_idx = i * samples_per_frame
-            end_idx = min(start_idx + samples_per_frame, len(self.audio_data))
-            
-            if start_idx >= len(self.audio_data):
-                bass_frequencies[i] = 0.0
-                continue
-            
-            segment = self.audio_data[start_idx:end_idx].astype(np.float32)
-            if len(segment) < samples_per_frame:
-                segment = np.pad(segment, (0, samples_per_frame - len(segment)), mode="constant")
-            
-            segment_windowed = segment * window
-            spec = np.fft.rfft(segment_windowed)
-            mag = np.abs(spec)
-            
-            freqs = np.fft.rfftfreq(samples_per_frame, 1/self.sample_rate)
-            
-            bass_mask = (freqs >= bass_low) & (freqs <= bass_high)
-            if np.any(bass_mask):
-                bass_energy = np.mean(mag[bass_mask])
-            else:
-                bass_energy = 0.0
-            
-            bass_frequencies[i] = bass_energy
-        
-        max_bass = np.max(bass_frequencies)
-        if max_bass > 0:
-            bass_frequencies = bass_frequencies / max_bass
-        
-        return bass_frequencies
-
     def _get_bass_level_at_frame(self, frame_idx: int) -> float:
         """Get bass level at specific frame"""
         if self.bass_frequencies is None or frame_idx >= len(self.bass_frequencies):
@@ -378,8 +325,67 @@ class UnifiedParticleSystem:
         
         return base_spawn + bass_spawn
 
+    def reset(self):
+        """Back to the state before the first frame"""
+        self.particles = self._init_particles()
+        self.spawn_accumulator = 0.0
+        self.frame = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy of the simulation state before frame `self.frame`"""
+        return {"frame": self.frame, "spawn_accumulator": self.spawn_accumulator, "particles": self.particles.snapshot()}
+
+    def restore(self, state: Mapping[str, Any]):
+        """Resume from a snapshot"""
+        self.particles.restore(state["particles"])
+        self.spawn_accumulator = float(state["spawn_accumulator"])
+        self.frame = int(state["frame"])
+
+    def advance(self, stop: int):
+        """Simulate frames [self.frame, stop)"""
+        for i in range(self.frame, stop):
+            self._update_particles(i / self.fps, i)
+
+    def seek(self, frame: int, checkpoints: Optional[Mapping[str, np.ndarray]] = None):
+        """
+        Bring the simulation to the state before `frame`: simulate forward from the current
+        state, or from the latest checkpoint at or before `frame` when that is closer (see
+        record_checkpoints), or from the first frame.
+        """
+        k = -1
+        if checkpoints is not None and CHECKPOINT_PREFIX + "frame" in checkpoints:
+            k = int(np.searchsorted(checkpoints[CHECKPOINT_PREFIX + "frame"], frame, side="right")) - 1
+        resume_from = int(checkpoints[CHECKPOINT_PREFIX + "frame"][k]) if k >= 0 else 0
+        if not resume_from <= self.frame <= frame:
+            if k >= 0:
+                self.restore({
+                    "frame": resume_from,
+                    "spawn_accumulator": checkpoints[CHECKPOINT_PREFIX + "spawn_accumulator"][k],
+                    "particles": unpack_snapshot(checkpoints, k, CHECKPOINT_PREFIX),
+                })
+            else:
+                self.reset()
+        self.advance(frame)
+
+    def record_checkpoints(self, stop: int, every: int = CHECKPOINT_FRAMES) -> Dict[str, np.ndarray]:
+        """
+        Simulate from the first frame towards `stop`, snapshotting the state every `every` frames.
+        Returned as flat arrays (for shared memory) that seek() resumes from.
+        """
+        self.reset()
+        snapshots = []
+        for frame in range(0, max(1, stop), max(1, int(every))):
+            self.advance(frame)
+            snapshots.append(self.snapshot())
+        checkpoints = pack_snapshots([state["particles"] for state in snapshots], CHECKPOINT_PREFIX)
+        checkpoints[CHECKPOINT_PREFIX + "frame"] = np.array([state["frame"] for state in snapshots], dtype=np.int64)
+        checkpoints[CHECKPOINT_PREFIX + "spawn_accumulator"] = np.array(
+            [state["spawn_accumulator"] for state in snapshots], dtype=np.float64)
+        return checkpoints
+
     def _update_particles(self, t: float, frame_idx: int):
         """Update particle system based on particle type"""
+        self.rng = self._frame_rng(frame_idx)
         raw_bass_level = self._get_bass_level_at_frame(frame_idx)
         bass_level = self._apply_enhanced_mode(raw_bass_level)
         
@@ -389,364 +395,335 @@ class UnifiedParticleSystem:
             self._update_continuous_particles(t, frame_idx, bass_level)
         else:
             self._update_standard_particles(t, frame_idx, bass_level)
+        
+        # Optional pairwise stage: neighbors found through a spatial hash, linear in the particle count
+        if self.config.interaction:
+            interact(self.particles, self.config.interaction, self.config.interaction_radius,
+                     self.config.interaction_strength)
+        self.frame = frame_idx + 1
 
     def _update_snow_particles(self, t: float, frame_idx: int, bass_level: float):
         """Update snowflake particles with bass-triggered respawning"""
-        particles_to_respawn = []
+        p = self.particles
+        x, y, vx, vy = p['x'], p['y'], p['vx'], p['vy']
         
-        for i, particle in enumerate(self.particles):
-            # Add gentle drift
-            particle['vx'] += particle['drift_x'] * 0.01
-            particle['vy'] += particle['drift_y'] * 0.01
-            
-            # Add bass-responsive intensity
-            if bass_level > self.bass_threshold:
-                speed_multiplier = 1.0 + bass_level * 0.5
-                particle['vx'] *= speed_multiplier
-                particle['vy'] *= speed_multiplier
-            
-            # Apply air resistance
-            particle['vx'] *= 0.999
-            particle['vy'] *= 0.999
-            
-            # Update position
-            particle['x'] += particle['vx']
-            particle['y'] += particle['vy']
-            
-            # Bass-triggered respawning
-            if bass_level > self.bass_threshold:
-                particle_speed = np.sqrt(particle['vx']**2 + particle['vy']**2)
-                speed_multiplier = 1.0 + (particle_speed / 5.0)
-                
-                base_respawn_probability = (bass_level - self.bass_threshold) * 0.3
-                respawn_probability = base_respawn_probability * speed_multiplier
-                
-                if np.random.random() < respawn_probability:
-                    particles_to_respawn.append(i)
-            
-            # Update rotation
-            particle['rotation'] += particle['rotation_speed']
-            
-            # Update pulse phase and brightness
-            particle['pulse_phase'] += 0.05 + bass_level * 0.1
-            base_brightness = 0.6 + 0.4 * (0.5 + 0.5 * np.sin(particle['pulse_phase']))
-            particle['brightness'] = base_brightness * (0.8 + 0.2 * bass_level)
-            
-            # Distance-based fading
-            distance_from_center = np.sqrt((particle['x'] - self.cx)**2 + (particle['y'] - self.cy)**2)
-            max_distance = np.sqrt(self.W**2 + self.H**2) / 2
-            fade_factor = max(0.1, 1.0 - (distance_from_center / max_distance))
-            particle['life'] = fade_factor
+        # Add gentle drift
+        vx += p['drift_x'] * 0.01
+        vy += p['drift_y'] * 0.01
+        
+        # Add bass-responsive intensity
+        if bass_level > self.bass_threshold:
+            speed_multiplier = 1.0 + bass_level * 0.5
+            vx *= speed_multiplier
+            vy *= speed_multiplier
+        
+        # Apply air resistance
+        vx *= 0.999
+        vy *= 0.999
+        
+        # Update position
+        x += vx
+        y += vy
+        
+        # Bass-triggered respawning, more likely for fast particles
+        respawn = None
+        if bass_level > self.bass_threshold:
+            speed_multiplier = 1.0 + np.hypot(vx, vy) / 5.0
+            respawn_probability = (bass_level - self.bass_threshold) * 0.3 * speed_multiplier
+            respawn = np.flatnonzero(self.rng.random(len(p)) < respawn_probability)
+        
+        # Update rotation
+        p['rotation'] += p['rotation_speed']
+        
+        # Update pulse phase and brightness
+        pulse_phase = p['pulse_phase']
+        pulse_phase += 0.05 + bass_level * 0.1
+        p['brightness'] = (0.6 + 0.4 * (0.5 + 0.5 * np.sin(pulse_phase))) * (0.8 + 0.2 * bass_level)
+        
+        # Distance-based fading
+        p['life'] = self._distance_fade(x, y)
         
         # Handle respawning
-        for i in reversed(particles_to_respawn):
-            self.particles[i] = self._spawn_snow_particle()
-        
-        # Spawn additional particles
-        if self.particles:
-            total_speed = sum(np.sqrt(p['vx']**2 + p['vy']**2) for p in self.particles)
-            avg_speed = total_speed / len(self.particles)
-            speed_factor = min(2.0, avg_speed / 2.0)
+        if respawn is not None and len(respawn):
+            p.assign(respawn, **self._spawn_snow_particles(len(respawn)))
+        
+        # Spawn additional particles, faster while the snow is moving fast
+        if len(p):
+            speed_factor = min(2.0, float(np.hypot(p['vx'], p['vy']).mean()) / 2.0)
         else:
             speed_factor = 1.0
         
         base_spawn_rate = 0.5 + bass_level * 3.0
         spawn_rate = base_spawn_rate * (1.0 + speed_factor)
         
-        for _ in range(int(spawn_rate)):
-            if len(self.particles) < self.particle_count * 2:
-                self.particles.append(self._spawn_snow_particle())
+        count = min(int(spawn_rate), max(0, self.particle_count * 2 - len(p)))
+        if count > 0:
+            p.extend(**self._spawn_snow_particles(count))
 
     def _update_continuous_particles(self, t: float, frame_idx: int, bass_level: float):
         """Update continuous spawning particles"""
         spawn_rate = self._calculate_spawn_rate(bass_level)
         self.spawn_accumulator += spawn_rate
         
-        # Spawn new particles
-        while self.spawn_accumulator >= 1.0 and len(self.particles) < self.max_particles:
-            new_particle = self._spawn_continuous_particle(bass_level)
-            self.particles.append(new_particle)
-            self.spawn_accumulator -= 1.0
+        # Spawn new particles: one per whole unit accumulated, up to max_particles
+        p = self.particles
+        count = min(int(self.spawn_accumulator), max(0, self.max_particles - len(p))) if self.spawn_accumulator >= 1.0 else 0
+        if count > 0:
+            p.extend(**self._spawn_continuous_particles(count, bass_level))
+            self.spawn_accumulator -= count
         
         # Update existing particles
-        particles_to_remove = []
+        x, y, vx, vy = p['x'], p['y'], p['vx'], p['vy']
+        
+        # Bass-responsive movement
+        if bass_level > self.bass_threshold:
+            speed_factor = self.enhanced_mode.get("factor", 1.0) if self.enhanced_mode.get("active", False) else 1.0
+            speed_multiplier = 1.0 + bass_level * speed_factor * 0.1
+            vx *= speed_multiplier
+            vy *= speed_multiplier
+        
+        # Apply air resistance
+        vx *= 0.998
+        vy *= 0.998
+        
+        # Update position
+        x += vx
+        y += vy
+        
+        # Update age
+        p['age'] += 1
+        
+        # Update pulse phase and brightness
+        pulse_phase = p['pulse_phase']
+        pulse_phase += 0.05 + bass_level * 0.1
+        p['brightness'] = (0.4 + 0.6 * (0.5 + 0.5 * np.sin(pulse_phase))) * (0.7 + 0.3 * bass_level)
+        
+        # Distance-based fading
+        p['life'] = self._distance_fade(x, y)
         
-        for i, particle in enumerate(self.particles):
-            # Bass-responsive movement
+        # Remove particles outside frame or too old
+        p.keep((x >= -50) & (x <= self.W + 50) & (y >= -50) & (y <= self.H + 50) & (p['age'] <= 1000))
+
+    def _update_standard_particles(self, t: float, frame_idx: int, bass_level: float):
+        """Update standard particles with music-dependent movement"""
+        p = self.particles
+        n = len(p)
+        rng = self.rng
+        x, y, vx, vy = p['x'], p['y'], p['vx'], p['vy']
+        pulse_phase, brightness = p['pulse_phase'], p['brightness']
+        
+        # ZEN PARTICLES: No music dependency, just floating around
+        if self.particle_type == ParticleType.ZEN:
+            # Simple floating movement with gentle drift
+            vx += rng.uniform(-0.05, 0.05, n)
+            vy += rng.uniform(-0.05, 0.05, n)
+            
+            # Apply gentle air resistance
+            vx *= 0.998
+            vy *= 0.998
+            
+            # Update position
+            x += vx
+            y += vy
+            
+            # Update pulse phase and brightness (no music dependency)
+            pulse_phase += 0.05
+            brightness[:] = 0.3 + 0.7 * (0.5 + 0.5 * np.sin(pulse_phase))
+            
+            # Handle boundaries for ZEN particles
+            if self.bounce:
+                self._bounce(x, y, vx, vy)
+            else:
+                # Random respawn if not bouncing
+                out = np.flatnonzero(self._outside(x, y))
+                if len(out):
+                    k = len(out)
+                    x[out] = rng.uniform(0, self.W, k)
+                    y[out] = rng.uniform(0, self.H, k)
+                    vx[out] = rng.uniform(-0.5, 0.5, k)
+                    vy[out] = rng.uniform(-0.5, 0.5, k)
+                    p['size'][out] = rng.uniform(1, 3, k)
+                    brightness[out] = rng.uniform(0.3, 1.0, k)
+                    pulse_phase[out] = rng.uniform(0, 2 * np.pi, k)
+        
+        # BOUNCING PARTICLES: Fixed count, bounce back, increased movement with bass
+        elif self.particle_type == ParticleType.BOUNCING:
+            # Bass-responsive movement (increased excitement with bass)
             if bass_level > self.bass_threshold:
-                speed_factor = self.enhanced_mode.get("factor", 1.0) if self.enhanced_mode.get("active", False) else 1.0
-                speed_multiplier = 1.0 + bass_level * speed_factor * 0.1
-                particle['vx'] *= speed_multiplier
-                particle['vy'] *= speed_multiplier
+                # High bass: increased movement and excitement
+                excitement_factor = 1.0 + bass_level * 2.0  # Up to 3x movement
+                vx += rng.uniform(-0.3, 0.3, n) * excitement_factor
+                vy += rng.uniform(-0.3, 0.3, n) * excitement_factor
+            else:
+                # Low bass: gentle movement
+                vx += rng.uniform(-0.1, 0.1, n)
+                vy += rng.uniform(-0.1, 0.1, n)
             
             # Apply air resistance
-            particle['vx'] *= 0.998
-            particle['vy'] *= 0.998
+            vx *= 0.995
+            vy *= 0.995
             
             # Update position
-            particle['x'] += particle['vx']
-            particle['y'] += particle['vy']
+            x += vx
+            y += vy
             
-            # Update age
-            particle['age'] += 1
+            # Update pulse phase and brightness (bass responsive)
+            pulse_phase += 0.1 + bass_level * 0.3
+            brightness[:] = (0.3 + 0.7 * (0.5 + 0.5 * np.sin(pulse_phase))) * (0.7 + 0.3 * bass_level)
             
-            # Update pulse phase and brightness
-            particle['pulse_phase'] += 0.05 + bass_level * 0.1
-            base_brightness = 0.4 + 0.6 * (0.5 + 0.5 * np.sin(particle['pulse_phase']))
-            particle['brightness'] = base_brightness * (0.7 + 0.3 * bass_level)
-            
-            # Distance-based fading
-            distance_from_center = np.sqrt((particle['x'] - self.cx)**2 + (particle['y'] - self.cy)**2)
-            max_distance = np.sqrt(self.W**2 + self.H**2) / 2
-            fade_factor = max(0.1, 1.0 - (distance_from_center / max_distance))
-            particle['life'] = fade_factor
-            
-            # Remove particles outside frame or too old
-            if (particle['x'] < -50 or particle['x'] > self.W + 50 or 
-                particle['y'] < -50 or particle['y'] > self.H + 50 or
-                particle['age'] > 1000):
-                particles_to_remove.append(i)
+            # BOUNCE BACK on frame boundaries (no respawn)
+            self._bounce(x, y, vx, vy)
         
-        # Remove particles
-        for i in reversed(particles_to_remove):
-            self.particles.pop(i)
-
-    def _update_standard_particles(self, t: float, frame_idx: int, bass_level: float):
-        """Update standard particles with music-dependent movement"""
-        for particle in self.particles:
-            # ZEN PARTICLES: No music dependency, just floating around
-            if self.particle_type == ParticleType.ZEN:
-                # Simple floating movement with gentle drift
-                particle['vx'] += np.random.uniform(-0.05, 0.05)
-                particle['vy'] += np.random.uniform(-0.05, 0.05)
+        # OTHER PARTICLES: Original music-dependent behavior
+        else:
+            # Direction from the center (a random one for particles exactly on it)
+            dx = x - self.cx
+            dy = y - self.cy
+            distance_from_center = np.hypot(dx, dy)
+            away = distance_from_center > 0
+            safe_distance = np.where(away, distance_from_center, 1.0)
+            
+            # Music-dependent movement logic
+            if bass_level > self.bass_threshold:
+                # High bass: outer movement
+                outward_force = bass_level * self.outer_movement_strength * 3.0
                 
-                # Apply gentle air resistance
-                particle['vx'] *= 0.998
-                particle['vy'] *= 0.998
+                angle = rng.uniform(0, 2 * np.pi, n)
+                dx_norm = np.where(away, dx / safe_distance, np.cos(angle))
+                dy_norm = np.where(away, dy / safe_distance, np.sin(angle))
                 
-                # Update position
-                particle['x'] += particle['vx']
-                particle['y'] += particle['vy']
+                vx += dx_norm * outward_force * 0.05
+                vy += dy_norm * outward_force * 0.05
                 
-                # Update pulse phase and brightness (no music dependency)
-                particle['pulse_phase'] += 0.05
-                base_brightness = 0.3 + 0.7 * (0.5 + 0.5 * np.sin(particle['pulse_phase']))
-                particle['brightness'] = base_brightness
+                vx += rng.uniform(-0.5, 0.5, n) * bass_level
+                vy += rng.uniform(-0.5, 0.5, n) * bass_level
+            else:
+                # Low bass: inner movement
+                inward_force = self.inner_movement_strength * (1.0 - bass_level) * 2.0
+                vx += np.where(away, -dx / safe_distance, 0.0) * inward_force * 0.03
+                vy += np.where(away, -dy / safe_distance, 0.0) * inward_force * 0.03
                 
-                # Handle boundaries for ZEN particles
-                if self.bounce:
-                    # Bounce behavior
-                    if particle['x'] < 0:
-                        particle['x'] = 0
-                        particle['vx'] = abs(particle['vx'])
-                    elif particle['x'] >= self.W:
-                        particle['x'] = self.W - 1
-                        particle['vx'] = -abs(particle['vx'])
-                    
-                    if particle['y'] < 0:
-                        particle['y'] = 0
-                        particle['vy'] = abs(particle['vy'])
-                    elif particle['y'] >= self.H:
-                        particle['y'] = self.H - 1
-                        particle['vy'] = -abs(particle['vy'])
-                else:
-                    # Random respawn if not bouncing
-                    if particle['x'] < 0 or particle['x'] >= self.W or particle['y'] < 0 or particle['y'] >= self.H:
-                        particle['x'] = np.random.uniform(0, self.W)
-                        particle['y'] = np.random.uniform(0, self.H)
-                        particle['vx'] = np.random.uniform(-0.5, 0.5)
-                        particle['vy'] = np.random.uniform(-0.5, 0.5)
-                        particle['size'] = np.random.uniform(1, 3)
-                        particle['brightness'] = np.random.uniform(0.3, 1.0)
-                        particle['pulse_phase'] = np.random.uniform(0, 2 * np.pi)
+                vx += rng.uniform(-0.1, 0.1, n)
+                vy += rng.uniform(-0.1, 0.1, n)
             
-            # BOUNCING PARTICLES: Fixed count, bounce back, increased movement with bass
-            elif self.particle_type == ParticleType.BOUNCING:
-                # Bass-responsive movement (increased excitement with bass)
-                if bass_level > self.bass_threshold:
-                    # High bass: increased movement and excitement
-                    excitement_factor = 1.0 + bass_level * 2.0  # Up to 3x movement
-                    particle['vx'] += np.random.uniform(-0.3, 0.3) * excitement_factor
-                    particle['vy'] += np.random.uniform(-0.3, 0.3) * excitement_factor
-                else:
-                    # Low bass: gentle movement
-                    particle['vx'] += np.random.uniform(-0.1, 0.1)
-                    particle['vy'] += np.random.uniform(-0.1, 0.1)
-                
-                # Apply air resistance
-                particle['vx'] *= 0.995
-                particle['vy'] *= 0.995
-                
-                # Update position
-                particle['x'] += particle['vx']
-                particle['y'] += particle['vy']
-                
-                # Update pulse phase and brightness (bass responsive)
-                particle['pulse_phase'] += 0.1 + bass_level * 0.3
-                base_brightness = 0.3 + 0.7 * (0.5 + 0.5 * np.sin(particle['pulse_phase']))
-                particle['brightness'] = base_brightness * (0.7 + 0.3 * bass_level)
-                
-                # BOUNCE BACK on frame boundaries (no respawn)
-                if particle['x'] < 0:
-                    particle['x'] = 0
-                    particle['vx'] = abs(particle['vx'])
-                elif particle['x'] >= self.W:
-                    particle['x'] = self.W - 1
-                    particle['vx'] = -abs(particle['vx'])
-                
-                if particle['y'] < 0:
-                    particle['y'] = 0
-                    particle['vy'] = abs(particle['vy'])
-                elif particle['y'] >= self.H:
-                    particle['y'] = self.H - 1
-                    particle['vy'] = -abs(particle['vy'])
+            # Apply air resistance
+            vx *= 0.995
+            vy *= 0.995
+            
+            # Update position
+            x += vx
+            y += vy
             
-            # OTHER PARTICLES: Original music-dependent behavior
+            # Update pulse phase and brightness
+            pulse_phase += 0.1 + bass_level * 0.2
+            brightness[:] = (0.3 + 0.7 * (0.5 + 0.5 * np.sin(pulse_phase))) * (0.7 + 0.3 * bass_level)
+            
+            # Update size based on z speed
+            size = p['size']
+            size += p['vz']
+            np.clip(size, 0.5, 10.0, out=size)
+            
+            # Handle boundaries for other particle types
+            if self.bounce:
+                self._bounce(x, y, vx, vy)
+            elif self.particle_type == ParticleType.NO_MUSIC:
+                # Wrap around: a fresh random coordinate on the axis that left the frame
+                out_x = np.flatnonzero((x < 0) | (x >= self.W))
+                out_y = np.flatnonzero((y < 0) | (y >= self.H))
+                x[out_x] = rng.uniform(0, self.W, len(out_x))
+                y[out_y] = rng.uniform(0, self.H, len(out_y))
             else:
-                # Calculate distance from center
-                dx = particle['x'] - self.cx
-                dy = particle['y'] - self.cy
-                distance_from_center = np.sqrt(dx*dx + dy*dy)
-                
-                # Music-dependent movement logic
-                if bass_level > self.bass_threshold:
-                    # High bass: outer movement
-                    outward_force = bass_level * self.outer_movement_strength * 3.0
-                    
-                    if distance_from_center > 0:
-                        dx_norm = dx / distance_from_center
-                        dy_norm = dy / distance_from_center
-                    else:
-                        angle = np.random.uniform(0, 2 * np.pi)
-                        dx_norm = np.cos(angle)
-                        dy_norm = np.sin(angle)
-                    
-                    particle['vx'] += dx_norm * outward_force * 0.05
-                    particle['vy'] += dy_norm * outward_force * 0.05
-                    
-                    particle['vx'] += np.random.uniform(-0.5, 0.5) * bass_level
-                    particle['vy'] += np.random.uniform(-0.5, 0.5) * bass_level
-                else:
-                    # Low bass: inner movement
-                    if distance_from_center > 0:
-                        inward_force = self.inner_movement_strength * (1.0 - bass_level) * 2.0
-                        
-                        dx_norm = -dx / distance_from_center
-                        dy_norm = -dy / distance_from_center
-                        
-                        particle['vx'] += dx_norm * inward_force * 0.03
-                        particle['vy'] += dy_norm * inward_force * 0.03
-                    
-                    particle['vx'] += np.random.uniform(-0.1, 0.1)
-                    particle['vy'] += np.random.uniform(-0.1, 0.1)
-                
-                # Apply air resistance
-                particle['vx'] *= 0.995
-                particle['vy'] *= 0.995
-                
-                # Update position
-                particle['x'] += particle['vx']
-                particle['y'] += particle['vy']
-                
-                # Update pulse phase and brightness
-                particle['pulse_phase'] += 0.1 + bass_level * 0.2
-                base_brightness = 0.3 + 0.7 * (0.5 + 0.5 * np.sin(particle['pulse_phase']))
-                particle['brightness'] = base_brightness * (0.7 + 0.3 * bass_level)
-                
-                # Update size based on z speed
-                if 'vz' in particle:
-                    particle['size'] += particle['vz']
-                    particle['size'] = max(0.5, min(particle['size'], 10.0))
-                
-                # Handle boundaries for other particle types
-                if self.bounce:
-                    # Bounce behavior
-                    if particle['x'] < 0:
-                        particle['x'] = 0
-                        particle['vx'] = abs(particle['vx'])
-                    elif particle['x'] >= self.W:
-                        particle['x'] = self.W - 1
-                        particle['vx'] = -abs(particle['vx'])
-                    
-                    if particle['y'] < 0:
-                        particle['y'] = 0
-                        particle['vy'] = abs(particle['vy'])
-                    elif particle['y'] >= self.H:
-                        particle['y'] = self.H - 1
-                        particle['vy'] = -abs(particle['vy'])
-                else:
-                    # Wrap around or respawn
-                    if particle['x'] < 0 or particle['x'] >= self.W or particle['y'] < 0 or particle['y'] >= self.H:
-                        if self.particle_type == ParticleType.NO_MUSIC:
-                            # Wrap around
-                            if particle['x'] < 0 or particle['x'] >= self.W:
-                                particle['x'] = np.random.uniform(0, self.W)
-                            if particle['y'] < 0 or particle['y'] >= self.H:
-                                particle['y'] = np.random.uniform(0, self.H)
-                        else:
-                            # Respawn from center
-                            particle['x'] = self.cx
-                            particle['y'] = self.cy
-                            angle = np.random.uniform(0, 2 * np.pi)
-                            speed = np.random.uniform(1.0, 3.0)
-                            particle['vx'] = speed * np.cos(angle)
-                            particle['vy'] = speed * np.sin(angle)
-                            particle['size'] = np.random.uniform(1, 3)
-                            particle['brightness'] = np.random.uniform(0.3, 1.0)
-                            particle['pulse_phase'] = np.random.uniform(0, 2 * np.pi)
-
-    def _draw_particles(self, frame):
-        """Draw particles based on particle type"""
+                # Respawn from center
+                out = np.flatnonzero(self._outside(x, y))
+                if len(out):
+                    k = len(out)
+                    angle = rng.uniform(0, 2 * np.pi, k)
+                    speed = rng.uniform(1.0, 3.0, k)
+                    x[out] = self.cx
+                    y[out] = self.cy
+                    vx[out] = speed * np.cos(angle)
+                    vy[out] = speed * np.sin(angle)
+                    size[out] = rng.uniform(1, 3, k)
+                    brightness[out] = rng.uniform(0.3, 1.0, k)
+                    pulse_phase[out] = rng.uniform(0, 2 * np.pi, k)
+
+    def _outside(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        return (x < 0) | (x >= self.W) | (y < 0) | (y >= self.H)
+
+    def _bounce(self, x: np.ndarray, y: np.ndarray, vx: np.ndarray, vy: np.ndarray) -> None:
+        """Reflect particles that left the frame back inside it, in place"""
+        for pos, vel, limit in ((x, vx, self.W), (y, vy, self.H)):
+            low = pos < 0
+            high = pos >= limit
+            pos[low] = 0
+            vel[low] = np.abs(vel[low])
+            pos[high] = limit - 1
+            vel[high] = -np.abs(vel[high])
+
+    def _distance_fade(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Life factor fading with the distance from the center (never below 0.1)"""
+        max_distance = np.sqrt(self.W**2 + self.H**2) / 2
+        return np.maximum(0.1, 1.0 - np.hypot(x - self.cx, y - self.cy) / max_distance)
+
+    def _draw_particles(self, frame, scale=1.0):
+        """Draw particles based on particle type; `scale` maps simulation pixels to frame pixels (previews)"""
         if self.particle_type == ParticleType.SNOW:
-            return self._draw_snow_particles(frame)
+            return self._draw_snow_particles(frame, scale)
         else:
-            return self._draw_standard_particles(frame)
-
-    def _draw_snow_particles(self, frame):
+            return self._draw_standard_particles(frame, scale)
+
+    def _visible_particles(self, frame, scale):
+        """Pixel centers and radii of the particles inside the frame, and the mask selecting them"""
+        height, width = frame.shape[:2]
+        p = self.particles
+        # int() truncation toward zero, as cv2 gets Python ints
+        x = (p['x'] * scale).astype(np.int64)
+        y = (p['y'] * scale).astype(np.int64)
+        visible = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+        size = (p['size'][visible] * scale).astype(np.int64)
+        return x[visible], y[visible], size, visible
+
+    def _rasterizer(self, frame) -> DiscRasterizer:
+        """Disc rasterizer for this frame size and the configured blend mode and glow"""
+        height, width = frame.shape[:2]
+        raster = self._raster
+        if (raster is None or (raster.width, raster.height) != (width, height) or raster.blend != self.config.blend
+                or raster.glow != float(self.config.glow)):
+            raster = self._raster = DiscRasterizer(width, height, self.config.blend, glow=self.config.glow)
+        return raster
+
+    def _draw_snow_particles(self, frame, scale=1.0):
         """Draw snowflake particles"""
-        for particle in self.particles:
-            x, y = int(particle['x']), int(particle['y'])
-            if 0 <= x < self.W and 0 <= y < self.H:
-                size = int(particle['size'])
-                final_brightness = particle['brightness'] * particle['life']
-                brightness = int(255 * final_brightness)
-                cv2.circle(frame, (x, y), size, (brightness, brightness, brightness), -1)
-        return frame
+        x, y, size, visible = self._visible_particles(frame, scale)
+        p = self.particles
+        gray = (255 * (p['brightness'][visible] * p['life'][visible])).astype(np.int64)
+        return self._rasterizer(frame).draw(frame, x, y, size, np.repeat(gray[:, None], 3, axis=1))
 
-    def _draw_standard_particles(self, frame):
+    def _draw_standard_particles(self, frame, scale=1.0):
         """Draw standard particles with colors"""
-        for particle in self.particles:
-            x, y = int(particle['x']), int(particle['y'])
-            if 0 <= x < self.W and 0 <= y < self.H:
-                size = int(particle['size'])
-                brightness = particle['brightness']
-                
-                # Apply brightness to color
-                color = particle.get('color', (255, 255, 255))
-                if isinstance(color, (list, tuple)) and len(color) >= 3:
-                    b, g, r = color[0], color[1], color[2]
-                    final_color = (
-                        int(b * brightness),
-                        int(g * brightness), 
-                        int(r * brightness)
-                    )
-                else:
-                    gray = int(255 * brightness)
-                    final_color = (gray, gray, gray)
-                
-                cv2.circle(frame, (x, y), size, final_color, -1)
-        return frame
-
-    def _draw_bass_indicator(self, frame, frame_idx):
-        """Draw bass level indicator on screen"""
+        x, y, size, visible = self._visible_particles(frame, scale)
+        p = self.particles
+        # Apply brightness to color
+        colors = (self.palette[p['color'][visible]] * p['brightness'][visible, None]).astype(np.int64)
+        return self._rasterizer(frame).draw(frame, x, y, size, colors)
+
+    def _draw_bass_indicator(self, frame, frame_idx, scale=1.0):
+        """Draw bass level indicator on screen, sized by `scale` like the particles"""
         raw_bass_level = self._get_bass_level_at_frame(frame_idx)
         enhanced_bass_level = self._apply_enhanced_mode(raw_bass_level)
+        W = frame.shape[1]
+
+        def px(length):
+            return int(round(length * scale))
+
+        def stroke(thickness):
+            return max(1, px(thickness))
         
         # Draw bass level bar
-        bar_width = 400
-        bar_height = 20
-        bar_x = (self.W - bar_width) // 2
-        bar_y = 50
+        bar_width = px(400)
+        bar_height = px(20)
+        bar_x = (W - bar_width) // 2
+        bar_y = px(50)
         
         cv2.rectangle(frame, (bar_x, bar_y), (bar_x + bar_width, bar_y + bar_height), (50, 50, 50), -1)
         
@@ -762,117 +739,132 @@ class UnifiedParticleSystem:
         
         # Add text
         font = cv2.FONT_HERSHEY_SIMPLEX
-        text_size = cv2.getTextSize(text, font, 0.6, 2)[0]
-        text_x = (self.W - text_size[0]) // 2
-        text_y = bar_y + bar_height + 30
-        cv2.putText(frame, text, (text_x, text_y), font, 0.6, color, 2)
+        text_size = cv2.getTextSize(text, font, 0.6 * scale, stroke(2))[0]
+        text_x = (W - text_size[0]) // 2
+        text_y = bar_y + bar_height + px(30)
+        cv2.putText(frame, text, (text_x, text_y), font, 0.6 * scale, color, stroke(2))
         
         # Add enhanced mode indicator
         if self.enhanced_mode.get("active", False) and raw_bass_level >= self.enhanced_mode.get("threshold", 0.3):
             enhanced_text = f"ENHANCED! (x{self.enhanced_mode.get('factor', 2.0)})"
-            enhanced_text_size = cv2.getTextSize(enhanced_text, font, 0.5, 2)[0]
-            enhanced_text_x = (self.W - enhanced_text_size[0]) // 2
-            enhanced_text_y = text_y + 25
-            cv2.putText(frame, enhanced_text, (enhanced_text_x, enhanced_text_y), font, 0.5, (0, 255, 255), 2)
+            enhanced_text_size = cv2.getTextSize(enhanced_text, font, 0.5 * scale, stroke(2))[0]
+            enhanced_text_x = (W - enhanced_text_size[0]) // 2
+            enhanced_text_y = text_y + px(25)
+            cv2.putText(frame, enhanced_text, (enhanced_text_x, enhanced_text_y), font, 0.5 * scale, (0, 255, 255), stroke(2))
         
         # Add particle count info
         particle_text = f"Particles: {len(self.particles)} | Type: {self.particle_type.value}"
-        particle_text_size = cv2.getTextSize(particle_text, font, 0.4, 1)[0]
-        particle_text_x = (self.W - particle_text_size[0]) // 2
-        particle_text_y = text_y + 50
-        cv2.putText(frame, particle_text, (particle_text_x, particle_text_y), font, 0.4, (255, 255, 255), 1)
+        particle_text_size = cv2.getTextSize(particle_text, font, 0.4 * scale, stroke(1))[0]
+        particle_text_x = (W - particle_text_size[0]) // 2
+        particle_text_y = text_y + px(50)
+        cv2.putText(frame, particle_text, (particle_text_x, particle_text_y), font, 0.4 * scale, (255, 255, 255), stroke(1))
         
         return frame
 
-    def render_particles(self, output_path: str, audio_path: Optional[str] = None):
-        """Render particles video with optional audio"""
-        start_time = time.time()
-        print(f"🚀 Starting {self.particle_type.value} particles render...")
+    def render_particles(self, output_path: str, audio_path: Optional[str] = None, preview: Optional[PreviewSettings] = None,
+                         metrics: Optional[RenderMetrics] = None, workers: Optional[int] = None):
+        """
+        Render particles video with optional audio.
+        Stage timings, progress and memory go to `metrics` (a RenderMetrics, created if omitted).
+
+        Final renders are split into frame ranges rendered in parallel processes when there
+        are enough frames (see parallel_render.render_workers); workers=1 forces a serial
+        render. The simulation is deterministic (one seeded random stream per frame), so the
+        parent simulates once without drawing, keeping a snapshot every CHECKPOINT_FRAMES
+        frames, and each worker resumes from the last snapshot before its range. Serial and
+        split renders draw identical frames.
+
+        With `preview`, only a window of the timeline is written, at preview size
+        and rate. The simulation still steps every final frame from the start
+        (particles move in final pixels per final frame), and the preview draws
+        the frames at its own instants scaled down, so it shows the motion the
+        final render will have.
+        """
+        print(f"🚀 Starting {self.particle_type.value} particles {'preview' if preview else 'render'}...")
+        metrics = metrics or RenderMetrics(kind="particles")
         
         # Load audio if provided
         if audio_path and os.path.exists(audio_path):
-            self.load_audio(audio_path)
+            self.load_audio(audio_path, metrics)
         else:
             print("⚠️ No audio file provided, using default movement")
         
         # Calculate total frames
         total_frames = int(self.duration * self.fps)
-        frame_times = np.arange(total_frames, dtype=np.float32) / self.fps
-        
-        # Video writer
-        tmp_out = output_path + ".temp.mp4"
-        self._ensure_dir(os.path.dirname(output_path))
-        writer = cv2.VideoWriter(tmp_out, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, (self.W, self.H))
-        if not writer.isOpened():
-            raise RuntimeError("Failed to open video writer")
-        
-        # Main rendering loop
-        for i in range(total_frames):
-            t = frame_times[i]
-            
-            # Start with black frame
-            frame = self.black_frame.copy()
+
+        if preview is None:
+            width, height, fps, scale = self.W, self.H, self.fps, 1.0
+            shown = np.arange(total_frames)
+            sink_options = {}
+        else:
+            width, height = preview.size(self.W, self.H)
+            fps, scale = preview.rate(self.fps), preview.scale(self.H)
+            first, stop = preview.frame_window(total_frames, self.fps)
+            if stop <= first:
+                raise ValueError(f"Preview window starts after the end of the render ({self.duration:.1f}s)")
+            shown = preview.source_frames(stop, self.fps, total_frames)[first:]
+            sink_options = dict(preview.sink_options(), audio_offset=first / fps)
+            print(f"🔎 Preview: {len(shown)} frames at {width}x{height}@{fps}")
+        # Simulation frame drawn as each output frame
+        arrays = {"frames": np.asarray(shown, dtype=np.int64)}
+        render_chunk = functools.partial(self._render_range, width=width, height=height, scale=scale)
+
+        # Every render simulates from the first frame, whatever ran on this system before
+        self.reset()
+
+        # Single ffmpeg pass per range: H.264 video + AAC audio (cut to the shorter of the two).
+        # Previews are short windows with an audio offset: always one pass
+        metrics.start_frames(len(shown), fps)
+        workers = 1 if preview is not None else render_workers(len(shown), workers)
+        if workers > 1:
+            with metrics.stage("simulate"):
+                arrays.update(self.record_checkpoints(int(shown[-1]) + 1))
+            stats = render_parallel(render_chunk, arrays, len(shown), output_path, width, height, fps,
+                                    audio_path=audio_path, workers=workers, shortest=True, metrics=metrics)[-1]
+        else:
+            with FrameSink(output_path, width, height, fps, audio_path=audio_path, shortest=True, metrics=metrics,
+                           **sink_options) as writer:
+                stats = render_chunk(arrays, 0, len(shown), writer)
+        
+        metrics.info["particles"] = stats["particles"]
+        metrics.finish()
+        print(f"✅ Done: {output_path} | {metrics.summary()}")
+
+    def _render_range(self, arrays: Dict[str, np.ndarray], start: int, stop: int, writer: FrameSink,
+                      width: int, height: int, scale: float = 1.0) -> Dict[str, int]:
+        """
+        Write output frames [start, stop), output frame j showing simulation frame arrays["frames"][j].
+        Resumes from the checkpoints in `arrays`, if any; stages are timed on writer.metrics.
+        """
+        metrics = writer.metrics or RenderMetrics()
+        frames = arrays["frames"]
+        if start >= stop:
+            return {"particles": len(self.particles)}
+        canvas = self.black_frame if (height, width) == self.black_frame.shape[:2] else np.zeros(
+            (height, width, 3), dtype=np.uint8)
+        with metrics.stage("simulate"):
+            self.seek(int(frames[start]), arrays)
+        
+        for j in range(start, stop):
+            i = int(frames[j])
             
             # Update particles
-            self._update_particles(t, i)
-            
-            # Draw particles
-            frame = self._draw_particles(frame)
+            with metrics.stage("simulate"):
+                self.advance(i + 1)
             
-            # Draw bass level indicator
-            frame = self._draw_bass_indicator(frame, i)
+            with metrics.stage("draw"):
+                # Start with black frame
+                frame = canvas.copy()
+                
+                # Draw particles
+                frame = self._draw_particles(frame, scale)
+                
+                # Draw bass level indicator
+                frame = self._draw_bass_indicator(frame, i, scale)
             
             # Write frame
             writer.write(frame)
-            
-            # Progress reporting
-            if total_frames > 0 and i % max(1, total_frames // 10) == 0:
-                elapsed = time.time() - start_time
-                fps_actual = (i + 1) / elapsed if elapsed > 0 else 0
-                print(f"Progress: {int(100 * i / total_frames)}% | Elapsed: {elapsed:.1f}s | FPS: {fps_actual:.1f} | Particles: {len(self.particles)}")
-
-        writer.release()
-
-        # Finalize
-        if os.path.exists(output_path):
-            os.remove(output_path)
-        os.rename(tmp_out, output_path)
-        
-        # Audio muxing
-        if audio_path and os.path.exists(audio_path):
-            self._mux_audio(output_path, audio_path)
-        
-        total_time = time.time() - start_time
-        print(f"✅ Done: {output_path} ({total_time:.1f}s)")
-
-    def _mux_audio(self, video_path: str, audio_path: str):
-        """Mux audio into video using ffmpeg"""
-        if not audio_path or not os.path.exists(audio_path):
-            return
-            
-        temp_out = video_path + ".with_audio.mp4"
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", video_path,
-            "-i", audio_path,
-            "-c:v", "copy",
-            "-c:a", "aac", "-b:a", "320k",
-            "-map", "0:v:0", "-map", "1:a:0",
-            "-shortest",
-            temp_out
-        ]
-        try:
-            proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            if proc.returncode == 0 and os.path.exists(temp_out) and os.path.getsize(temp_out) > 0:
-                os.remove(video_path)
-                shutil.move(temp_out, video_path)
-                print("🔊 Audio muxed into video.")
-            else:
-                if os.path.exists(temp_out):
-                    os.remove(temp_out)
-                print("⚠️ ffmpeg failed; leaving video without audio.")
-        except Exception as e:
-            print(f"⚠️ ffmpeg error: {e}. Leaving video without audio.")
+        return {"particles": len(self.particles)}
 
     @staticmethod
     def _ensure_dir(d):
@@ -892,9 +884,13 @@ class UnifiedParticleSystem:
                 "fps": self.fps,
                 "duration": self.duration,
                 "bass_threshold": self.bass_threshold,
-                "enhanced_mode": self.enhanced_mode
+                "enhanced_mode": self.enhanced_mode,
+                "blend": self.config.blend,
+                "glow": self.config.glow,
+                "seed": self.seed,
+                "interaction": self.config.interaction
             },
-            "audio_loaded": self.audio_data is not None
+            "audio_loaded": self.bass_frequencies is not None
         }
 
     def update_config(self, new_config: Dict[str, Any]):
@@ -917,12 +913,13 @@ class UnifiedParticleSystem:
                     self.bass_threshold = float(value)
                 elif key == 'enhanced_mode':
                     self.enhanced_mode = value
+                elif key == 'seed':
+                    self.seed = int(value)
 
     def change_particle_type(self, new_type: ParticleType):
         """Change particle type and reinitialize"""
         self.particle_type = new_type
-        self.particles = self._init_particles()
-        self.spawn_accumulator = 0.0
+        self.reset()
 
     def get_available_particle_types(self) -> List[str]:
         """Get list of available particle types"""
@@ -0,0 +1,74 @@
+"""
+Low-resolution proxy previews for the generators.
+
+A preview renders one window of the final timeline at a fraction of the
+resolution and frame rate (480p@15 by default) with a fast x264 preset, so
+settings can be iterated on without paying for a full render. It is a
+proxy of the final output, not a separate render:
+- pixel geometry (bar thickness, dot and particle sizes, overlay sizes) is
+  scaled by the same factor as the frame, and percentage-based positions
+  are unchanged, so the composition matches;
+- audio features are computed once at the final frame rate (and shared
+  through feature_cache), and each preview frame reads the feature row of
+  the final frame at the same instant (source_frames);
+- the audio track is cut to the window.
+
+    preview = PreviewSettings(start=30.0, duration=20.0)
+    visualizer.render(audio_path, output_path, config, preview=preview)
+"""
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+PREVIEW_HEIGHT = int(os.getenv("RENDER_PREVIEW_HEIGHT", "480"))
+PREVIEW_FPS = int(os.getenv("RENDER_PREVIEW_FPS", "15"))
+PREVIEW_DURATION = float(os.getenv("RENDER_PREVIEW_DURATION", "20"))
+PREVIEW_X264_PRESET = os.getenv("RENDER_PREVIEW_X264_PRESET", "ultrafast")
+PREVIEW_X264_CRF = int(os.getenv("RENDER_PREVIEW_X264_CRF", "28"))
+
+
+@dataclass
+class PreviewSettings:
+    start: float = 0.0                   # window start on the final timeline, seconds
+    duration: float = PREVIEW_DURATION   # window length, seconds
+    height: int = PREVIEW_HEIGHT         # output height; width keeps the final aspect ratio
+    fps: int = PREVIEW_FPS
+    preset: str = PREVIEW_X264_PRESET    # libx264 speed/quality of the proxy
+    crf: int = PREVIEW_X264_CRF
+
+    def scale(self, height: int) -> float:
+        """Factor from final to preview pixels (previews never upscale)"""
+        return min(1.0, self.height / height) if height > 0 else 1.0
+
+    def size(self, width: int, height: int) -> Tuple[int, int]:
+        """Preview frame size: the final size scaled down, rounded to even numbers for yuv420p"""
+        scale = self.scale(height)
+        return max(2, int(round(width * scale / 2)) * 2), max(2, int(round(height * scale / 2)) * 2)
+
+    def rate(self, final_fps: float) -> int:
+        """Preview frame rate (never above the final rate)"""
+        return max(1, int(min(self.fps, final_fps)))
+
+    def frame_window(self, final_frames: int, final_fps: float) -> Tuple[int, int]:
+        """Preview frames [start, stop) of the window, clamped to the final timeline"""
+        fps = self.rate(final_fps)
+        end = min(final_frames / final_fps, max(0.0, self.start) + max(0.0, self.duration))
+        start = min(int(round(max(0.0, self.start) * fps)), int(end * fps))
+        return start, int(end * fps)
+
+    def source_frames(self, stop: int, final_fps: float, final_frames: int) -> np.ndarray:
+        """For preview frames [0, stop): the index of the final frame shown at the same instant"""
+        fps = self.rate(final_fps)
+        # Small epsilon so instants that land exactly on a final frame are not truncated to the one before
+        index = np.floor(np.arange(stop, dtype=np.float64) * (final_fps / fps) + 1e-6).astype(np.int64)
+        return np.minimum(index, max(0, final_frames - 1))
+
+    def sink_options(self) -> Dict[str, Any]:
+        return {"preset": self.preset, "crf": self.crf}
+
+
+def scale_length(value: float, scale: float) -> int:
+    """A pixel length scaled to the preview, kept at least one pixel"""
+    return max(1, int(round(value * scale)))
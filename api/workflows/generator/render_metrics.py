@@ -0,0 +1,169 @@
+"""
+Per-stage render instrumentation for the generators.
+
+A RenderMetrics object follows one render: it accumulates wall time per
+stage (audio decode, feature extraction, background decode, simulation,
+draw, encode, mux), counts finished frames, samples resident memory, and
+turns all of it into one structured record at the end. The FrameSink a
+render writes to carries the metrics (sink.metrics), which gives encode time
+and frame progress for free and lets the render loops time their own
+stages, in worker processes too:
+
+    metrics = RenderMetrics(job_id, "visualizer", on_progress=lambda done, total: ...)
+    visualizer.render(audio_path, output_path, config, metrics=metrics)
+    record = metrics.record()
+
+Time spent blocked in sink.write() counts as encode (ffmpeg is behind the
+render loop); when the audio is muxed in the encoding pass, mux stays at 0.
+In a parallel render the stage times are summed over worker processes, so
+they can add up to more than the wall time.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+PROGRESS_INTERVAL = float(os.getenv("RENDER_PROGRESS_INTERVAL", "0.5"))  # seconds between progress callbacks
+
+# Stages in report order; renderers may add their own
+STAGES = ("audio_decode", "features", "background_decode", "simulate", "draw", "encode", "mux")
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far"""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, KiB elsewhere
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process now (falls back to the peak where /proc is missing)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+class RenderMetrics:
+    """Stage timings, frame progress and peak memory of one render"""
+
+    def __init__(self, job_id: Optional[str] = None, kind: str = "render",
+                 on_progress: Optional[ProgressCallback] = None, counter: Optional[np.ndarray] = None):
+        """
+        Args:
+            job_id, kind: Identify the render in the record ('visualizer', 'particles', ...)
+            on_progress: Called with (frames_done, total_frames), at most every RENDER_PROGRESS_INTERVAL seconds
+            counter: One-element shared-memory array a worker process publishes its frame count to
+        """
+        self.job_id = job_id
+        self.kind = kind
+        self.on_progress = on_progress
+        self.stages: Dict[str, float] = {}
+        self.frames = 0
+        self.total_frames = 0
+        self.fps = 0.0
+        self.workers = 1
+        self.worker_peak_rss = 0
+        self.info: Dict[str, Any] = {}
+        self._counter = counter
+        self._created_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        self._finished: Optional[float] = None
+        self._last_report = 0.0
+        self._peak_rss = current_rss_bytes()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def start_frames(self, total_frames: int, fps: float) -> None:
+        """Frames this render will write, at what rate"""
+        self.total_frames, self.fps = int(total_frames), float(fps)
+        self._report(force=True)
+
+    def frame_done(self, count: int = 1) -> None:
+        self.frames += count
+        if self._counter is not None:
+            self._counter[0] = self.frames
+        self._report()
+
+    def set_frames(self, frames: int) -> None:
+        """Frame count gathered from worker processes"""
+        self.frames = int(frames)
+        self._report()
+
+    def merge(self, stages: Dict[str, float], peak_rss: int = 0) -> None:
+        """Fold in the stage times of a worker process"""
+        for name, seconds in stages.items():
+            self.add(name, seconds)
+        self.worker_peak_rss = max(self.worker_peak_rss, int(peak_rss))
+
+    def finish(self) -> "RenderMetrics":
+        if self._finished is None:
+            self._finished = time.perf_counter()
+            self._report(force=True)
+        return self
+
+    @property
+    def wall_seconds(self) -> float:
+        return (self._finished or time.perf_counter()) - self._started
+
+    def record(self) -> Dict[str, Any]:
+        """Structured timing record of the render (JSON-ready)"""
+        self._peak_rss = max(self._peak_rss, current_rss_bytes())
+        wall = self.wall_seconds
+        order = {name: k for k, name in enumerate(STAGES)}
+        stages = sorted(self.stages.items(), key=lambda item: (order.get(item[0], len(order)), item[0]))
+        video_seconds = self.frames / self.fps if self.fps > 0 else 0.0
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "created_at": self._created_at.isoformat(),
+            "finished": self._finished is not None,
+            "wall_seconds": round(wall, 4),
+            "stages": {name: round(seconds, 4) for name, seconds in stages},
+            "frames": self.frames,
+            "total_frames": self.total_frames,
+            "render_fps": round(self.frames / wall, 2) if wall > 0 else 0.0,
+            "realtime_factor": round(video_seconds / wall, 3) if wall > 0 else 0.0,
+            "workers": self.workers,
+            "peak_rss_mb": round(self._peak_rss / 2 ** 20, 1),
+            "worker_peak_rss_mb": round(self.worker_peak_rss / 2 ** 20, 1),
+            **self.info,
+        }
+
+    def summary(self) -> str:
+        """One log line: wall time, throughput, memory and the stage split"""
+        record = self.record()
+        stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in record["stages"].items())
+        return (f"{record['frames']} frames in {record['wall_seconds']:.2f}s ({record['render_fps']:.1f} fps, "
+                f"{record['realtime_factor']:.2f}x realtime, peak RSS {record['peak_rss_mb']:.0f} MB) | {stages}")
+
+    def _report(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        if not force and now - self._last_report < PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        self._peak_rss = max(self._peak_rss, current_rss_bytes())
+        if self.on_progress is not None:
+            self.on_progress(self.frames, self.total_frames)
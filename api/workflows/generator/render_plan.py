@@ -0,0 +1,116 @@
+"""
+Per-frame bar values for the visualizers, computed before the draw loop.
+
+Fades, frame smoothing and enhanced mode only depend on the FFT series,
+which is known up front, so build_render_plan evaluates them for the whole
+track at once. It returns a RenderPlan holding (frames, bars) float32 bar
+values and the (frames,) fade curve. The draw loop then only indexes into
+the plan. The plan also travels as plain arrays (RenderPlan.arrays), which
+is what parallel_render copies into shared memory.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+@dataclass
+class RenderPlan:
+    values: np.ndarray   # (frames, bars) float32 final bar values in [0, 1]
+    opacity: np.ndarray  # (frames,) float32 fade curve; frames at 0 are not drawn
+
+    def visible(self, frame_idx: int) -> bool:
+        return self.opacity[frame_idx] > 0
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"values": self.values, "opacity": self.opacity}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "RenderPlan":
+        return cls(values=arrays["values"], opacity=arrays["opacity"])
+
+
+def fade_curve(total_frames: int, start: int, fadein: int, fadeout: int, delay_outro: int = 0) -> np.ndarray:
+    """
+    Opacity of every frame: 0 before `start`, linear fade-in over `fadein` frames,
+    1, then a linear fade-out over `fadeout` frames ending `delay_outro` frames early.
+    """
+    idx = np.arange(total_frames, dtype=np.float64)
+    end = total_frames - fadeout - delay_outro
+    opacity = np.ones(total_frames, dtype=np.float64)
+    # Later assignments take precedence, matching the frame-by-frame checks
+    if fadeout > 0:
+        opacity[idx >= end] = np.maximum(0.0, 1 - (idx[idx >= end] - end) / fadeout)
+    else:
+        opacity[idx >= end] = 0.0
+    if fadein > 0:
+        ramp = (idx >= start) & (idx < start + fadein)
+        opacity[ramp] = (idx[ramp] - start) / fadein
+    opacity[idx < start] = 0.0
+    return opacity.astype(np.float32)
+
+
+def smooth_frames(values: np.ndarray, smoothness_factor: float) -> np.ndarray:
+    """
+    Frame smoothing over consecutive rows (the visible frames), returned as float64.
+
+    Each frame moves towards its raw value by half the velocity-clamped step,
+    optionally blends with the mean of the last three outputs (smoothness >= 60%),
+    then passes through an EMA. The velocity clamp makes the filter non-linear,
+    so it cannot be expressed as lfilter coefficients; instead it runs once per
+    frame over all bars at once, ahead of the draw loop.
+    """
+    out = np.array(values, dtype=np.float64)
+    if smoothness_factor <= 0 or len(out) < 2:
+        return out
+
+    if smoothness_factor < 0.3:
+        max_velocity = 0.3
+        alpha = 0.5
+    else:
+        max_velocity = 0.1 + (0.2 * smoothness_factor)
+        alpha = 0.2 + (0.3 * smoothness_factor)
+    blend = (smoothness_factor - 0.6) / 0.4 if smoothness_factor > 0.6 else 0.0
+
+    step = np.empty(out.shape[1], dtype=np.float64)
+    for k in range(1, len(out)):
+        prev = out[k - 1]
+        np.subtract(out[k], prev, out=step)
+        np.clip(step, -max_velocity, max_velocity, out=step)
+        smoothed = prev + 0.5 * step
+        if blend and k > 1:
+            smoothed = (1 - blend) * smoothed + blend * out[max(0, k - 3):k].mean(axis=0)
+        out[k] = (1 - alpha) * prev + alpha * smoothed
+    return out
+
+
+def enhance_values(values: np.ndarray, enhanced_mode: Optional[Dict[str, Any]], height_range: int) -> np.ndarray:
+    """Enhanced mode: values whose height increase reaches the threshold are boosted by `factor` (80/20 blend)"""
+    if not enhanced_mode or not enhanced_mode.get("active", False):
+        return values
+    threshold = enhanced_mode.get("threshold", 0.3)
+    factor = enhanced_mode.get("factor", 2.0)
+    boosted = 0.8 * np.minimum(1.0, values * factor) + 0.2 * values
+    return np.where(values * height_range >= height_range * threshold, boosted, values).astype(values.dtype)
+
+
+def build_render_plan(fft_data: np.ndarray, bar_count: int, opacity: np.ndarray, smoothness_factor: float = 0.0,
+                      enhanced_mode: Optional[Dict[str, Any]] = None, height_range: int = 0) -> RenderPlan:
+    """
+    Args:
+        fft_data: (frames, segments) normalized band magnitudes
+        bar_count: Bars drawn per frame (segments are cut or zero-padded to it)
+        opacity: Fade curve from fade_curve(); also scales the bar values
+        smoothness_factor: 0-1; frame smoothing carries state across visible frames only
+        enhanced_mode, height_range: Optional enhanced-mode boost (see enhance_values)
+    """
+    total_frames = len(opacity)
+    values = np.zeros((total_frames, bar_count), dtype=np.float32)
+    n = min(bar_count, fft_data.shape[1])
+    values[:, :n] = fft_data[:total_frames, :n] * opacity[:, None]
+
+    visible = np.flatnonzero(opacity > 0)
+    if smoothness_factor > 0 and len(visible):
+        values[visible] = smooth_frames(values[visible], smoothness_factor)
+    values = enhance_values(values, enhanced_mode, height_range)
+    return RenderPlan(values=values, opacity=np.asarray(opacity, dtype=np.float32))
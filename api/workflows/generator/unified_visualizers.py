@@ -1,22 +1,39 @@
+import copy
+import functools
 import os
+import sys
+import time
 import cv2
-import torch
 import numpy as np
-import librosa
-import subprocess
-import shutil
+from numpy.lib.stride_tricks import sliding_window_view
 from pydub import AudioSegment
-try:
-    from moviepy.editor import VideoFileClip, AudioFileClip
-except ImportError:
-    try:
-        from moviepy import VideoFileClip, AudioFileClip
-    except ImportError:
-        VideoFileClip = None
-        AudioFileClip = None
+from scipy.signal import lfilter
 from typing import Dict, List, Optional, Tuple, Any
 from enum import Enum
 
+try:
+    from api.workflows.generator.background_source import BackgroundSource
+    from api.workflows.generator.feature_cache import feature_cache
+    from api.workflows.generator.frame_sink import FrameSink
+    from api.workflows.generator.parallel_render import render_parallel, render_workers
+    from api.workflows.generator.preview import PreviewSettings, scale_length
+    from api.workflows.generator.rasterizer import linear_bars, linear_dots
+    from api.workflows.generator.render_metrics import RenderMetrics
+    from api.workflows.generator.render_plan import RenderPlan, build_render_plan, fade_curve
+except ImportError:  # run as a script from the generator directories
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from background_source import BackgroundSource
+    from feature_cache import feature_cache
+    from frame_sink import FrameSink
+    from parallel_render import render_parallel, render_workers
+    from preview import PreviewSettings, scale_length
+    from rasterizer import linear_bars, linear_dots
+    from render_metrics import RenderMetrics
+    from render_plan import RenderPlan, build_render_plan, fade_curve
+
+# pydub sample width (bytes) -> PCM dtype of AudioSegment.raw_data
+SAMPLE_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
 class VisualizerType(Enum):
     LINEAR_BARS = "linear_bars"
     LINEAR_DOTS = "linear_dots"
@@ -24,6 +41,9 @@ class VisualizerType(Enum):
     BASS_CIRCLE = "bass_circle"
     TRAP_NATION = "trap_nation"
 
+# Layouts whose bar heights go through enhanced mode
+ENHANCED_TYPES = (VisualizerType.LINEAR_BARS, VisualizerType.LINEAR_DOTS, VisualizerType.WAVEFORM)
+
 class VisualizerConfig:
     def __init__(self, 
                  visualizer_type: VisualizerType,
@@ -110,88 +130,155 @@ class AudioVisualizerBase:
         self.fade_params = {}
         self.visualizer_fps = 30
         self.time_in = 0.0
+        self.sink_options = {}
 
-    def render(self, audio_path: str, output_path: str, config: VisualizerConfig, video_path: Optional[str] = None) -> str:
-        self.logger.log(f"Starting render for {audio_path}")
+    def render(self, audio_path: str, output_path: str, config: VisualizerConfig, video_path: Optional[str] = None, workers: Optional[int] = None, preview: Optional[PreviewSettings] = None, metrics: Optional[RenderMetrics] = None) -> str:
+        self.logger.log(f"Starting {'preview' if preview else 'render'} for {audio_path}")
+        metrics = metrics or RenderMetrics(kind="visualizer")
         self.visualizer_fps = config.fps
         self.time_in = config.time_in
 
-        vis_width = int(config.width * config.width_percent / 100)
-        vis_height = int(config.height * config.height_percent / 100)
-        
-        vis_x = int(config.width * config.x_position / 100) - vis_width // 2
-        vis_y = int(config.height * config.y_position / 100) - vis_height // 2
-        
-        vis_x = max(0, min(vis_x, config.width - vis_width))
-        vis_y = max(0, min(vis_y, config.height - vis_height))
-
-        if config.bar_count is None:
-            config.bar_count = config.n_segments
-        if config.bar_thickness is None:
-            config.bar_thickness = max(1, int(vis_width / config.bar_count / 2))
-        
-        if config.dot_size is None:
-            config.dot_size = max(1, config.bar_thickness)
+        vis_width, vis_height, vis_x, vis_y = self._layout(config)
+        self.resolve_config(config)
         
         smoothness_factor = config.smoothness / 100.0
 
-        y_sr, fft_data, duration, total_frames, _ = self._prepare_fft_data(
-            audio_path, config.fps, config.n_segments, config.duration_intro,
-            config.fadein, config.fadeout, config.delay_outro, smoothness_factor
+        fft_data, total_frames = self._audio_features(audio_path, config, smoothness_factor, metrics)
+
+        # Everything stateful across frames is precomputed, so any frame range renders independently
+        with metrics.stage("features"):
+            plan = self._build_render_plan(fft_data, config, smoothness_factor, total_frames)
+        if preview is not None:
+            return self._render_preview(plan, audio_path, output_path, config, video_path, preview, metrics)
+
+        render_chunk = functools.partial(
+            self._render_range, config=config, video_path=video_path,
+            layout=(vis_width, vis_height, vis_x, vis_y)
         )
 
-        bg_video = self._load_background(video_path, duration, config.width, config.height)
-        writer, temp_path = self._init_writer(output_path, config.fps, config.width, config.height)
-
-        smoothing_buffer = None
-        previous_values = None
-        velocity_buffer = None
-        moving_average_buffer = None
-
-        for i in range(total_frames):
-            frame = self._create_background_frame(bg_video, i / config.fps, config.width, config.height)
-            opacity = self._calculate_opacity(i)
-
-            if opacity > 0:
-                values = fft_data[i].detach().cpu().numpy() * opacity
-                if config.bar_count < len(values):
-                    values = values[:config.bar_count]
-                elif config.bar_count > len(values):
-                    padded_values = np.zeros(config.bar_count)
-                    padded_values[:len(values)] = values
-                    values = padded_values
-                
-                if smoothness_factor > 0:
-                    values = self._apply_frame_smoothing(values, smoothness_factor, smoothing_buffer, previous_values, velocity_buffer, moving_average_buffer, i)
-                    if smoothing_buffer is None:
-                        smoothing_buffer = values.copy()
-                        previous_values = values.copy()
-                        velocity_buffer = np.zeros_like(values)
-                        moving_average_buffer = [values.copy()]
-                    else:
-                        smoothing_buffer = values.copy()
-                        previous_values = values.copy()
-                        if len(moving_average_buffer) >= 3:
-                            moving_average_buffer.pop(0)
-                        moving_average_buffer.append(values.copy())
-                
-                frame = self._draw_frame(frame, values, i, config, vis_width, vis_height, vis_x, vis_y)
+        metrics.start_frames(total_frames, config.fps)
+        workers = render_workers(total_frames, workers)
+        if workers > 1:
+            self.logger.log(f"Rendering {total_frames} frames in {workers} processes")
+            render_parallel(render_chunk, plan.arrays(), total_frames, output_path, config.width, config.height, config.fps,
+                            audio_path=audio_path, workers=workers, sink_options=self.sink_options, log=self.logger.log,
+                            metrics=metrics)
+        else:
+            with self._init_writer(output_path, config.fps, config.width, config.height, audio_path, metrics) as writer:
+                render_chunk(plan.arrays(), 0, total_frames, writer)
 
-            writer.write(frame)
+        metrics.finish()
+        self.logger.log(f"✅ Render complete: {output_path} | {metrics.summary()}")
+        return output_path
 
-            if i % (total_frames // 10 or 1) == 0:
-                self.logger.log(f"Progress: {100 * i // total_frames}%")
+    @classmethod
+    def resolve_config(cls, config: VisualizerConfig) -> VisualizerConfig:
+        """Fill in the sizes left to defaults (bar count, bar thickness, dot size), in place"""
+        if config.bar_count is None:
+            config.bar_count = config.n_segments
+        if config.bar_thickness is None:
+            config.bar_thickness = max(1, int(cls._layout(config)[0] / config.bar_count / 2))
+        if config.dot_size is None:
+            config.dot_size = max(1, config.bar_thickness)
+        return config
 
-        writer.release()
-        self._finalize_output(temp_path, output_path)
-        self._add_audio(output_path, audio_path)
+    @staticmethod
+    def _layout(config: VisualizerConfig) -> Tuple[int, int, int, int]:
+        """Visualizer box (width, height, x, y) in frame pixels"""
+        vis_width = int(config.width * config.width_percent / 100)
+        vis_height = int(config.height * config.height_percent / 100)
 
-        if bg_video:
-            bg_video.close()
+        vis_x = int(config.width * config.x_position / 100) - vis_width // 2
+        vis_y = int(config.height * config.y_position / 100) - vis_height // 2
 
-        self.logger.log(f"✅ Render complete: {output_path}")
+        vis_x = max(0, min(vis_x, config.width - vis_width))
+        vis_y = max(0, min(vis_y, config.height - vis_height))
+        return vis_width, vis_height, vis_x, vis_y
+
+    def _audio_features(self, audio_path: str, config: VisualizerConfig, smoothness_factor: float, metrics: Optional[RenderMetrics] = None) -> Tuple[np.ndarray, int]:
+        """Band magnitudes at the final frame rate, shared by every preview and final render of the same audio"""
+        metrics = metrics or RenderMetrics()
+        metrics.info["features_cached"] = True
+
+        def compute() -> Dict[str, np.ndarray]:
+            metrics.info["features_cached"] = False
+            _, fft_data, _, _, _ = self._prepare_fft_data(
+                audio_path, config.fps, config.n_segments, config.duration_intro, smoothness_factor=smoothness_factor,
+                metrics=metrics
+            )
+            return {"fft": fft_data}
+
+        params = ("bands", config.fps, config.n_segments, config.duration_intro, smoothness_factor)
+        fft_data = feature_cache.get_or_compute(audio_path, params, compute)["fft"]
+        total_frames = len(fft_data)
+        self.fade_params = self._fade_frames(config.fps, config.fadein, config.fadeout, config.delay_outro, total_frames)
+        return fft_data, total_frames
+
+    def _render_preview(self, plan: RenderPlan, audio_path: str, output_path: str, config: VisualizerConfig, video_path: Optional[str], preview: PreviewSettings, metrics: RenderMetrics) -> str:
+        """Draw a window of the final timeline at preview size and rate, sampling the final render plan"""
+        total_frames = len(plan.opacity)
+        fps = preview.rate(config.fps)
+        start, stop = preview.frame_window(total_frames, config.fps)
+        if stop <= start:
+            raise ValueError(f"Preview window starts after the end of the track ({total_frames / config.fps:.1f}s)")
+
+        # Preview frame j shows the plan row of the final frame at the same instant
+        source = preview.source_frames(stop, config.fps, total_frames)
+        preview_plan = RenderPlan(values=plan.values[source], opacity=plan.opacity[source])
+        preview_config = self._preview_config(config, preview)
+        self.logger.log(f"Preview: frames {start}-{stop} at {preview_config.width}x{preview_config.height}@{fps}")
+
+        metrics.start_frames(stop - start, fps)
+        with FrameSink(output_path, preview_config.width, preview_config.height, fps, audio_path=audio_path,
+                       shortest=True, audio_offset=start / fps, metrics=metrics, **preview.sink_options()) as writer:
+            self._render_range(preview_plan.arrays(), start, stop, writer, config=preview_config,
+                               video_path=video_path, layout=self._layout(preview_config))
+
+        metrics.finish()
+        self.logger.log(f"✅ Preview complete: {output_path} | {metrics.summary()}")
         return output_path
 
+    @staticmethod
+    def _preview_config(config: VisualizerConfig, preview: PreviewSettings) -> VisualizerConfig:
+        """The final config at preview size and rate; pixel lengths scale with the frame, percentages stay"""
+        scale = preview.scale(config.height)
+        scaled = copy.copy(config)
+        scaled.width, scaled.height = preview.size(config.width, config.height)
+        scaled.fps = preview.rate(config.fps)
+        scaled.bar_thickness = scale_length(config.bar_thickness, scale)
+        scaled.dot_size = scale_length(config.dot_size, scale)
+        return scaled
+
+    def _build_render_plan(self, fft_data: np.ndarray, config: VisualizerConfig, smoothness_factor: float, total_frames: int) -> RenderPlan:
+        """Fades, frame smoothing and enhanced mode for every frame, before anything is drawn"""
+        opacity = fade_curve(
+            total_frames, int(self.time_in * self.visualizer_fps), self.fade_params["fadein_frames"],
+            self.fade_params["fadeout_frames"], self.fade_params["delay_outro_frames"]
+        )
+        enhanced_mode = config.enhanced_mode if config.visualizer_type in ENHANCED_TYPES else None
+        height_range = int(config.height * config.bar_height_max / 100) - int(config.height * config.bar_height_min / 100)
+        return build_render_plan(fft_data, config.bar_count, opacity, smoothness_factor, enhanced_mode, height_range)
+
+    def _render_range(self, arrays: Dict[str, np.ndarray], start: int, stop: int, writer: FrameSink, config: VisualizerConfig, video_path: Optional[str], layout: Tuple[int, int, int, int]) -> None:
+        """Draw and write frames [start, stop) from the render plan (stages timed on writer.metrics)"""
+        vis_width, vis_height, vis_x, vis_y = layout
+        plan = RenderPlan.from_arrays(arrays)
+        metrics = writer.metrics or RenderMetrics()
+        with metrics.stage("background_decode"):
+            bg_video = self._load_background(video_path, config.width, config.height, config.fps, start)
+        try:
+            for i in range(start, stop):
+                with metrics.stage("background_decode"):
+                    frame = self._create_background_frame(bg_video, i, config.width, config.height)
+                if plan.visible(i):
+                    with metrics.stage("draw"):
+                        frame = self._draw_frame(frame, plan.values[i], i, config, vis_width, vis_height, vis_x, vis_y)
+
+                writer.write(frame)
+        finally:
+            if bg_video:
+                bg_video.close()
+
     def _draw_frame(self, frame: np.ndarray, values: np.ndarray, frame_idx: int, config: VisualizerConfig, vis_width: int, vis_height: int, vis_x: int, vis_y: int) -> np.ndarray:
         if config.visualizer_type == VisualizerType.LINEAR_BARS:
             return self._draw_linear_bars(frame, values, config)
@@ -207,141 +294,17 @@ class AudioVisualizerBase:
             return frame
 
     def _draw_linear_bars(self, frame: np.ndarray, values: np.ndarray, config: VisualizerConfig) -> np.ndarray:
-        values = self._apply_enhanced_mode(values, config)
-        
-        n_segments = len(values)
-        margin = max(10, config.width // 20)
-        usable_w = config.width - 2 * margin
-        center_y = int(config.height * config.y_position / 100)
-        min_bar_h = int(config.height * config.bar_height_min / 100)
-        max_bar_h = int(config.height * config.bar_height_max / 100)
-
-        if config.mirror_right:
-            bars_per_side = n_segments // 2
-            left_values = values[:bars_per_side]
-            right_values = values[:bars_per_side]
-        else:
-            bars_per_side = n_segments
-            left_values = values
-            right_values = []
-
-        if len(left_values) > 0:
-            left_width = usable_w // 2 if config.mirror_right else usable_w
-            start_x = int(config.width * config.x_position / 100) - left_width // 2
-            for j in range(len(left_values)):
-                amp = left_values[j]
-                x = start_x + int((j / (len(left_values) - 1)) * left_width) if len(left_values) > 1 else start_x + left_width // 2
-                bar_h = int(min_bar_h + amp * (max_bar_h - min_bar_h))
-                top = int(center_y - bar_h/2)
-                bottom = int(center_y + bar_h/2)
-                
-                if config.transparency:
-                    color_intensity = int(255 * amp)
-                else:
-                    color_intensity = 255
-                bar_color = (min(255, int(config.color[0] * (color_intensity + 50) / 255)), 
-                           min(255, int(config.color[1] * (color_intensity + 50) / 255)), 
-                           min(255, int(config.color[2] * (color_intensity + 50) / 255)))
-                cv2.line(frame, (x, top), (x, bottom), bar_color, config.bar_thickness)
-
-        if config.mirror_right and len(right_values) > 0:
-            right_width = usable_w // 2
-            right_start_x = int(config.width * config.x_position / 100) + right_width // 2
-            for j in range(len(right_values)):
-                mirror_j = len(right_values) - 1 - j
-                amp = right_values[mirror_j]
-                x = right_start_x + int((j / (len(right_values) - 1)) * right_width) if len(right_values) > 1 else right_start_x + right_width // 2
-                bar_h = int(min_bar_h + amp * (max_bar_h - min_bar_h))
-                top = int(center_y - bar_h/2)
-                bottom = int(center_y + bar_h/2)
-                
-                if config.transparency:
-                    color_intensity = int(255 * amp)
-                else:
-                    color_intensity = 255
-                bar_color = (min(255, int(config.color[0] * (color_intensity + 50) / 255)), 
-                           min(255, int(config.color[1] * (color_intensity + 50) / 255)), 
-                           min(255, int(config.color[2] * (color_intensity + 50) / 255)))
-                cv2.line(frame, (x, top), (x, bottom), bar_color, config.bar_thickness)
-        
-        return frame
+        raster = linear_bars(len(values), config.width, config.height, config.x_position, config.y_position,
+                             config.mirror_right, config.bar_height_min, config.bar_height_max, config.bar_thickness)
+        return raster.draw(frame, values, config.color, config.transparency)
 
     def _draw_linear_dots(self, frame: np.ndarray, values: np.ndarray, config: VisualizerConfig) -> np.ndarray:
-        values = self._apply_enhanced_mode(values, config)
-        
-        n_segments = len(values)
-        margin = max(10, config.width // 20)
-        usable_w = config.width - 2 * margin
-        center_y = int(config.height * config.y_position / 100)
-        min_dot_h = int(config.height * config.bar_height_min / 100)
-        max_dot_h = int(config.height * config.bar_height_max / 100)
-
-        if config.mirror_right:
-            dots_per_side = n_segments // 2
-            left_values = values[:dots_per_side]
-            right_values = values[:dots_per_side]
-        else:
-            dots_per_side = n_segments
-            left_values = values
-            right_values = []
-
-        if len(left_values) > 0:
-            left_width = usable_w // 2 if config.mirror_right else usable_w
-            if config.mirror_right:
-                center_x = int(config.width * config.x_position / 100)
-                start_x = center_x - left_width
-            else:
-                start_x = int(config.width * config.x_position / 100) - left_width // 2
-            for j in range(len(left_values)):
-                amp = left_values[j]
-                x = start_x + int((j / (len(left_values) - 1)) * left_width) if len(left_values) > 1 else start_x + left_width // 2
-                dot_h = int(min_dot_h + amp * (max_dot_h - min_dot_h))
-                top_y = int(center_y - dot_h/2)
-                bottom_y = int(center_y + dot_h/2)
-                
-                if config.transparency:
-                    color_intensity = int(255 * amp)
-                else:
-                    color_intensity = 255
-                dot_color = (min(255, int(config.color[0] * (color_intensity + 50) / 255)), 
-                           min(255, int(config.color[1] * (color_intensity + 50) / 255)), 
-                           min(255, int(config.color[2] * (color_intensity + 50) / 255)))
-                
-                if config.top_active:
-                    self._draw_high_quality_dot(frame, x, top_y, config.dot_size, dot_color, config.dot_filled)
-                if config.bottom_active:
-                    self._draw_high_quality_dot(frame, x, bottom_y, config.dot_size, dot_color, config.dot_filled)
-
-        if config.mirror_right and len(right_values) > 0:
-            right_width = usable_w // 2
-            center_x = int(config.width * config.x_position / 100)
-            right_start_x = center_x
-            for j in range(len(right_values)):
-                mirror_j = len(right_values) - 1 - j
-                amp = right_values[mirror_j]
-                x = right_start_x + int((j / (len(right_values) - 1)) * right_width) if len(right_values) > 1 else right_start_x + right_width // 2
-                dot_h = int(min_dot_h + amp * (max_dot_h - min_dot_h))
-                top_y = int(center_y - dot_h/2)
-                bottom_y = int(center_y + dot_h/2)
-                
-                if config.transparency:
-                    color_intensity = int(255 * amp)
-                else:
-                    color_intensity = 255
-                dot_color = (min(255, int(config.color[0] * (color_intensity + 50) / 255)), 
-                           min(255, int(config.color[1] * (color_intensity + 50) / 255)), 
-                           min(255, int(config.color[2] * (color_intensity + 50) / 255)))
-                
-                if config.top_active:
-                    self._draw_high_quality_dot(frame, x, top_y, config.dot_size, dot_color, config.dot_filled)
-                if config.bottom_active:
-                    self._draw_high_quality_dot(frame, x, bottom_y, config.dot_size, dot_color, config.dot_filled)
-        
-        return frame
+        raster = linear_dots(len(values), config.width, config.height, config.x_position, config.y_position,
+                             config.mirror_right, config.bar_height_min, config.bar_height_max, config.dot_size,
+                             config.dot_filled, config.top_active, config.bottom_active)
+        return raster.draw(frame, values, config.color, config.transparency)
 
     def _draw_waveform(self, frame: np.ndarray, values: np.ndarray, config: VisualizerConfig) -> np.ndarray:
-        values = self._apply_enhanced_mode(values, config)
-        
         n_segments = len(values)
         margin = max(10, config.width // 20)
         usable_w = config.width - 2 * margin
@@ -480,19 +443,6 @@ class AudioVisualizerBase:
         
         return frame
 
-    def _draw_high_quality_dot(self, frame: np.ndarray, x: int, y: int, radius: int, color: Tuple[int, int, int], filled: bool):
-        if filled:
-            for i in range(radius + 1):
-                alpha = 1.0 - (i / (radius + 1)) * 0.3
-                blended_color = tuple(int(c * alpha) for c in color)
-                cv2.circle(frame, (x, y), radius - i, blended_color, -1)
-        else:
-            thickness = max(2, radius // 3)
-            for i in range(thickness):
-                alpha = 1.0 - (i / thickness) * 0.2
-                blended_color = tuple(int(c * alpha) for c in color)
-                cv2.circle(frame, (x, y), radius - i, blended_color, 1)
-
     def _create_smooth_curve(self, credits: List[Tuple[int, int]], interpolation_factor: int = 8) -> List[Tuple[int, int]]:
         if len(credits) < 2:
             return credits
@@ -550,203 +500,112 @@ class AudioVisualizerBase:
         
         return list(zip(x_smooth, y_smooth))
 
-    def _apply_enhanced_mode(self, values: np.ndarray, config: VisualizerConfig) -> np.ndarray:
-        if not config.enhanced_mode or not config.enhanced_mode.get("active", False):
-            return values
-        
-        threshold = config.enhanced_mode.get("threshold", 0.3)
-        factor = config.enhanced_mode.get("factor", 2.0)
-        
-        min_height = int(config.height * config.bar_height_min / 100)
-        max_height = int(config.height * config.bar_height_max / 100)
-        height_range = max_height - min_height
-        height_threshold = height_range * threshold
-        
-        enhanced_values = values.copy()
-        for i in range(len(enhanced_values)):
-            current_height_increase = enhanced_values[i] * height_range
-            
-            if current_height_increase >= height_threshold:
-                enhanced_value = min(1.0, enhanced_values[i] * factor)
-                transition_factor = 0.8
-                enhanced_values[i] = transition_factor * enhanced_value + (1 - transition_factor) * enhanced_values[i]
-            else:
-                enhanced_values[i] = enhanced_values[i]
-        
-        return enhanced_values
-
-    def _prepare_fft_data(self, audio_path: str, fps: int, n_segments: int, duration_intro: float = 0, fadein: float = 3, fadeout: float = 3, delay_outro: float = 0, smoothness_factor: float = 0.0):
+    def _decode_audio(self, audio_path: str, duration_intro: float = 0) -> Tuple[np.ndarray, int]:
+        """Decode to mono float32 in [-1, 1] in memory"""
         audio = AudioSegment.from_file(audio_path)
         if duration_intro > 0:
             audio = audio[duration_intro * 1000:]
-
-        if not self.temp_dir:
-            self.temp_dir = os.path.join(os.path.dirname(audio_path), "temp_fft")
-        os.makedirs(self.temp_dir, exist_ok=True)
-        temp_wav = os.path.join(self.temp_dir, "audio_temp.wav")
-        audio.export(temp_wav, format="wav")
-
-        y, sr = librosa.load(temp_wav, sr=None)
+        pcm = np.frombuffer(audio.raw_data, dtype=SAMPLE_DTYPES[audio.sample_width]).reshape(-1, audio.channels)
+        # Channel mix and int-to-float scaling as one matrix-vector product
+        scale = 1.0 / (audio.channels * float(1 << (8 * audio.sample_width - 1)))
+        return pcm.astype(np.float32) @ np.full(audio.channels, scale, dtype=np.float32), audio.frame_rate
+
+    @staticmethod
+    def _band_matrix(n_bins: int, n_bands: int) -> np.ndarray:
+        """(n_bins, n_bands) assignment of FFT bins to bars: bar k shows bin k"""
+        n_bands = min(n_bands, n_bins)
+        matrix = np.zeros((n_bins, n_bands), dtype=np.float32)
+        matrix[np.arange(n_bands), np.arange(n_bands)] = 1.0
+        return matrix
+
+    @staticmethod
+    def _frame_magnitudes(frames: np.ndarray, bins: np.ndarray, window: Optional[np.ndarray] = None) -> np.ndarray:
+        """|rfft| of every (windowed) frame at the given bins, shape (n_frames, len(bins))"""
+        n = frames.shape[1]
+        if len(bins) * 8 < n:
+            # Few low bins (the bar layouts): a partial DFT basis with the window folded in beats a full rfft
+            angle = (2 * np.pi / n) * np.outer(np.arange(n), bins)
+            basis = np.concatenate([np.cos(angle), -np.sin(angle)], axis=1)
+            if window is not None:
+                basis *= window[:, None]
+            parts = frames @ basis.astype(np.float32)
+            return np.hypot(parts[:, :len(bins)], parts[:, len(bins):])
+        if window is not None:
+            frames = frames * window
+        return np.abs(np.fft.rfft(frames, axis=1)[:, bins]).astype(np.float32)
+
+    def _prepare_fft_data(self, audio_path: str, fps: int, n_segments: int, duration_intro: float = 0, fadein: float = 3, fadeout: float = 3, delay_outro: float = 0, smoothness_factor: float = 0.0, metrics: Optional[RenderMetrics] = None):
+        metrics = metrics or RenderMetrics()
+        with metrics.stage("audio_decode"):
+            y, sr = self._decode_audio(audio_path, duration_intro)
+        features_start = time.perf_counter()
         duration = len(y) / sr
         total_frames = int(duration * fps)
         samples_per_frame = int(sr / fps)
 
-        y_tensor = torch.tensor(y, device="cpu")
-        
         if smoothness_factor > 0.3:
-            window = torch.hann_window(samples_per_frame)
+            window = np.hanning(samples_per_frame + 1)[:-1].astype(np.float32)
         else:
-            window = torch.ones(samples_per_frame)
-        
-        fft_magnitude_list = []
-        for i in range(total_frames):
-            start_idx = i * samples_per_frame
-            end_idx = start_idx + samples_per_frame
-            
-            if start_idx >= len(y_tensor):
-                frame_data = torch.zeros(samples_per_frame)
-            else:
-                frame_data = y_tensor[start_idx:end_idx]
-                if len(frame_data) < samples_per_frame:
-                    pad_length = samples_per_frame - len(frame_data)
-                    frame_data = torch.cat([frame_data, torch.zeros(pad_length)])
-            
-            frame_data = frame_data * window
-            fft_frame = torch.fft.rfft(frame_data)
-            fft_mag = torch.abs(fft_frame[:n_segments // 2])
-            
-            fft_magnitude_list.append(fft_mag)
-        
-        fft_magnitude = torch.stack(fft_magnitude_list)
-        
+            window = None
+
+        # One strided view over all frames (hop == frame length), zero-padded at the end
+        needed = total_frames * samples_per_frame
+        padded = np.pad(y, (0, max(0, needed - len(y))))
+        frames = sliding_window_view(padded[:needed], samples_per_frame)[::samples_per_frame]
+
+        # Band aggregation as a single matrix multiply over the bins the bars use
+        band_matrix = self._band_matrix(samples_per_frame // 2 + 1, n_segments // 2)
+        bins = np.flatnonzero(band_matrix.any(axis=1))
+        fft_magnitude = self._frame_magnitudes(frames, bins, window) @ band_matrix[bins]
+
         if smoothness_factor > 0.5:
             smoothing_alpha = 0.1 + (0.3 * smoothness_factor)
             fft_magnitude = self._apply_smoothing_filter(fft_magnitude, alpha=smoothing_alpha)
-        
-        for freq_idx in range(fft_magnitude.shape[1]):
-            freq_band = fft_magnitude[:, freq_idx]
-            freq_max = torch.amax(freq_band)
-            if freq_max > 0:
-                fft_magnitude[:, freq_idx] = freq_band / freq_max
 
-        mirrored = torch.cat([fft_magnitude, torch.flip(fft_magnitude, dims=[1])], dim=1)
+        band_max = fft_magnitude.max(axis=0, initial=0.0)
+        fft_magnitude = np.divide(fft_magnitude, band_max, out=fft_magnitude, where=band_max > 0)
+
+        mirrored = np.concatenate([fft_magnitude, fft_magnitude[:, ::-1]], axis=1)
         if mirrored.shape[1] != n_segments:
             mirrored = mirrored[:, :n_segments]
 
-        self.fade_params = {
+        self.fade_params = self._fade_frames(fps, fadein, fadeout, delay_outro, total_frames)
+        metrics.add("features", time.perf_counter() - features_start)
+        return y, mirrored, duration, total_frames, samples_per_frame
+
+    @staticmethod
+    def _fade_frames(fps: int, fadein: float, fadeout: float, delay_outro: float, total_frames: int) -> Dict[str, int]:
+        return {
             "fadein_frames": int(fadein * fps),
             "fadeout_frames": int(fadeout * fps),
             "delay_outro_frames": int(delay_outro * fps),
             "total_frames": total_frames
         }
-        return y, mirrored, duration, total_frames, samples_per_frame
 
-    def _apply_smoothing_filter(self, fft_magnitude: torch.Tensor, alpha: float = 0.3) -> torch.Tensor:
-        smoothed = torch.zeros_like(fft_magnitude)
-        smoothed[0] = fft_magnitude[0]
-        
-        for i in range(1, len(fft_magnitude)):
-            smoothed[i] = alpha * fft_magnitude[i] + (1 - alpha) * smoothed[i-1]
-        
-        return smoothed
+    def _apply_smoothing_filter(self, fft_magnitude: np.ndarray, alpha: float = 0.3) -> np.ndarray:
+        if len(fft_magnitude) == 0:
+            return fft_magnitude
+        zi = (1 - alpha) * fft_magnitude[:1]
+        smoothed, _ = lfilter([alpha], [1.0, -(1 - alpha)], fft_magnitude, axis=0, zi=zi)
+        return smoothed.astype(np.float32)
 
-    def _apply_frame_smoothing(self, values: np.ndarray, smoothness_factor: float, smoothing_buffer: Optional[np.ndarray], previous_values: Optional[np.ndarray], velocity_buffer: Optional[np.ndarray], moving_average_buffer: Optional[List[np.ndarray]], frame_idx: int) -> np.ndarray:
-        if smoothing_buffer is None or previous_values is None:
-            return values
-        
-        velocity = values - previous_values
-        
-        if smoothness_factor < 0.3:
-            max_velocity = 0.3
-        else:
-            max_velocity = 0.1 + (0.2 * smoothness_factor)
-        velocity = np.clip(velocity, -max_velocity, max_velocity)
-        
-        if velocity_buffer is not None:
-            velocity_buffer = 0.5 * velocity_buffer + 0.5 * velocity
-        else:
-            velocity_buffer = velocity
-        
-        smoothed_values = previous_values + velocity_buffer
-        
-        if smoothness_factor >= 0.6 and moving_average_buffer is not None and len(moving_average_buffer) > 1:
-            moving_avg = np.mean(moving_average_buffer, axis=0)
-            blend_factor = (smoothness_factor - 0.6) / 0.4
-            smoothed_values = (1 - blend_factor) * smoothed_values + blend_factor * moving_avg
-        
-        if smoothness_factor < 0.3:
-            smoothing_alpha = 0.5
-        else:
-            smoothing_alpha = 0.2 + (0.3 * smoothness_factor)
-        final_values = (1 - smoothing_alpha) * smoothing_buffer + smoothing_alpha * smoothed_values
-        
-        return final_values
-
-    def _load_background(self, video_path: Optional[str], duration: float, width: int, height: int):
-        if not video_path or VideoFileClip is None:
+    def _load_background(self, video_path: Optional[str], width: int, height: int, fps: int, start_frame: int = 0) -> Optional[BackgroundSource]:
+        """Decoder for the background video (or still image), already at the output size and rate, from start_frame on"""
+        if not video_path:
             return None
         try:
-            clip = VideoFileClip(video_path).subclip(0, duration).resize((width, height))
-            return clip
+            return BackgroundSource(video_path, width, height, fps, start_frame=start_frame)
         except Exception as e:
             self.logger.log(f"⚠️ Failed to load background video: {e}")
             return None
 
-    def _create_background_frame(self, bg_video, t: float, width: int, height: int) -> np.ndarray:
+    def _create_background_frame(self, bg_video: Optional[BackgroundSource], frame_idx: int, width: int, height: int) -> np.ndarray:
         if bg_video:
-            try:
-                frame = bg_video.get_frame(t)[:, :, ::-1].copy()
-                return frame
-            except Exception:
-                pass
+            return bg_video.frame(frame_idx)
         return np.zeros((height, width, 3), dtype=np.uint8)
 
-    def _calculate_opacity(self, frame_idx: int) -> float:
-        fadein = self.fade_params["fadein_frames"]
-        fadeout = self.fade_params["fadeout_frames"]
-        total = self.fade_params["total_frames"]
-        delay_outro = self.fade_params["delay_outro_frames"]
-
-        start = int(self.time_in * self.visualizer_fps)
-        end = total - fadeout - delay_outro
-
-        if frame_idx < start:
-            return 0.0
-        if frame_idx < start + fadein:
-            return (frame_idx - start) / fadein
-        if frame_idx >= end:
-            return max(0.0, 1 - (frame_idx - end) / fadeout)
-        return 1.0
-
-    def _init_writer(self, output_path: str, fps: int, width: int, height: int):
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        temp_path = output_path + ".temp.mp4"
-        writer = cv2.VideoWriter(
-            temp_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height)
-        )
-        if not writer.isOpened():
-            raise RuntimeError("Failed to open video writer")
-        return writer, temp_path
-
-    def _finalize_output(self, temp_path: str, output_path: str):
-        if os.path.exists(output_path):
-            os.remove(output_path)
-        os.rename(temp_path, output_path)
-
-    def _add_audio(self, video_path: str, audio_path: str):
-        temp_out = video_path + ".with_audio.mp4"
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", video_path, "-i", audio_path,
-            "-c:v", "copy", "-c:a", "aac", "-b:a", "320k",
-            "-map", "0:v:0", "-map", "1:a:0",
-            temp_out
-        ]
-        subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        if os.path.exists(temp_out):
-            os.remove(video_path)
-            shutil.move(temp_out, video_path)
-            self.logger.log("🔊 Audio muxed into video")
+    def _init_writer(self, output_path: str, fps: int, width: int, height: int, audio_path: Optional[str] = None, metrics: Optional[RenderMetrics] = None) -> FrameSink:
+        return FrameSink(output_path, width, height, fps, audio_path=audio_path, metrics=metrics, **self.sink_options)
 
 class UnifiedVisualizerService:
     def __init__(self):
@@ -755,9 +614,9 @@ class UnifiedVisualizerService:
     def create_visualizer(self, visualizer_type: VisualizerType) -> AudioVisualizerBase:
         return AudioVisualizerBase(f"{visualizer_type.value}_visualizer")
     
-    def render_visualizer(self, audio_path: str, output_path: str, config: VisualizerConfig, video_path: Optional[str] = None) -> str:
+    def render_visualizer(self, audio_path: str, output_path: str, config: VisualizerConfig, video_path: Optional[str] = None, preview: Optional[PreviewSettings] = None, metrics: Optional[RenderMetrics] = None) -> str:
         visualizer = self.create_visualizer(config.visualizer_type)
-        return visualizer.render(audio_path, output_path, config, video_path)
+        return visualizer.render(audio_path, output_path, config, video_path, preview=preview, metrics=metrics)
     
     def get_available_visualizers(self) -> List[Dict[str, str]]:
         return [
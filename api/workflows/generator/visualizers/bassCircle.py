@@ -1,19 +1,32 @@
 # bass_logo_visualizer.py
+import functools
 import os
 import math
-import shutil
-import subprocess
-import time
+import sys
+import zlib
 import numpy as np
 import cv2
-import librosa
-from moviepy import VideoFileClip
+from scipy.signal import lfilter
+
+try:
+    from api.workflows.generator.audio_envelope import Band, EnvelopeSpec, ema, load_envelopes
+    from api.workflows.generator.background_source import BackgroundSource
+    from api.workflows.generator.frame_sink import FrameSink
+    from api.workflows.generator.parallel_render import render_parallel, render_workers
+    from api.workflows.generator.render_metrics import RenderMetrics
+except ImportError:  # run as a script from this directory
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from audio_envelope import Band, EnvelopeSpec, ema, load_envelopes
+    from background_source import BackgroundSource
+    from frame_sink import FrameSink
+    from parallel_render import render_parallel, render_workers
+    from render_metrics import RenderMetrics
 
 
 class BassCircleLogoVisualizer:
     """
     Minimal visualizer: bass-reactive circles + center logo cutout.
-    - Background: optional video (resized to output WH). If absent, black frames.
+    - Background: optional video or image (scaled to output WH). If absent, black frames.
     - Bass: mean of first few FFT bins per frame.
     - Colors: BGR tuples (OpenCV).
     - Spacing: configurable gaps and spacing between circles.
@@ -104,326 +117,158 @@ class BassCircleLogoVisualizer:
         # Pre-allocate black frame for background
         self.black_frame = np.zeros((self.H, self.W, 3), dtype=np.uint8)
 
-        # Logo processing cache for performance
-        self._logo_cache = None
-        self._logo_alpha_cache = None
-        self._logo_size_cache = None
+        # Static logo layers (placement + fixed-point alpha) per logo size, and the one in use
+        self._logo_layers = {}
+        self._logo_layer = None
 
     # ---------------------------
     # Public API
     # ---------------------------
-    def render(self, audio_path, output_path, logo_path=None, background_video_path=None):
+    def render(self, audio_path, output_path, logo_path=None, background_video_path=None, workers=None, metrics=None):
         """
-        Render the bass circle + logo cutout visualizer with performance timing.
+        Render the bass circle + logo cutout visualizer.
+        Frame ranges are rendered in parallel processes when there are enough frames
+        (see parallel_render.render_workers); workers=1 forces a serial render.
+        Stage timings, progress and memory go to `metrics` (a RenderMetrics, created if omitted).
         """
-        start_time = time.time()
-        print("🚀 Starting visualizer render...")
-
-        # --- background video (optional) ---
-        bg_start = time.time()
-        bg = self._open_background(background_video_path)
-        bg_time = time.time() - bg_start
-        print(f"📹 Background setup: {bg_time:.3f}s")
+        metrics = metrics or RenderMetrics(kind="bass_circle")
 
         # --- load and preprocess logo (optional) ---
-        logo_start = time.time()
-        if logo_path:
-            logo = self._load_logo(logo_path)
-            self._preprocess_logo(logo)
-        else:
-            logo = None
-        logo_time = time.time() - logo_start
-        print(f"🖼️ Logo loading: {logo_time:.3f}s")
+        with metrics.stage("logo"):
+            if logo_path:
+                logo = self._load_logo(logo_path)
+                self._preprocess_logo(logo)
+            else:
+                logo = None
 
         # --- compute per-frame bass values and total frames ---
-        audio_start = time.time()
-        bass_series, total_frames, duration = self._compute_bass_series(audio_path)
-        audio_time = time.time() - audio_start
-        print(f"🎵 Audio processing: {audio_time:.3f}s ({total_frames} frames, {duration:.1f}s duration)")
-
-        # --- writer ---
-        writer_start = time.time()
-        tmp_out = output_path + ".temp.mp4"
-        self._ensure_dir(os.path.dirname(output_path))
-        writer = cv2.VideoWriter(tmp_out, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, (self.W, self.H))
-        if not writer.isOpened():
-            raise RuntimeError("Failed to open video writer")
-        writer_time = time.time() - writer_start
-        print(f"📝 Video writer setup: {writer_time:.3f}s")
-
-        # --- main loop ---
-        render_start = time.time()
-
-        # Pre-compute opacity values for all frames (vectorized)
-        precompute_start = time.time()
-        opacity_values = self._compute_opacity_vectorized(total_frames)
-
-        # Pre-compute frame times
-        frame_times = np.arange(total_frames, dtype=np.float32) / self.fps
-        precompute_time = time.time() - precompute_start
-        print(f"⚡ Pre-computations: {precompute_time:.3f}s")
-
-        # Initialize smoothing variables
-        prev_outer_bass = 0.0
-
-        # Performance tracking
-        bg_time_total = 0
-        circles_time_total = 0
-        logo_time_total = 0
-        write_time_total = 0
-
-        for i in range(total_frames):
-            t = frame_times[i]
-
-            # Background frame timing
-            bg_start = time.time()
-            frame = self._get_background_frame(bg, t)
-            bg_time_total += time.time() - bg_start
-
-            # Fast opacity check
-            opacity = opacity_values[i]
-            if opacity <= 0:
-                write_start = time.time()
+        bass_series, total_frames, duration = self._compute_bass_series(audio_path, metrics)
+
+        # --- per-frame series: everything stateful is resolved here, so frame ranges are independent ---
+        with metrics.stage("features"):
+            opacity_values = self._compute_opacity_vectorized(total_frames)
+            bass = np.clip(bass_series, 0.0, 1.0).astype(np.float64) * opacity_values
+            arrays = {
+                "opacity": opacity_values,
+                "bass": bass,
+                "outer_bass": self._compute_outer_bass(bass, opacity_values),
+            }
+
+        # --- main loop: one ffmpeg pass per range encodes H.264 (and muxes the original audio) ---
+        metrics.start_frames(total_frames, self.fps)
+        render_chunk = functools.partial(self._render_range, background_video_path=background_video_path, logo=logo)
+        workers = render_workers(total_frames, workers)
+        if workers > 1:
+            render_parallel(render_chunk, arrays, total_frames, output_path, self.W, self.H, self.fps,
+                            audio_path=audio_path, workers=workers, metrics=metrics)
+        else:
+            with FrameSink(output_path, self.W, self.H, self.fps, audio_path=audio_path, metrics=metrics) as writer:
+                render_chunk(arrays, 0, total_frames, writer)
+
+        metrics.finish()
+        print(f"✅ Done: {output_path} | {metrics.summary()}")
+
+    def _compute_outer_bass(self, bass, opacity):
+        """
+        Outer-ring bass: the core series with extra exponential smoothing (50% of the main
+        smoothing), carried across visible frames only.
+        """
+        if self.smoothing <= 0:
+            return bass.copy()
+        outer_smooth_factor = (self.smoothing / 100.0) * 0.5
+        alpha_outer = 0.9 - (outer_smooth_factor * 0.8)  # 0.9 to 0.1
+        outer = bass.copy()
+        visible = np.flatnonzero(opacity > 0)
+        if len(visible) == 0:
+            return outer
+        # The EMA starts from 0, except that a visible frame 0 passes through unchanged
+        if visible[0] == 0:
+            zi, visible = [(1 - alpha_outer) * bass[0]], visible[1:]
+        else:
+            zi = [0.0]
+        outer[visible], _ = lfilter([alpha_outer], [1.0, -(1 - alpha_outer)], bass[visible], zi=zi)
+        return outer
+
+    def _render_range(self, arrays, start, stop, writer, background_video_path=None, logo=None):
+        """
+        Draw and write frames [start, stop) from the precomputed series.
+        Opens its own background clip so it can run in a worker process; stages are timed on writer.metrics.
+        """
+        metrics = writer.metrics or RenderMetrics()
+        with metrics.stage("background_decode"):
+            bg = self._open_background(background_video_path, start)
+
+        opacity_values, bass, outer_bass = arrays["opacity"], arrays["bass"], arrays["outer_bass"]
+        try:
+            for i in range(start, stop):
+                with metrics.stage("background_decode"):
+                    frame = self._get_background_frame(bg, i)
+
+                # Fast opacity check
+                if opacity_values[i] > 0:
+                    with metrics.stage("draw"):
+                        # keep the background under the logo before the circles cover it
+                        cutout = self._logo_layer if logo is not None else None
+                        bg_roi = frame[cutout["rows"], cutout["cols"]].copy() if cutout is not None and bg is not None else None
+                        frame = self._draw_bass_circles(frame, float(bass[i]), float(outer_bass[i]))
+                        if logo is not None:
+                            frame = self._apply_logo_cutout(frame, bg_roi)
+
                 writer.write(frame)
-                write_time_total += time.time() - write_start
-                continue
-
-            # Apply additional smoothing for outer rings if smoothing is enabled
-            bass = min(1.0, max(0.0, bass_series[i])) * opacity
-
-            if self.smoothing > 0:
-                # Apply additional smoothing for outer rings (50% of main smoothing)
-                outer_smooth_factor = (self.smoothing / 100.0) * 0.5
-                if i == 0:
-                    outer_bass = bass
-                else:
-                    alpha_outer = 0.9 - (outer_smooth_factor * 0.8)  # 0.9 to 0.1
-                    outer_bass = alpha_outer * bass + (1 - alpha_outer) * prev_outer_bass
-                prev_outer_bass = outer_bass
-            else:
-                outer_bass = bass  # Use same value when no smoothing
-
-            # draw circles timing
-            circles_start = time.time()
-            frame = self._draw_bass_circles(frame, bass, outer_bass)
-            circles_time_total += time.time() - circles_start
-
-            # logo cutout timing
-            if logo is not None:
-                logo_start = time.time()
-                frame = self._apply_logo_cutout(frame, logo, i, bg)
-                logo_time_total += time.time() - logo_start
-
-            # Write timing
-            write_start = time.time()
-            writer.write(frame)
-            write_time_total += time.time() - write_start
-
-            # Optimized progress reporting with timing
-            if total_frames > 0 and i % max(1, total_frames // 10) == 0:
-                elapsed = time.time() - render_start
-                fps_actual = (i + 1) / elapsed if elapsed > 0 else 0
-                print(f"Progress: {int(100 * i / total_frames)}% | Elapsed: {elapsed:.1f}s | FPS: {fps_actual:.1f}")
-
-        render_time = time.time() - render_start
-        print(f"🎬 Frame rendering: {render_time:.3f}s ({render_time/total_frames*1000:.1f}ms per frame)")
-
-        writer.release()
-        if bg is not None:
-            bg.close()
-
-        # finalize temp -> output
-        finalize_start = time.time()
-        if os.path.exists(output_path):
-            os.remove(output_path)
-        os.rename(tmp_out, output_path)
-        finalize_time = time.time() - finalize_start
-        print(f"📁 File operations: {finalize_time:.3f}s")
-
-        # mux original audio
-        audio_mux_start = time.time()
-        self._mux_audio(output_path, audio_path)
-        audio_mux_time = time.time() - audio_mux_start
-        print(f"🔊 Audio muxing: {audio_mux_time:.3f}s")
-
-        # Final performance summary
-        total_time = time.time() - start_time
-        realtime_ratio = duration / total_time if total_time > 0 else 0
-
-        print("\n" + "="*60)
-        print("📊 PERFORMANCE SUMMARY")
-        print("="*60)
-        print(f"🎵 Audio processing:     {audio_time:6.3f}s ({audio_time/total_time*100:5.1f}%)")
-        print(f"⚡ Pre-computations:     {precompute_time:6.3f}s ({precompute_time/total_time*100:5.1f}%)")
-        print(f"🎬 Frame rendering:      {render_time:6.3f}s ({render_time/total_time*100:5.1f}%)")
-        print(f"📝 Video writer setup:   {writer_time:6.3f}s ({writer_time/total_time*100:5.1f}%)")
-        print(f"📁 File operations:      {finalize_time:6.3f}s ({finalize_time/total_time*100:5.1f}%)")
-        print(f"🔊 Audio muxing:         {audio_mux_time:6.3f}s ({audio_mux_time/total_time*100:5.1f}%)")
-        print(f"📹 Background setup:     {bg_time:6.3f}s ({bg_time/total_time*100:5.1f}%)")
-        print(f"🖼️ Logo loading:         {logo_time:6.3f}s ({logo_time/total_time*100:5.1f}%)")
-        print(f"🌊 Smoothing level:      {self.smoothing:6d}% (includes anti-flicker)")
-        print("-"*60)
-        print("🔍 DETAILED FRAME TIMING:")
-        print(f"📹 Background frames:    {bg_time_total:6.3f}s ({bg_time_total/total_time*100:5.1f}%)")
-        print(f"⭕ Circle drawing:       {circles_time_total:6.3f}s ({circles_time_total/total_time*100:5.1f}%)")
-        print(f"🖼️ Logo cutout:          {logo_time_total:6.3f}s ({logo_time_total/total_time*100:5.1f}%)")
-        print(f"💾 Video writing:        {write_time_total:6.3f}s ({write_time_total/total_time*100:5.1f}%)")
-        print("-"*60)
-        print(f"⏱️  Total time:           {total_time:6.3f}s")
-        print(f"🎬 Video duration:       {duration:6.1f}s")
-        print(f"⚡ Speed ratio:          {realtime_ratio:6.2f}x realtime")
-        print(f"🎯 Avg FPS:              {total_frames/total_time:6.1f} fps")
-        print("="*60)
-        print(f"✅ Done: {output_path}")
+        finally:
+            if bg is not None:
+                bg.close()
+
+        # flush queued frames and finish encoding this range
+        writer.close()
 
     # ---------------------------
     # Background / frames
     # ---------------------------
-    def _open_background(self, video_path):
+    def _open_background(self, video_path, start_frame=0):
         if not video_path:
             return None
         try:
-            clip = VideoFileClip(video_path)
-            # If background is shorter than audio, we still sample safely by clamping time.
-            # Resize on each frame fetch is costly; we fetch then resize via cv2.
-            return clip
+            # Decoded sequentially, already scaled to WH and resampled to fps by ffmpeg.
+            # If background is shorter than audio, its last frame is held.
+            return BackgroundSource(video_path, self.W, self.H, self.fps, start_frame=start_frame, loop=False)
         except Exception as e:
             print(f"⚠️ Failed to open background video: {e}")
             return None
 
-    def _get_background_frame(self, bg, t):
+    def _get_background_frame(self, bg, frame_idx):
         """
-        Highly optimized background frame retrieval with caching.
+        Background for output frame `frame_idx` (prefetched by the decoder thread).
         """
         if bg is None:
             return self.black_frame.copy()
-
-        try:
-            # Fast time clamping
-            t_clamped = min(max(0.0, t), max(0.0, bg.duration - 1e-3))
-            img = bg.get_frame(t_clamped)
-
-            # Fast type conversion and color space conversion
-            if img.dtype != np.uint8:
-                img = (np.clip(img, 0.0, 1.0) * 255).astype(np.uint8)
-
-            # RGB -> BGR (vectorized)
-            img = img[:, :, ::-1]
-
-            # Resize only if necessary
-            if img.shape[:2] != (self.H, self.W):
-                img = cv2.resize(img, (self.W, self.H), interpolation=cv2.INTER_AREA)
-
-            return img
-        except Exception:
-            return self.black_frame.copy()
+        return bg.frame(frame_idx)
 
     # ---------------------------
     # Audio / Bass series
     # ---------------------------
-    def _compute_bass_series(self, audio_path):
+    def _compute_bass_series(self, audio_path, metrics=None):
         """
-        Highly optimized bass computation using vectorized batch processing.
+        Per-frame bass: mean of FFT bins 1..bass_bins of each frame's spectrum, scaled to the
+        frame's own peak (shared, cached envelope extraction in audio_envelope).
         Returns (bass_series[0..N-1], N, duration_s).
         """
-        load_start = time.time()
-        y, sr = librosa.load(audio_path, sr=None, mono=True)
-        load_time = time.time() - load_start
-
-        # skip intro seconds if requested
-        if self.duration_intro > 0:
-            start = int(self.duration_intro * sr)
-            y = y[start:]
-
-        duration = len(y) / sr
-        total_frames = max(1, int(duration * self.fps))
-        samples_per_frame = max(1, int(sr / self.fps))
-
-        # Pre-compute window once
-        window_start = time.time()
-        window = np.hanning(samples_per_frame).astype(np.float32)
-        window_time = time.time() - window_start
-
-        # Pre-allocate arrays
-        bass_vals = np.zeros(total_frames, dtype=np.float32)
-
-        # Use larger chunks for better vectorization
-        chunk_size = min(2000, total_frames)  # Increased chunk size
-
-        fft_start = time.time()
-
-        # Pre-compute all segment indices for vectorized processing
-        segment_indices = np.arange(total_frames) * samples_per_frame
-        segment_ends = np.minimum(segment_indices + samples_per_frame, len(y))
-
-        for chunk_start in range(0, total_frames, chunk_size):
-            chunk_end = min(chunk_start + chunk_size, total_frames)
-            chunk_size_actual = chunk_end - chunk_start
-
-            # Vectorized segment extraction
-            seg_starts = segment_indices[chunk_start:chunk_end]
-            seg_ends = segment_ends[chunk_start:chunk_end]
-
-            # Process all segments in the chunk at once
-            chunk_vals = np.zeros(chunk_size_actual, dtype=np.float32)
-
-            for i, (s, e) in enumerate(zip(seg_starts, seg_ends)):
-                if s >= len(y):
-                    chunk_vals[i] = 0.0
-                    continue
-
-                # Extract segment
-                seg = y[s:e].astype(np.float32)
-
-                # Pad if necessary (vectorized)
-                if len(seg) < samples_per_frame:
-                    seg = np.pad(seg, (0, samples_per_frame - len(seg)), mode="constant")
-
-                # Apply window and compute FFT (vectorized)
-                seg_windowed = seg * window
-                spec = np.fft.rfft(seg_windowed)
-                mag = np.abs(spec)
-
-                # Fast normalization using numpy operations
-                maxmag = mag.max()
-                if maxmag < 1e-6:
-                    norm = mag
-                else:
-                    norm = mag / maxmag
-
-                # Bass calculation (vectorized)
-                bins = min(self.bass_bins + 1, len(norm))
-                if bins <= 1:
-                    bass = 0.0
-                else:
-                    bass = float(np.mean(norm[1:bins]))
-
-                chunk_vals[i] = bass
-
-            # Store chunk results
-            bass_vals[chunk_start:chunk_end] = chunk_vals
-
-        fft_time = time.time() - fft_start
-
-        # Final normalization (vectorized)
-        norm_start = time.time()
-        bass_vals = np.clip(bass_vals, 0.0, 1.0)
-        norm_time = time.time() - norm_start
+        spec = EnvelopeSpec(
+            self.fps,
+            bands=(Band("bass", bins=(1, self.bass_bins + 1)),),
+            skip_intro=self.duration_intro,
+            frame_peak=True,
+            normalize=False,
+        )
+        bass_vals = np.clip(load_envelopes(audio_path, spec, metrics)["bass"], 0.0, 1.0)
+        total_frames = len(bass_vals)
 
         # Apply smoothing and anti-flickering
-        smooth_start = time.time()
         if self.smoothing > 0:
-            bass_vals = self._apply_smoothing_system(bass_vals)
-        smooth_time = time.time() - smooth_start
+            with (metrics or RenderMetrics()).stage("features"):
+                bass_vals = self._apply_smoothing_system(bass_vals)
 
-        # Print detailed audio processing timing
-        print(f"  📂 Audio loading: {load_time:.3f}s")
-        print(f"  🪟 Window setup: {window_time:.3f}s")
-        print(f"  🔢 FFT processing: {fft_time:.3f}s")
-        print(f"  📊 Normalization: {norm_time:.3f}s")
-        print(f"  🌊 Smoothing: {smooth_time:.3f}s (level={self.smoothing}%)")
-
-        return bass_vals, total_frames, duration
+        return bass_vals, total_frames, total_frames / self.fps
 
     def _apply_smoothing_system(self, bass_series):
         """
@@ -452,12 +297,8 @@ class BassCircleLogoVisualizer:
 
         alpha = max(0.01, min(0.9, alpha))
 
-        # Apply exponential smoothing
-        smoothed = np.zeros_like(bass_series)
-        smoothed[0] = bass_series[0]
-
-        for i in range(1, len(bass_series)):
-            smoothed[i] = alpha * bass_series[i] + (1 - alpha) * smoothed[i-1]
+        # Apply exponential smoothing (seeded with the first frame)
+        smoothed = ema(bass_series, 1 - alpha)
 
         # 2. Anti-flickering (applies to levels > 30%)
         if smooth_factor > 0.3:
@@ -611,6 +452,7 @@ class BassCircleLogoVisualizer:
         """
         Preprocess logo once for optimal performance during rendering.
         """
+        self._logo_layer = None
         if logo_rgba is None:
             return
 
@@ -639,6 +481,16 @@ class BassCircleLogoVisualizer:
         if w <= 0 or h <= 0:
             return
 
+        key = (zlib.crc32(np.ascontiguousarray(logo_rgba)), w, h)
+        if key not in self._logo_layers:
+            self._logo_layers[key] = self._build_logo_layer(logo_rgba, w, h)
+        self._logo_layer = self._logo_layers[key]
+
+    def _build_logo_layer(self, logo_rgba, w, h):
+        """
+        Static cutout layer for a logo scaled to (w, h): where it sits in the frame
+        (its visible bounding box) and its alpha in 8-bit fixed point (0-256) as uint16.
+        """
         # Use efficient interpolation for preprocessing
         logo = cv2.resize(logo_rgba, (w, h), interpolation=cv2.INTER_AREA)
 
@@ -653,57 +505,44 @@ class BassCircleLogoVisualizer:
         # Light anti-aliasing blur
         alpha = cv2.GaussianBlur(alpha, (3, 3), 0.5)
 
-        # Cache the processed logo and alpha
-        self._logo_cache = logo
-        self._logo_alpha_cache = alpha
-        self._logo_size_cache = (w, h)
+        # center placement, clamped to the frame
+        x0 = max(0, min(int(self.cx - w // 2), self.W - w))
+        y0 = max(0, min(int(self.cy - h // 2), self.H - h))
+        alpha = alpha[:min(h, self.H - y0), :min(w, self.W - x0)]
 
-    def _apply_logo_cutout(self, frame, logo_rgba, frame_idx, bg_clip):
+        # blend only the bounding box of the pixels the cutout actually changes
+        weight = np.round(alpha * 256).astype(np.uint16)
+        ys, xs = np.nonzero(weight)
+        if len(ys) == 0:
+            return None
+        top, bottom, left, right = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+        weight = weight[top:bottom, left:right, None]
+        return {
+            "rows": slice(y0 + top, y0 + bottom),
+            "cols": slice(x0 + left, x0 + right),
+            "alpha": weight,
+            "inv_alpha": 256 - weight,
+        }
+
+    def _apply_logo_cutout(self, frame, bg_roi=None):
         """
-        Fast logo cutout using preprocessed cached data:
-        - If background video available: replace masked pixels with background pixels at this time.
-        - Else: replace with black (gives a hole look).
+        Fast logo cutout using the cached logo layer:
+        - If a background is available: blend in bg_roi, the background pixels under the logo
+          saved before the circles were drawn on this frame.
+        - Else: blend to black (gives a hole look).
+        Fixed-point blend: (roi * (256 - a) + bg * a + 128) >> 8 stays within uint16.
         """
-        # Use cached preprocessed logo data
-        if self._logo_cache is None or self._logo_alpha_cache is None or self._logo_size_cache is None:
+        layer = self._logo_layer
+        if layer is None:
             return frame
 
-        w, h = self._logo_size_cache
-        alpha = self._logo_alpha_cache
-
-        # center placement
-        x0 = int(self.cx - w // 2)
-        y0 = int(self.cy - h // 2)
-
-        # clamp ROI to frame
-        x0_clamp = max(0, min(x0, self.W - w))
-        y0_clamp = max(0, min(y0, self.H - h))
-        w_clamp = min(w, self.W - x0_clamp)
-        h_clamp = min(h, self.H - y0_clamp)
-        if w_clamp <= 0 or h_clamp <= 0:
-            return frame
-
-        # region of interest in frame
-        roi = frame[y0_clamp:y0_clamp + h_clamp, x0_clamp:x0_clamp + w_clamp].copy()
-        alpha_roi = alpha[:h_clamp, :w_clamp]
-
-        if bg_clip is not None:
-            # fetch matching background frame for this visual frame index
-            t = frame_idx / self.fps
-            bg_img = self._get_background_frame(bg_clip, t)
-            bg_roi = bg_img[y0_clamp:y0_clamp + h_clamp, x0_clamp:x0_clamp + w_clamp]
-
-            # Fast alpha blending using vectorized operations
-            alpha_3d = np.stack([alpha_roi] * 3, axis=2)
-            roi = (1.0 - alpha_3d) * roi.astype(np.float32) + alpha_3d * bg_roi.astype(np.float32)
-            roi = np.clip(roi, 0, 255).astype(np.uint8)
-        else:
-            # Replace with black using fast alpha blending
-            alpha_3d = np.stack([alpha_roi] * 3, axis=2)
-            roi = (1.0 - alpha_3d) * roi.astype(np.float32)
-            roi = np.clip(roi, 0, 255).astype(np.uint8)
-
-        frame[y0_clamp:y0_clamp + h_clamp, x0_clamp:x0_clamp + w_clamp] = roi
+        roi = frame[layer["rows"], layer["cols"]]
+        blended = roi * layer["inv_alpha"]
+        if bg_roi is not None:
+            blended += bg_roi * layer["alpha"]
+        blended += 128
+        blended >>= 8
+        roi[...] = blended
         return frame
 
     # ---------------------------
@@ -722,36 +561,6 @@ class BassCircleLogoVisualizer:
         return img
 
 
-    @staticmethod
-    def _mux_audio(video_path, audio_path):
-        """
-        Use ffmpeg to mux audio into the video (copy video, encode AAC audio).
-        If ffmpeg missing or fails, keep the silent video.
-        """
-        temp_out = video_path + ".with_audio.mp4"
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", video_path,
-            "-i", audio_path,
-            "-c:v", "copy",
-            "-c:a", "aac", "-b:a", "320k",
-            "-map", "0:v:0", "-map", "1:a:0",
-            temp_out
-        ]
-        try:
-            proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            if proc.returncode == 0 and os.path.exists(temp_out) and os.path.getsize(temp_out) > 0:
-                os.remove(video_path)
-                shutil.move(temp_out, video_path)
-                print("🔊 Audio muxed into video.")
-            else:
-                if os.path.exists(temp_out):
-                    os.remove(temp_out)
-                print("⚠️ ffmpeg failed; leaving video without audio.")
-        except Exception as e:
-            print(f"⚠️ ffmpeg not available or error occurred: {e}. Leaving video without audio.")
-
-
 if __name__ == "__main__":
     """
     Example:
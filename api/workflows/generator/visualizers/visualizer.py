@@ -1,12 +1,25 @@
 import os
 import cv2
-import torch
 import numpy as np
-import librosa
-import subprocess
-import shutil
+import sys
+from numpy.lib.stride_tricks import sliding_window_view
 from pydub import AudioSegment
-from moviepy import VideoFileClip, AudioFileClip
+from scipy.signal import lfilter
+
+try:
+    from api.workflows.generator.background_source import BackgroundSource
+    from api.workflows.generator.frame_sink import FrameSink
+    from api.workflows.generator.rasterizer import linear_bars, linear_dots
+    from api.workflows.generator.render_plan import build_render_plan, fade_curve
+except ImportError:  # run as a script from this directory
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from background_source import BackgroundSource
+    from frame_sink import FrameSink
+    from rasterizer import linear_bars, linear_dots
+    from render_plan import build_render_plan, fade_curve
+
+# pydub sample width (bytes) -> PCM dtype of AudioSegment.raw_data
+SAMPLE_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
 
 class logger:
     def __init__(self, name="Visualizer"):
@@ -84,6 +97,7 @@ class AudioVisualizerBase:
                 - threshold: Minimum value (0.0-1.0) required to trigger movement (default 0.3)
                 - factor: Enhancement factor multiplier (default 2.0)
                 Example: {"active": True, "threshold": 0.3, "factor": 2.0}
+                Applied once to the render plan: draw_frame_fn receives the boosted values
         """
         self.logger.log(f"Starting render for {audio_path}")
         self.visualizer_fps = fps
@@ -121,59 +135,29 @@ class AudioVisualizerBase:
         )
 
         # --- Background ---
-        bg_video = self._load_background(video_path, duration, width, height)
-
-        # --- Writer ---
-        writer, temp_path = self._init_writer(output_path, fps, width, height)
-
-        # Initialize smoothing buffers
-        smoothing_buffer = None
-        previous_values = None
-        velocity_buffer = None
-        moving_average_buffer = None
-
-        # --- Frame loop ---
-        for i in range(total_frames):
-            frame = self._create_background_frame(bg_video, i / fps, width, height)
-            opacity = self._calculate_opacity(i)
-
-            if opacity > 0 and draw_frame_fn:
-                values = fft_data[i].detach().cpu().numpy() * opacity
-                # Limit values to bar_count if specified
-                if bar_count < len(values):
-                    values = values[:bar_count]
-                elif bar_count > len(values):
-                    # Pad with zeros if bar_count is larger
-                    padded_values = np.zeros(bar_count)
-                    padded_values[:len(values)] = values
-                    values = padded_values
-
-                # Apply frame-level smoothing based on smoothness level
-                if smoothness_factor > 0:
-                    values = self._apply_frame_smoothing(values, smoothness_factor, smoothing_buffer, previous_values, velocity_buffer, moving_average_buffer, i)
-                    # Update buffers for next frame
-                    if smoothing_buffer is None:
-                        smoothing_buffer = values.copy()
-                        previous_values = values.copy()
-                        velocity_buffer = np.zeros_like(values)
-                        moving_average_buffer = [values.copy()]
-                    else:
-                        smoothing_buffer = values.copy()
-                        previous_values = values.copy()
-                        if len(moving_average_buffer) >= 3:  # Keep last 3 frames for moving average (0.1s at 30fps)
-                            moving_average_buffer.pop(0)
-                        moving_average_buffer.append(values.copy())
+        bg_video = self._load_background(video_path, width, height, fps)
+
+        # --- Render plan: fades, frame smoothing and enhanced mode for every frame, before the loop ---
+        opacity = fade_curve(
+            total_frames, int(self.time_in * fps), self.fade_params["fadein_frames"],
+            self.fade_params["fadeout_frames"], self.fade_params["delay_outro_frames"]
+        )
+        height_range = int(height * bar_height_max / 100) - int(height * bar_height_min / 100)
+        plan = build_render_plan(fft_data, bar_count, opacity, smoothness_factor, enhanced_mode, height_range)
 
-                frame = draw_frame_fn(frame, values, i, fps, vis_width, vis_height, vis_x, vis_y, bar_thickness, mirror_right, bar_height_min, bar_height_max, height, width, x_position, y_position, color, dot_size, dot_filled, transparency, top_active, bottom_active, fill_alpha, border_alpha, smooth_arcs, enhanced_mode)
+        # --- Writer + frame loop (encoded and muxed with the audio in one ffmpeg pass) ---
+        with self._init_writer(output_path, fps, width, height, audio_path) as writer:
+            for i in range(total_frames):
+                frame = self._create_background_frame(bg_video, i, width, height)
 
-            writer.write(frame)
+                if plan.visible(i) and draw_frame_fn:
+                    values = plan.values[i]
+                    frame = draw_frame_fn(frame, values, i, fps, vis_width, vis_height, vis_x, vis_y, bar_thickness, mirror_right, bar_height_min, bar_height_max, height, width, x_position, y_position, color, dot_size, dot_filled, transparency, top_active, bottom_active, fill_alpha, border_alpha, smooth_arcs, enhanced_mode)
 
-            if i % (total_frames // 10 or 1) == 0:
-                self.logger.log(f"Progress: {100 * i // total_frames}%")
+                writer.write(frame)
 
-        writer.release()
-        self._finalize_output(temp_path, output_path)
-        self._add_audio(output_path, audio_path)
+                if i % (total_frames // 10 or 1) == 0:
+                    self.logger.log(f"Progress: {100 * i // total_frames}%")
 
         if bg_video:
             bg_video.close()
@@ -184,74 +168,73 @@ class AudioVisualizerBase:
     # ----------------------------
     # Helpers: Audio/FFT
     # ----------------------------
-    def _prepare_fft_data(self, audio_path, fps, n_segments,
-                          duration_intro=0, fadein=3, fadeout=3, delay_outro=0, smoothness_factor=0.0):
+    def _decode_audio(self, audio_path, duration_intro=0):
+        """Decode to mono float32 in [-1, 1] in memory"""
         audio = AudioSegment.from_file(audio_path)
         if duration_intro > 0:
             audio = audio[duration_intro * 1000:]
+        pcm = np.frombuffer(audio.raw_data, dtype=SAMPLE_DTYPES[audio.sample_width]).reshape(-1, audio.channels)
+        # Channel mix and int-to-float scaling as one matrix-vector product
+        scale = 1.0 / (audio.channels * float(1 << (8 * audio.sample_width - 1)))
+        return pcm.astype(np.float32) @ np.full(audio.channels, scale, dtype=np.float32), audio.frame_rate
+
+    @staticmethod
+    def _band_matrix(n_bins, n_bands):
+        """(n_bins, n_bands) assignment of FFT bins to bars: bar k shows bin k"""
+        n_bands = min(n_bands, n_bins)
+        matrix = np.zeros((n_bins, n_bands), dtype=np.float32)
+        matrix[np.arange(n_bands), np.arange(n_bands)] = 1.0
+        return matrix
+
+    @staticmethod
+    def _frame_magnitudes(frames, bins, window=None):
+        """|rfft| of every (windowed) frame at the given bins, shape (n_frames, len(bins))"""
+        n = frames.shape[1]
+        if len(bins) * 8 < n:
+            # Few low bins (the bar layouts): a partial DFT basis with the window folded in beats a full rfft
+            angle = (2 * np.pi / n) * np.outer(np.arange(n), bins)
+            basis = np.concatenate([np.cos(angle), -np.sin(angle)], axis=1)
+            if window is not None:
+                basis *= window[:, None]
+            parts = frames @ basis.astype(np.float32)
+            return np.hypot(parts[:, :len(bins)], parts[:, len(bins):])
+        if window is not None:
+            frames = frames * window
+        return np.abs(np.fft.rfft(frames, axis=1)[:, bins]).astype(np.float32)
 
-        # Export to temp WAV for librosa
-        if not self.temp_dir:
-            self.temp_dir = os.path.join(os.path.dirname(audio_path), "temp_fft")
-        os.makedirs(self.temp_dir, exist_ok=True)
-        temp_wav = os.path.join(self.temp_dir, "audio_temp.wav")
-        audio.export(temp_wav, format="wav")
-
-        y, sr = librosa.load(temp_wav, sr=None)
+    def _prepare_fft_data(self, audio_path, fps, n_segments,
+                          duration_intro=0, fadein=3, fadeout=3, delay_outro=0, smoothness_factor=0.0):
+        y, sr = self._decode_audio(audio_path, duration_intro)
         duration = len(y) / sr
         total_frames = int(duration * fps)
         samples_per_frame = int(sr / fps)
 
-        # FFT processing with configurable smoothness
-        y_tensor = torch.tensor(y, device="cpu")
-
         # Apply window function based on smoothness level
         if smoothness_factor > 0.3:  # Only apply window for higher smoothness values
-            window = torch.hann_window(samples_per_frame)
+            window = np.hanning(samples_per_frame + 1)[:-1].astype(np.float32)  # periodic Hann
         else:
-            window = torch.ones(samples_per_frame)  # No window for maximum responsiveness
+            window = None  # No window for maximum responsiveness
 
-        # Process each frame individually
-        fft_magnitude_list = []
-        for i in range(total_frames):
-            start_idx = i * samples_per_frame
-            end_idx = start_idx + samples_per_frame
+        # One strided view over all frames (hop == frame length), zero-padded at the end
+        needed = total_frames * samples_per_frame
+        padded = np.pad(y, (0, max(0, needed - len(y))))
+        frames = sliding_window_view(padded[:needed], samples_per_frame)[::samples_per_frame]
 
-            if start_idx >= len(y_tensor):
-                # Pad with zeros if beyond audio length
-                frame_data = torch.zeros(samples_per_frame)
-            else:
-                frame_data = y_tensor[start_idx:end_idx]
-                if len(frame_data) < samples_per_frame:
-                    # Pad with zeros if frame is too short
-                    pad_length = samples_per_frame - len(frame_data)
-                    frame_data = torch.cat([frame_data, torch.zeros(pad_length)])
-
-            # Apply window function
-            frame_data = frame_data * window
-
-            # Direct FFT on this frame
-            fft_frame = torch.fft.rfft(frame_data)
-            fft_mag = torch.abs(fft_frame[:n_segments // 2])
-
-            fft_magnitude_list.append(fft_mag)
+        # Band aggregation as a single matrix multiply over the bins the bars use
+        band_matrix = self._band_matrix(samples_per_frame // 2 + 1, n_segments // 2)
+        bins = np.flatnonzero(band_matrix.any(axis=1))
+        fft_magnitude = self._frame_magnitudes(frames, bins, window) @ band_matrix[bins]
 
-        fft_magnitude = torch.stack(fft_magnitude_list)
-
-        # Apply FFT-level smoothing based on smoothness factor
         if smoothness_factor > 0.5:  # Only apply FFT smoothing for higher smoothness values
             smoothing_alpha = 0.1 + (0.3 * smoothness_factor)  # 0.1 to 0.4 range
             fft_magnitude = self._apply_smoothing_filter(fft_magnitude, alpha=smoothing_alpha)
 
         # Normalize each frequency band independently to its own maximum
         # This allows each bar to reach full height based on its own peak
-        for freq_idx in range(fft_magnitude.shape[1]):
-            freq_band = fft_magnitude[:, freq_idx]
-            freq_max = torch.amax(freq_band)
-            if freq_max > 0:
-                fft_magnitude[:, freq_idx] = freq_band / freq_max
+        band_max = fft_magnitude.max(axis=0, initial=0.0)
+        fft_magnitude = np.divide(fft_magnitude, band_max, out=fft_magnitude, where=band_max > 0)
 
-        mirrored = torch.cat([fft_magnitude, torch.flip(fft_magnitude, dims=[1])], dim=1)
+        mirrored = np.concatenate([fft_magnitude, fft_magnitude[:, ::-1]], axis=1)
         if mirrored.shape[1] != n_segments:
             mirrored = mirrored[:, :n_segments]
 
@@ -263,144 +246,45 @@ class AudioVisualizerBase:
         }
         return y, mirrored, duration, total_frames, samples_per_frame
 
-    def _pad_or_slice(self, tensor, start, length):
-        end = start + length
-        if start >= len(tensor):
-            return torch.zeros(length)
-        segment = tensor[start:end]
-        if len(segment) < length:
-            pad = torch.zeros(length - len(segment))
-            segment = torch.cat([segment, pad])
+    def _pad_or_slice(self, array, start, length):
+        segment = np.zeros(length, dtype=np.float32)
+        if start < len(array):
+            chunk = array[start:start + length]
+            segment[:len(chunk)] = chunk
         return segment
 
     def _apply_smoothing_filter(self, fft_magnitude, alpha=0.3):
-        """Apply exponential smoothing to reduce jitter between frames"""
-        smoothed = torch.zeros_like(fft_magnitude)
-        smoothed[0] = fft_magnitude[0]
-
-        for i in range(1, len(fft_magnitude)):
-            smoothed[i] = alpha * fft_magnitude[i] + (1 - alpha) * smoothed[i-1]
-
-        return smoothed
-
-    def _apply_frame_smoothing(self, values, smoothness_factor, smoothing_buffer, previous_values, velocity_buffer, moving_average_buffer, frame_idx):
-        """Apply frame-level smoothing based on smoothness level (0-100%)"""
-        if smoothing_buffer is None or previous_values is None:
-            return values
-
-        # Calculate velocity (change from previous frame)
-        velocity = values - previous_values
-
-        # Anti-flickering: limit maximum velocity change based on smoothness
-        if smoothness_factor < 0.3:
-            max_velocity = 0.3  # More controlled for low smoothness
-        else:
-            max_velocity = 0.1 + (0.2 * smoothness_factor)  # 0.1 to 0.3 range
-        velocity = np.clip(velocity, -max_velocity, max_velocity)
-
-        # Update velocity buffer with smoothing
-        if velocity_buffer is not None:
-            velocity_buffer = 0.5 * velocity_buffer + 0.5 * velocity  # More responsive
-        else:
-            velocity_buffer = velocity
-
-        # Apply velocity-limited smoothing
-        smoothed_values = previous_values + velocity_buffer
-
-        # For high smoothness (60-100), use moving average
-        if smoothness_factor >= 0.6 and moving_average_buffer is not None and len(moving_average_buffer) > 1:
-            # Calculate moving average of last few frames
-            moving_avg = np.mean(moving_average_buffer, axis=0)
-            # Blend between smoothed values and moving average
-            blend_factor = (smoothness_factor - 0.6) / 0.4  # 0 to 1 for smoothness 60-100
-            smoothed_values = (1 - blend_factor) * smoothed_values + blend_factor * moving_avg
-
-        # Final smoothing with exponential moving average
-        if smoothness_factor < 0.3:
-            smoothing_alpha = 0.5  # More controlled for low smoothness
-        else:
-            smoothing_alpha = 0.2 + (0.3 * smoothness_factor)  # 0.2 to 0.5 range
-        final_values = (1 - smoothing_alpha) * smoothing_buffer + smoothing_alpha * smoothed_values
-
-        return final_values
+        """Apply exponential smoothing to reduce jitter between frames (all bands at once, seeded with frame 0)"""
+        if len(fft_magnitude) == 0:
+            return fft_magnitude
+        zi = (1 - alpha) * fft_magnitude[:1]
+        smoothed, _ = lfilter([alpha], [1.0, -(1 - alpha)], fft_magnitude, axis=0, zi=zi)
+        return smoothed.astype(np.float32)
 
     # ----------------------------
     # Helpers: Background
     # ----------------------------
-    def _load_background(self, video_path, duration, width, height):
+    def _load_background(self, video_path, width, height, fps, start_frame=0):
+        """Sequential decoder for the background video or image, scaled and resampled to the output in ffmpeg"""
         if not video_path:
             return None
         try:
-            clip = VideoFileClip(video_path).subclip(0, duration).resize((width, height))
-            return clip
+            return BackgroundSource(video_path, width, height, fps, start_frame=start_frame)
         except Exception as e:
             self.logger.log(f"⚠️ Failed to load background video: {e}")
             return None
 
-    def _create_background_frame(self, bg_video, t, width, height):
+    def _create_background_frame(self, bg_video, frame_idx, width, height):
         if bg_video:
-            try:
-                frame = bg_video.get_frame(t)[:, :, ::-1].copy()
-                return frame
-            except Exception:
-                pass
+            return bg_video.frame(frame_idx)
         return np.zeros((height, width, 3), dtype=np.uint8)
 
-    # ----------------------------
-    # Helpers: Fade/Opacity
-    # ----------------------------
-    def _calculate_opacity(self, frame_idx):
-        fadein = self.fade_params["fadein_frames"]
-        fadeout = self.fade_params["fadeout_frames"]
-        total = self.fade_params["total_frames"]
-        delay_outro = self.fade_params["delay_outro_frames"]
-
-        start = int(self.time_in * self.visualizer_fps)
-        end = total - fadeout - delay_outro
-
-        if frame_idx < start:
-            return 0.0
-        if frame_idx < start + fadein:
-            return (frame_idx - start) / fadein
-        if frame_idx >= end:
-            return max(0.0, 1 - (frame_idx - end) / fadeout)
-        return 1.0
-
     # ----------------------------
     # Helpers: Writer
     # ----------------------------
-    def _init_writer(self, output_path, fps, width, height):
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        temp_path = output_path + ".temp.mp4"
-        writer = cv2.VideoWriter(
-            temp_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height)
-        )
-        if not writer.isOpened():
-            raise RuntimeError("Failed to open video writer")
-        return writer, temp_path
-
-    def _finalize_output(self, temp_path, output_path):
-        if os.path.exists(output_path):
-            os.remove(output_path)
-        os.rename(temp_path, output_path)
-
-    # ----------------------------
-    # Helpers: Audio mux
-    # ----------------------------
-    def _add_audio(self, video_path, audio_path):
-        temp_out = video_path + ".with_audio.mp4"
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", video_path, "-i", audio_path,
-            "-c:v", "copy", "-c:a", "aac", "-b:a", "320k",
-            "-map", "0:v:0", "-map", "1:a:0",
-            temp_out
-        ]
-        subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        if os.path.exists(temp_out):
-            os.remove(video_path)
-            shutil.move(temp_out, video_path)
-            self.logger.log("🔊 Audio muxed into video")
+    def _init_writer(self, output_path, fps, width, height, audio_path=None):
+        """One ffmpeg pass: raw frames + audio -> H.264/AAC MP4 (no mp4v intermediate, no remux)"""
+        return FrameSink(output_path, width, height, fps, audio_path=audio_path)
 
 
 # ----------------------------
@@ -410,125 +294,11 @@ class LinearBarsVisualizer(AudioVisualizerBase):
     def __init__(self):
         super().__init__("LinearBars")
 
-    def _apply_enhanced_mode(self, values, enhanced_mode, bar_height_min, bar_height_max, total_height):
-        """Apply enhanced mode processing to values based on height increase threshold"""
-        if not enhanced_mode or not enhanced_mode.get("active", False):
-            return values
-
-        # Get enhanced mode parameters with defaults
-        threshold = enhanced_mode.get("threshold", 0.3)
-        factor = enhanced_mode.get("factor", 2.0)
-
-        # Calculate height range
-        min_height = int(total_height * bar_height_min / 100)
-        max_height = int(total_height * bar_height_max / 100)
-        height_range = max_height - min_height
-
-        # Calculate threshold in terms of height increase
-        height_threshold = height_range * threshold
-
-        # Apply threshold and enhancement based on height increase
-        enhanced_values = values.copy()
-        for i in range(len(enhanced_values)):
-            # Calculate current height increase
-            current_height_increase = enhanced_values[i] * height_range
-
-            if current_height_increase >= height_threshold:
-                # Apply enhancement factor with gradual transition to reduce flickering
-                enhanced_value = min(1.0, enhanced_values[i] * factor)
-
-                # Gradual transition instead of sudden jump
-                transition_factor = 0.8  # 80% new value, 20% old value for smoother transition
-                enhanced_values[i] = transition_factor * enhanced_value + (1 - transition_factor) * enhanced_values[i]
-            else:
-                # Keep values below threshold as they are (stand in place)
-                enhanced_values[i] = enhanced_values[i]
-
-        return enhanced_values
-
     def draw_frame(self, frame, values, frame_idx, fps, vis_width, vis_height, vis_x, vis_y, bar_thickness, mirror_right=False, bar_height_min=10, bar_height_max=35, total_height=1080, total_width=1920, x_position=50, y_position=50, color=(255, 50, 100), dot_size=None, dot_filled=True, transparency=True, top_active=True, bottom_active=True, fill_alpha=0.5, border_alpha=1.0, smooth_arcs=False, enhanced_mode=None):
-        # Apply enhanced mode processing to values
-        values = self._apply_enhanced_mode(values, enhanced_mode, bar_height_min, bar_height_max, total_height)
-
-        n_segments = len(values)
-        # Use full video width for bar positioning, not just visualizer width
-        margin = max(10, total_width // 20)  # Dynamic margin based on total video width
-        usable_w = total_width - 2 * margin
-
-        # Calculate center position based on y_position parameter
-        center_y = int(total_height * y_position / 100)
-
-        # Calculate bar height limits as percentages of total video height
-        min_bar_h = int(total_height * bar_height_min / 100)
-        max_bar_h = int(total_height * bar_height_max / 100)
-
-        # Ensure bars can extend beyond visualizer boundaries
-        # The visualizer band is just a reference area, bars can go outside it
-
-        # Calculate the number of bars to draw on each side
-        if mirror_right:
-            bars_per_side = n_segments // 2
-            # Use first half of values for left side
-            left_values = values[:bars_per_side]
-            # Mirror the left side values for right side
-            right_values = values[:bars_per_side]
-        else:
-            bars_per_side = n_segments
-            left_values = values
-            right_values = []
-
-        # Draw left side bars
-        if len(left_values) > 0:
-            # Calculate left side width (half of usable width when mirroring)
-            left_width = usable_w // 2 if mirror_right else usable_w
-            # Calculate starting x position based on x_position parameter
-            start_x = int(total_width * x_position / 100) - left_width // 2
-            for j in range(len(left_values)):
-                amp = left_values[j]
-                x = start_x + int((j / (len(left_values) - 1)) * left_width) if len(left_values) > 1 else start_x + left_width // 2
-                # Calculate bar height using min/max limits
-                bar_h = int(min_bar_h + amp * (max_bar_h - min_bar_h))
-                top = int(center_y - bar_h/2)
-                bottom = int(center_y + bar_h/2)
-
-                # Draw bar with gradient effect for smoother appearance
-                if transparency:
-                    color_intensity = int(255 * amp)
-                else:
-                    color_intensity = 255  # Full opacity
-                bar_color = (min(255, int(color[0] * (color_intensity + 50) / 255)),
-                           min(255, int(color[1] * (color_intensity + 50) / 255)),
-                           min(255, int(color[2] * (color_intensity + 50) / 255)))
-                cv2.line(frame, (x, top), (x, bottom), bar_color, bar_thickness)
-
-        # Draw right side bars (mirrored)
-        if mirror_right and len(right_values) > 0:
-            # Calculate right side width (half of usable width)
-            right_width = usable_w // 2
-            # Calculate starting x position for right side based on x_position parameter
-            right_start_x = int(total_width * x_position / 100) + right_width // 2
-            for j in range(len(right_values)):
-                # Mirror the bar order - reverse the index
-                mirror_j = len(right_values) - 1 - j
-                amp = right_values[mirror_j]
-                # Position bars in the right half, mirrored from left
-                x = right_start_x + int((j / (len(right_values) - 1)) * right_width) if len(right_values) > 1 else right_start_x + right_width // 2
-                # Calculate bar height using min/max limits
-                bar_h = int(min_bar_h + amp * (max_bar_h - min_bar_h))
-                top = int(center_y - bar_h/2)
-                bottom = int(center_y + bar_h/2)
-
-                # Draw bar with gradient effect for smoother appearance
-                if transparency:
-                    color_intensity = int(255 * amp)
-                else:
-                    color_intensity = 255  # Full opacity
-                bar_color = (min(255, int(color[0] * (color_intensity + 50) / 255)),
-                           min(255, int(color[1] * (color_intensity + 50) / 255)),
-                           min(255, int(color[2] * (color_intensity + 50) / 255)))
-                cv2.line(frame, (x, top), (x, bottom), bar_color, bar_thickness)
-
-        return frame
+        # Bar positions and shapes are built once per layout; each frame is painted with array ops
+        raster = linear_bars(len(values), total_width, total_height, x_position, y_position, mirror_right,
+                             bar_height_min, bar_height_max, bar_thickness)
+        return raster.draw(frame, values, color, transparency)
 
 
 # ----------------------------
@@ -538,161 +308,15 @@ class LinearDotsVisualizer(AudioVisualizerBase):
     def __init__(self):
         super().__init__("LinearDots")
 
-    def _apply_enhanced_mode(self, values, enhanced_mode, bar_height_min, bar_height_max, total_height):
-        """Apply enhanced mode processing to values based on height increase threshold"""
-        if not enhanced_mode or not enhanced_mode.get("active", False):
-            return values
-
-        # Get enhanced mode parameters with defaults
-        threshold = enhanced_mode.get("threshold", 0.3)
-        factor = enhanced_mode.get("factor", 2.0)
-
-        # Calculate height range
-        min_height = int(total_height * bar_height_min / 100)
-        max_height = int(total_height * bar_height_max / 100)
-        height_range = max_height - min_height
-
-        # Calculate threshold in terms of height increase
-        height_threshold = height_range * threshold
-
-        # Apply threshold and enhancement based on height increase
-        enhanced_values = values.copy()
-        for i in range(len(enhanced_values)):
-            # Calculate current height increase
-            current_height_increase = enhanced_values[i] * height_range
-
-            if current_height_increase >= height_threshold:
-                # Apply enhancement factor with gradual transition to reduce flickering
-                enhanced_value = min(1.0, enhanced_values[i] * factor)
-
-                # Gradual transition instead of sudden jump
-                transition_factor = 0.8  # 80% new value, 20% old value for smoother transition
-                enhanced_values[i] = transition_factor * enhanced_value + (1 - transition_factor) * enhanced_values[i]
-            else:
-                # Keep values below threshold as they are (stand in place)
-                enhanced_values[i] = enhanced_values[i]
-
-        return enhanced_values
-
-    def _draw_high_quality_dot(self, frame, x, y, radius, color, filled):
-        """Draw a high-quality dot with anti-aliasing"""
-        if filled:
-            # For filled dots, use multiple circles with decreasing opacity for smooth edges
-            for i in range(radius + 1):
-                alpha = 1.0 - (i / (radius + 1)) * 0.3  # Gradual fade for smooth edges
-                blended_color = tuple(int(c * alpha) for c in color)
-                cv2.circle(frame, (x, y), radius - i, blended_color, -1)
-        else:
-            # For outline dots, draw multiple concentric circles for smooth edges
-            thickness = max(2, radius // 3)
-            for i in range(thickness):
-                alpha = 1.0 - (i / thickness) * 0.2  # Slight fade for smooth edges
-                blended_color = tuple(int(c * alpha) for c in color)
-                cv2.circle(frame, (x, y), radius - i, blended_color, 1)
-
     def draw_frame(self, frame, values, frame_idx, fps, vis_width, vis_height, vis_x, vis_y, bar_thickness, mirror_right=False, bar_height_min=10, bar_height_max=35, total_height=1080, total_width=1920, x_position=50, y_position=50, color=(255, 50, 100), dot_size=None, dot_filled=True, transparency=True, top_active=True, bottom_active=True, fill_alpha=0.5, border_alpha=1.0, smooth_arcs=False, enhanced_mode=None):
-        # Apply enhanced mode processing to values
-        values = self._apply_enhanced_mode(values, enhanced_mode, bar_height_min, bar_height_max, total_height)
-
-        n_segments = len(values)
-        # Use full video width for dot positioning, not just visualizer width
-        margin = max(10, total_width // 20)  # Dynamic margin based on total video width
-        usable_w = total_width - 2 * margin
-
-        # Calculate center position based on y_position parameter
-        center_y = int(total_height * y_position / 100)
-
-        # Calculate dot height limits as percentages of total video height
-        min_dot_h = int(total_height * bar_height_min / 100)
-        max_dot_h = int(total_height * bar_height_max / 100)
-
         # Set dot size with default
         if dot_size is None:
             dot_size = max(1, bar_thickness)
 
-        # Calculate the number of dots to draw on each side
-        if mirror_right:
-            dots_per_side = n_segments // 2
-            # Use first half of values for left side
-            left_values = values[:dots_per_side]
-            # Mirror the left side values for right side
-            right_values = values[:dots_per_side]
-        else:
-            dots_per_side = n_segments
-            left_values = values
-            right_values = []
-
-        # Draw left side dots
-        if len(left_values) > 0:
-            # Calculate left side width (half of usable width when mirroring)
-            left_width = usable_w // 2 if mirror_right else usable_w
-            # Calculate starting x position based on x_position parameter
-            if mirror_right:
-                # When mirroring, center the left side to the left of center
-                center_x = int(total_width * x_position / 100)
-                start_x = center_x - left_width
-            else:
-                # When not mirroring, center the full width
-                start_x = int(total_width * x_position / 100) - left_width // 2
-            for j in range(len(left_values)):
-                amp = left_values[j]
-                x = start_x + int((j / (len(left_values) - 1)) * left_width) if len(left_values) > 1 else start_x + left_width // 2
-                # Calculate dot height using min/max limits
-                dot_h = int(min_dot_h + amp * (max_dot_h - min_dot_h))
-                top_y = int(center_y - dot_h/2)
-                bottom_y = int(center_y + dot_h/2)
-
-                # Draw dots with gradient effect for smoother appearance
-                if transparency:
-                    color_intensity = int(255 * amp)
-                else:
-                    color_intensity = 255  # Full opacity
-                dot_color = (min(255, int(color[0] * (color_intensity + 50) / 255)),
-                           min(255, int(color[1] * (color_intensity + 50) / 255)),
-                           min(255, int(color[2] * (color_intensity + 50) / 255)))
-
-                # Draw top dot with high quality (if active)
-                if top_active:
-                    self._draw_high_quality_dot(frame, x, top_y, dot_size, dot_color, dot_filled)
-                # Draw bottom dot with high quality (if active)
-                if bottom_active:
-                    self._draw_high_quality_dot(frame, x, bottom_y, dot_size, dot_color, dot_filled)
-
-        # Draw right side dots (mirrored)
-        if mirror_right and len(right_values) > 0:
-            # Calculate right side width (half of usable width)
-            right_width = usable_w // 2
-            # Calculate starting x position for right side based on x_position parameter
-            center_x = int(total_width * x_position / 100)
-            right_start_x = center_x
-            for j in range(len(right_values)):
-                # Mirror the dot order - reverse the index
-                mirror_j = len(right_values) - 1 - j
-                amp = right_values[mirror_j]
-                # Position dots in the right half, mirrored from left
-                x = right_start_x + int((j / (len(right_values) - 1)) * right_width) if len(right_values) > 1 else right_start_x + right_width // 2
-                # Calculate dot height using min/max limits
-                dot_h = int(min_dot_h + amp * (max_dot_h - min_dot_h))
-                top_y = int(center_y - dot_h/2)
-                bottom_y = int(center_y + dot_h/2)
-
-                # Draw dots with gradient effect for smoother appearance
-                if transparency:
-                    color_intensity = int(255 * amp)
-                else:
-                    color_intensity = 255  # Full opacity
-                dot_color = (min(255, int(color[0] * (color_intensity + 50) / 255)),
-                           min(255, int(color[1] * (color_intensity + 50) / 255)),
-                           min(255, int(color[2] * (color_intensity + 50) / 255)))
-
-                # Draw top dot with high quality (if active)
-                if top_active:
-                    self._draw_high_quality_dot(frame, x, top_y, dot_size, dot_color, dot_filled)
-                # Draw bottom dot with high quality (if active)
-                if bottom_active:
-                    self._draw_high_quality_dot(frame, x, bottom_y, dot_size, dot_color, dot_filled)
-
-        return frame
+        # Dots are pre-rendered stamps (the same concentric rings as before) blitted at every dot center
+        raster = linear_dots(len(values), total_width, total_height, x_position, y_position, mirror_right,
+                             bar_height_min, bar_height_max, dot_size, dot_filled, top_active, bottom_active)
+        return raster.draw(frame, values, color, transparency)
 
 
 # ----------------------------
@@ -773,46 +397,7 @@ class WaveformVisualizer(AudioVisualizerBase):
 
         return list(zip(x_smooth, y_smooth))
 
-    def _apply_enhanced_mode(self, values, enhanced_mode, bar_height_min, bar_height_max, total_height):
-        """Apply enhanced mode processing to values based on height increase threshold"""
-        if not enhanced_mode or not enhanced_mode.get("active", False):
-            return values
-
-        # Get enhanced mode parameters with defaults
-        threshold = enhanced_mode.get("threshold", 0.3)
-        factor = enhanced_mode.get("factor", 2.0)
-
-        # Calculate height range
-        min_height = int(total_height * bar_height_min / 100)
-        max_height = int(total_height * bar_height_max / 100)
-        height_range = max_height - min_height
-
-        # Calculate threshold in terms of height increase
-        height_threshold = height_range * threshold
-
-        # Apply threshold and enhancement based on height increase
-        enhanced_values = values.copy()
-        for i in range(len(enhanced_values)):
-            # Calculate current height increase
-            current_height_increase = enhanced_values[i] * height_range
-
-            if current_height_increase >= height_threshold:
-                # Apply enhancement factor with gradual transition to reduce flickering
-                enhanced_value = min(1.0, enhanced_values[i] * factor)
-
-                # Gradual transition instead of sudden jump
-                transition_factor = 0.8  # 80% new value, 20% old value for smoother transition
-                enhanced_values[i] = transition_factor * enhanced_value + (1 - transition_factor) * enhanced_values[i]
-            else:
-                # Keep values below threshold as they are (stand in place)
-                enhanced_values[i] = enhanced_values[i]
-
-        return enhanced_values
-
     def draw_frame(self, frame, values, frame_idx, fps, vis_width, vis_height, vis_x, vis_y, bar_thickness, mirror_right=False, bar_height_min=10, bar_height_max=35, total_height=1080, total_width=1920, x_position=50, y_position=50, color=(255, 50, 100), dot_size=None, dot_filled=True, transparency=True, top_active=True, bottom_active=True, fill_alpha=0.5, border_alpha=1.0, smooth_arcs=False, enhanced_mode=None):
-        # Apply enhanced mode processing to values
-        values = self._apply_enhanced_mode(values, enhanced_mode, bar_height_min, bar_height_max, total_height)
-
         n_segments = len(values)
         # Use full video width for waveform positioning
         margin = max(10, total_width // 20)
@@ -1161,36 +746,37 @@ class WaveformVisualizer(AudioVisualizerBase):
 # ----------------------------
 # Usage
 # ----------------------------
-# Linear Bars Visualizer
-vis_bars = LinearBarsVisualizer()
-output_dir = os.path.dirname(__file__)
-vis_bars.render(os.path.join(output_dir, "song.wav"), os.path.join(output_dir, "out_bars.mp4"),
-          width=1280, height=720, draw_frame_fn=vis_bars.draw_frame,
-          height_percent=10, width_percent=90,
-          bar_thickness=3, bar_count=60, mirror_right=True,
-          bar_height_min=10, bar_height_max=35, smoothness=0,
-          x_position=50, y_position=50, color=(255, 50, 100),
-          transparency=True, enhanced_mode={"active": True, "threshold": 0.3, "factor": 2.0})
-
-# Linear Dots Visualizer
-vis_dots = LinearDotsVisualizer()
-vis_dots.render(os.path.join(output_dir, "song.wav"), os.path.join(output_dir, "out_dots.mp4"),
-          width=1280, height=720, draw_frame_fn=vis_dots.draw_frame,
-          height_percent=10, width_percent=90,
-          bar_thickness=3, bar_count=60, mirror_right=True,
-          bar_height_min=10, bar_height_max=35, smoothness=10,
-          x_position=50, y_position=50, color=(255, 50, 100),
-          dot_size=3, dot_filled=True, transparency=False,
-          top_active=False, bottom_active=True, enhanced_mode={"active": True, "threshold": 0.3, "factor": 2.0})
-
-# Waveform Visualizer
-vis_waveform = WaveformVisualizer()
-vis_waveform.render(os.path.join(output_dir, "song.wav"), os.path.join(output_dir, "out_waveform.mp4"),
-          width=1280, height=720, draw_frame_fn=vis_waveform.draw_frame,
-          height_percent=15, width_percent=90,
-          bar_thickness=2, bar_count=120, mirror_right=True,
-          bar_height_min=0, bar_height_max=40, smoothness=20,
-          x_position=50, y_position=50, color=(100, 200, 255),
-          fill_alpha=0.5, border_alpha=1.0, transparency=True,
-          top_active=True, bottom_active=True, smooth_arcs=True,
-          enhanced_mode={"active": True, "threshold": 0.3, "factor": 2.0})
\ No newline at end of file
+if __name__ == "__main__":
+    # Linear Bars Visualizer
+    vis_bars = LinearBarsVisualizer()
+    output_dir = os.path.dirname(__file__)
+    vis_bars.render(os.path.join(output_dir, "song.wav"), os.path.join(output_dir, "out_bars.mp4"),
+              width=1280, height=720, draw_frame_fn=vis_bars.draw_frame,
+              height_percent=10, width_percent=90,
+              bar_thickness=3, bar_count=60, mirror_right=True,
+              bar_height_min=10, bar_height_max=35, smoothness=0,
+              x_position=50, y_position=50, color=(255, 50, 100),
+              transparency=True, enhanced_mode={"active": True, "threshold": 0.3, "factor": 2.0})
+
+    # Linear Dots Visualizer
+    vis_dots = LinearDotsVisualizer()
+    vis_dots.render(os.path.join(output_dir, "song.wav"), os.path.join(output_dir, "out_dots.mp4"),
+              width=1280, height=720, draw_frame_fn=vis_dots.draw_frame,
+              height_percent=10, width_percent=90,
+              bar_thickness=3, bar_count=60, mirror_right=True,
+              bar_height_min=10, bar_height_max=35, smoothness=10,
+              x_position=50, y_position=50, color=(255, 50, 100),
+              dot_size=3, dot_filled=True, transparency=False,
+              top_active=False, bottom_active=True, enhanced_mode={"active": True, "threshold": 0.3, "factor": 2.0})
+
+    # Waveform Visualizer
+    vis_waveform = WaveformVisualizer()
+    vis_waveform.render(os.path.join(output_dir, "song.wav"), os.path.join(output_dir, "out_waveform.mp4"),
+              width=1280, height=720, draw_frame_fn=vis_waveform.draw_frame,
+              height_percent=15, width_percent=90,
+              bar_thickness=2, bar_count=120, mirror_right=True,
+              bar_height_min=0, bar_height_max=40, smoothness=20,
+              x_position=50, y_position=50, color=(100, 200, 255),
+              fill_alpha=0.5, border_alpha=1.0, transparency=True,
+              top_active=True, bottom_active=True, smooth_arcs=True,
+              enhanced_mode={"active": True, "threshold": 0.3, "factor": 2.0})
\ No newline at end of file